@@ -90,6 +90,17 @@ class FactCheckConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             logger.error(f"Error sending fact-check update: {str(e)}")
     
+    async def token_delta(self, event):
+        """Handle streamed partial response text from group"""
+        try:
+            await self.send(text_data=json.dumps({
+                'type': 'token_delta',
+                'data': event['data']
+            }))
+            
+        except Exception as e:
+            logger.error(f"Error sending token delta: {str(e)}")
+    
     async def send_initial_status(self):
         """Send initial status when client connects"""
         try:
@@ -8,13 +8,13 @@ class FactCheckSessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = FactCheckSession
         fields = [
-            'session_id', 'user_input', 'uploaded_image', 'mode', 'status', 
-            'final_verdict', 'confidence_score', 'analysis_summary',
+            'session_id', 'user_input', 'uploaded_image', 'mode', 'search_options', 'status', 
+            'final_verdict', 'confidence_score', 'analysis_summary', 'reused_from',
             'created_at', 'updated_at', 'completed_at'
         ]
         read_only_fields = [
-            'session_id', 'status', 'final_verdict', 'confidence_score',
-            'analysis_summary', 'created_at', 'updated_at', 'completed_at'
+            'session_id', 'search_options', 'status', 'final_verdict', 'confidence_score',
+            'analysis_summary', 'reused_from', 'created_at', 'updated_at', 'completed_at'
         ]
 
 
@@ -58,8 +58,9 @@ class ChatGPTInteractionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChatGPTInteraction
         fields = [
-            'interaction_type', 'prompt', 'response', 'model_used',
-            'tokens_used', 'cost', 'timestamp'
+            'interaction_type', 'prompt', 'response', 'model_used', 'step_number',
+            'tokens_used', 'input_tokens', 'cached_input_tokens', 'output_tokens',
+            'reasoning_tokens', 'web_search_calls', 'latency_ms', 'queue_wait_ms', 'retries', 'hedged', 'cost', 'timestamp'
         ]
         read_only_fields = ['prompt', 'response']  # Sensitive data
 
@@ -92,12 +93,44 @@ class FactCheckRequestSerializer(serializers.Serializer):
         default='fact_check',
         required=False
     )
+    force_refresh = serializers.BooleanField(
+        default=False,
+        required=False,
+        help_text="Run a fresh analysis even if the same claim was checked recently"
+    )
+    # Web search overrides; flat fields so multipart uploads can set them too
+    search_context_size = serializers.ChoiceField(
+        choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')],
+        required=False,
+        help_text="Search context size for every step, replacing the per-step profiles"
+    )
+    search_country = serializers.RegexField(r'^[A-Za-z]{2}$', required=False, help_text="Two-letter ISO country code")
+    search_region = serializers.CharField(max_length=100, required=False)
+    search_city = serializers.CharField(max_length=100, required=False)
+    search_timezone = serializers.CharField(max_length=64, required=False, help_text="IANA timezone, e.g. Europe/London")
     
     def validate_user_input(self, value):
         """Validate user input"""
         if len(value.strip()) < 2:
             raise serializers.ValidationError("Input must be at least 2 characters long")
         return value.strip()
+    
+    def get_search_options(self):
+        """Collect the validated web search overrides for FactCheckSession.search_options"""
+        data = self.validated_data
+        search_options = {}
+        if data.get('search_context_size'):
+            search_options['search_context_size'] = data['search_context_size']
+        user_location = {
+            field: data[f'search_{field}']
+            for field in ['country', 'region', 'city', 'timezone']
+            if data.get(f'search_{field}')
+        }
+        if 'country' in user_location:
+            user_location['country'] = user_location['country'].upper()
+        if user_location:
+            search_options['user_location'] = user_location
+        return search_options
 
 
 class FactCheckStatusSerializer(serializers.Serializer):
@@ -110,6 +143,7 @@ class FactCheckStatusSerializer(serializers.Serializer):
     total_steps = serializers.IntegerField(help_text="Actual steps created so far")
     expected_steps = serializers.IntegerField(required=False, help_text="Total steps expected for the workflow")
     failed_steps = serializers.IntegerField()
+    skipped_steps = serializers.IntegerField(required=False, help_text="Steps skipped by an early exit; count as done")
     current_step = serializers.DictField(allow_null=True)
     steps = serializers.ListField()
     web_search_mode = serializers.BooleanField(required=False, help_text="Indicates if web search workflow is used")
@@ -132,3 +166,4 @@ class FactCheckResultSerializer(serializers.Serializer):
     recommendations = serializers.ListField(allow_null=True)
     created_at = serializers.DateTimeField()
     completed_at = serializers.DateTimeField(allow_null=True)
+    early_exit = serializers.BooleanField(default=False, help_text="Steps 2 and 3 were skipped after a trusted fact-check was found")
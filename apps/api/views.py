@@ -9,6 +9,9 @@ from django.conf import settings
 from apps.fact_checker.models import FactCheckSession
 from apps.fact_checker.tasks import perform_fact_check_task
 from apps.fact_checker.services.enhanced_analysis_service import EnhancedAnalysisService
+from apps.fact_checker.services.llm_usage import USAGE_FIELDS, rollup_usage
+from apps.fact_checker.services.result_reuse_service import ResultReuseService
+from apps.fact_checker.utils import compute_claim_fingerprint
 from apps.api.serializers import (
     FactCheckRequestSerializer,
     FactCheckSessionSerializer,
@@ -35,16 +38,40 @@ def fact_check_create(request):
                 'details': serializer.errors
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        user_input = serializer.validated_data['user_input']
+        uploaded_image = serializer.validated_data.get('uploaded_image')
+        mode = serializer.validated_data.get('mode', 'fact_check')
+        search_options = serializer.get_search_options()
+        claim_fingerprint = compute_claim_fingerprint(user_input, mode, uploaded_image, search_options)
+        
         # Create fact-check session
         session = FactCheckSession.objects.create(
-            user_input=serializer.validated_data['user_input'],
-            uploaded_image=serializer.validated_data.get('uploaded_image'),
-            mode=serializer.validated_data.get('mode', 'fact_check'),
+            user_input=user_input,
+            uploaded_image=uploaded_image,
+            mode=mode,
+            search_options=search_options,
+            claim_fingerprint=claim_fingerprint,
             user=request.user if request.user.is_authenticated else None
         )
         
         logger.info(f"Created fact-check session {session.session_id}")
         
+        # Answer repeated claims from a recent completed session instead of re-running the pipeline
+        if not serializer.validated_data.get('force_refresh'):
+            reuse_service = ResultReuseService()
+            reusable_session = reuse_service.find_reusable_session(claim_fingerprint)
+            if reusable_session:
+                session = reuse_service.clone_result(reusable_session, session)
+                session_serializer = FactCheckSessionSerializer(session)
+                
+                return Response({
+                    'session_id': str(session.session_id),
+                    'status': session.status,
+                    'message': 'Reused a recent fact-check of the same claim',
+                    'reused_from': str(reusable_session.session_id),
+                    'session_data': session_serializer.data
+                }, status=status.HTTP_201_CREATED)
+        
         # Start asynchronous analysis
         perform_fact_check_task.delay(str(session.session_id))
         
@@ -91,6 +118,8 @@ def fact_check_status(request, session_id):
         total_steps = len(progress_steps)
         completed_steps = len([step for step in progress_steps if step['status'] == 'completed'])
         failed_steps = len([step for step in progress_steps if step['status'] == 'failed'])
+        # Steps skipped by an early exit are done as far as progress is concerned
+        skipped_steps = len([step for step in progress_steps if step['status'] == 'skipped'])
         current_step = next((step for step in progress_steps if step['status'] == 'in_progress'), None)
         
         # For web search mode, expect 4 steps instead of traditional 5-6 steps
@@ -109,7 +138,7 @@ def fact_check_status(request, session_id):
         else:
             expected_steps = 5  # Traditional analysis
             
-        progress_percentage = (completed_steps / expected_steps) * 100 if expected_steps > 0 else 0
+        progress_percentage = ((completed_steps + skipped_steps) / expected_steps) * 100 if expected_steps > 0 else 0
         
         progress_data = {
             'session_id': str(session.session_id),
@@ -119,6 +148,7 @@ def fact_check_status(request, session_id):
             'total_steps': total_steps,
             'expected_steps': expected_steps,
             'failed_steps': failed_steps,
+            'skipped_steps': skipped_steps,
             'multi_step_web_search': multi_step_web_search,
             'use_web_search': use_web_search,
             'current_step': {
@@ -176,7 +206,8 @@ def fact_check_results(request, session_id):
             'created_at': session.created_at,
             'completed_at': session.completed_at,
             'sources': session_serializer.data['sources'],
-            'analysis_steps': session_serializer.data['analysis_steps']
+            'analysis_steps': session_serializer.data['analysis_steps'],
+            'early_exit': session.analysis_steps.filter(status='skipped').exists()
         }
         
         # Extract detailed results from analysis steps
@@ -266,6 +297,11 @@ def fact_check_steps(request, session_id):
             for step in analysis_steps
         )
         
+        # Roll up token usage, latency, retries and cost per session and per step
+        usage = rollup_usage(session.gpt_interactions.values(
+            'step_number', 'prompt_template', 'tokens_used', 'latency_ms', 'queue_wait_ms', 'retries', 'hedged', 'cost', *USAGE_FIELDS
+        ))
+        
         return Response({
             'session_id': str(session.session_id),
             'status': session.status,
@@ -273,7 +309,8 @@ def fact_check_steps(request, session_id):
             'analysis_steps': analysis_steps,
             'search_queries': session_serializer.data['search_queries'],
             'sources_found': len(session_serializer.data['sources']),
-            'gpt_interactions': len(session_serializer.data['gpt_interactions'])
+            'gpt_interactions': len(session_serializer.data['gpt_interactions']),
+            'usage': usage
         }, status=status.HTTP_200_OK)
         
     except FactCheckSession.DoesNotExist:
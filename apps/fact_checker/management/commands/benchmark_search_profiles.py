@@ -0,0 +1,117 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.fact_checker.services import llm_client, llm_usage
+from apps.fact_checker.services.search_profiles import CONTEXT_SIZES, profile_context_size, search_user_location
+
+DEFAULT_CLAIMS = [
+    'The Great Wall of China is visible from space with the naked eye',
+    'Global average temperatures in 2023 were the highest on record',
+    'Drinking eight glasses of water a day is medically required',
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare web search latency and cost across search context sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'claims',
+            nargs='*',
+            type=str,
+            help='Claims to search for (defaults to a small built-in set)'
+        )
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            choices=CONTEXT_SIZES,
+            default=CONTEXT_SIZES,
+            help='Search context sizes to compare'
+        )
+        parser.add_argument('--model', type=str, default='o4-mini', help='Model to search with')
+        parser.add_argument('--runs', type=int, default=1, help='Requests per claim and size')
+        parser.add_argument('--country', type=str, default=None, help='Override the configured search country')
+        parser.add_argument(
+            '--step',
+            type=str,
+            default=None,
+            help='Show the context size the fact_check profile picks for this step_type'
+        )
+
+    def handle(self, *args, **options):
+        from apps.fact_checker.worker_runtime import run_in_worker_loop, stop_worker_runtime
+
+        claims = options['claims'] or DEFAULT_CLAIMS
+        search_options = {'user_location': {'country': options['country'].upper()}} if options['country'] else {}
+        user_location = search_user_location(search_options)
+
+        self.stdout.write(
+            f"Benchmarking {len(claims)} claims x {options['runs']} runs with {options['model']} "
+            f"(location: {user_location or 'none'})"
+        )
+        if options['step']:
+            self.stdout.write(f"Profile for {options['step']}: {profile_context_size('fact_check', options['step'])}")
+
+        # Requests go straight to the API so the LLM response cache never answers them
+        try:
+            results = {
+                size: run_in_worker_loop(self._benchmark(size, claims, options['model'], options['runs'], user_location))
+                for size in options['sizes']
+            }
+        finally:
+            stop_worker_runtime()
+
+        self.stdout.write(f"\n{'size':<8} {'calls':>5} {'errors':>6} {'p50 s':>7} {'mean s':>7} {'in tok':>8} {'out tok':>8} {'cites':>6} {'cost $':>10}")
+        for size, calls in results.items():
+            succeeded = [call for call in calls if not call.get('error')]
+            if not succeeded:
+                self.stdout.write(f"{size:<8} {len(calls):>5} {len(calls):>6}")
+                continue
+            latencies = [call['latency_ms'] / 1000 for call in succeeded]
+            cost = sum((call['cost'] or Decimal('0') for call in succeeded), Decimal('0'))
+            self.stdout.write(
+                f"{size:<8} {len(calls):>5} {len(calls) - len(succeeded):>6} "
+                f"{statistics.median(latencies):>7.1f} {statistics.mean(latencies):>7.1f} "
+                f"{statistics.mean(call['input_tokens'] for call in succeeded):>8.0f} "
+                f"{statistics.mean(call['output_tokens'] for call in succeeded):>8.0f} "
+                f"{statistics.mean(call['citations'] for call in succeeded):>6.1f} "
+                f"{cost:>10.4f}"
+            )
+
+    async def _benchmark(self, size, claims, model, runs, user_location):
+        tool = {"type": "web_search_preview", "search_context_size": size}
+        if user_location:
+            tool["user_location"] = user_location
+
+        calls = []
+        for claim in claims:
+            for _ in range(runs):
+                prompt = f"Search the web for evidence about this claim and summarize what credible sources say: {claim}"
+                started = time.monotonic()
+                call_stats = {}
+                try:
+                    response = await llm_client.create_response(
+                        call_stats=call_stats,
+                        model=model,
+                        tools=[tool],
+                        input=[{"role": "user", "content": [{"type": "input_text", "text": prompt}]}]
+                    )
+                except Exception as e:
+                    self.stdout.write(f"Error ({size}): {str(e)}")
+                    calls.append({'error': str(e)})
+                    continue
+
+                usage = llm_usage.build_call_usage(model, response, int((time.monotonic() - started) * 1000), call_stats)
+                usage['citations'] = sum(
+                    1
+                    for item in (getattr(response, 'output', None) or [])
+                    for block in (getattr(item, 'content', None) or [])
+                    for annotation in (getattr(block, 'annotations', None) or [])
+                    if getattr(annotation, 'type', None) == 'url_citation'
+                )
+                calls.append(usage)
+                self.stdout.write(f"  {size}: {usage['latency_ms'] / 1000:.1f}s, {usage['citations']} citations - {claim[:50]}")
+        return calls
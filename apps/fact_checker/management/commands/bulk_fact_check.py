@@ -0,0 +1,107 @@
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.fact_checker.models import FactCheckSession
+from apps.fact_checker.services.result_reuse_service import ResultReuseService
+from apps.fact_checker.tasks import perform_bulk_fact_check_task
+from apps.fact_checker.utils import compute_claim_fingerprint
+
+
+class Command(BaseCommand):
+    help = 'Verify a file of claims (one per line) through the Batch API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'file',
+            nargs='?',
+            type=str,
+            help='Text file with one claim per line'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['fact_check', 'research'],
+            default='fact_check',
+            help='Analysis mode for every claim'
+        )
+        parser.add_argument(
+            '--resume',
+            type=str,
+            default=None,
+            help='Resume the unfinished sessions of an earlier bulk job instead of reading a file'
+        )
+        parser.add_argument(
+            '--force-refresh',
+            action='store_true',
+            help='Analyze every claim even if a recent result could be reused'
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            help='Run asynchronously with Celery'
+        )
+
+    def handle(self, *args, **options):
+        if options['mode'] == 'fact_check' and not getattr(settings, 'USE_WEB_SEARCH', False):
+            raise CommandError('Bulk fact checks use the web search workflow; set USE_WEB_SEARCH=True')
+
+        if options['resume']:
+            bulk_job = options['resume']
+        elif options['file']:
+            bulk_job = self._create_sessions(options['file'], options['mode'], options['force_refresh'])
+        else:
+            raise CommandError('Give a file of claims or --resume <bulk_job>')
+
+        unfinished = FactCheckSession.objects.filter(bulk_job=bulk_job, status__in=['pending', 'analyzing']).count()
+        self.stdout.write(f"Bulk job {bulk_job}: {unfinished} sessions to analyze via the {settings.BATCH_BACKEND} batch backend")
+        if not unfinished:
+            return
+
+        if options['async']:
+            perform_bulk_fact_check_task.delay(bulk_job)
+            self.stdout.write(f"Task queued. Resume it with: python manage.py bulk_fact_check --resume {bulk_job}")
+            return
+
+        from apps.fact_checker.worker_runtime import stop_worker_runtime
+
+        try:
+            result = perform_bulk_fact_check_task(bulk_job)
+        finally:
+            stop_worker_runtime()
+
+        if result.get('error'):
+            raise CommandError(result['error'])
+        self.stdout.write(
+            self.style.SUCCESS(f"Bulk job {bulk_job} finished: {result['sessions'] - result['failed']} completed, {result['failed']} failed")
+        )
+
+    def _create_sessions(self, path, mode, force_refresh):
+        try:
+            with open(path, encoding='utf-8') as claims_file:
+                claims = [line.strip() for line in claims_file if line.strip()]
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {str(e)}")
+        if not claims:
+            raise CommandError(f"No claims in {path}")
+
+        bulk_job = uuid.uuid4().hex
+        reuse_service = ResultReuseService()
+        reused = 0
+        for claim in claims:
+            claim_fingerprint = compute_claim_fingerprint(claim, mode)
+            session = FactCheckSession.objects.create(
+                user_input=claim,
+                mode=mode,
+                claim_fingerprint=claim_fingerprint,
+                bulk_job=bulk_job
+            )
+
+            # Claims answered recently are copied instead of analyzed again
+            reusable_session = None if force_refresh else reuse_service.find_reusable_session(claim_fingerprint)
+            if reusable_session:
+                reuse_service.clone_result(reusable_session, session)
+                reused += 1
+
+        self.stdout.write(f"Created {len(claims)} sessions for bulk job {bulk_job} ({reused} reused recent results)")
+        return bulk_job
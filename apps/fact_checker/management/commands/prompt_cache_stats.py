@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from apps.fact_checker.models import ChatGPTInteraction
+from apps.fact_checker.services.llm_usage import prompt_cache_hit_rate
+
+
+class Command(BaseCommand):
+    help = 'Show the cached input token hit rate of each prompt template'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Look back this many hours')
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options['hours'])
+        rows = (
+            ChatGPTInteraction.objects
+            .filter(timestamp__gte=since, prompt_template__isnull=False)
+            .values('prompt_template')
+            .annotate(calls=Count('id'), input_tokens=Sum('input_tokens'), cached_input_tokens=Sum('cached_input_tokens'))
+            .order_by('prompt_template')
+        )
+
+        self.stdout.write(f"Prompt cache hit rate over the last {options['hours']} hours:")
+        self.stdout.write(f"{'template':<40} {'calls':>6} {'input':>10} {'cached':>10} {'hit rate':>9}")
+        for row in rows:
+            hit_rate = prompt_cache_hit_rate(row['cached_input_tokens'] or 0, row['input_tokens'] or 0)
+            self.stdout.write(
+                f"{row['prompt_template']:<40} {row['calls']:>6} {row['input_tokens'] or 0:>10} "
+                f"{row['cached_input_tokens'] or 0:>10} {'-' if hit_rate is None else f'{hit_rate:.1%}':>9}"
+            )
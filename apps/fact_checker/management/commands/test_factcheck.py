@@ -43,26 +43,24 @@ class Command(BaseCommand):
             # Run synchronously (for testing)
             self.stdout.write("Starting synchronous analysis...")
             try:
-                import asyncio
-                from apps.fact_checker.services.enhanced_analysis_service import EnhancedAnalysisService
+                from apps.fact_checker.worker_runtime import (
+                    get_analysis_service, run_in_worker_loop, stop_worker_runtime
+                )
                 from django.conf import settings
                 
                 use_web_search = getattr(settings, 'USE_WEB_SEARCH', False)
-                analysis_service = EnhancedAnalysisService(use_web_search=use_web_search)
-                
-                # Run async analysis
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+                analysis_service = get_analysis_service(use_web_search=use_web_search)
                 
+                # Run async analysis on the same runtime the Celery worker uses
                 try:
-                    result = loop.run_until_complete(
+                    result = run_in_worker_loop(
                         analysis_service.perform_complete_analysis(session)
                     )
                     
                     self.stdout.write(f"Analysis completed: {result}")
                     
                 finally:
-                    loop.close()
+                    stop_worker_runtime()
                     
             except Exception as e:
                 self.stdout.write(f"Error: {str(e)}")
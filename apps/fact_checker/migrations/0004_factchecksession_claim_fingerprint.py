@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-16 14:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fact_checker", "0003_factchecksession_mode_alter_analysisstep_step_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="factchecksession",
+            name="claim_fingerprint",
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="factchecksession",
+            name="reused_from",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="reuses",
+                to="fact_checker.factchecksession",
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-16 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checker', '0004_factchecksession_claim_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='cached_input_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='input_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='latency_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='output_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='reasoning_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='step_number',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='web_search_calls',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='chatgptinteraction',
+            name='cost',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=12, null=True),
+        ),
+    ]
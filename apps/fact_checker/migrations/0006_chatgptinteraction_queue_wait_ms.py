@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checker', '0005_chatgptinteraction_usage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='queue_wait_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checker', '0006_chatgptinteraction_queue_wait_ms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='hedged',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='retries',
+            field=models.IntegerField(default=0),
+        ),
+    ]
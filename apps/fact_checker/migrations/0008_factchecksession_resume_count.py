@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checker', '0007_chatgptinteraction_retries_hedged'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='factchecksession',
+            name='resume_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checker', '0008_factchecksession_resume_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='analysisstep',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('failed', 'Failed'), ('skipped', 'Skipped')], default='pending', max_length=20),
+        ),
+    ]
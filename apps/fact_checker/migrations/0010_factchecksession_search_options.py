@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checker', '0009_analysisstep_skipped_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='factchecksession',
+            name='search_options',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
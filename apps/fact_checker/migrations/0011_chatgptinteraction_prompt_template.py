@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checker', '0010_factchecksession_search_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='prompt_template',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
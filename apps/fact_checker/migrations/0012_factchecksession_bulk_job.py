@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checker', '0011_chatgptinteraction_prompt_template'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='factchecksession',
+            name='bulk_job',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
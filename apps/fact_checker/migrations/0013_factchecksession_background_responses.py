@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checker', '0012_factchecksession_bulk_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='factchecksession',
+            name='background_responses',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fact_checker', '0013_factchecksession_background_responses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatgptinteraction',
+            name='provider',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+    ]
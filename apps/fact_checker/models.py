@@ -31,10 +31,23 @@ class FactCheckSession(models.Model):
     user_input = models.TextField()
     uploaded_image = models.ImageField(upload_to='fact_check_images/', null=True, blank=True)
     mode = models.CharField(max_length=20, choices=MODE_CHOICES, default='fact_check')
+    # Hash of mode, normalized claim text and image content, used to reuse recent results
+    claim_fingerprint = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    reused_from = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='reuses'
+    )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     final_verdict = models.CharField(max_length=20, choices=VERDICT_CHOICES, null=True, blank=True)
     confidence_score = models.FloatField(null=True, blank=True)
     analysis_summary = models.TextField(null=True, blank=True)
+    # Per-request web search overrides: search_context_size and user_location (see search_profiles)
+    search_options = models.JSONField(default=dict, blank=True)
+    # Times an interrupted analysis was requeued to resume from its completed steps
+    resume_count = models.IntegerField(default=0)
+    # Bulk job the session was submitted with (bulk_fact_check); its calls go through the Batch API
+    bulk_job = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    # Research calls submitted as background responses and not collected yet (see background_responses)
+    background_responses = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     completed_at = models.DateTimeField(null=True, blank=True)
@@ -78,6 +91,7 @@ class AnalysisStep(models.Model):
         ('in_progress', 'In Progress'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
+        ('skipped', 'Skipped'),  # Not needed after an early exit
     ]
     
     session = models.ForeignKey(FactCheckSession, on_delete=models.CASCADE, related_name='analysis_steps')
@@ -161,10 +175,22 @@ class ChatGPTInteraction(models.Model):
     session = models.ForeignKey(FactCheckSession, on_delete=models.CASCADE, related_name='gpt_interactions')
     interaction_type = models.CharField(max_length=30, choices=INTERACTION_TYPES)
     prompt = models.TextField()
+    prompt_template = models.CharField(max_length=100, null=True, blank=True)  # prompt_templates key, e.g. "fact_check.initial_search.v1"
     response = models.TextField()
     model_used = models.CharField(max_length=50, default='gpt-4')
+    provider = models.CharField(max_length=50, null=True, blank=True)  # LLM_PROVIDERS key of the provider that answered
+    step_number = models.IntegerField(null=True, blank=True)
     tokens_used = models.IntegerField(null=True, blank=True)
-    cost = models.DecimalField(max_digits=10, decimal_places=4, null=True, blank=True)
+    input_tokens = models.IntegerField(null=True, blank=True)
+    cached_input_tokens = models.IntegerField(null=True, blank=True)
+    output_tokens = models.IntegerField(null=True, blank=True)
+    reasoning_tokens = models.IntegerField(null=True, blank=True)
+    web_search_calls = models.IntegerField(null=True, blank=True)
+    latency_ms = models.IntegerField(null=True, blank=True)
+    queue_wait_ms = models.IntegerField(null=True, blank=True)  # time spent waiting for the shared rate limit
+    retries = models.IntegerField(default=0)
+    hedged = models.BooleanField(default=False)  # a duplicate request was sent because the first was slow
+    cost = models.DecimalField(max_digits=12, decimal_places=6, null=True, blank=True)  # USD
     timestamp = models.DateTimeField(auto_now_add=True)
     
     class Meta:
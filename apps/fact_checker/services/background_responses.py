@@ -0,0 +1,154 @@
+"""
+Background Responses API calls for long research runs
+
+A research session spends minutes waiting on the model, most of it on the
+final report. With RESEARCH_BACKGROUND_RESPONSES on, each research call is
+submitted with background=True and the analysis stops right there: the step
+raises StepDeferred, the pipeline returns, and the Celery task ends without
+holding a worker slot or an analysis slot while the model works.
+
+poll_background_responses_task then checks the pending responses every
+BACKGROUND_POLL_INTERVAL seconds. Once they have finished it runs the session
+again. Completed steps are restored from their checkpoints, the waiting step
+collects its finished response instead of submitting a new one, and the next
+step is submitted in background mode in turn. Each session therefore moves
+step by step through short task runs.
+
+Pending responses are recorded in FactCheckSession.background_responses under
+a slot (the step's prompt template key) with a fingerprint of the prompt, so a
+rerun only collects a response submitted for the same prompt. A response still
+running after BACKGROUND_RESPONSE_MAX_WAIT seconds is cancelled and its step
+fails.
+"""
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from apps.fact_checker.models import FactCheckSession
+from apps.fact_checker.services import llm_client
+from apps.fact_checker.services.llm_providers import get_provider
+from apps.fact_checker.services.pipeline import StepDeferred
+from apps.fact_checker.services.rate_limiter import PRIORITY_NORMAL
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = {'queued', 'in_progress'}
+
+
+def prompt_fingerprint(request: Dict[str, Any]) -> str:
+    """
+    Hash the prompt and output format of a request
+
+    Model and search settings are left out: they are re-routed on every run and
+    may differ from the submission without making its response stale.
+    """
+    payload = json.dumps({'input': request.get('input'), 'text': request.get('text')}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_expired(entry: Dict[str, Any]) -> bool:
+    return time.time() - entry.get('submitted_at', 0) > getattr(settings, 'BACKGROUND_RESPONSE_MAX_WAIT', 3600)
+
+
+class BackgroundResponses:
+    """
+    Submits one session's calls as background responses and collects them on later runs
+
+    Args:
+        session: The session whose background_responses field records pending calls
+    """
+
+    def __init__(self, session: FactCheckSession):
+        self.session = session
+
+    async def create_response(self, slot: str, priority: int = PRIORITY_NORMAL, call_stats: Optional[Dict[str, Any]] = None, **request) -> Any:
+        """
+        Return the finished response for this slot's request, submitting it if needed
+
+        Raises:
+            StepDeferred: The response is still queued or running
+        """
+        fingerprint = prompt_fingerprint(request)
+        entry = self.session.background_responses.get(slot)
+        call_stats = call_stats if call_stats is not None else {}
+
+        if entry and entry.get('prompt') == fingerprint:
+            try:
+                response = await llm_client.retrieve_response(entry['id'], entry.get('provider'))
+            except Exception as e:
+                # A failed status check is retried by the next poll rather than failing the step
+                logger.warning(f"Error retrieving background response {entry['id']}: {str(e)}")
+                raise StepDeferred(f"Could not check background response {entry['id']}")
+        else:
+            response = await llm_client.submit_background_response(priority=priority, call_stats=call_stats, **request)
+            entry = {
+                'id': response.id,
+                'model': call_stats.get('model', request['model']),
+                'provider': call_stats.get('provider'),
+                'prompt': fingerprint,
+                'submitted_at': time.time(),
+            }
+            await self._save(slot, entry)
+            logger.info(f"Submitted background response {response.id} for {slot} of session {self.session.session_id}")
+
+        if response.status in PENDING_STATUSES:
+            if not is_expired(entry):
+                raise StepDeferred(f"Background response {entry['id']} for {slot} is {response.status}")
+            await self._cancel(entry)
+            await self._save(slot, None)
+            raise RuntimeError(f"Background response {entry['id']} for {slot} did not finish in time")
+
+        await self._save(slot, None)
+        if response.status in ('failed', 'cancelled'):
+            error = getattr(getattr(response, 'error', None), 'message', None) or response.status
+            raise RuntimeError(f"Background response {entry['id']} for {slot} {response.status}: {error}")
+
+        call_stats['model'] = entry['model']
+        if entry.get('provider'):
+            call_stats['provider'] = entry['provider']
+            call_stats['metered'] = get_provider(entry['provider']).metered
+        if getattr(response, 'completed_at', None) and getattr(response, 'created_at', None):
+            call_stats['latency_ms'] = int((response.completed_at - response.created_at) * 1000)
+        logger.info(f"Collected background response {entry['id']} for {slot} of session {self.session.session_id}")
+        return response
+
+    async def _cancel(self, entry: Dict[str, Any]) -> None:
+        try:
+            await llm_client.cancel_response(entry['id'], entry.get('provider'))
+        except Exception as e:
+            logger.warning(f"Error cancelling background response {entry['id']}: {str(e)}")
+
+    async def _save(self, slot: str, entry: Optional[Dict[str, Any]]) -> None:
+        # Keep the in-memory session current too; later saves of it write the whole field
+        pending = dict(self.session.background_responses)
+        if entry is None:
+            pending.pop(slot, None)
+        else:
+            pending[slot] = entry
+        self.session.background_responses = pending
+        await sync_to_async(FactCheckSession.objects.filter(pk=self.session.pk).update)(
+            background_responses=pending, updated_at=timezone.now()
+        )
+
+
+async def responses_ready(pending: Dict[str, Dict[str, Any]]) -> bool:
+    """
+    Whether the session can be run again: every pending response has finished or expired
+    """
+    for slot, entry in pending.items():
+        if is_expired(entry):
+            continue
+        try:
+            response = await llm_client.retrieve_response(entry['id'], entry.get('provider'))
+        except Exception as e:
+            logger.warning(f"Error checking background response {entry['id']} for {slot}: {str(e)}")
+            return False
+        if response.status in PENDING_STATUSES:
+            return False
+    return True
@@ -0,0 +1,253 @@
+"""
+OpenAI Batch API transport for bulk analyses
+
+Bulk sessions (manage.py bulk_fact_check) run the same analysis pipelines as
+interactive ones, but their Responses API calls are not sent one by one.
+Every call made on the event loop joins a pending batch. The batch is written
+as a JSONL file and submitted to the Batch API once BATCH_MAX_REQUESTS calls
+have gathered or BATCH_FLUSH_INTERVAL seconds have passed. It is polled every
+BATCH_POLL_INTERVAL seconds, and each call returns as soon as its batch has
+finished. A session's pipeline therefore advances one batch per step: step 1
+of every session goes out together, then steps 2 and 3 of the sessions whose
+step 1 came back, and so on. Results are persisted by the steps as usual.
+
+Batch requests cost half as much and do not count against the interactive
+rate limit, but they can take up to the 24 hour completion window. Streaming,
+hedging and model fallback do not apply.
+
+BATCH_BACKEND selects the endpoint: "openai" for the Batch API, or "local"
+for LocalBatchClient. The local stand-in accepts the same files and batches
+calls and answers each line through a handler, by default the interactive
+Responses API, so bulk mode can run end to end in development and tests.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+import weakref
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from openai.types.responses import Response
+
+logger = logging.getLogger(__name__)
+
+RESPONSES_ENDPOINT = "/v1/responses"
+FINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+
+class BatchRequestError(Exception):
+    """A request failed inside its batch, or its batch did not complete"""
+
+
+class BatchCollector:
+    """
+    Gathers Responses API calls from concurrent pipelines into batch jobs
+
+    Args:
+        client: AsyncOpenAI client or LocalBatchClient providing files and batches
+        max_requests: Submit a batch once this many calls are waiting
+        flush_interval: Submit a non-empty batch after this many seconds
+        poll_interval: Seconds between batch status checks
+    """
+
+    def __init__(self, client: Any, max_requests: int = 1000, flush_interval: float = 30.0, poll_interval: float = 60.0):
+        self.client = client
+        self.max_requests = max_requests
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self._pending: List[Tuple[str, Dict[str, Any], asyncio.Future]] = []
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._batches: set = set()
+
+    async def create_response(self, call_stats: Optional[Dict[str, Any]] = None, **request) -> Any:
+        """
+        Queue a Responses API request and wait for its batch to finish
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((uuid.uuid4().hex, request, future))
+
+        if len(self._pending) >= self.max_requests:
+            self.flush()
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self.flush_interval, self.flush)
+
+        response = await future
+        if call_stats is not None:
+            call_stats['batch'] = True
+        return response
+
+    def flush(self) -> None:
+        """
+        Submit the waiting requests as a batch now
+        """
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._pending:
+            return
+
+        requests, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run_batch(requests))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, requests: List[Tuple[str, Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            batch = await self._submit(requests)
+            batch = await self._wait(batch)
+            results = await self._read_results(batch)
+        except Exception as e:
+            logger.error(f"Batch of {len(requests)} requests failed: {str(e)}")
+            results = {}
+            error = str(e)
+        else:
+            error = f"Batch {batch.id} ended {batch.status} without a result for this request"
+
+        for custom_id, _, future in requests:
+            if future.done():
+                continue
+            line = results.get(custom_id)
+            if line is None:
+                future.set_exception(BatchRequestError(error))
+                continue
+            response = line.get('response') or {}
+            if response.get('status_code') == 200:
+                future.set_result(Response.construct(**response['body']))
+            else:
+                message = (line.get('error') or {}).get('message') or json.dumps(response.get('body'))[:500]
+                future.set_exception(BatchRequestError(f"Batch request failed ({response.get('status_code')}): {message}"))
+
+    async def _submit(self, requests: List[Tuple[str, Dict[str, Any], asyncio.Future]]) -> Any:
+        lines = [
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": RESPONSES_ENDPOINT, "body": request})
+            for custom_id, request, _ in requests
+        ]
+        input_file = await self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode('utf-8'), "application/jsonl"),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=RESPONSES_ENDPOINT,
+            completion_window="24h"
+        )
+        logger.info(f"Submitted batch {batch.id} with {len(requests)} requests")
+        return batch
+
+    async def _wait(self, batch: Any) -> Any:
+        started = time.monotonic()
+        while batch.status not in FINAL_STATUSES:
+            await asyncio.sleep(self.poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
+        logger.info(f"Batch {batch.id} {batch.status} after {time.monotonic() - started:.0f}s")
+        return batch
+
+    async def _read_results(self, batch: Any) -> Dict[str, Dict[str, Any]]:
+        # Expired and cancelled batches still return the requests that finished
+        results = {}
+        for file_id in (getattr(batch, 'output_file_id', None), getattr(batch, 'error_file_id', None)):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for raw_line in content.text.splitlines():
+                if raw_line.strip():
+                    line = json.loads(raw_line)
+                    results[line['custom_id']] = line
+        return results
+
+
+class LocalBatchClient:
+    """
+    In-process stand-in for the files and batches endpoints of the Batch API
+
+    Each line of a submitted batch is answered by handler(body), which returns
+    a Responses API response body; batches complete once every line is done.
+    """
+
+    def __init__(self, handler: Optional[Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = None):
+        self.handler = handler or self._interactive_response
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+        self._files: Dict[str, str] = {}
+        self._batches: Dict[str, SimpleNamespace] = {}
+        self._tasks: set = set()
+
+    @staticmethod
+    async def _interactive_response(body: Dict[str, Any]) -> Dict[str, Any]:
+        from apps.fact_checker.services import llm_client
+
+        response = await llm_client.create_response(**body)
+        return response.model_dump()
+
+    async def _create_file(self, file: Tuple[str, bytes, str], purpose: str) -> SimpleNamespace:
+        file_id = f"file-local-{uuid.uuid4().hex[:12]}"
+        self._files[file_id] = file[1].decode('utf-8')
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    async def _file_content(self, file_id: str) -> SimpleNamespace:
+        return SimpleNamespace(text=self._files[file_id])
+
+    async def _create_batch(self, input_file_id: str, endpoint: str, completion_window: str, **kwargs) -> SimpleNamespace:
+        batch = SimpleNamespace(
+            id=f"batch-local-{uuid.uuid4().hex[:12]}", status='in_progress', endpoint=endpoint,
+            input_file_id=input_file_id, output_file_id=None, error_file_id=None
+        )
+        self._batches[batch.id] = batch
+        task = asyncio.get_running_loop().create_task(self._process(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return SimpleNamespace(**vars(batch))
+
+    async def _retrieve_batch(self, batch_id: str) -> SimpleNamespace:
+        return SimpleNamespace(**vars(self._batches[batch_id]))
+
+    async def _process(self, batch: SimpleNamespace) -> None:
+        lines = [json.loads(line) for line in self._files[batch.input_file_id].splitlines() if line.strip()]
+
+        async def answer(line: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                body = await self.handler(line['body'])
+                return {"custom_id": line['custom_id'], "response": {"status_code": 200, "body": body}, "error": None}
+            except Exception as e:
+                return {
+                    "custom_id": line['custom_id'],
+                    "response": {"status_code": 500, "body": {"error": {"message": str(e)}}},
+                    "error": {"message": str(e)},
+                }
+
+        results = await asyncio.gather(*(answer(line) for line in lines))
+        output_id = f"file-local-{uuid.uuid4().hex[:12]}"
+        self._files[output_id] = "\n".join(json.dumps(result) for result in results)
+        batch.output_file_id = output_id
+        batch.status = 'completed'
+
+
+# Like the OpenAI client, a collector and its pending futures belong to one event loop
+_collectors: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BatchCollector]" = weakref.WeakKeyDictionary()
+
+
+def get_batch_collector() -> BatchCollector:
+    """
+    Get the batch collector configured by BATCH_BACKEND for the running loop
+    """
+    loop = asyncio.get_running_loop()
+    collector = _collectors.get(loop)
+    if collector is None:
+        if getattr(settings, 'BATCH_BACKEND', 'openai') == 'local':
+            client = LocalBatchClient()
+        else:
+            from apps.fact_checker.services.llm_client import get_async_client
+            client = get_async_client()
+
+        collector = BatchCollector(
+            client,
+            max_requests=getattr(settings, 'BATCH_MAX_REQUESTS', 1000),
+            flush_interval=getattr(settings, 'BATCH_FLUSH_INTERVAL', 30.0),
+            poll_interval=getattr(settings, 'BATCH_POLL_INTERVAL', 60.0),
+        )
+        _collectors[loop] = collector
+    return collector
@@ -1,11 +1,30 @@
 import logging
 import json
-import base64
-from typing import Dict, List, Optional, Any
-from openai import OpenAI
+import time
+from functools import partial
+from typing import Dict, List, Optional, Any, Type, Union
 from django.conf import settings
 from django.utils import timezone
 from asgiref.sync import sync_to_async
+from apps.fact_checker.services import batch_client, image_pipeline, llm_cache, llm_client, llm_usage
+from apps.fact_checker.services.background_responses import BackgroundResponses
+from apps.fact_checker.services.context_projection import project_context
+from apps.fact_checker.services.image_pipeline import PreparedImage
+from apps.fact_checker.services.model_router import ModelRouter
+from apps.fact_checker.services.output_schemas import (
+    GeneralResearch, ResearchUnderstanding, SpecificResearch, StepOutput,
+    WebClaimAnalysis, WebClaimVerdict, WebSourceAssessments, parse_output, text_format,
+)
+from apps.fact_checker.services.pipeline import Node, Pipeline, StepDeferred
+from apps.fact_checker.services.prompt_templates import (
+    RESEARCH_FINAL_REPORT, RESEARCH_GENERAL_SEARCH, RESEARCH_SPECIFIC_EXPLORATION,
+    RESEARCH_STEP_SUMMARY, RESEARCH_UNDERSTANDING,
+)
+from apps.fact_checker.services.rate_limiter import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from apps.fact_checker.services.search_profiles import web_search_tool
+from apps.fact_checker.services.session_budget import BudgetExceeded, SessionBudget, within_deadline
+from apps.fact_checker.services.step_summaries import build_step_summary, schedule_step_summary, uses_llm_summaries
+from apps.fact_checker.services.token_stream import TokenStreamer
 from apps.fact_checker.models import ChatGPTInteraction, FactCheckSession, AnalysisStep
 
 logger = logging.getLogger(__name__)
@@ -15,7 +34,6 @@ class ChatGPTWebSearchService:
     """Service for interacting with OpenAI's ChatGPT API using web search tool with multi-step analysis"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = "gpt-4.1-mini"
         self.advModel = "o4-mini"
 
@@ -23,10 +41,15 @@ class ChatGPTWebSearchService:
 class ChatGPTResearchService:
     """Service for conducting general research using OpenAI's ChatGPT API with web search capabilities"""
     
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, batch: bool = False):
         self.model = "gpt-4.1-mini"
         self.advModel = "o4-mini"
+        # Bulk analyses send their Responses API calls through the Batch API
+        self.batch = batch
+        # Submit research calls as background responses so no worker waits on them
+        self.background = getattr(settings, 'RESEARCH_BACKGROUND_RESPONSES', False) and not batch
+        # Stream the markdown report to the session's WebSocket group as it is generated
+        self.stream_output = getattr(settings, 'STREAM_LLM_OUTPUT', False) and not batch and not self.background
     
     def _extract_web_search_citations(self, response_content: List[Any]) -> List[Dict[str, Any]]:
         """
@@ -130,96 +153,116 @@ class ChatGPTResearchService:
         logger.info(f"Extracted {len(citations)} total citations")
         return citations
     
-    def _clean_json_response(self, response_text: str) -> str:
-        """
-        Clean JSON response by removing markdown code blocks and other formatting
-        """
-        if not response_text or not response_text.strip():
-            return ""
-            
-        # Remove markdown code blocks if present
-        if response_text.strip().startswith('```'):
-            # Find the start of JSON content
-            lines = response_text.strip().split('\n')
-            # Skip the opening ```json line
-            if lines[0].startswith('```'):
-                lines = lines[1:]
-            # Remove the closing ``` line
-            if lines and lines[-1].strip() == '```':
-                lines = lines[:-1]
-            response_text = '\n'.join(lines)
-        
-        # Try to extract JSON from text that might have additional content
-        response_text = response_text.strip()
-        
-        # Look for JSON object boundaries
-        start_idx = response_text.find('{')
-        if start_idx != -1:
-            # Find the last closing brace
-            brace_count = 0
-            end_idx = -1
-            for i in range(start_idx, len(response_text)):
-                if response_text[i] == '{':
-                    brace_count += 1
-                elif response_text[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_idx = i
-                        break
-            
-            if end_idx != -1:
-                response_text = response_text[start_idx:end_idx + 1]
-        
-        return response_text.strip()
-
-    async def _summarize_step_result(self, step_number: int, result_data: Dict[str, Any]) -> str:
+    async def _summarize_step_result(self, session: FactCheckSession, step_number: int, result_data: Dict[str, Any]) -> str:
         """
         Calls the AI to generate a user-friendly summary of a step's result for research.
         """
         try:
             # Create a simplified version of the result for the prompt
-            summary_prompt_data = {k: v for k, v in result_data.items() if k not in ['citations', 'step', 'parsing_error']}
-
-            prompt = f"""
-            Based on the following JSON data from step {step_number} of a research process, please provide a concise, one-sentence summary for a non-technical user.
-
-            Data:
-            {json.dumps(summary_prompt_data, indent=2)}
+            summary_prompt_data = {k: v for k, v in result_data.items() if k not in ['citations', 'step', 'llm_cache']}
 
-            Example Summaries:
-            - Step 1: "Analyzed and clarified the research question, identifying key areas to investigate."
-            - Step 2: "Conducted comprehensive background research and gathered general information about the topic."
-            - Step 3: "Performed detailed investigation into specific aspects and gathered expert insights."
-
-            Your summary:
-            """
+            prompt = RESEARCH_STEP_SUMMARY.render(step_number=step_number, data=json.dumps(summary_prompt_data, indent=2))
 
             # Using the simpler chat completions API for this non-critical task
-            response = self.client.chat.completions.create(
+            started = time.monotonic()
+            call_stats = {}
+            response = await llm_client.create_chat_completion(
+                priority=PRIORITY_LOW,
+                call_stats=call_stats,
                 model="gpt-4.1-mini", # Cheaper and faster model is fine for this
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.5,
                 max_tokens=100,
+                prompt_cache_key=RESEARCH_STEP_SUMMARY.key,
             )
             
+            call_usage = llm_usage.build_call_usage("gpt-4.1-mini", response, int((time.monotonic() - started) * 1000), call_stats)
+            
             summary = response.choices[0].message.content.strip()
+            await sync_to_async(ChatGPTInteraction.objects.create)(
+                session=session,
+                interaction_type='step_summary',
+                prompt=prompt,
+                response=summary,
+                step_number=step_number,
+                prompt_template=RESEARCH_STEP_SUMMARY.key,
+                **llm_usage.interaction_fields(call_usage)
+            )
             logger.info(f"Generated summary for research step {step_number}: {summary}")
             return summary
         except Exception as e:
             logger.error(f"Error generating summary for research step {step_number}: {str(e)}")
             return f"Research step {step_number} has been completed."
 
-    async def _make_web_search_request(self, prompt: str, image_data: Optional[bytes] = None) -> tuple[str, List[Dict[str, Any]]]:
+    async def _create_web_search_response(self, tools: List[Dict[str, Any]], input_data: List[Dict[str, Any]], stream_to: Optional[str] = None, stream_step: Optional[Union[int, str]] = None, priority: int = PRIORITY_NORMAL, call_stats: Optional[Dict[str, Any]] = None, text: Optional[Dict[str, Any]] = None, model: Optional[str] = None, prompt_cache_key: Optional[str] = None, background: Optional[BackgroundResponses] = None) -> Any:
+        """
+        Call the Responses API, streaming text deltas to the session's WebSocket group if requested
+
+        In batch mode the request joins the next Batch API job instead; with background
+        set it is submitted as a background response (see background_responses)
+        """
+        request = {"model": model or self.advModel, "tools": tools, "input": input_data}
+        if text:
+            request["text"] = text
+        if prompt_cache_key:
+            request["prompt_cache_key"] = prompt_cache_key
+
+        if self.batch:
+            return await batch_client.get_batch_collector().create_response(call_stats=call_stats, **request)
+
+        if background is not None:
+            return await background.create_response(prompt_cache_key or request["model"], priority=priority, call_stats=call_stats, **request)
+
+        if not stream_to:
+            return await llm_client.create_response(priority=priority, call_stats=call_stats, **request)
+
+        streamer = TokenStreamer(stream_to, stream_step)
+        response = await llm_client.stream_response(streamer.push, priority=priority, call_stats=call_stats, **request)
+        await streamer.close()
+        return response
+
+    async def _make_web_search_request(self, prompt: str, image_data: Optional[PreparedImage] = None, stream_to: Optional[str] = None, stream_step: Optional[Union[int, str]] = None, priority: int = PRIORITY_NORMAL, output_type: Optional[Type[StepOutput]] = None, route: Optional[Dict[str, Any]] = None, prompt_cache_key: Optional[str] = None, background: Optional[BackgroundResponses] = None) -> tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
         """
         Helper method to make web search requests and extract response + citations
+        Identical requests are answered from the LLM response cache without a network call
+        With stream_to set to a session id, partial text is sent as token_delta events while the response is generated
+        With output_type set, the response is constrained to that contract's JSON schema (see output_schemas)
+        With route set (see model_router), its model and search settings replace the defaults,
+        and its session budget is checked before the call, bounds it in time and records its usage
+        With prompt_cache_key set to a prompt template's key, calls of that template share OpenAI's prompt cache
+        With background set, the call runs as a background response and StepDeferred is raised until it finishes
         """
-        tools = [{"type": "web_search_preview", "search_context_size": "medium"}]
+        model = (route or {}).get("model") or self.advModel
+        tools = [web_search_tool(route)]
+        text = text_format(output_type) if output_type else None
+        budget = (route or {}).get("budget")
+        timeout = (route or {}).get("timeout")
+        started = time.monotonic()
+        call_info = {"cache": llm_cache.empty_cache_stats()}
+        call_stats = {}
+
+        cache = llm_cache.get_llm_cache()
+        image = image_pipeline.as_prepared(image_data)
+        cache_key = llm_cache.build_cache_key(model, tools, prompt, image.data if image else None, text)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            request_bytes = len(prompt.encode('utf-8')) + (image.size if image else 0)
+            response_bytes = len(json.dumps(cached).encode('utf-8'))
+            call_info["cache"].update(hits=1, bytes_saved=request_bytes + response_bytes)
+            call_info["usage"] = llm_usage.build_call_usage(model, None, int((time.monotonic() - started) * 1000))
+            logger.info(f"LLM cache hit for web search request {cache_key[:12]}")
+            if stream_to:
+                streamer = TokenStreamer(stream_to, stream_step)
+                await streamer.push(cached["response_text"])
+                await streamer.close()
+            return cached["response_text"], cached["citations"], call_info
+
+        call_info["cache"]["misses"] = 1 if cache.enabled else 0
+        if budget:
+            budget.check()
         
         # Prepare input according to OpenAI responses API documentation
-        if image_data:
-            import base64
-            base64_image = base64.b64encode(image_data).decode('utf-8')
-            
+        if image:
             # For responses API with images, use the correct format from the documentation
             input_data = [
                 {
@@ -228,17 +271,13 @@ class ChatGPTResearchService:
                         {"type": "input_text", "text": prompt},
                         {
                             "type": "input_image",
-                            "image_url": f"data:image/jpeg;base64,{base64_image}",
+                            "image_url": image.data_url,
                         },
                     ],
                 }
             ]
             
-            response = self.client.responses.create(
-                model=self.advModel,
-                tools=tools,
-                input=input_data
-            )
+            response = await within_deadline(self._create_web_search_response(tools, input_data, stream_to, stream_step, priority, call_stats, text, model, prompt_cache_key, background), timeout)
         else:
             # For text-only requests, use the simpler format
             input_data = [
@@ -250,14 +289,20 @@ class ChatGPTResearchService:
                 }
             ]
             
-            response = self.client.responses.create(
-                model=self.advModel,
-                tools=tools,
-                input=input_data
-            )
+            response = await within_deadline(self._create_web_search_response(tools, input_data, stream_to, stream_step, priority, call_stats, text, model, prompt_cache_key, background), timeout)
         
+        call_info["usage"] = llm_usage.build_call_usage(model, response, int((time.monotonic() - started) * 1000), call_stats)
+        if budget:
+            budget.record(call_info["usage"])
+        if prompt_cache_key:
+            logger.info(
+                f"Prompt {prompt_cache_key}: {call_info['usage']['cached_input_tokens']} of "
+                f"{call_info['usage']['input_tokens']} input tokens cached"
+            )
+
         # Extract response text and citations
         response_text = ""
+        refusal = ""
         citations = []
 
         try:
@@ -278,6 +323,8 @@ class ChatGPTResearchService:
                                     # For output_text type, the text is directly on the object as per OpenAI docs
                                     response_text = getattr(content_block, 'text', '') or content_block.get('text', '')
                                 break
+                            if block_type == 'refusal':
+                                refusal = getattr(content_block, 'refusal', '')
                         if response_text:
                             break
         except Exception as e:
@@ -288,9 +335,19 @@ class ChatGPTResearchService:
             response_text = response.output_text
             logger.debug("Using fallback output_text for response")
 
-        return response_text, citations
+        if not response_text and refusal:
+            # Recorded like any reply; it won't validate against an output contract
+            logger.warning(f"Model refused the request: {refusal}")
+            response_text = refusal
 
-    async def analyze_claim_with_web_search(self, session: FactCheckSession, user_input: str, image_data: Optional[bytes] = None) -> Dict[str, Any]:
+        # Answers from a fallback model are lower quality, truncated ones or refusals won't validate, and
+        # the local stand-in's are not real; don't serve any of them for the primary model's key
+        if response_text and not refusal and call_info["usage"]["model"] == model and call_stats.get("metered", True) and getattr(response, 'status', 'completed') == 'completed':
+            await cache.set(cache_key, {"response_text": response_text, "citations": citations})
+
+        return response_text, citations, call_info
+
+    async def analyze_claim_with_web_search(self, session: FactCheckSession, user_input: str, image_data: Optional[PreparedImage] = None) -> Dict[str, Any]:
         """
         Perform comprehensive fact-checking using web search in multiple steps
         This orchestrates the 4-step analysis process
@@ -300,25 +357,25 @@ class ChatGPTResearchService:
             
             # Step 1: Initial search for credible sources
             step1_result = await self._step1_initial_search(session, user_input, image_data)
-            if step1_result.get('error') and not step1_result.get('parsing_error'):
+            if step1_result.get('error'):
                 logger.error(f"Step 1 failed: {step1_result.get('error')}")
                 return step1_result
             
-            # Step 2: Deeper exploration (continue even if Step 1 had parsing issues)
+            # Step 2: Deeper exploration
             step2_result = await self._step2_deeper_exploration(session, user_input, step1_result)
-            if step2_result.get('error') and not step2_result.get('parsing_error'):
+            if step2_result.get('error'):
                 logger.error(f"Step 2 failed: {step2_result.get('error')}")
                 # Continue with partial results
                 
-            # Step 3: Source evaluation (continue even if previous steps had parsing issues)
+            # Step 3: Source evaluation
             step3_result = await self._step3_source_evaluation(session, step1_result, step2_result)
-            if step3_result.get('error') and not step3_result.get('parsing_error'):
+            if step3_result.get('error'):
                 logger.error(f"Step 3 failed: {step3_result.get('error')}")
                 # Continue with partial results
                 
-            # Step 4: Final conclusion (continue even if previous steps had parsing issues)
+            # Step 4: Final conclusion
             step4_result = await self._step4_final_conclusion(session, user_input, step1_result, step2_result, step3_result)
-            if step4_result.get('error') and not step4_result.get('parsing_error'):
+            if step4_result.get('error'):
                 logger.error(f"Step 4 failed: {step4_result.get('error')}")
                 return step4_result
             
@@ -328,36 +385,19 @@ class ChatGPTResearchService:
                 if isinstance(step_result, dict) and "citations" in step_result:
                     all_citations.extend(step_result["citations"])
             
-            # Check if we had any parsing errors
-            parsing_errors = [
-                step_result.get('parsing_error', False) 
-                for step_result in [step1_result, step2_result, step3_result, step4_result]
-            ]
-            had_parsing_errors = any(parsing_errors)
-            
-            # Extract verdict from Step 4 (even if it had parsing errors)
-            verdict_info = step4_result.get("verdict", {
-                "classification": "uncertain",
-                "confidence_score": 0.0,
-                "summary": "Multi-step analysis completed with some formatting issues."
-            })
-            
             # Return combined results in the format expected by enhanced_analysis_service
             final_result = {
                 "web_search_used": True,
                 "multi_step_analysis": True,
-                "had_parsing_errors": had_parsing_errors,
                 "step1_initial_search": step1_result,
                 "step2_deeper_exploration": step2_result,
                 "step3_source_evaluation": step3_result,
                 "step4_final_conclusion": step4_result,
                 "citations": all_citations,
-                "verdict": verdict_info
+                "verdict": step4_result["verdict"]
             }
             
             logger.info(f"Multi-step web search analysis completed for session {session.session_id} with {len(all_citations)} total citations")
-            if had_parsing_errors:
-                logger.warning(f"Analysis completed but had parsing errors in {sum(parsing_errors)} step(s)")
             
             return final_result
             
@@ -366,7 +406,7 @@ class ChatGPTResearchService:
             return {"error": str(e)}
 
     # Keep existing methods for backwards compatibility
-    async def analyze_initial_claim_with_search(self, session: FactCheckSession, user_input: str, image_data: Optional[bytes] = None) -> Dict[str, Any]:
+    async def analyze_initial_claim_with_search(self, session: FactCheckSession, user_input: str, image_data: Optional[PreparedImage] = None) -> Dict[str, Any]:
         """
         Perform initial analysis with web search support
         Compatible with existing workflow but enhanced with web search
@@ -377,27 +417,10 @@ class ChatGPTResearchService:
             
             Claim: {user_input}
             
-            Please provide a JSON response with the following structure:
-            {{
-                "main_topic": "The primary topic or subject matter",
-                "factual_claims": ["List of specific factual claims that can be verified"],
-                "potential_publishers": ["List of credible news sources likely to have covered this topic"],
-                "search_keywords": ["List of effective search terms for finding relevant information"],
-                "claim_type": "news_event|historical_fact|scientific_claim|statistical_claim|other",
-                "urgency_level": "high|medium|low",
-                "complexity_score": 1-10,
-                "initial_assessment": "Brief initial assessment of the claim's plausibility based on web search",
-                "web_search_insights": {{
-                    "recent_coverage": ["Recent news coverage found"],
-                    "authoritative_sources": ["Authoritative sources that have addressed this topic"],
-                    "initial_credibility": "Assessment based on immediate web search results"
-                }}
-            }}
-            
             Use web search to enhance your initial analysis with current information.
             """
             
-            response_text, citations = await self._make_web_search_request(prompt, image_data)
+            response_text, citations, call_info = await self._make_web_search_request(prompt, image_data, output_type=WebClaimAnalysis)
             
             # Log the interaction
             interaction_data = {
@@ -411,25 +434,13 @@ class ChatGPTResearchService:
                 interaction_type='initial_analysis_web_search',
                 prompt=prompt,
                 response=json.dumps(interaction_data),
-                model_used=self.model,
-                tokens_used=None
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            # Parse JSON response
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["web_search_used"] = True
-                return result
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse JSON response: {response_text}")
-                return {
-                    "error": "Failed to parse response", 
-                    "raw_response": response_text,
-                    "citations": citations,
-                    "web_search_used": True
-                }
+            result = parse_output(WebClaimAnalysis, response_text)
+            result["citations"] = citations
+            result["web_search_used"] = True
+            return result
                 
         except Exception as e:
             logger.error(f"Error in initial claim analysis with web search: {str(e)}")
@@ -457,30 +468,12 @@ class ChatGPTResearchService:
             Sources to evaluate:
             {json.dumps(sources_summary, indent=2)}
             
-            Use web search to verify publisher credibility, look for additional coverage, and cross-reference information. Provide a JSON response with:
-            {{
-                "source_evaluations": [
-                    {{
-                        "url": "source_url",
-                        "credibility_score": 0.0-1.0,
-                        "relevance_score": 0.0-1.0,
-                        "supports_claim": true|false|null,
-                        "key_points": ["Important points from this source"],
-                        "publisher_reliability": "high|medium|low|unknown",
-                        "bias_assessment": "left|center|right|unknown",
-                        "fact_check_notes": "Notes about this source's reliability",
-                        "cross_references": ["Additional sources found that corroborate or contradict"]
-                    }}
-                ],
-                "overall_assessment": "Summary of source quality and consensus",
-                "additional_findings": "What web search revealed about this topic",
-                "consensus_level": "How much agreement exists among reliable sources"
-            }}
+            Use web search to verify publisher credibility, look for additional coverage, and cross-reference information.
             
             Use web search extensively to verify publisher reputations and find additional corroborating sources.
             """
             
-            response_text, citations = await self._make_web_search_request(prompt)
+            response_text, citations, call_info = await self._make_web_search_request(prompt, output_type=WebSourceAssessments)
             
             # Log the interaction
             interaction_data = {
@@ -494,24 +487,13 @@ class ChatGPTResearchService:
                 interaction_type='source_evaluation_web_search',
                 prompt=prompt,
                 response=json.dumps(interaction_data),
-                model_used=self.model,
-                tokens_used=None
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["web_search_used"] = True
-                return result
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse JSON response: {response_text}")
-                return {
-                    "error": "Failed to parse response", 
-                    "raw_response": response_text,
-                    "citations": citations,
-                    "web_search_used": True
-                }
+            result = parse_output(WebSourceAssessments, response_text)
+            result["citations"] = citations
+            result["web_search_used"] = True
+            return result
                 
         except Exception as e:
             logger.error(f"Error in source evaluation with web search: {str(e)}")
@@ -530,27 +512,12 @@ class ChatGPTResearchService:
             Previous evidence and analysis:
             {json.dumps(analysis_data, indent=2)}
             
-            Use web search to find any recent developments, updates, or additional authoritative sources. Provide a comprehensive final verdict in JSON format:
-            {{
-                "verdict": "true|likely_true|uncertain|likely_false|false",
-                "confidence_score": 0.0-1.0,
-                "reasoning": "Detailed explanation of the verdict incorporating latest web search findings",
-                "key_evidence": ["List of most important evidence points including web search findings"],
-                "contradictory_evidence": ["Evidence that contradicts the claim"],
-                "supporting_evidence": ["Evidence that supports the claim"],
-                "source_quality_summary": "Assessment of overall source quality including web search sources",
-                "recent_developments": ["Any recent developments found through web search"],
-                "expert_consensus": "What expert sources and authoritative publications say",
-                "limitations": ["Limitations of this fact-check"],
-                "recommendations": ["Areas where additional research would be valuable"],
-                "summary": "Brief summary suitable for display to users",
-                "last_updated": "Information about when this assessment was made and what current sources say"
-            }}
+            Use web search to find any recent developments, updates, or additional authoritative sources. Provide a comprehensive final verdict.
             
             Use web search extensively to ensure your verdict reflects the most current and comprehensive information available.
             """
             
-            response_text, citations = await self._make_web_search_request(prompt)
+            response_text, citations, call_info = await self._make_web_search_request(prompt, output_type=WebClaimVerdict)
             
             # Log the interaction
             interaction_data = {
@@ -564,24 +531,13 @@ class ChatGPTResearchService:
                 interaction_type='final_verdict_web_search',
                 prompt=prompt,
                 response=json.dumps(interaction_data),
-                model_used=self.model,
-                tokens_used=None
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["web_search_used"] = True
-                return result
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse JSON response: {response_text}")
-                return {
-                    "error": "Failed to parse response", 
-                    "raw_response": response_text,
-                    "citations": citations,
-                    "web_search_used": True
-                }
+            result = parse_output(WebClaimVerdict, response_text)
+            result["citations"] = citations
+            result["web_search_used"] = True
+            return result
                 
         except Exception as e:
             logger.error(f"Error in final verdict generation with web search: {str(e)}")
@@ -616,113 +572,18 @@ class ChatGPTResearchService:
         return queries[:5]  # Limit to 5 queries
     
     # Research Service Methods for ChatGPTResearchService
-    def _create_research_fallback_response(self, step_number: int, raw_response: str, citations: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """
-        Create a fallback response structure for research steps when JSON parsing fails
-        """
-        summary_text = f"Research step {step_number} has been completed with a parsing error."
-        
-        if step_number == 1:
-            return {
-                "research_question": "Unable to parse structured response",
-                "summary": summary_text,
-                "question_type": "general",
-                "research_scope": "broad",
-                "key_concepts": [],
-                "search_strategy": "Web search conducted",
-                "initial_understanding": raw_response[:500] + "..." if len(raw_response) > 500 else raw_response,
-                "research_areas": [],
-                "citations": citations,
-                "step": step_number,
-                "parsing_error": True
-            }
-        elif step_number == 2:
-            return {
-                "general_findings": [],
-                "summary": summary_text,
-                "key_information": [],
-                "topic_overview": raw_response[:1000] + "..." if len(raw_response) > 1000 else raw_response,
-                "related_topics": [],
-                "preliminary_insights": [],
-                "areas_for_deeper_research": [],
-                "citations": citations,
-                "step": step_number,
-                "parsing_error": True
-            }
-        elif step_number == 3:
-            return {
-                "detailed_findings": [],
-                "summary": summary_text,
-                "specific_insights": [],
-                "expert_opinions": [],
-                "case_studies": [],
-                "data_points": [],
-                "conflicting_viewpoints": [],
-                "research_gaps": [],
-                "raw_findings": raw_response[:1000] + "..." if len(raw_response) > 1000 else raw_response,
-                "citations": citations,
-                "step": step_number,
-                "parsing_error": True
-            }
-        else:
-            return {
-                "error": "Unknown research step number",
-                "raw_response": raw_response,
-                "citations": citations,
-                "step": step_number,
-                "parsing_error": True
-            }
-
-    async def _research_step1_understand_request(self, session: FactCheckSession, user_input: str, image_data: Optional[bytes] = None) -> Dict[str, Any]:
+    async def _research_step1_understand_request(self, step: AnalysisStep, session: FactCheckSession, router: ModelRouter, user_input: str, image_data: Optional[PreparedImage] = None, background: Optional[BackgroundResponses] = None) -> Dict[str, Any]:
         """
         Step 1: Understand and clarify the research request
         """
         try:
-            # Create analysis step
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=1,
-                step_type='research_understanding',
-                description='Understanding and clarifying the research request',
-                status='in_progress'
-            )
+            prompt = RESEARCH_UNDERSTANDING.render(user_input=user_input)
             
-            prompt = f"""
-            You are an expert researcher analyzing a research request. Your goal is to understand what the user wants to learn and clarify the research question to guide comprehensive investigation.
-
-            User Request: {user_input}
-
-            Analyze this request and identify:
-            1. The core research question or topic
-            2. Key concepts and areas to explore
-            3. The scope and approach needed
-            4. What the user is ultimately trying to understand
-
-            CRITICAL: You MUST respond with ONLY valid JSON. Do not include any text before or after the JSON. Do not use markdown formatting or code blocks.
-
-            Provide your response in this EXACT JSON structure:
-            {{
-                "research_question": "Clear, focused research question derived from the user's request",
-                "question_type": "academic|business|technical|general|exploratory|comparative|analytical",
-                "research_scope": "narrow|focused|broad|comprehensive",
-                "key_concepts": ["List of key concepts, terms, or topics central to this research"],
-                "search_strategy": "Recommended approach for conducting this research",
-                "initial_understanding": "Your understanding of what the user is looking for",
-                "research_areas": [
-                    {{
-                        "area": "Specific research area or subtopic",
-                        "importance": "high|medium|low",
-                        "description": "Why this area is important for the research"
-                    }}
-                ],
-                "methodology_suggestions": ["Suggested research methods or approaches"],
-                "expected_outcomes": ["What types of insights or information this research should provide"]
-            }}
-
-            Focus on understanding the research intent to enable comprehensive investigation. RESPOND ONLY WITH THE JSON STRUCTURE ABOVE.
-            """
-            
-            response_text, citations = await self._make_web_search_request(prompt, image_data)
+            response_text, citations, call_info = await self._make_web_search_request(
+                prompt, image_data, output_type=ResearchUnderstanding, route=router.route(step.step_type, steps_left=4),
+                prompt_cache_key=RESEARCH_UNDERSTANDING.key,
+                background=background
+            )
             
             # Log the interaction
             interaction_data = {
@@ -737,48 +598,35 @@ class ChatGPTResearchService:
                 session=session,
                 interaction_type='research_step1_understanding',
                 prompt=prompt,
+                prompt_template=RESEARCH_UNDERSTANDING.key,
                 response=json.dumps(interaction_data),
-                model_used=self.advModel,
-                tokens_used=None
+                step_number=1,
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            # Parse response
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                if not cleaned_response:
-                    raise json.JSONDecodeError("Cleaned response is empty.", "", 0)
-                
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["step"] = 1
+            # Validate against the step's output contract; a mismatch fails the step
+            result = parse_output(ResearchUnderstanding, response_text)
+            result["citations"] = citations
+            result["step"] = 1
+            result["llm_cache"] = call_info["cache"]
 
-                # Generate and save summary
-                summary = await self._summarize_step_result(1, result)
-                result["summary"] = summary
-                step.summary = summary
-                
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Research Step 1 completed with {len(citations)} citations")
-                return result
-                
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse Research Step 1 JSON response: {str(e)}")
-                
-                fallback_result = self._create_research_fallback_response(1, response_text, citations)
-                step.summary = fallback_result.get("summary", "Research Step 1 completed with a parsing error.")
+            # Template summaries are instant; LLM summaries are patched in from the background
+            if not uses_llm_summaries():
+                result["summary"] = step.summary = build_step_summary(step.step_type, result, session.user_input)
 
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = fallback_result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Research Step 1 completed with fallback response and {len(citations)} citations")
-                return fallback_result
+            step.status = 'completed'
+            step.completed_at = timezone.now()
+            step.result_data = result
+            await sync_to_async(step.save)()
+
+            if uses_llm_summaries():
+                schedule_step_summary(step, partial(self._summarize_step_result, session, 1, dict(result)))
+            
+            logger.info(f"Research Step 1 completed with {len(citations)} citations")
+            return result
                 
+        except StepDeferred:
+            raise
         except Exception as e:
             logger.error(f"Error in Research Step 1: {str(e)}")
             
@@ -790,61 +638,21 @@ class ChatGPTResearchService:
             
             return {"error": str(e), "step": 1}
 
-    async def _research_step2_general_search(self, session: FactCheckSession, user_input: str, step1_result: Dict[str, Any]) -> Dict[str, Any]:
+    async def _research_step2_general_search(self, step: AnalysisStep, session: FactCheckSession, router: ModelRouter, user_input: str, step1_result: Dict[str, Any], background: Optional[BackgroundResponses] = None) -> Dict[str, Any]:
         """
         Step 2: Conduct general research on the summarized question
         """
         try:
-            # Create analysis step
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=2,
-                step_type='general_research',
-                description='Conducting general research on the topic',
-                status='in_progress'
+            prompt = RESEARCH_GENERAL_SEARCH.render(
+                user_input=user_input,
+                context=project_context([("Step 1 - Understanding", step1_result)]),
             )
             
-            prompt = f"""
-            You are an expert researcher conducting comprehensive background research. Based on the research understanding, gather broad information to build a foundation of knowledge about the topic.
-
-            Original User Request: {user_input}
-
-            Research Understanding from Step 1:
-            {json.dumps(step1_result, indent=2)}
-
-            Conduct thorough web searches to gather:
-            1. Foundational information and background context
-            2. Current state of knowledge and recent developments
-            3. Key facts, data, and statistics
-            4. Major perspectives and different viewpoints
-            5. Important trends and patterns
-            6. Authoritative sources and expert insights
-
-            CRITICAL: You MUST respond with ONLY valid JSON. Do not include any text before or after the JSON. Do not use markdown formatting or code blocks.
-
-            Provide your response in this EXACT JSON structure:
-            {{
-                "general_findings": [
-                    {{
-                        "topic": "Specific aspect or subtopic",
-                        "key_information": "Important information found about this topic",
-                        "source_type": "academic|news|government|industry|expert|other",
-                        "reliability": "high|medium|low"
-                    }}
-                ],
-                "key_information": ["Most important facts or pieces of information discovered"],
-                "topic_overview": "Comprehensive overview of the topic based on research findings",
-                "related_topics": ["Related topics or areas that emerged during research"],
-                "preliminary_insights": ["Initial insights or patterns observed"],
-                "areas_for_deeper_research": ["Specific areas that warrant more detailed investigation"],
-                "information_gaps": ["Areas where information is lacking or unclear"],
-                "research_quality_assessment": "Assessment of the quality and availability of information on this topic"
-            }}
-
-            Focus on building comprehensive understanding through diverse, reliable sources. RESPOND ONLY WITH THE JSON STRUCTURE ABOVE.
-            """
-            
-            response_text, citations = await self._make_web_search_request(prompt)
+            response_text, citations, call_info = await self._make_web_search_request(
+                prompt, output_type=GeneralResearch, route=router.route(step.step_type, steps_left=3, step1_result=step1_result),
+                prompt_cache_key=RESEARCH_GENERAL_SEARCH.key,
+                background=background
+            )
             
             # Log the interaction
             interaction_data = {
@@ -859,47 +667,36 @@ class ChatGPTResearchService:
                 session=session,
                 interaction_type='research_step2_general_search',
                 prompt=prompt,
+                prompt_template=RESEARCH_GENERAL_SEARCH.key,
                 response=json.dumps(interaction_data),
-                model_used=self.advModel,
-                tokens_used=None
+                step_number=2,
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            # Parse response
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                if not cleaned_response:
-                    raise json.JSONDecodeError("Cleaned response is empty.", "", 0)
-                
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["step"] = 2
-                summary = await self._summarize_step_result(2, result)
-                result["summary"] = summary
-                step.summary = summary
-                
-                # Mark step as completed
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Research Step 2 completed with {len(citations)} citations")
-                return result
-                
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse Research Step 2 JSON response: {str(e)}")
-                
-                fallback_result = self._create_research_fallback_response(2, response_text, citations)
-                step.summary = fallback_result.get("summary", "Research Step 2 completed with a parsing error.")
+            # Validate against the step's output contract; a mismatch fails the step
+            result = parse_output(GeneralResearch, response_text)
+            result["citations"] = citations
+            result["step"] = 2
+            result["llm_cache"] = call_info["cache"]
 
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = fallback_result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Research Step 2 completed with fallback response and {len(citations)} citations")
-                return fallback_result
+            # Template summaries are instant; LLM summaries are patched in from the background
+            if not uses_llm_summaries():
+                result["summary"] = step.summary = build_step_summary(step.step_type, result, session.user_input)
+            
+            # Mark step as completed
+            step.status = 'completed'
+            step.completed_at = timezone.now()
+            step.result_data = result
+            await sync_to_async(step.save)()
+
+            if uses_llm_summaries():
+                schedule_step_summary(step, partial(self._summarize_step_result, session, 2, dict(result)))
+            
+            logger.info(f"Research Step 2 completed with {len(citations)} citations")
+            return result
                 
+        except StepDeferred:
+            raise
         except Exception as e:
             logger.error(f"Error in Research Step 2: {str(e)}")
             
@@ -910,77 +707,20 @@ class ChatGPTResearchService:
             
             return {"error": str(e), "step": 2}
 
-    async def _research_step3_specific_exploration(self, session: FactCheckSession, step1_result: Dict[str, Any], step2_result: Dict[str, Any]) -> Dict[str, Any]:
+    async def _research_step3_specific_exploration(self, step: AnalysisStep, session: FactCheckSession, router: ModelRouter, step1_result: Dict[str, Any], step2_result: Dict[str, Any], background: Optional[BackgroundResponses] = None) -> Dict[str, Any]:
         """
         Step 3: Conduct specific, detailed research on identified areas
         """
         try:
-            # Create analysis step
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=3,
-                step_type='specific_research',
-                description='Conducting specific detailed research',
-                status='in_progress'
+            prompt = RESEARCH_SPECIFIC_EXPLORATION.render(
+                context=project_context([("Step 1 - Understanding", step1_result), ("Step 2 - General Research", step2_result)]),
             )
             
-            prompt = f"""
-            You are an expert researcher conducting targeted investigation. Based on the foundational research, now explore specific aspects in greater depth to provide comprehensive understanding.
-
-            Research Understanding:
-            {json.dumps(step1_result, indent=2)}
-
-            General Research Findings:
-            {json.dumps(step2_result, indent=2)}
-
-            Conduct focused searches to explore:
-            1. Detailed analysis of the most important areas identified
-            2. Expert perspectives and authoritative opinions
-            3. Specific evidence, case studies, and real-world examples
-            4. Current debates, challenges, and emerging issues
-            5. Practical implications and applications
-            6. Recent developments and future outlook
-
-            CRITICAL: You MUST respond with ONLY valid JSON. Do not include any text before or after the JSON. Do not use markdown formatting or code blocks.
-
-            Provide your response in this EXACT JSON structure:
-            {{
-                "detailed_findings": [
-                    {{
-                        "area": "Specific research area explored",
-                        "key_insights": "Detailed insights discovered",
-                        "evidence_type": "statistical|qualitative|expert_opinion|case_study|other",
-                        "confidence_level": "high|medium|low",
-                        "implications": "What this finding means for the research question"
-                    }}
-                ],
-                "specific_insights": ["Specific, detailed insights that directly address the research question"],
-                "expert_opinions": [
-                    {{
-                        "expert": "Expert name or description",
-                        "expertise": "Area of expertise",
-                        "opinion": "Summary of their perspective",
-                        "context": "Context or basis for their opinion"
-                    }}
-                ],
-                "case_studies": ["Relevant case studies or examples found"],
-                "data_points": [
-                    {{
-                        "metric": "Specific data point or statistic",
-                        "value": "The actual value or finding",
-                        "source": "Source of the data",
-                        "context": "What this data means"
-                    }}
-                ],
-                "conflicting_viewpoints": ["Different perspectives or contradictory information found"],
-                "research_gaps": ["Areas where more research is needed"],
-                "practical_applications": ["How this research can be applied or used"]
-            }}
-
-            Focus on depth and specificity to provide comprehensive answers. RESPOND ONLY WITH THE JSON STRUCTURE ABOVE.
-            """
-            
-            response_text, citations = await self._make_web_search_request(prompt)
+            response_text, citations, call_info = await self._make_web_search_request(
+                prompt, output_type=SpecificResearch, route=router.route(step.step_type, steps_left=2, step1_result=step1_result),
+                prompt_cache_key=RESEARCH_SPECIFIC_EXPLORATION.key,
+                background=background
+            )
             
             # Log the interaction
             interaction_data = {
@@ -995,47 +735,36 @@ class ChatGPTResearchService:
                 session=session,
                 interaction_type='research_step3_specific_exploration',
                 prompt=prompt,
+                prompt_template=RESEARCH_SPECIFIC_EXPLORATION.key,
                 response=json.dumps(interaction_data),
-                model_used=self.advModel,
-                tokens_used=None
+                step_number=3,
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            # Parse response
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                if not cleaned_response:
-                    raise json.JSONDecodeError("Cleaned response is empty.", "", 0)
-                
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["step"] = 3
-                summary = await self._summarize_step_result(3, result)
-                result["summary"] = summary
-                step.summary = summary
-                
-                # Mark step as completed
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Research Step 3 completed with {len(citations)} citations")
-                return result
-                
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse Research Step 3 JSON response: {str(e)}")
-                
-                fallback_result = self._create_research_fallback_response(3, response_text, citations)
-                step.summary = fallback_result.get("summary", "Research Step 3 completed with a parsing error.")
+            # Validate against the step's output contract; a mismatch fails the step
+            result = parse_output(SpecificResearch, response_text)
+            result["citations"] = citations
+            result["step"] = 3
+            result["llm_cache"] = call_info["cache"]
 
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = fallback_result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Research Step 3 completed with fallback response and {len(citations)} citations")
-                return fallback_result
+            # Template summaries are instant; LLM summaries are patched in from the background
+            if not uses_llm_summaries():
+                result["summary"] = step.summary = build_step_summary(step.step_type, result, session.user_input)
+            
+            # Mark step as completed
+            step.status = 'completed'
+            step.completed_at = timezone.now()
+            step.result_data = result
+            await sync_to_async(step.save)()
+
+            if uses_llm_summaries():
+                schedule_step_summary(step, partial(self._summarize_step_result, session, 3, dict(result)))
+            
+            logger.info(f"Research Step 3 completed with {len(citations)} citations")
+            return result
                 
+        except StepDeferred:
+            raise
         except Exception as e:
             logger.error(f"Error in Research Step 3: {str(e)}")
             
@@ -1046,51 +775,30 @@ class ChatGPTResearchService:
             
             return {"error": str(e), "step": 3}
 
-    async def _research_generate_final_report(self, session: FactCheckSession, user_input: str, step1_result: Dict[str, Any], step2_result: Dict[str, Any], step3_result: Dict[str, Any]) -> Dict[str, Any]:
+    async def _research_generate_final_report(self, session: FactCheckSession, router: ModelRouter, user_input: str, step1_result: Dict[str, Any], step2_result: Dict[str, Any], step3_result: Dict[str, Any], background: Optional[BackgroundResponses] = None) -> Dict[str, Any]:
         """
         Generate final research report as a comprehensive markdown response
+        With the session budget exceeded it is a partial report written without another model call
         """
         try:
-            prompt = f"""
-            You are an expert researcher writing a comprehensive research report. Your goal is to help the audience fully understand the answer to their research question through clear, engaging writing. 
-
-            Original Research Request: {user_input}
-
-            Research Process Summary:
-            Step 1 - Understanding: {json.dumps(step1_result, indent=2)}
-            Step 2 - General Research: {json.dumps(step2_result, indent=2)}
-            Step 3 - Specific Investigation: {json.dumps(step3_result, indent=2)}
-
-            Write a comprehensive research report in markdown format that addresses the user's question. Focus on helping the audience understand the topic thoroughly rather than providing recommendations or action items.
-
-            Your report should:
-            - Start with a clear, engaging introduction that frames the research question and provides a short and concise overview of the conclusions drawn
-            - Present findings in a logical, easy-to-follow structure
-            - Include key insights, data, and expert perspectives discovered
-            - Explain complex concepts in accessible language
-            - Highlight different viewpoints when they exist
-            - Discuss current trends and recent developments
-            - Address any limitations or gaps in the available information
-            - Conclude with a synthesis that answers the original question
-
-            Write in a style similar to a high-quality research article or investigative report. Use markdown formatting including:
-            - Headers (## and ###) to organize sections
-            - **Bold text** for emphasis on key points
-            - *Italics* for important terms or concepts
-            - Bullet points or numbered lists where appropriate
-            - > Blockquotes for significant expert opinions or key insights
-
-            Do NOT include:
-            - Specific action recommendations
-            - Detailed methodology sections
-            - Formal citations (but you can reference "recent studies" or "experts indicate")
-
-            Focus on being informative, engaging, and helping the reader gain deep understanding of the topic.
-
-            Write your complete research report in markdown format below:
-            """
-            
-            response_text, citations = await self._make_web_search_request(prompt)
+            # The report draws on every finding, so it gets a larger context budget
+            context = project_context([
+                ("Step 1 - Understanding", step1_result),
+                ("Step 2 - General Research", step2_result),
+                ("Step 3 - Specific Investigation", step3_result),
+            ], budget=getattr(settings, 'RESEARCH_REPORT_CONTEXT_TOKEN_BUDGET', 8000))
+            
+            prompt = RESEARCH_FINAL_REPORT.render(user_input=user_input, context=context)
+            
+            response_text, citations, call_info = await self._make_web_search_request(
+                prompt,
+                stream_to=str(session.session_id) if self.stream_output else None,
+                stream_step='research_report',
+                priority=PRIORITY_HIGH,  # finishes a session the user is already watching
+                route=router.route('research_report', steps_left=1, step1_result=step1_result),
+                prompt_cache_key=RESEARCH_FINAL_REPORT.key,
+                background=background
+            )
             
             # Log the interaction
             interaction_data = {
@@ -1104,9 +812,10 @@ class ChatGPTResearchService:
                 session=session,
                 interaction_type='research_final_report',
                 prompt=prompt,
+                prompt_template=RESEARCH_FINAL_REPORT.key,
                 response=json.dumps(interaction_data),
-                model_used=self.advModel,
-                tokens_used=None
+                step_number=4,  # The report has no AnalysisStep; it is the stage after step 3
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
             # Return the markdown report directly (no JSON parsing needed)
@@ -1118,44 +827,125 @@ class ChatGPTResearchService:
                     "executive_summary": response_text[:300] + "..." if len(response_text) > 300 else response_text
                 },
                 "citations": citations,
-                "web_search_used": True
+                "web_search_used": True,
+                "llm_cache": call_info["cache"]
             }
                 
+        except StepDeferred:
+            raise
+        except BudgetExceeded as e:
+            logger.warning(f"Research report of session {session.session_id} is partial: {str(e)}")
+            return self._partial_report(str(e), step1_result, step2_result, step3_result)
         except Exception as e:
             logger.error(f"Error in final research report generation: {str(e)}")
             return {"error": str(e)}
 
-    async def conduct_research_with_web_search(self, session: FactCheckSession, user_input: str, image_data: Optional[bytes] = None) -> Dict[str, Any]:
+    def _partial_report(self, reason: str, step1_result: Dict[str, Any], step2_result: Dict[str, Any], step3_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Write a markdown report from the research steps that finished, for a session out of budget
+        """
+        sections = [
+            "# Research Report (partial)",
+            f"> This report is incomplete: the research stopped early because {reason.removeprefix('Session budget exceeded: ')}.",
+        ]
+        if step1_result.get('research_question'):
+            sections.append(f"## Research Question\n\n{step1_result['research_question']}")
+        if step2_result.get('topic_overview'):
+            sections.append(f"## Overview\n\n{step2_result['topic_overview']}")
+        if step2_result.get('key_information'):
+            sections.append("## Key Information\n\n" + "\n".join(f"- {item}" for item in step2_result['key_information']))
+        if step3_result.get('specific_insights'):
+            sections.append("## Specific Insights\n\n" + "\n".join(f"- {item}" for item in step3_result['specific_insights']))
+        markdown_content = "\n\n".join(sections)
+
+        return {
+            "research_report": {
+                "markdown_content": markdown_content,
+                "format": "markdown",
+                "title": "Research Report (partial)",
+                "executive_summary": step2_result.get('topic_overview') or step1_result.get('initial_understanding', '')
+            },
+            "citations": [],
+            "web_search_used": True,
+            "partial": True,
+            "budget_exceeded": reason
+        }
+
+    def _build_router(self, session: FactCheckSession, user_input: str, image_data: Optional[PreparedImage], budget: SessionBudget) -> ModelRouter:
+        """
+        Route the session's steps; batch runs wait on the Batch API for hours, so no latency budget applies
+        """
+        return ModelRouter(
+            str(session.session_id), user_input, has_image=bool(image_data),
+            budget=None if self.batch else getattr(settings, 'RESEARCH_LATENCY_BUDGET', None),
+            mode=session.mode, search_options=session.search_options, session_budget=budget
+        )
+
+    async def conduct_research_with_web_search(self, session: FactCheckSession, user_input: str, image_data: Optional[PreparedImage] = None, budget: Optional[SessionBudget] = None) -> Dict[str, Any]:
         """
         Conduct comprehensive research using web search in multiple steps
         This orchestrates the 3-step research process
+        With budget set, every step runs within the session's limits (see session_budget)
         """
         try:
             logger.info(f"Starting multi-step research analysis for session {session.session_id}")
-            
-            # Step 1: Understand the research request
-            step1_result = await self._research_step1_understand_request(session, user_input, image_data)
-            if step1_result.get('error') and not step1_result.get('parsing_error'):
-                logger.error(f"Research Step 1 failed: {step1_result.get('error')}")
-                return step1_result
-            
-            # Step 2: General research (continue even if Step 1 had parsing issues)
-            step2_result = await self._research_step2_general_search(session, user_input, step1_result)
-            if step2_result.get('error') and not step2_result.get('parsing_error'):
-                logger.error(f"Research Step 2 failed: {step2_result.get('error')}")
-                # Continue with partial results
-                
-            # Step 3: Specific exploration (continue even if previous steps had parsing issues)
-            step3_result = await self._research_step3_specific_exploration(session, step1_result, step2_result)
-            if step3_result.get('error') and not step3_result.get('parsing_error'):
-                logger.error(f"Research Step 3 failed: {step3_result.get('error')}")
-                # Continue with partial results
-                
-            # Generate final research report
-            final_report = await self._research_generate_final_report(session, user_input, step1_result, step2_result, step3_result)
-            if final_report.get('error'):
-                logger.error(f"Research final report generation failed: {final_report.get('error')}")
-                return final_report
+
+            budget = budget or SessionBudget()
+            router = self._build_router(session, user_input, image_data, budget)
+            background = BackgroundResponses(session) if self.background else None
+            pipeline = Pipeline([
+                Node(
+                    'step1',
+                    partial(self._research_step1_understand_request, session=session, router=router, user_input=user_input, image_data=image_data, background=background),
+                    step_number=1,
+                    step_type='research_understanding',
+                    description='Understanding and clarifying the research request'
+                ),
+                # Steps 2 and 3 may fail, or be skipped when the session budget runs low;
+                # the report is written from partial results
+                Node(
+                    'step2',
+                    partial(self._research_step2_general_search, session=session, router=router, user_input=user_input, background=background),
+                    inputs={'step1_result': 'step1'},
+                    step_number=2,
+                    step_type='general_research',
+                    description='Conducting general research on the topic',
+                    required=False,
+                    skip=budget.skip_reason
+                ),
+                Node(
+                    'step3',
+                    partial(self._research_step3_specific_exploration, session=session, router=router, background=background),
+                    inputs={'step1_result': 'step1', 'step2_result': 'step2'},
+                    step_number=3,
+                    step_type='specific_research',
+                    description='Conducting specific detailed research',
+                    required=False,
+                    skip=budget.skip_reason
+                ),
+                # The report has no AnalysisStep row
+                Node(
+                    'report',
+                    partial(self._research_generate_final_report, session=session, router=router, user_input=user_input, background=background),
+                    inputs={'step1_result': 'step1', 'step2_result': 'step2', 'step3_result': 'step3'}
+                ),
+            ])
+            run = await pipeline.run(session)
+            if run.failed:
+                logger.error(f"Research {run.failed} failed: {run.error_result.get('error')}")
+                return run.error_result or {"error": f"Research {run.failed} failed"}
+            if run.deferred:
+                # Background responses are still running; poll_background_responses_task resumes the session
+                return {"deferred": run.deferred}
+            for name in ('step2', 'step3'):
+                if run.status[name] == 'failed':
+                    logger.error(f"Research {name} failed: {run.results[name].get('error')}")
+                    # Continue with partial results
+
+            step1_result = run.results['step1']
+            step2_result = run.results['step2']
+            step3_result = run.results['step3']
+            final_report = run.results['report']
             
             # Combine all citations
             all_citations = []
@@ -1167,18 +957,10 @@ class ChatGPTResearchService:
             if "citations" in final_report:
                 all_citations.extend(final_report["citations"])
             
-            # Check if we had any parsing errors
-            parsing_errors = [
-                step_result.get('parsing_error', False) 
-                for step_result in [step1_result, step2_result, step3_result]
-            ]
-            had_parsing_errors = any(parsing_errors)
-            
             # Return combined results in a research format
             final_result = {
                 "research_type": "multi_step_web_search",
                 "web_search_used": True,
-                "had_parsing_errors": had_parsing_errors,
                 "step1_understanding": step1_result,
                 "step2_general_research": step2_result,
                 "step3_specific_exploration": step3_result,
@@ -1187,12 +969,12 @@ class ChatGPTResearchService:
                 "research_summary": final_report.get("research_report", {}).get("executive_summary", "Research completed successfully"),
                 "methodology": "Three-step web search research process",
                 "format": "markdown",
-                "markdown_content": final_report.get("research_report", {}).get("markdown_content", "Research report could not be generated")
+                "markdown_content": final_report.get("research_report", {}).get("markdown_content", "Research report could not be generated"),
+                "partial": bool(final_report.get("partial")),
+                "budget": budget.snapshot()
             }
             
             logger.info(f"Multi-step research analysis completed for session {session.session_id} with {len(all_citations)} total citations")
-            if had_parsing_errors:
-                logger.warning(f"Research completed but had parsing errors in {sum(parsing_errors)} step(s)")
             
             return final_result
             
@@ -1,10 +1,30 @@
 import logging
 import json
-from typing import Dict, List, Optional, Any
-from openai import OpenAI
+import time
+from functools import partial
+from typing import Dict, List, Optional, Any, Type, Union
 from django.conf import settings
 from django.utils import timezone
 from asgiref.sync import sync_to_async
+from apps.fact_checker.services import batch_client, image_pipeline, llm_cache, llm_client, llm_usage
+from apps.fact_checker.services.context_projection import project_citations, project_context
+from apps.fact_checker.services.early_exit import fact_check_exit_reason
+from apps.fact_checker.services.image_pipeline import PreparedImage
+from apps.fact_checker.services.model_router import ModelRouter
+from apps.fact_checker.services.output_schemas import (
+    DeeperExploration, FinalConclusion, InitialSearch, SourceEvaluation, StepOutput,
+    WebClaimAnalysis, WebClaimVerdict, WebSourceAssessments, parse_output, text_format,
+)
+from apps.fact_checker.services.pipeline import Node, Pipeline
+from apps.fact_checker.services.prompt_templates import (
+    FACT_CHECK_DEEPER_EXPLORATION, FACT_CHECK_FINAL_CONCLUSION, FACT_CHECK_INITIAL_SEARCH,
+    FACT_CHECK_SOURCE_EVALUATION, FACT_CHECK_STEP_SUMMARY,
+)
+from apps.fact_checker.services.rate_limiter import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from apps.fact_checker.services.search_profiles import web_search_tool
+from apps.fact_checker.services.session_budget import BudgetExceeded, SessionBudget, within_deadline
+from apps.fact_checker.services.step_summaries import build_step_summary, schedule_step_summary, uses_llm_summaries
+from apps.fact_checker.services.token_stream import TokenStreamer
 from apps.fact_checker.models import ChatGPTInteraction, FactCheckSession, AnalysisStep
 
 logger = logging.getLogger(__name__)
@@ -13,10 +33,13 @@ logger = logging.getLogger(__name__)
 class ChatGPTWebSearchService:
     """Service for interacting with OpenAI's ChatGPT API using web search tool with multi-step analysis"""
     
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, batch: bool = False):
         self.model = "gpt-4.1-mini"
         self.advModel = "o4-mini"
+        # Bulk analyses send their Responses API calls through the Batch API
+        self.batch = batch
+        # Stream long final outputs to the session's WebSocket group as they are generated
+        self.stream_output = getattr(settings, 'STREAM_LLM_OUTPUT', False) and not batch
     
     def _extract_web_search_citations(self, response_content: List[Any]) -> List[Dict[str, Any]]:
         """
@@ -120,191 +143,111 @@ class ChatGPTWebSearchService:
         logger.info(f"Extracted {len(citations)} total citations")
         return citations
     
-    def _clean_json_response(self, response_text: str) -> str:
-        """
-        Clean JSON response by removing markdown code blocks and other formatting
-        """
-        if not response_text or not response_text.strip():
-            return ""
-            
-        # Remove markdown code blocks if present
-        if response_text.strip().startswith('```'):
-            # Find the start of JSON content
-            lines = response_text.strip().split('\n')
-            # Skip the opening ```json line
-            if lines[0].startswith('```'):
-                lines = lines[1:]
-            # Remove the closing ``` line
-            if lines and lines[-1].strip() == '```':
-                lines = lines[:-1]
-            response_text = '\n'.join(lines)
-        
-        # Try to extract JSON from text that might have additional content
-        response_text = response_text.strip()
-        
-        # Look for JSON object boundaries
-        start_idx = response_text.find('{')
-        if start_idx != -1:
-            # Find the last closing brace
-            brace_count = 0
-            end_idx = -1
-            for i in range(start_idx, len(response_text)):
-                if response_text[i] == '{':
-                    brace_count += 1
-                elif response_text[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_idx = i
-                        break
-            
-            if end_idx != -1:
-                response_text = response_text[start_idx:end_idx + 1]
-        
-        return response_text.strip()
-    
-    async def _summarize_step_result(self, step_number: int, result_data: Dict[str, Any]) -> str:
+    async def _summarize_step_result(self, session: FactCheckSession, step_number: int, result_data: Dict[str, Any]) -> str:
         """
         Calls the AI to generate a user-friendly summary of a step's result.
         """
         try:
             # Create a simplified version of the result for the prompt
-            summary_prompt_data = {k: v for k, v in result_data.items() if k not in ['citations', 'step', 'parsing_error']}
+            summary_prompt_data = {k: v for k, v in result_data.items() if k not in ['citations', 'step', 'llm_cache']}
 
-            prompt = f"""
-            Based on the following JSON data from step {step_number} of a fact-checking process, please provide a concise, one-sentence summary for a non-technical user.
-
-            Data:
-            {json.dumps(summary_prompt_data, indent=2)}
-
-            Example Summaries:
-            - Step 1: "Identified the main topic and found initial credible sources to investigate the claim."
-            - Step 2: "Gathered specific evidence and noted some conflicting reports that require further analysis."
-            - Step 3: "Evaluated the reliability of the sources, finding most to be credible but with some potential for bias."
-            - Step 4: "Finalized the analysis, reaching a verdict with a moderate level of confidence."
-
-            Your summary:
-            """
+            prompt = FACT_CHECK_STEP_SUMMARY.render(step_number=step_number, data=json.dumps(summary_prompt_data, indent=2))
 
             # Using the simpler chat completions API for this non-critical task
-            response = self.client.chat.completions.create(
+            started = time.monotonic()
+            call_stats = {}
+            response = await llm_client.create_chat_completion(
+                priority=PRIORITY_LOW,
+                call_stats=call_stats,
                 model="gpt-4.1-mini", # Cheaper and faster model is fine for this
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.5,
                 max_tokens=100,
+                prompt_cache_key=FACT_CHECK_STEP_SUMMARY.key,
             )
             
+            call_usage = llm_usage.build_call_usage("gpt-4.1-mini", response, int((time.monotonic() - started) * 1000), call_stats)
+            
             summary = response.choices[0].message.content.strip()
+            await sync_to_async(ChatGPTInteraction.objects.create)(
+                session=session,
+                interaction_type='step_summary',
+                prompt=prompt,
+                response=summary,
+                step_number=step_number,
+                prompt_template=FACT_CHECK_STEP_SUMMARY.key,
+                **llm_usage.interaction_fields(call_usage)
+            )
             logger.info(f"Generated summary for step {step_number}: {summary}")
             return summary
         except Exception as e:
             logger.error(f"Error generating summary for step {step_number}: {str(e)}")
             return f"Step {step_number} has been completed."
     
-    def _create_fallback_response(self, step_number: int, raw_response: str, citations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _create_web_search_response(self, tools: List[Dict[str, Any]], input_data: List[Dict[str, Any]], stream_to: Optional[str] = None, stream_step: Optional[Union[int, str]] = None, priority: int = PRIORITY_NORMAL, call_stats: Optional[Dict[str, Any]] = None, text: Optional[Dict[str, Any]] = None, model: Optional[str] = None, prompt_cache_key: Optional[str] = None) -> Any:
         """
-        Create a fallback response structure when JSON parsing fails
+        Call the Responses API, streaming text deltas to the session's WebSocket group if requested
+
+        In batch mode the request joins the next Batch API job instead
         """
-        if step_number == 1:
-            return {
-                "main_topic": "Analysis completed but unable to parse structured response",
-                "summary": summary_text,
-                "claim_type": "other",
-                "initial_credible_sources": [],
-                "general_summary": raw_response[:500] + "..." if len(raw_response) > 500 else raw_response,
-                "search_strategy": "Web search conducted",
-                "preliminary_assessment": "Unable to provide structured assessment",
-                "areas_needing_deeper_research": [],
-                "citations": citations,
-                "step": step_number,
-                "parsing_error": True
-            }
-        elif step_number == 2:
-            return {
-                "specific_evidence": [],
-                "summary": summary_text,
-                "counter_arguments": [],
-                "expert_perspectives": [],
-                "recent_developments": [],
-                "contextual_factors": [],
-                "contradictory_information": [],
-                "areas_of_uncertainty": [],
-                "raw_findings": raw_response[:1000] + "..." if len(raw_response) > 1000 else raw_response,
-                "citations": citations,
-                "step": step_number,
-                "parsing_error": True
-            }
-        elif step_number == 3:
-            return {
-                "source_credibility_analysis": [],
-                "summary": summary_text,
-                "overall_source_quality": {
-                    "primary_sources_count": 0,
-                    "secondary_sources_count": 0,
-                    "high_credibility_sources": 0,
-                    "questionable_sources": 0,
-                    "source_diversity": "Unable to assess"
-                },
-                "cross_reference_analysis": {
-                    "consistent_information": [],
-                    "conflicting_information": [],
-                    "unique_claims": [],
-                    "verification_status": "unable_to_verify"
-                },
-                "red_flags": [],
-                "source_recommendations": raw_response[:500] + "..." if len(raw_response) > 500 else raw_response,
-                "citations": citations,
-                "step": step_number,
-                "parsing_error": True
-            }
-        elif step_number == 4:
-            return {
-                "verdict": {
-                    "classification": "uncertain",
-                    "confidence_score": 0.0,
-                    "summary": "Analysis completed but unable to provide structured verdict due to response format issues"
-                },
-                "summary": summary_text,
-                "detailed_analysis": {
-                    "reasoning": raw_response[:1000] + "..." if len(raw_response) > 1000 else raw_response,
-                    "key_evidence": [],
-                    "supporting_evidence": [],
-                    "contradictory_evidence": [],
-                    "source_quality_assessment": "Unable to assess due to parsing error",
-                    "limitations": ["Response format parsing failed"],
-                    "areas_of_uncertainty": ["Complete analysis due to technical issues"]
-                },
-                "methodology_summary": {
-                    "search_approach": "Multi-step web search analysis",
-                    "sources_consulted": "Web search results",
-                    "verification_methods": "Cross-reference analysis",
-                    "analysis_date": "Current date"
-                },
-                "recommendations": ["Manual review recommended due to parsing issues"],
-                "follow_up_suggestions": ["Re-run analysis or review raw findings"],
-                "citations": citations,
-                "step": step_number,
-                "parsing_error": True
-            }
-        else:
-            return {
-                "error": "Unknown step number",
-                "raw_response": raw_response,
-                "citations": citations,
-                "step": step_number,
-                "parsing_error": True
-            }
+        request = {"model": model or self.advModel, "tools": tools, "input": input_data}
+        if text:
+            request["text"] = text
+        if prompt_cache_key:
+            request["prompt_cache_key"] = prompt_cache_key
+
+        if self.batch:
+            return await batch_client.get_batch_collector().create_response(call_stats=call_stats, **request)
+
+        if not stream_to:
+            return await llm_client.create_response(priority=priority, call_stats=call_stats, **request)
+
+        streamer = TokenStreamer(stream_to, stream_step)
+        response = await llm_client.stream_response(streamer.push, priority=priority, call_stats=call_stats, **request)
+        await streamer.close()
+        return response
 
-    async def _make_web_search_request(self, prompt: str, image_data: Optional[bytes] = None) -> tuple[str, List[Dict[str, Any]]]:
+    async def _make_web_search_request(self, prompt: str, image_data: Optional[PreparedImage] = None, stream_to: Optional[str] = None, stream_step: Optional[Union[int, str]] = None, priority: int = PRIORITY_NORMAL, output_type: Optional[Type[StepOutput]] = None, route: Optional[Dict[str, Any]] = None, prompt_cache_key: Optional[str] = None) -> tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
         """
         Helper method to make web search requests and extract response + citations
+        Identical requests are answered from the LLM response cache without a network call
+        With stream_to set to a session id, partial text is sent as token_delta events while the response is generated
+        With output_type set, the response is constrained to that contract's JSON schema (see output_schemas)
+        With route set (see model_router), its model and search settings replace the defaults,
+        and its session budget is checked before the call, bounds it in time and records its usage
+        With prompt_cache_key set to a prompt template's key, calls of that template share OpenAI's prompt cache
         """
-        tools = [{"type": "web_search_preview", "search_context_size": "medium"}]
+        model = (route or {}).get("model") or self.advModel
+        tools = [web_search_tool(route)]
+        text = text_format(output_type) if output_type else None
+        budget = (route or {}).get("budget")
+        timeout = (route or {}).get("timeout")
+        started = time.monotonic()
+        call_info = {"cache": llm_cache.empty_cache_stats()}
+        call_stats = {}
+
+        cache = llm_cache.get_llm_cache()
+        image = image_pipeline.as_prepared(image_data)
+        cache_key = llm_cache.build_cache_key(model, tools, prompt, image.data if image else None, text)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            request_bytes = len(prompt.encode('utf-8')) + (image.size if image else 0)
+            response_bytes = len(json.dumps(cached).encode('utf-8'))
+            call_info["cache"].update(hits=1, bytes_saved=request_bytes + response_bytes)
+            call_info["usage"] = llm_usage.build_call_usage(model, None, int((time.monotonic() - started) * 1000))
+            logger.info(f"LLM cache hit for web search request {cache_key[:12]}")
+            if stream_to:
+                streamer = TokenStreamer(stream_to, stream_step)
+                await streamer.push(cached["response_text"])
+                await streamer.close()
+            return cached["response_text"], cached["citations"], call_info
+
+        call_info["cache"]["misses"] = 1 if cache.enabled else 0
+        if budget:
+            budget.check()
         
         # Prepare input according to OpenAI responses API documentation
-        if image_data:
-            import base64
-            base64_image = base64.b64encode(image_data).decode('utf-8')
-            
+        if image:
             # For responses API with images, use the correct format from the documentation
             input_data = [
                 {
@@ -313,17 +256,13 @@ class ChatGPTWebSearchService:
                         {"type": "input_text", "text": prompt},
                         {
                             "type": "input_image",
-                            "image_url": f"data:image/jpeg;base64,{base64_image}",
+                            "image_url": image.data_url,
                         },
                     ],
                 }
             ]
             
-            response = self.client.responses.create(
-                model=self.advModel,
-                tools=tools,
-                input=input_data
-            )
+            response = await within_deadline(self._create_web_search_response(tools, input_data, stream_to, stream_step, priority, call_stats, text, model, prompt_cache_key), timeout)
         else:
             # For text-only requests, use the simpler format
             input_data = [
@@ -335,14 +274,20 @@ class ChatGPTWebSearchService:
                 }
             ]
             
-            response = self.client.responses.create(
-                model=self.advModel,
-                tools=tools,
-                input=input_data
-            )
+            response = await within_deadline(self._create_web_search_response(tools, input_data, stream_to, stream_step, priority, call_stats, text, model, prompt_cache_key), timeout)
         
+        call_info["usage"] = llm_usage.build_call_usage(model, response, int((time.monotonic() - started) * 1000), call_stats)
+        if budget:
+            budget.record(call_info["usage"])
+        if prompt_cache_key:
+            logger.info(
+                f"Prompt {prompt_cache_key}: {call_info['usage']['cached_input_tokens']} of "
+                f"{call_info['usage']['input_tokens']} input tokens cached"
+            )
+
         # Extract response text and citations
         response_text = ""
+        refusal = ""
         citations = []
 
         try:
@@ -363,6 +308,8 @@ class ChatGPTWebSearchService:
                                     # For output_text type, the text is directly on the object as per OpenAI docs
                                     response_text = getattr(content_block, 'text', '') or content_block.get('text', '')
                                 break
+                            if block_type == 'refusal':
+                                refusal = getattr(content_block, 'refusal', '')
                         if response_text:
                             break
         except Exception as e:
@@ -373,57 +320,29 @@ class ChatGPTWebSearchService:
             response_text = response.output_text
             logger.debug("Using fallback output_text for response")
 
-        return response_text, citations
+        if not response_text and refusal:
+            # Recorded like any reply; it won't validate against an output contract
+            logger.warning(f"Model refused the request: {refusal}")
+            response_text = refusal
 
-    async def _step1_initial_search(self, session: FactCheckSession, user_input: str, image_data: Optional[bytes] = None) -> Dict[str, Any]:
+        # Answers from a fallback model are lower quality, truncated ones or refusals won't validate, and
+        # the local stand-in's are not real; don't serve any of them for the primary model's key
+        if response_text and not refusal and call_info["usage"]["model"] == model and call_stats.get("metered", True) and getattr(response, 'status', 'completed') == 'completed':
+            await cache.set(cache_key, {"response_text": response_text, "citations": citations})
+
+        return response_text, citations, call_info
+
+    async def _step1_initial_search(self, step: AnalysisStep, session: FactCheckSession, router: ModelRouter, user_input: str, image_data: Optional[PreparedImage] = None) -> Dict[str, Any]:
         """
         Step 1: Initial search for credible sources and general summary
         """
         try:
-            # Create analysis step
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=1,
-                step_type='initial_web_search',
-                description='Initial search for credible sources and general summary',
-                status='in_progress'
-            )
+            prompt = FACT_CHECK_INITIAL_SEARCH.render(user_input=user_input)
             
-            prompt = f"""
-            You are an expert fact-checker performing an initial search for credible sources. Analyze the following claim and search for the most authoritative and credible sources available. Use the user's input language (English or Chinese) for your response.
-
-            Claim: {user_input}
-
-            Focus on finding:
-            1. Primary sources (official statements, press releases, government documents)
-            2. Credible news organizations with strong fact-checking reputations
-            3. Academic or scientific sources if relevant
-            4. Expert commentary from recognized authorities
-
-            CRITICAL: You MUST respond with ONLY valid JSON. Do not include any text before or after the JSON. Do not use markdown formatting or code blocks.
-
-            Provide your response in this EXACT JSON structure:
-            {{
-                "main_topic": "The primary topic or subject matter",
-                "claim_type": "news_event|historical_fact|scientific_claim|statistical_claim|political_statement|other",
-                "initial_credible_sources": [
-                    {{
-                        "source_name": "Name of the source",
-                        "source_type": "news|academic|government|expert|other",
-                        "credibility_level": "high|medium|low",
-                        "key_information": "Main information from this source"
-                    }}
-                ],
-                "general_summary": "Brief general summary of what current credible sources say about this topic",
-                "search_strategy": "What search approach was most effective for finding information",
-                "preliminary_assessment": "Initial assessment based on credible sources found",
-                "areas_needing_deeper_research": ["List of specific aspects that need more detailed investigation"]
-            }}
-
-            Always use web search to find the most credible and authoritative sources available, DO NOT overly rely on your internal knowledge. RESPOND ONLY WITH THE JSON STRUCTURE ABOVE.
-            """
-            
-            response_text, citations = await self._make_web_search_request(prompt, image_data)
+            response_text, citations, call_info = await self._make_web_search_request(
+                prompt, image_data, output_type=InitialSearch, route=router.route(step.step_type, steps_left=3),
+                prompt_cache_key=FACT_CHECK_INITIAL_SEARCH.key
+            )
             
             # Log the interaction
             interaction_data = {
@@ -437,51 +356,32 @@ class ChatGPTWebSearchService:
                 session=session,
                 interaction_type='step1_initial_search',
                 prompt=prompt,
+                prompt_template=FACT_CHECK_INITIAL_SEARCH.key,
                 response=json.dumps(interaction_data),
-                model_used=self.advModel,
-                tokens_used=None  # Would need to extract from response if available
+                step_number=1,
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            # Parse response
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                if not cleaned_response:
-                    raise json.JSONDecodeError("Cleaned response is empty.", "", 0)
-                
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["step"] = 1
+            # Validate against the step's output contract; a mismatch fails the step
+            result = parse_output(InitialSearch, response_text)
+            result["citations"] = citations
+            result["step"] = 1
+            result["llm_cache"] = call_info["cache"]
 
-                # --- NEW: Generate and save summary ---
-                summary = await self._summarize_step_result(1, result)
-                result["summary"] = summary
-                step.summary = summary
-                # --- END NEW ---
-                
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Step 1 completed with {len(citations)} citations")
-                return result
-                
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse Step 1 JSON response: {str(e)}")
-                
-                fallback_result = self._create_fallback_response(1, response_text, citations)
-                
-                # --- NEW: Add summary to fallback ---
-                step.summary = fallback_result.get("summary", "Step 1 completed with a parsing error.")
-                # --- END NEW ---
+            # Template summaries are instant; LLM summaries are patched in from the background
+            if not uses_llm_summaries():
+                result["summary"] = step.summary = build_step_summary(step.step_type, result, session.user_input)
 
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = fallback_result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Step 1 completed with fallback response and {len(citations)} citations")
-                return fallback_result
+            step.status = 'completed'
+            step.completed_at = timezone.now()
+            step.result_data = result
+            await sync_to_async(step.save)()
+
+            if uses_llm_summaries():
+                schedule_step_summary(step, partial(self._summarize_step_result, session, 1, dict(result)))
+            
+            logger.info(f"Step 1 completed with {len(citations)} citations")
+            return result
                 
         except Exception as e:
             logger.error(f"Error in Step 1 initial search: {str(e)}")
@@ -494,72 +394,20 @@ class ChatGPTWebSearchService:
             
             return {"error": str(e), "step": 1}
 
-    async def _step2_deeper_exploration(self, session: FactCheckSession, user_input: str, step1_result: Dict[str, Any]) -> Dict[str, Any]:
+    async def _step2_deeper_exploration(self, step: AnalysisStep, session: FactCheckSession, router: ModelRouter, user_input: str, step1_result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Step 2: Deeper exploration and refined searches for specific content
         """
         try:
-            # Create analysis step
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=2,
-                step_type='deeper_exploration',
-                description='Deeper exploration and refined searches for specific content',
-                status='in_progress'
+            prompt = FACT_CHECK_DEEPER_EXPLORATION.render(
+                user_input=user_input,
+                context=project_context([("Step 1 - Initial Search", step1_result)]),
             )
             
-            prompt = f"""
-            You are an expert fact-checker conducting deeper research. Based on the initial findings, conduct more specific and targeted searches to gather detailed information.
-
-            Original Claim: {user_input}
-
-            Initial Research Findings:
-            {json.dumps(step1_result, indent=2)}
-
-            Now conduct deeper, more specific searches focusing on:
-            1. Detailed evidence for specific claims
-            2. Counter-arguments or alternative perspectives
-            3. Expert analysis and commentary
-            4. Recent updates or developments
-            5. Contextual information that affects the claim's validity
-
-            CRITICAL: You MUST respond with ONLY valid JSON. Do not include any text before or after the JSON. Do not use markdown formatting or code blocks.
-
-            Provide your response in this EXACT JSON structure:
-            {{
-                "specific_evidence": [
-                    {{
-                        "evidence_type": "statistical|testimonial|documentary|expert_opinion|other",
-                        "evidence_description": "Description of the evidence found",
-                        "source_quality": "high|medium|low",
-                        "supports_claim": "strongly_supports|somewhat_supports|neutral|somewhat_contradicts|strongly_contradicts"
-                    }}
-                ],
-                "counter_arguments": [
-                    {{
-                        "argument": "Description of counter-argument or alternative perspective",
-                        "source": "Source of this counter-argument",
-                        "credibility": "high|medium|low"
-                    }}
-                ],
-                "expert_perspectives": [
-                    {{
-                        "expert_name": "Name or description of expert",
-                        "expertise_area": "Their area of expertise",
-                        "opinion_summary": "Summary of their perspective",
-                        "stance": "supports|opposes|neutral|nuanced"
-                    }}
-                ],
-                "recent_developments": ["Any recent news, updates, or developments related to this claim"],
-                "contextual_factors": ["Important contextual information that affects interpretation"],
-                "contradictory_information": ["Information that contradicts the original claim"],
-                "areas_of_uncertainty": ["Aspects where evidence is unclear or conflicting"]
-            }}
-
-            Use targeted web searches to gather comprehensive evidence from multiple perspectives. RESPOND ONLY WITH THE JSON STRUCTURE ABOVE.
-            """
-            
-            response_text, citations = await self._make_web_search_request(prompt)
+            response_text, citations, call_info = await self._make_web_search_request(
+                prompt, output_type=DeeperExploration, route=router.route(step.step_type, steps_left=2, step1_result=step1_result),
+                prompt_cache_key=FACT_CHECK_DEEPER_EXPLORATION.key
+            )
             
             # Log the interaction
             interaction_data = {
@@ -573,49 +421,33 @@ class ChatGPTWebSearchService:
                 session=session,
                 interaction_type='step2_deeper_exploration',
                 prompt=prompt,
+                prompt_template=FACT_CHECK_DEEPER_EXPLORATION.key,
                 response=json.dumps(interaction_data),
-                model_used=self.advModel,
-                tokens_used=None
+                step_number=2,
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            # Parse response
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                if not cleaned_response:
-                    raise json.JSONDecodeError("Cleaned response is empty.", "", 0)
-                
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["step"] = 2
-                summary = await self._summarize_step_result(2, result)
-                result["summary"] = summary
-                step.summary = summary
-                
-                # Mark step as completed
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Step 2 completed with {len(citations)} citations")
-                return result
-                
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse Step 2 JSON response: {str(e)}")
-                logger.debug(f"Raw response: {response_text[:500]}...")
-                
-                # Create fallback response
-                fallback_result = self._create_fallback_response(2, response_text, citations)
-                step.summary = fallback_result.get("summary", "Step 2 completed with a parsing error.")
+            # Validate against the step's output contract; a mismatch fails the step
+            result = parse_output(DeeperExploration, response_text)
+            result["citations"] = citations
+            result["step"] = 2
+            result["llm_cache"] = call_info["cache"]
 
-                # Mark step as completed with fallback result
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = fallback_result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Step 2 completed with fallback response and {len(citations)} citations")
-                return fallback_result
+            # Template summaries are instant; LLM summaries are patched in from the background
+            if not uses_llm_summaries():
+                result["summary"] = step.summary = build_step_summary(step.step_type, result, session.user_input)
+            
+            # Mark step as completed
+            step.status = 'completed'
+            step.completed_at = timezone.now()
+            step.result_data = result
+            await sync_to_async(step.save)()
+
+            if uses_llm_summaries():
+                schedule_step_summary(step, partial(self._summarize_step_result, session, 2, dict(result)))
+            
+            logger.info(f"Step 2 completed with {len(citations)} citations")
+            return result
                 
         except Exception as e:
             logger.error(f"Error in Step 2 deeper exploration: {str(e)}")
@@ -627,80 +459,21 @@ class ChatGPTWebSearchService:
             
             return {"error": str(e), "step": 2}
 
-    async def _step3_source_evaluation(self, session: FactCheckSession, step1_result: Dict[str, Any], step2_result: Dict[str, Any]) -> Dict[str, Any]:
+    async def _step3_source_evaluation(self, step: AnalysisStep, session: FactCheckSession, router: ModelRouter, step1_result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Step 3: Evaluate cited sources and their credibility
         """
         try:
-            # Create analysis step
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=3,
-                step_type='source_credibility_evaluation',
-                description='Evaluate cited sources and their credibility',
-                status='in_progress'
-            )
+            # Runs alongside step 2, so only the initial search's sources are evaluated here
+            all_citations = step1_result.get("citations", [])
+            context = project_context([("Step 1 - Initial Search", step1_result)])
             
-            # Combine citations from previous steps
-            all_citations = []
-            all_citations.extend(step1_result.get("citations", []))
-            all_citations.extend(step2_result.get("citations", []))
+            prompt = FACT_CHECK_SOURCE_EVALUATION.render(sources=project_citations(all_citations), context=context)
             
-            prompt = f"""
-            You are an expert fact-checker evaluating source credibility and reliability. Analyze all the sources found in the previous research steps and provide a comprehensive credibility assessment.
-
-            Sources to evaluate from previous research:
-            {json.dumps(all_citations, indent=2)}
-
-            Previous research findings:
-            Step 1 - Initial Search: {json.dumps(step1_result, indent=2)}
-            Step 2 - Deeper Exploration: {json.dumps(step2_result, indent=2)}
-
-            Conduct additional web searches to verify publisher credibility, check for bias, and cross-reference information.
-
-            CRITICAL: You MUST respond with ONLY valid JSON. Do not include any text before or after the JSON. Do not use markdown formatting or code blocks.
-
-            Provide your response in this EXACT JSON structure:
-            {{
-                "source_credibility_analysis": [
-                    {{
-                        "url": "Source URL",
-                        "publisher": "Publisher name",
-                        "credibility_score": 0.8,
-                        "credibility_factors": [
-                            "List of factors affecting credibility (e.g., editorial standards, fact-checking history, transparency)"
-                        ],
-                        "bias_assessment": {{
-                            "political_lean": "left|center|right|unknown",
-                            "bias_level": "minimal|low|moderate|high",
-                            "factual_reporting": "very_high|high|mostly_factual|mixed|low"
-                        }},
-                        "publisher_reputation": "excellent|good|fair|poor|unknown",
-                        "fact_check_history": "Description of publisher's fact-checking track record",
-                        "funding_transparency": "transparent|somewhat_transparent|opaque|unknown"
-                    }}
-                ],
-                "overall_source_quality": {{
-                    "primary_sources_count": 2,
-                    "secondary_sources_count": 3,
-                    "high_credibility_sources": 4,
-                    "questionable_sources": 1,
-                    "source_diversity": "Assessment of source diversity and independence"
-                }},
-                "cross_reference_analysis": {{
-                    "consistent_information": ["Information that is consistently reported across sources"],
-                    "conflicting_information": ["Information that conflicts between sources"],
-                    "unique_claims": ["Claims found in only one or few sources"],
-                    "verification_status": "well_verified|partially_verified|poorly_verified|conflicting"
-                }},
-                "red_flags": ["Any credibility red flags or concerns identified"],
-                "source_recommendations": "Recommendations about which sources are most trustworthy"
-            }}
-
-            Use web search to verify publisher reputations and credibility ratings from media bias and fact-checking organizations. RESPOND ONLY WITH THE JSON STRUCTURE ABOVE.
-            """
-            
-            response_text, citations = await self._make_web_search_request(prompt)
+            response_text, citations, call_info = await self._make_web_search_request(
+                prompt, output_type=SourceEvaluation, route=router.route(step.step_type, steps_left=2, step1_result=step1_result),
+                prompt_cache_key=FACT_CHECK_SOURCE_EVALUATION.key
+            )
             
             # Log the interaction
             interaction_data = {
@@ -714,50 +487,33 @@ class ChatGPTWebSearchService:
                 session=session,
                 interaction_type='step3_source_evaluation',
                 prompt=prompt,
+                prompt_template=FACT_CHECK_SOURCE_EVALUATION.key,
                 response=json.dumps(interaction_data),
-                model_used=self.advModel,
-                tokens_used=None
+                step_number=3,
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            # Parse response
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                if not cleaned_response:
-                    raise json.JSONDecodeError("Cleaned response is empty.", "", 0)
-                
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["step"] = 3
-                summary = await self._summarize_step_result(3, result)
-                result["summary"] = summary
-                step.summary = summary
-                
-                # Mark step as completed
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Step 3 completed with {len(citations)} citations")
-                return result
-                
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse Step 3 JSON response: {str(e)}")
-                logger.debug(f"Raw response: {response_text[:500]}...")
-                
-                # Create fallback response
-                fallback_result = self._create_fallback_response(3, response_text, citations)
-                
-                step.summary = fallback_result.get("summary", "Step 3 completed with a parsing error.")
+            # Validate against the step's output contract; a mismatch fails the step
+            result = parse_output(SourceEvaluation, response_text)
+            result["citations"] = citations
+            result["step"] = 3
+            result["llm_cache"] = call_info["cache"]
 
-                # Mark step as completed with fallback result
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = fallback_result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Step 3 completed with fallback response and {len(citations)} citations")
-                return fallback_result
+            # Template summaries are instant; LLM summaries are patched in from the background
+            if not uses_llm_summaries():
+                result["summary"] = step.summary = build_step_summary(step.step_type, result, session.user_input)
+            
+            # Mark step as completed
+            step.status = 'completed'
+            step.completed_at = timezone.now()
+            step.result_data = result
+            await sync_to_async(step.save)()
+
+            if uses_llm_summaries():
+                schedule_step_summary(step, partial(self._summarize_step_result, session, 3, dict(result)))
+            
+            logger.info(f"Step 3 completed with {len(citations)} citations")
+            return result
                 
         except Exception as e:
             logger.error(f"Error in Step 3 source evaluation: {str(e)}")
@@ -769,69 +525,40 @@ class ChatGPTWebSearchService:
             
             return {"error": str(e), "step": 3}
 
-    async def _step4_final_conclusion(self, session: FactCheckSession, user_input: str, step1_result: Dict[str, Any], step2_result: Dict[str, Any], step3_result: Dict[str, Any]) -> Dict[str, Any]:
+    async def _step4_final_conclusion(self, step: AnalysisStep, session: FactCheckSession, router: ModelRouter, user_input: str, step1_result: Dict[str, Any], step2_result: Dict[str, Any], step3_result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Step 4: Summarize all findings and provide final conclusion
+        After an early exit (steps 2 and 3 skipped) this is a lightweight conclusion from step 1's findings
+        With the session budget exceeded it is a partial conclusion written without another model call
         """
         try:
-            # Create analysis step
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=4,
-                step_type='final_conclusion',
-                description='Summarize findings and provide final conclusion',
-                status='in_progress'
+            skipped = step2_result.get('reason') if step2_result.get('skipped') else None
+            if skipped:
+                context = project_context([("Step 1 - Initial Search Results", step1_result)])
+                if fact_check_exit_reason(step1_result):
+                    research_note = f"Deeper research was skipped because {skipped}. Base the verdict on that fact-check and the initial findings; search only to confirm it is still current."
+                else:
+                    research_note = f"Deeper research was skipped because {skipped}. Base the verdict on the initial findings and keep any verification searches brief."
+            else:
+                context = project_context([
+                    ("Step 1 - Initial Search Results", step1_result),
+                    ("Step 2 - Deeper Exploration", step2_result),
+                    ("Step 3 - Source Evaluation", step3_result),
+                ])
+                research_note = "Based on all research conducted, provide a final comprehensive assessment. Use web search for any final verification or to check for very recent developments."
+            
+            prompt = FACT_CHECK_FINAL_CONCLUSION.render(user_input=user_input, context=context, research_note=research_note)
+            
+            response_text, citations, call_info = await self._make_web_search_request(
+                prompt,
+                stream_to=str(session.session_id) if self.stream_output else None,
+                stream_step=4,
+                priority=PRIORITY_HIGH,  # finishes a session the user is already watching
+                output_type=FinalConclusion,
+                route=router.route(step.step_type, steps_left=1, step1_result=step1_result, ceiling='fast' if skipped else None),
+                prompt_cache_key=FACT_CHECK_FINAL_CONCLUSION.key,
             )
             
-            prompt = f"""
-            You are an expert fact-checker providing a final conclusion. Synthesize all previous research to provide a comprehensive final verdict.
-
-            Original Claim: {user_input}
-
-            Research Summary:
-            Step 1 - Initial Search Results: {json.dumps(step1_result, indent=2)}
-            Step 2 - Deeper Exploration: {json.dumps(step2_result, indent=2)}
-            Step 3 - Source Evaluation: {json.dumps(step3_result, indent=2)}
-
-            Based on all research conducted, provide a final comprehensive assessment. Use web search for any final verification or to check for very recent developments.
-
-            CRITICAL: You MUST respond with ONLY valid JSON. Do not include any text before or after the JSON. Do not use markdown formatting or code blocks.
-
-            Provide your response in this EXACT JSON structure:
-            {{
-                "verdict": {{
-                    "classification": "true|likely_true|uncertain|likely_false|false",
-                    "confidence_score": 0.85,
-                    "summary": "Brief summary suitable for display to users"
-                }},
-                "detailed_analysis": {{
-                    "reasoning": "Detailed explanation of the verdict based on all research findings",
-                    "key_evidence": ["Most important evidence points supporting the verdict"],
-                    "supporting_evidence": ["Evidence that supports the claim"],
-                    "contradictory_evidence": ["Evidence that contradicts the claim"],
-                    "source_quality_assessment": "Overall assessment of source quality and reliability",
-                    "limitations": ["Limitations of this fact-check analysis"],
-                    "areas_of_uncertainty": ["Aspects where definitive conclusions cannot be made"]
-                }},
-                "methodology_summary": {{
-                    "search_approach": "Summary of search methodology used",
-                    "sources_consulted": "Types and quality of sources consulted",
-                    "verification_methods": "Methods used to verify information",
-                    "analysis_date": "When this analysis was conducted"
-                }},
-                "recommendations": [
-                    "Recommendations for readers about interpreting this information"
-                ],
-                "follow_up_suggestions": [
-                    "Suggestions for further research or monitoring of developments"
-                ]
-            }}
-
-            Provide a balanced, evidence-based conclusion that acknowledges uncertainties while being as definitive as the evidence allows. RESPOND ONLY WITH THE JSON STRUCTURE ABOVE.
-            """
-            
-            response_text, citations = await self._make_web_search_request(prompt)
-            
             # Log the interaction
             interaction_data = {
                 "response": response_text,
@@ -844,50 +571,45 @@ class ChatGPTWebSearchService:
                 session=session,
                 interaction_type='step4_final_conclusion',
                 prompt=prompt,
+                prompt_template=FACT_CHECK_FINAL_CONCLUSION.key,
                 response=json.dumps(interaction_data),
-                model_used=self.advModel,
-                tokens_used=None
+                step_number=4,
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            # Parse response
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                if not cleaned_response:
-                    raise json.JSONDecodeError("Cleaned response is empty.", "", 0)
-                
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["step"] = 4
-                summary = await self._summarize_step_result(4, result)
-                result["summary"] = summary
-                step.summary = summary
-                
-                # Mark step as completed
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Step 4 completed with {len(citations)} citations")
-                return result
-                
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse Step 4 JSON response: {str(e)}")
-                logger.debug(f"Raw response: {response_text[:500]}...")
-                
-                # Create fallback response  
-                fallback_result = self._create_fallback_response(4, response_text, citations)
-                step.summary = fallback_result.get("summary", "Step 4 completed with a parsing error.")
+            # Validate against the step's output contract; a mismatch fails the step
+            result = parse_output(FinalConclusion, response_text)
+            result["citations"] = citations
+            result["step"] = 4
+            result["llm_cache"] = call_info["cache"]
 
-                
-                # Mark step as completed with fallback result
-                step.status = 'completed'
-                step.completed_at = timezone.now()
-                step.result_data = fallback_result
-                await sync_to_async(step.save)()
-                
-                logger.info(f"Step 4 completed with fallback response and {len(citations)} citations")
-                return fallback_result
+            # Template summaries are instant; LLM summaries are patched in from the background
+            if not uses_llm_summaries():
+                result["summary"] = step.summary = build_step_summary(step.step_type, result, session.user_input)
+            
+            # Mark step as completed
+            step.status = 'completed'
+            step.completed_at = timezone.now()
+            step.result_data = result
+            await sync_to_async(step.save)()
+
+            if uses_llm_summaries():
+                schedule_step_summary(step, partial(self._summarize_step_result, session, 4, dict(result)))
+            
+            logger.info(f"Step 4 completed with {len(citations)} citations")
+            return result
+
+        except BudgetExceeded as e:
+            logger.warning(f"Step 4 of session {session.session_id} ends with a partial conclusion: {str(e)}")
+
+            result = self._partial_conclusion(str(e), step1_result, step2_result, step3_result)
+            result["summary"] = step.summary = build_step_summary(step.step_type, result, session.user_input)
+
+            step.status = 'completed'
+            step.completed_at = timezone.now()
+            step.result_data = result
+            await sync_to_async(step.save)()
+            return result
                 
         except Exception as e:
             logger.error(f"Error in Step 4 final conclusion: {str(e)}")
@@ -899,37 +621,120 @@ class ChatGPTWebSearchService:
             
             return {"error": str(e), "step": 4}
 
-    async def analyze_claim_with_web_search(self, session: FactCheckSession, user_input: str, image_data: Optional[bytes] = None) -> Dict[str, Any]:
+    def _partial_conclusion(self, reason: str, step1_result: Dict[str, Any], step2_result: Dict[str, Any], step3_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a FinalConclusion-shaped result from the steps that finished, for a session out of budget
+        """
+        completed = [
+            name for name, result in (("initial search", step1_result), ("deeper exploration", step2_result), ("source evaluation", step3_result))
+            if not result.get('error') and not result.get('skipped')
+        ]
+        preliminary = step1_result.get('preliminary_assessment', '')
+        key_evidence = [evidence.get('evidence_description', '') for evidence in step2_result.get('specific_evidence', [])][:5]
+
+        return {
+            "verdict": {
+                "classification": "uncertain",
+                "confidence_score": 0.3,
+                "summary": f"Partial result: the analysis stopped early because {reason.removeprefix('Session budget exceeded: ')}. {preliminary}".strip()
+            },
+            "detailed_analysis": {
+                "reasoning": preliminary or step1_result.get('general_summary', ''),
+                "key_evidence": key_evidence,
+                "supporting_evidence": [],
+                "contradictory_evidence": step2_result.get('contradictory_information', []),
+                "source_quality_assessment": step3_result.get('source_recommendations', ''),
+                "limitations": [f"The analysis ended before a final conclusion: {reason}"],
+                "areas_of_uncertainty": step1_result.get('areas_needing_deeper_research', []),
+            },
+            "methodology_summary": {
+                "search_approach": step1_result.get('search_strategy', ''),
+                "sources_consulted": f"Findings of the completed steps: {', '.join(completed) or 'none'}",
+                "verification_methods": "No final verification; the session budget ran out",
+                "analysis_date": timezone.now().date().isoformat(),
+            },
+            "recommendations": ["Treat this verdict as preliminary and run the fact-check again for a full conclusion"],
+            "follow_up_suggestions": step1_result.get('areas_needing_deeper_research', []),
+            "citations": [],
+            "step": 4,
+            "partial": True,
+            "budget_exceeded": reason,
+        }
+
+    def _build_router(self, session: FactCheckSession, user_input: str, image_data: Optional[PreparedImage], budget: SessionBudget) -> ModelRouter:
+        """
+        Route the session's steps; batch runs wait on the Batch API for hours, so no latency budget applies
+        """
+        return ModelRouter(
+            str(session.session_id), user_input, has_image=bool(image_data),
+            budget=None if self.batch else getattr(settings, 'ANALYSIS_LATENCY_BUDGET', None),
+            mode=session.mode, search_options=session.search_options, session_budget=budget
+        )
+
+    async def analyze_claim_with_web_search(self, session: FactCheckSession, user_input: str, image_data: Optional[PreparedImage] = None, budget: Optional[SessionBudget] = None) -> Dict[str, Any]:
         """
         Perform comprehensive fact-checking using web search in multiple steps
-        This orchestrates the 4-step analysis process
+        This orchestrates the 4-step analysis process; source evaluation only
+        needs the initial search, so it runs alongside the deeper exploration
+        With budget set, every step runs within the session's limits (see session_budget)
         """
         try:
             logger.info(f"Starting multi-step web search analysis for session {session.session_id}")
-            
-            # Step 1: Initial search for credible sources
-            step1_result = await self._step1_initial_search(session, user_input, image_data)
-            if step1_result.get('error') and not step1_result.get('parsing_error'):
-                logger.error(f"Step 1 failed: {step1_result.get('error')}")
-                return step1_result
-            
-            # Step 2: Deeper exploration (continue even if Step 1 had parsing issues)
-            step2_result = await self._step2_deeper_exploration(session, user_input, step1_result)
-            if step2_result.get('error') and not step2_result.get('parsing_error'):
-                logger.error(f"Step 2 failed: {step2_result.get('error')}")
-                # Continue with partial results
-                
-            # Step 3: Source evaluation (continue even if previous steps had parsing issues)
-            step3_result = await self._step3_source_evaluation(session, step1_result, step2_result)
-            if step3_result.get('error') and not step3_result.get('parsing_error'):
-                logger.error(f"Step 3 failed: {step3_result.get('error')}")
-                # Continue with partial results
-                
-            # Step 4: Final conclusion (continue even if previous steps had parsing issues)
-            step4_result = await self._step4_final_conclusion(session, user_input, step1_result, step2_result, step3_result)
-            if step4_result.get('error') and not step4_result.get('parsing_error'):
-                logger.error(f"Step 4 failed: {step4_result.get('error')}")
-                return step4_result
+
+            budget = budget or SessionBudget()
+            router = self._build_router(session, user_input, image_data, budget)
+            pipeline = Pipeline([
+                Node(
+                    'step1',
+                    partial(self._step1_initial_search, session=session, router=router, user_input=user_input, image_data=image_data),
+                    step_number=1,
+                    step_type='initial_web_search',
+                    description='Initial search for credible sources and general summary'
+                ),
+                # Steps 2 and 3 may fail, or be skipped when step 1 found a trusted fact-check
+                # or the session budget runs low; the conclusion is drawn from what is available
+                Node(
+                    'step2',
+                    partial(self._step2_deeper_exploration, session=session, router=router, user_input=user_input),
+                    inputs={'step1_result': 'step1'},
+                    step_number=2,
+                    step_type='deeper_exploration',
+                    description='Deeper exploration and refined searches for specific content',
+                    required=False,
+                    skip=lambda step1_result: fact_check_exit_reason(step1_result) or budget.skip_reason()
+                ),
+                Node(
+                    'step3',
+                    partial(self._step3_source_evaluation, session=session, router=router),
+                    inputs={'step1_result': 'step1'},
+                    step_number=3,
+                    step_type='source_credibility_evaluation',
+                    description='Evaluate cited sources and their credibility',
+                    required=False,
+                    skip=lambda step1_result: fact_check_exit_reason(step1_result) or budget.skip_reason()
+                ),
+                Node(
+                    'step4',
+                    partial(self._step4_final_conclusion, session=session, router=router, user_input=user_input),
+                    inputs={'step1_result': 'step1', 'step2_result': 'step2', 'step3_result': 'step3'},
+                    step_number=4,
+                    step_type='final_conclusion',
+                    description='Summarize findings and provide final conclusion'
+                ),
+            ])
+            run = await pipeline.run(session)
+            if run.failed:
+                logger.error(f"Step {run.failed} failed: {run.error_result.get('error')}")
+                return run.error_result or {"error": f"Step {run.failed} failed"}
+            for name in ('step2', 'step3'):
+                if run.status[name] == 'failed':
+                    logger.error(f"Step {name} failed: {run.results[name].get('error')}")
+                    # Continue with partial results
+
+            step1_result = run.results['step1']
+            step2_result = run.results['step2']
+            step3_result = run.results['step3']
+            step4_result = run.results['step4']
             
             # Combine all citations
             all_citations = []
@@ -937,36 +742,22 @@ class ChatGPTWebSearchService:
                 if isinstance(step_result, dict) and "citations" in step_result:
                     all_citations.extend(step_result["citations"])
             
-            # Check if we had any parsing errors
-            parsing_errors = [
-                step_result.get('parsing_error', False) 
-                for step_result in [step1_result, step2_result, step3_result, step4_result]
-            ]
-            had_parsing_errors = any(parsing_errors)
-            
-            # Extract verdict from Step 4 (even if it had parsing errors)
-            verdict_info = step4_result.get("verdict", {
-                "classification": "uncertain",
-                "confidence_score": 0.0,
-                "summary": "Multi-step analysis completed with some formatting issues."
-            })
-            
             # Return combined results in the format expected by enhanced_analysis_service
             final_result = {
                 "web_search_used": True,
                 "multi_step_analysis": True,
-                "had_parsing_errors": had_parsing_errors,
                 "step1_initial_search": step1_result,
                 "step2_deeper_exploration": step2_result,
                 "step3_source_evaluation": step3_result,
                 "step4_final_conclusion": step4_result,
                 "citations": all_citations,
-                "verdict": verdict_info
+                "verdict": step4_result["verdict"],
+                "early_exit": run.status['step2'] == 'skipped' and bool(fact_check_exit_reason(step1_result)),
+                "partial": bool(step4_result.get("partial")),
+                "budget": budget.snapshot()
             }
             
             logger.info(f"Multi-step web search analysis completed for session {session.session_id} with {len(all_citations)} total citations")
-            if had_parsing_errors:
-                logger.warning(f"Analysis completed but had parsing errors in {sum(parsing_errors)} step(s)")
             
             return final_result
             
@@ -975,7 +766,7 @@ class ChatGPTWebSearchService:
             return {"error": str(e)}
 
     # Keep existing methods for backwards compatibility
-    async def analyze_initial_claim_with_search(self, session: FactCheckSession, user_input: str, image_data: Optional[bytes] = None) -> Dict[str, Any]:
+    async def analyze_initial_claim_with_search(self, session: FactCheckSession, user_input: str, image_data: Optional[PreparedImage] = None) -> Dict[str, Any]:
         """
         Perform initial analysis with web search support
         Compatible with existing workflow but enhanced with web search
@@ -986,27 +777,10 @@ class ChatGPTWebSearchService:
             
             Claim: {user_input}
             
-            Please provide a JSON response with the following structure:
-            {{
-                "main_topic": "The primary topic or subject matter",
-                "factual_claims": ["List of specific factual claims that can be verified"],
-                "potential_publishers": ["List of credible news sources likely to have covered this topic"],
-                "search_keywords": ["List of effective search terms for finding relevant information"],
-                "claim_type": "news_event|historical_fact|scientific_claim|statistical_claim|other",
-                "urgency_level": "high|medium|low",
-                "complexity_score": 1-10,
-                "initial_assessment": "Brief initial assessment of the claim's plausibility based on web search",
-                "web_search_insights": {{
-                    "recent_coverage": ["Recent news coverage found"],
-                    "authoritative_sources": ["Authoritative sources that have addressed this topic"],
-                    "initial_credibility": "Assessment based on immediate web search results"
-                }}
-            }}
-            
             Use web search to enhance your initial analysis with current information.
             """
             
-            response_text, citations = await self._make_web_search_request(prompt, image_data)
+            response_text, citations, call_info = await self._make_web_search_request(prompt, image_data, output_type=WebClaimAnalysis)
             
             # Log the interaction
             interaction_data = {
@@ -1020,25 +794,13 @@ class ChatGPTWebSearchService:
                 interaction_type='initial_analysis_web_search',
                 prompt=prompt,
                 response=json.dumps(interaction_data),
-                model_used=self.model,
-                tokens_used=None
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            # Parse JSON response
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["web_search_used"] = True
-                return result
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse JSON response: {response_text}")
-                return {
-                    "error": "Failed to parse response", 
-                    "raw_response": response_text,
-                    "citations": citations,
-                    "web_search_used": True
-                }
+            result = parse_output(WebClaimAnalysis, response_text)
+            result["citations"] = citations
+            result["web_search_used"] = True
+            return result
                 
         except Exception as e:
             logger.error(f"Error in initial claim analysis with web search: {str(e)}")
@@ -1066,30 +828,12 @@ class ChatGPTWebSearchService:
             Sources to evaluate:
             {json.dumps(sources_summary, indent=2)}
             
-            Use web search to verify publisher credibility, look for additional coverage, and cross-reference information. Provide a JSON response with:
-            {{
-                "source_evaluations": [
-                    {{
-                        "url": "source_url",
-                        "credibility_score": 0.0-1.0,
-                        "relevance_score": 0.0-1.0,
-                        "supports_claim": true|false|null,
-                        "key_points": ["Important points from this source"],
-                        "publisher_reliability": "high|medium|low|unknown",
-                        "bias_assessment": "left|center|right|unknown",
-                        "fact_check_notes": "Notes about this source's reliability",
-                        "cross_references": ["Additional sources found that corroborate or contradict"]
-                    }}
-                ],
-                "overall_assessment": "Summary of source quality and consensus",
-                "additional_findings": "What web search revealed about this topic",
-                "consensus_level": "How much agreement exists among reliable sources"
-            }}
+            Use web search to verify publisher credibility, look for additional coverage, and cross-reference information.
             
             Use web search extensively to verify publisher reputations and find additional corroborating sources.
             """
             
-            response_text, citations = await self._make_web_search_request(prompt)
+            response_text, citations, call_info = await self._make_web_search_request(prompt, output_type=WebSourceAssessments)
             
             # Log the interaction
             interaction_data = {
@@ -1103,24 +847,13 @@ class ChatGPTWebSearchService:
                 interaction_type='source_evaluation_web_search',
                 prompt=prompt,
                 response=json.dumps(interaction_data),
-                model_used=self.model,
-                tokens_used=None
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["web_search_used"] = True
-                return result
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse JSON response: {response_text}")
-                return {
-                    "error": "Failed to parse response", 
-                    "raw_response": response_text,
-                    "citations": citations,
-                    "web_search_used": True
-                }
+            result = parse_output(WebSourceAssessments, response_text)
+            result["citations"] = citations
+            result["web_search_used"] = True
+            return result
                 
         except Exception as e:
             logger.error(f"Error in source evaluation with web search: {str(e)}")
@@ -1139,27 +872,12 @@ class ChatGPTWebSearchService:
             Previous evidence and analysis:
             {json.dumps(analysis_data, indent=2)}
             
-            Use web search to find any recent developments, updates, or additional authoritative sources. Provide a comprehensive final verdict in JSON format:
-            {{
-                "verdict": "true|likely_true|uncertain|likely_false|false",
-                "confidence_score": 0.0-1.0,
-                "reasoning": "Detailed explanation of the verdict incorporating latest web search findings",
-                "key_evidence": ["List of most important evidence points including web search findings"],
-                "contradictory_evidence": ["Evidence that contradicts the claim"],
-                "supporting_evidence": ["Evidence that supports the claim"],
-                "source_quality_summary": "Assessment of overall source quality including web search sources",
-                "recent_developments": ["Any recent developments found through web search"],
-                "expert_consensus": "What expert sources and authoritative publications say",
-                "limitations": ["Limitations of this fact-check"],
-                "recommendations": ["Recommendations for further verification if needed"],
-                "summary": "Brief summary suitable for display to users",
-                "last_updated": "Information about when this assessment was made and what current sources say"
-            }}
+            Use web search to find any recent developments, updates, or additional authoritative sources. Provide a comprehensive final verdict.
             
             Use web search extensively to ensure your verdict reflects the most current and comprehensive information available.
             """
             
-            response_text, citations = await self._make_web_search_request(prompt)
+            response_text, citations, call_info = await self._make_web_search_request(prompt, output_type=WebClaimVerdict)
             
             # Log the interaction
             interaction_data = {
@@ -1173,24 +891,13 @@ class ChatGPTWebSearchService:
                 interaction_type='final_verdict_web_search',
                 prompt=prompt,
                 response=json.dumps(interaction_data),
-                model_used=self.model,
-                tokens_used=None
+                **llm_usage.interaction_fields(call_info["usage"])
             )
             
-            try:
-                cleaned_response = self._clean_json_response(response_text)
-                result = json.loads(cleaned_response)
-                result["citations"] = citations
-                result["web_search_used"] = True
-                return result
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse JSON response: {response_text}")
-                return {
-                    "error": "Failed to parse response", 
-                    "raw_response": response_text,
-                    "citations": citations,
-                    "web_search_used": True
-                }
+            result = parse_output(WebClaimVerdict, response_text)
+            result["citations"] = citations
+            result["web_search_used"] = True
+            return result
                 
         except Exception as e:
             logger.error(f"Error in final verdict generation with web search: {str(e)}")
@@ -0,0 +1,194 @@
+"""
+Compact, token-budgeted digests of earlier step results for later prompts
+
+Steps 2-4 and the research steps used to embed earlier results verbatim with
+json.dumps(..., indent=2), including citations, bookkeeping keys, fallback raw
+text and indentation, so every prompt grew with each step. The projector strips
+bookkeeping, removes repeated strings, serializes compactly and, if the digest is
+still over budget, drops low-value fields and trims lists and long strings until
+it fits. Size is measured with tiktoken when its encoding is available locally
+and estimated from character counts otherwise.
+"""
+import copy
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Keys that only matter to our own bookkeeping, never to the model
+BOOKKEEPING_FIELDS = {'citations', 'step', 'llm_cache', 'summary', 'web_search_used'}
+
+# Dropped first, in this order, when a digest is over budget
+LOW_VALUE_FIELDS = [
+    ['search_strategy', 'methodology_suggestions', 'expected_outcomes', 'methodology_summary'],
+    ['follow_up_suggestions', 'related_topics', 'practical_applications', 'case_studies'],
+    ['funding_transparency', 'fact_check_history', 'credibility_factors', 'publisher_reputation'],
+    ['source_recommendations', 'research_quality_assessment', 'source_diversity', 'unique_claims'],
+    ['general_summary', 'topic_overview'],
+]
+
+# Progressively tighter caps applied after low-value fields are gone
+LIST_LIMITS = [8, 5, 3, 2, 1]
+STRING_LIMITS = [600, 300, 150, 80]
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding('o200k_base')
+    except Exception as e:
+        # Missing package or no cached encoding file and no network; estimate instead
+        logger.info(f"tiktoken unavailable, estimating token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens in text with the o200k tokenizer used by gpt-4.1 and o4-mini
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    # About four characters per token for ASCII, roughly one per CJK character
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE_RE.sub(' ', text).strip().casefold()
+
+
+def _clean(value: Any, seen: set) -> Any:
+    """
+    Drop bookkeeping keys, empty values and strings already seen in an earlier field
+    """
+    if isinstance(value, dict):
+        cleaned = {}
+        for key, item in value.items():
+            if key in BOOKKEEPING_FIELDS:
+                continue
+            item = _clean(item, seen)
+            if item not in (None, '', [], {}):
+                cleaned[key] = item
+        return cleaned
+    if isinstance(value, list):
+        cleaned = [_clean(item, seen) for item in value]
+        return [item for item in cleaned if item not in (None, '', [], {})]
+    if isinstance(value, str):
+        text = _WHITESPACE_RE.sub(' ', value).strip()
+        key = _normalize(text)
+        # Short strings are enum values like "high"; only dedupe real content
+        if len(key) > 24:
+            if key in seen:
+                return None
+            seen.add(key)
+        return text
+    return value
+
+
+def _drop_fields(value: Any, fields: set) -> Any:
+    if isinstance(value, dict):
+        return {key: _drop_fields(item, fields) for key, item in value.items() if key not in fields}
+    if isinstance(value, list):
+        return [_drop_fields(item, fields) for item in value]
+    return value
+
+
+def _limit(value: Any, max_items: Optional[int], max_chars: Optional[int]) -> Any:
+    if isinstance(value, dict):
+        return {key: _limit(item, max_items, max_chars) for key, item in value.items()}
+    if isinstance(value, list):
+        items = value[:max_items] if max_items else value
+        return [_limit(item, max_items, max_chars) for item in items]
+    if isinstance(value, str) and max_chars and len(value) > max_chars:
+        return value[:max_chars - 1].rstrip() + '…'
+    return value
+
+
+def _render(sections: List[Tuple[str, Any]]) -> str:
+    return '\n'.join(
+        f"{label}: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}"
+        for label, data in sections
+    )
+
+
+def _fit(sections: List[Tuple[str, Any]], budget: int) -> str:
+    text = _render(sections)
+    if count_tokens(text) <= budget:
+        return text
+
+    # Lowest-value fields go first
+    dropped = set()
+    for group in LOW_VALUE_FIELDS:
+        dropped.update(group)
+        sections = [(label, _drop_fields(data, dropped)) for label, data in sections]
+        text = _render(sections)
+        if count_tokens(text) <= budget:
+            return text
+
+    # Then shorter lists and strings
+    for max_items, max_chars in zip(LIST_LIMITS, STRING_LIMITS + STRING_LIMITS[-1:]):
+        limited = [(label, _limit(data, max_items, max_chars)) for label, data in sections]
+        text = _render(limited)
+        if count_tokens(text) <= budget:
+            return text
+
+    # Last resort: hard cut, keeping whole characters
+    while count_tokens(text) > budget and len(text) > 1:
+        text = text[:int(len(text) * 0.9)]
+    return text + '…'
+
+
+def project_context(sections: List[Tuple[str, Dict[str, Any]]], budget: Optional[int] = None) -> str:
+    """
+    Build a compact digest of earlier step results that fits within a token budget
+
+    Args:
+        sections: (label, step result) pairs, oldest first; earlier steps win deduplication
+        budget: Maximum tokens for the digest, defaults to CONTEXT_TOKEN_BUDGET
+
+    Returns:
+        str: One "label: {compact json}" line per section
+    """
+    if budget is None:
+        budget = getattr(settings, 'CONTEXT_TOKEN_BUDGET', 3000)
+
+    seen = set()
+    cleaned = [(label, _clean(copy.deepcopy(data or {}), seen)) for label, data in sections]
+    digest = _fit(cleaned, budget)
+
+    logger.debug(f"Projected {len(sections)} step results into {count_tokens(digest)} tokens (budget {budget})")
+    return digest
+
+
+def project_citations(citations: List[Dict[str, Any]], budget: Optional[int] = None) -> str:
+    """
+    Build a deduplicated url/title list of citations that fits within a token budget
+    """
+    if budget is None:
+        budget = getattr(settings, 'CITATION_TOKEN_BUDGET', 1500)
+
+    unique = []
+    seen_urls = set()
+    for citation in citations or []:
+        url = (citation.get('url') or '').strip()
+        if not url or url in seen_urls:
+            continue
+        seen_urls.add(url)
+        unique.append({'url': url, 'title': citation.get('title', '')})
+
+    for limit in [None, 40, 25, 15, 10, 5]:
+        text = json.dumps(unique[:limit] if limit else unique, ensure_ascii=False, separators=(',', ':'))
+        if count_tokens(text) <= budget:
+            return text
+    return text
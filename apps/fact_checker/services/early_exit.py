@@ -0,0 +1,72 @@
+"""
+Early-exit policy for the web search fact-check
+
+When the initial search already turns up a published fact-check of the same
+claim by a trusted fact-checking organization, the deeper exploration and
+source evaluation rarely change the verdict. The policy is checked once step 1
+has finished; if it passes, steps 2 and 3 are skipped and step 4 writes a
+lightweight conclusion from the step 1 findings.
+
+The fact-check must come from one of EARLY_EXIT_FACT_CHECKERS, carry a clear
+rating and at least EARLY_EXIT_MIN_CONFIDENCE, and its URL must be among the
+citations web search actually returned, so a recalled or invented link never
+ends the analysis.
+"""
+import logging
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Ratings that leave the claim open; these never end the analysis early
+UNCLEAR_RATINGS = {'mixed', 'unproven'}
+
+
+def _domain(url: str) -> str:
+    netloc = urlparse(url or '').netloc.lower()
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+def _normalize_url(url: str) -> str:
+    """
+    Host and path of a URL; scheme, query string (e.g. utm_source) and fragment don't change the page
+    """
+    return f"{_domain(url)}{urlparse(url or '').path.rstrip('/')}"
+
+
+def _is_trusted(domain: str) -> bool:
+    trusted = getattr(settings, 'EARLY_EXIT_FACT_CHECKERS', [])
+    return any(domain == checker or domain.endswith(f".{checker}") for checker in trusted)
+
+
+def fact_check_exit_reason(step1_result: Dict[str, Any]) -> Optional[str]:
+    """
+    Decide whether the initial search settles the claim
+
+    Returns:
+        The reason to skip the remaining research, or None to continue
+    """
+    if not getattr(settings, 'EARLY_EXIT_ENABLED', False) or step1_result.get('error'):
+        return None
+
+    fact_check = step1_result.get('existing_fact_check')
+    if not fact_check or fact_check.get('rating') in UNCLEAR_RATINGS:
+        return None
+
+    min_confidence = getattr(settings, 'EARLY_EXIT_MIN_CONFIDENCE', 0.85)
+    if fact_check.get('confidence', 0) < min_confidence:
+        return None
+
+    domain = _domain(fact_check.get('url'))
+    if not _is_trusted(domain):
+        return None
+
+    # The same page, not just any article from the fact-checker's domain
+    cited_urls = {_normalize_url(citation.get('url')) for citation in step1_result.get('citations', [])}
+    if _normalize_url(fact_check.get('url')) not in cited_urls:
+        logger.info(f"Existing fact-check {fact_check.get('url')} was not among the search citations, continuing")
+        return None
+
+    return f"{fact_check.get('publisher')} already rated this claim {fact_check['rating']} ({fact_check['url']})"
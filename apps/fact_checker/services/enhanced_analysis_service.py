@@ -1,5 +1,6 @@
 import logging
 import asyncio
+from functools import partial
 from typing import Dict, List, Optional, Any
 from django.utils import timezone
 from asgiref.sync import sync_to_async
@@ -8,29 +9,61 @@ from apps.fact_checker.services.chatgpt_service import ChatGPTService
 from apps.fact_checker.services.chatgpt_web_search_service import ChatGPTWebSearchService
 from apps.fact_checker.services.chatgpt_shallow_analysis_service import ChatGPTResearchService
 from apps.fact_checker.services.google_search_service import GoogleSearchService
+from apps.fact_checker.services.image_pipeline import PreparedImage, prepare_image
 from apps.fact_checker.services.web_crawler_service import WebCrawlerService
+from apps.fact_checker.services.pipeline import Node, Pipeline
+from apps.fact_checker.services.session_budget import SessionBudget
+from apps.fact_checker.services.step_summaries import build_step_summary
 
 logger = logging.getLogger(__name__)
 
+# Session error message for the traditional workflow step that stopped the analysis
+TRADITIONAL_STEP_ERRORS = {
+    'initial_analysis': "Initial analysis failed",
+    'search': "No sources found",
+    'crawl': "Content extraction failed",
+    'source_evaluation': "Source evaluation failed",
+    'final_verdict': "Final verdict generation failed",
+}
+
 
 class EnhancedAnalysisService:
     """
     Enhanced analysis service that can use traditional workflow, web search workflow, or research workflow
     """
     
-    def __init__(self, use_web_search: bool = False, use_research: bool = False):
+    def __init__(self, use_web_search: bool = False, use_research: bool = False, persistent: bool = False, batch: bool = False):
         self.use_web_search = use_web_search
         self.use_research = use_research
+        # Persistent services are reused across tasks, so their crawler stays open
+        # until shutdown() instead of being closed after every analysis
+        self.persistent = persistent
+        # Bulk analyses (web search and research only) go through the Batch API
+        self.batch = batch
         
         if use_research:
-            self.research_service = ChatGPTResearchService()
+            self.research_service = ChatGPTResearchService(batch=batch)
         elif use_web_search:
-            self.chatgpt_service = ChatGPTWebSearchService()
+            self.chatgpt_service = ChatGPTWebSearchService(batch=batch)
         else:
             self.chatgpt_service = ChatGPTService()
             self.search_service = GoogleSearchService()
             self.crawler_service = WebCrawlerService()
     
+    async def start(self) -> None:
+        """
+        Warm up long-lived resources (the crawler browser for the traditional workflow)
+        """
+        if hasattr(self, 'crawler_service'):
+            await self.crawler_service.start()
+    
+    async def shutdown(self) -> None:
+        """
+        Release long-lived resources held by this service
+        """
+        if hasattr(self, 'crawler_service'):
+            await self.crawler_service.cleanup()
+    
     async def perform_complete_analysis(self, session: FactCheckSession) -> Dict[str, Any]:
         """
         Perform complete analysis using traditional, web search, or research workflow
@@ -54,7 +87,7 @@ class EnhancedAnalysisService:
             return await self._handle_analysis_error(session, f"Analysis error: {str(e)}", {})
         finally:
             # Cleanup resources if using traditional workflow
-            if not self.use_web_search and not self.use_research and hasattr(self, 'crawler_service'):
+            if not self.persistent and not self.use_web_search and not self.use_research and hasattr(self, 'crawler_service'):
                 await self.crawler_service.cleanup()
     
     async def _perform_web_search_analysis(self, session: FactCheckSession) -> Dict[str, Any]:
@@ -68,10 +101,13 @@ class EnhancedAnalysisService:
                 image_path = session.uploaded_image.path
                 image_data = await sync_to_async(self._read_image_data)(image_path)
             
+            # The session's time, token and web search limits apply to every step
+            budget = await sync_to_async(SessionBudget.for_session)(session, batch=self.batch)
+
             # Perform multi-step comprehensive analysis with web search
             # The ChatGPTWebSearchService now handles creating its own AnalysisStep records
             result = await self.chatgpt_service.analyze_claim_with_web_search(
-                session, session.user_input, image_data
+                session, session.user_input, image_data, budget=budget
             )
             
             if result.get('error'):
@@ -115,6 +151,9 @@ class EnhancedAnalysisService:
                 'detailed_results': result,
                 'web_search_used': True,
                 'multi_step_analysis': result.get('multi_step_analysis', False),
+                'early_exit': result.get('early_exit', False),
+                'partial': result.get('partial', False),
+                'budget': result.get('budget'),
                 'citations': citations
             }
             
@@ -133,12 +172,24 @@ class EnhancedAnalysisService:
                 image_path = session.uploaded_image.path
                 image_data = await sync_to_async(self._read_image_data)(image_path)
             
+            # The session's time, token and web search limits apply to every step
+            budget = await sync_to_async(SessionBudget.for_session)(session, batch=self.batch)
+
             # Perform multi-step comprehensive research with web search
             # The ChatGPTResearchService handles creating its own AnalysisStep records
             result = await self.research_service.conduct_research_with_web_search(
-                session, session.user_input, image_data
+                session, session.user_input, image_data, budget=budget
             )
             
+            if result.get('deferred'):
+                # Waiting on background responses; the session stays 'analyzing' until it is run again
+                return {
+                    'success': True,
+                    'session_id': str(session.session_id),
+                    'status': 'analyzing',
+                    'deferred': result['deferred']
+                }
+            
             if result.get('error'):
                 return await self._handle_analysis_error(session, "Research analysis failed", result)
             
@@ -154,7 +205,8 @@ class EnhancedAnalysisService:
             # Update session with final results
             session.status = 'completed'
             session.final_verdict = 'completed'  # Research doesn't have traditional verdicts
-            session.confidence_score = 0.9  # High confidence for completed research
+            # High confidence for completed research, lower for a report cut short by the session budget
+            session.confidence_score = 0.5 if result.get('partial') else 0.9
             session.analysis_summary = full_markdown  # Store full markdown content
             session.completed_at = timezone.now()
             await sync_to_async(session.save)()
@@ -182,7 +234,9 @@ class EnhancedAnalysisService:
                 'web_search_used': True,
                 'multi_step_analysis': True,
                 'citations': citations,
-                'methodology': result.get('methodology', 'Three-step web search research process')
+                'methodology': result.get('methodology', 'Three-step web search research process'),
+                'partial': result.get('partial', False),
+                'budget': result.get('budget')
             }
             
         except Exception as e:
@@ -193,38 +247,60 @@ class EnhancedAnalysisService:
         """
         Perform analysis using traditional workflow with manual search and crawling
         """
-        # Step 1: Initial Analysis with ChatGPT
-        initial_analysis = await self._step_initial_analysis(session)
-        if not initial_analysis or initial_analysis.get('error'):
-            return await self._handle_analysis_error(session, "Initial analysis failed", initial_analysis)
-        
-        # Step 2: Generate search queries
-        search_queries = self._generate_search_queries(initial_analysis)
-        
-        # Step 3: Search for sources
-        search_results = await self._step_search_sources(session, search_queries)
-        if not search_results:
-            return await self._handle_analysis_error(session, "No sources found", {})
-        
-        # Step 4: Crawl and extract content
-        crawled_sources = await self._step_crawl_sources(session, search_results)
-        if not crawled_sources:
-            return await self._handle_analysis_error(session, "Content extraction failed", {})
-        
-        # Step 5: Evaluate sources with ChatGPT
-        source_evaluation = await self._step_evaluate_sources(session, crawled_sources)
-        if not source_evaluation or source_evaluation.get('error'):
-            return await self._handle_analysis_error(session, "Source evaluation failed", source_evaluation)
-        
-        # Step 6: Generate final verdict
-        final_verdict = await self._step_generate_verdict(session, {
-            'initial_analysis': initial_analysis,
-            'sources': crawled_sources,
-            'source_evaluation': source_evaluation
-        })
-        
-        if not final_verdict or final_verdict.get('error'):
-            return await self._handle_analysis_error(session, "Final verdict generation failed", final_verdict)
+        # Each step needs the one before it, so this pipeline is a chain
+        pipeline = Pipeline([
+            Node(
+                'initial_analysis',
+                partial(self._step_initial_analysis, session=session),
+                step_number=1,
+                step_type='topic_analysis',
+                description='Analyzing claim and identifying key topics'
+            ),
+            Node(
+                'search',
+                lambda step, initial_analysis: self._step_search_sources(
+                    step, session, self._generate_search_queries(initial_analysis)
+                ),
+                inputs={'initial_analysis': 'initial_analysis'},
+                step_number=2,
+                step_type='source_search',
+                description='Searching for relevant sources',
+                restore=lambda data: data['search_results']
+            ),
+            Node(
+                'crawl',
+                partial(self._step_crawl_sources, session=session),
+                inputs={'search_results': 'search'},
+                step_number=3,
+                step_type='content_extraction',
+                description='Extracting content from sources',
+                restore=lambda data: data['crawled_sources']
+            ),
+            Node(
+                'source_evaluation',
+                partial(self._step_evaluate_sources, session=session),
+                inputs={'crawled_sources': 'crawl'},
+                step_number=4,
+                step_type='source_evaluation',
+                description='Evaluating source credibility and relevance'
+            ),
+            Node(
+                'final_verdict',
+                lambda step, initial_analysis, sources, source_evaluation: self._step_generate_verdict(step, session, {
+                    'initial_analysis': initial_analysis,
+                    'sources': sources,
+                    'source_evaluation': source_evaluation
+                }),
+                inputs={'initial_analysis': 'initial_analysis', 'sources': 'crawl', 'source_evaluation': 'source_evaluation'},
+                step_number=5,
+                step_type='final_verdict',
+                description='Generating final verdict'
+            ),
+        ])
+        run = await pipeline.run(session)
+        if run.failed:
+            return await self._handle_analysis_error(session, TRADITIONAL_STEP_ERRORS[run.failed], run.error_result)
+        final_verdict = run.results['final_verdict']
         
         # Update session with final results
         session.status = 'completed'
@@ -298,7 +374,7 @@ class EnhancedAnalysisService:
             return await self._handle_analysis_error(session, f"Hybrid analysis error: {str(e)}", {})
         finally:
             # Cleanup resources
-            if hasattr(self, 'crawler_service'):
+            if not self.persistent and hasattr(self, 'crawler_service'):
                 await self.crawler_service.cleanup()
     
     async def _store_web_search_citations(self, session: FactCheckSession, citations: List[Dict[str, Any]]) -> None:
@@ -333,17 +409,9 @@ class EnhancedAnalysisService:
     
     
     # Include methods from original AnalysisService for traditional workflow
-    async def _step_initial_analysis(self, session: FactCheckSession) -> Dict[str, Any]:
+    async def _step_initial_analysis(self, step: AnalysisStep, session: FactCheckSession) -> Dict[str, Any]:
         """Step 1: Initial analysis with ChatGPT (traditional)"""
         try:
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=1,
-                step_type='topic_analysis',
-                description='Analyzing claim and identifying key topics',
-                status='in_progress'
-            )
-            
             # Get image data if present
             image_data = None
             if session.uploaded_image:
@@ -365,6 +433,7 @@ class EnhancedAnalysisService:
             step.status = 'completed'
             step.completed_at = timezone.now()
             step.result_data = result
+            step.summary = build_step_summary(step.step_type, step.result_data, session.user_input)
             await sync_to_async(step.save)()
             
             return result
@@ -391,17 +460,9 @@ class EnhancedAnalysisService:
         
         return queries[:5]  # Overall limit of 5 queries
     
-    async def _step_search_sources(self, session: FactCheckSession, search_queries: List[str]) -> List[Dict[str, Any]]:
+    async def _step_search_sources(self, step: AnalysisStep, session: FactCheckSession, search_queries: List[str]) -> List[Dict[str, Any]]:
         """Step 2: Search for sources using Google Search"""
         try:
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=2,
-                step_type='source_search',
-                description='Searching for relevant sources',
-                status='in_progress'
-            )
-            
             all_results = []
             
             for query in search_queries[:3]:  # Limit to top 3 queries
@@ -430,6 +491,7 @@ class EnhancedAnalysisService:
             step.status = 'completed'
             step.completed_at = timezone.now()
             step.result_data = {'search_results': unique_results[:10]}  # Limit to top 10
+            step.summary = build_step_summary(step.step_type, step.result_data, session.user_input)
             await sync_to_async(step.save)()
             
             return unique_results[:10]
@@ -438,17 +500,9 @@ class EnhancedAnalysisService:
             logger.error(f"Error in source search: {str(e)}")
             return []
     
-    async def _step_crawl_sources(self, session: FactCheckSession, search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def _step_crawl_sources(self, step: AnalysisStep, session: FactCheckSession, search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Step 3: Crawl and extract content from sources"""
         try:
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=3,
-                step_type='content_extraction',
-                description='Extracting content from sources',
-                status='in_progress'
-            )
-            
             crawled_sources = []
             
             # Process sources concurrently but with a limit
@@ -497,7 +551,9 @@ class EnhancedAnalysisService:
             # Mark step as completed
             step.status = 'completed'
             step.completed_at = timezone.now()
-            step.result_data = {'crawled_count': len(crawled_sources)}
+            # The crawled sources are kept so a resumed analysis can skip crawling
+            step.result_data = {'crawled_count': len(crawled_sources), 'crawled_sources': crawled_sources}
+            step.summary = build_step_summary(step.step_type, step.result_data, session.user_input)
             await sync_to_async(step.save)()
             
             return crawled_sources
@@ -506,17 +562,9 @@ class EnhancedAnalysisService:
             logger.error(f"Error in content extraction: {str(e)}")
             return []
     
-    async def _step_evaluate_sources(self, session: FactCheckSession, crawled_sources: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _step_evaluate_sources(self, step: AnalysisStep, session: FactCheckSession, crawled_sources: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Step 4: Evaluate sources with ChatGPT"""
         try:
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=4,
-                step_type='source_evaluation',
-                description='Evaluating source credibility and relevance',
-                status='in_progress'
-            )
-            
             result = await self.chatgpt_service.evaluate_sources(session, crawled_sources)
             
             if result.get('error'):
@@ -543,6 +591,7 @@ class EnhancedAnalysisService:
             step.status = 'completed'
             step.completed_at = timezone.now()
             step.result_data = result
+            step.summary = build_step_summary(step.step_type, step.result_data, session.user_input)
             await sync_to_async(step.save)()
             
             return result
@@ -551,17 +600,9 @@ class EnhancedAnalysisService:
             logger.error(f"Error in source evaluation: {str(e)}")
             return {"error": str(e)}
     
-    async def _step_generate_verdict(self, session: FactCheckSession, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _step_generate_verdict(self, step: AnalysisStep, session: FactCheckSession, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
         """Step 5: Generate final verdict"""
         try:
-            step = await sync_to_async(AnalysisStep.objects.create)(
-                session=session,
-                step_number=5,
-                step_type='final_verdict',
-                description='Generating final verdict',
-                status='in_progress'
-            )
-            
             result = await self.chatgpt_service.generate_final_verdict(session, analysis_data)
             
             if result.get('error'):
@@ -574,6 +615,7 @@ class EnhancedAnalysisService:
             step.status = 'completed'
             step.completed_at = timezone.now()
             step.result_data = result
+            step.summary = build_step_summary(step.step_type, step.result_data, session.user_input)
             await sync_to_async(step.save)()
             
             return result
@@ -598,11 +640,10 @@ class EnhancedAnalysisService:
             'error_data': error_data
         }
     
-    def _read_image_data(self, image_path: str) -> bytes:
-        """Read image data from file path"""
+    def _read_image_data(self, image_path: str) -> Optional[PreparedImage]:
+        """Read an uploaded image, downscaled and recompressed once for every step that sends it"""
         try:
-            with open(image_path, 'rb') as image_file:
-                return image_file.read()
+            return prepare_image(image_path)
         except Exception as e:
             logger.error(f"Error reading image file {image_path}: {str(e)}")
             return None
@@ -622,6 +663,8 @@ class EnhancedAnalysisService:
         total_steps = len(progress_steps)
         completed_steps = len([step for step in progress_steps if step['status'] == 'completed'])
         failed_steps = len([step for step in progress_steps if step['status'] == 'failed'])
+        # Steps skipped by an early exit are done as far as progress is concerned
+        skipped_steps = len([step for step in progress_steps if step['status'] == 'skipped'])
         current_step = next((step for step in progress_steps if step['status'] == 'in_progress'), None)
         
         # Determine expected steps based on analysis type
@@ -637,7 +680,7 @@ class EnhancedAnalysisService:
         else:
             expected_steps = 5  # Traditional analysis
             
-        progress_percentage = (completed_steps / expected_steps) * 100 if expected_steps > 0 else 0
+        progress_percentage = ((completed_steps + skipped_steps) / expected_steps) * 100 if expected_steps > 0 else 0
         
         return {
             'session_id': str(session.session_id),
@@ -647,6 +690,7 @@ class EnhancedAnalysisService:
             'total_steps': total_steps,
             'expected_steps': expected_steps,
             'failed_steps': failed_steps,
+            'skipped_steps': skipped_steps,
             'multi_step_web_search': multi_step_web_search,
             'current_step': {
                 'step_number': current_step['step_number'] if current_step else None,
@@ -0,0 +1,201 @@
+"""
+Image preprocessing for vision requests
+
+An uploaded image used to be sent as-is by every step that looked at it: the
+full-size original, base64-encoded again for each call and always labelled
+image/jpeg whatever its real format. prepare_image() runs once per analysis
+run in the worker and:
+
+- detects the real format with Pillow and applies the EXIF orientation;
+- downscales to what the vision model actually looks at. At high detail the
+  model fits an image into 2048x2048 and then shrinks its short side to
+  768px (IMAGE_MAX_DIMENSION, IMAGE_MAX_SHORT_SIDE), so any pixels past that
+  are uploaded, billed for bandwidth and thrown away;
+- recompresses to JPEG at IMAGE_JPEG_QUALITY, flattening transparency onto
+  white. The original is kept when it is already within bounds, in a format
+  the API accepts and smaller than the recompressed copy;
+- returns a PreparedImage whose data URL is encoded once and shared by every
+  step of the run.
+
+Prepared images are stored under IMAGE_CACHE_DIR, keyed on the original's
+content and the settings above, so resumed runs and repeated uploads skip the
+work. An image Pillow cannot read is sent unchanged under its sniffed type.
+"""
+import base64
+import hashlib
+import io
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+from functools import cached_property
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Formats the vision models accept, by Pillow format name
+SUPPORTED_FORMATS = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'WEBP': 'image/webp',
+    'GIF': 'image/gif',
+}
+
+EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/gif': '.gif',
+}
+
+# EXIF tag holding the camera orientation
+ORIENTATION_TAG = 0x0112
+
+
+class PreparedImage:
+    """An image ready to send, with its data URL encoded on first use"""
+
+    def __init__(self, data: bytes, mime_type: str, width: Optional[int] = None, height: Optional[int] = None, original_size: Optional[int] = None):
+        self.data = data
+        self.mime_type = mime_type
+        self.width = width
+        self.height = height
+        self.original_size = original_size if original_size is not None else len(data)
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @cached_property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+    def __bool__(self) -> bool:
+        return bool(self.data)
+
+    def __repr__(self) -> str:
+        return f"<PreparedImage {self.mime_type} {self.width}x{self.height} {self.size} bytes>"
+
+
+def target_size(width: int, height: int) -> Tuple[int, int]:
+    """
+    Get the largest size the vision model uses for an image of this size
+    """
+    long_side, short_side = max(width, height), min(width, height)
+    scale = min(1.0, settings.IMAGE_MAX_DIMENSION / long_side, settings.IMAGE_MAX_SHORT_SIDE / short_side)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _recompress(image: Image.Image) -> bytes:
+    """
+    Encode an image as JPEG, flattening any transparency onto white
+    """
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=settings.IMAGE_JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def prepare_image_bytes(data: bytes, name: str = '') -> PreparedImage:
+    """
+    Downscale and recompress image bytes for a vision request
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            source_format = original.format
+            animated = getattr(original, 'is_animated', False)
+            rotated = original.getexif().get(ORIENTATION_TAG, 1) != 1
+            image = ImageOps.exif_transpose(original) if rotated else original
+            size = target_size(*image.size)
+            if size != image.size:
+                image = image.resize(size, Image.LANCZOS)
+
+            recompressed = _recompress(image)
+            mime_type = SUPPORTED_FORMATS.get(source_format)
+            if mime_type and not animated and not rotated and size == original.size and len(data) <= len(recompressed):
+                return PreparedImage(data, mime_type, size[0], size[1], len(data))
+            return PreparedImage(recompressed, 'image/jpeg', size[0], size[1], len(data))
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        mime_type = mimetypes.guess_type(name)[0] or 'image/jpeg'
+        logger.warning(f"Could not preprocess image {name or '(upload)'}, sending it as {mime_type}: {str(e)}")
+        return PreparedImage(data, mime_type)
+
+
+def _cache_key(data: bytes) -> str:
+    material = hashlib.sha256(data)
+    material.update(json.dumps([settings.IMAGE_MAX_DIMENSION, settings.IMAGE_MAX_SHORT_SIDE, settings.IMAGE_JPEG_QUALITY]).encode('utf-8'))
+    return material.hexdigest()
+
+
+def _load_cached(cache_dir: Path, key: str, original_size: int) -> Optional[PreparedImage]:
+    for mime_type, extension in EXTENSIONS.items():
+        path = cache_dir / f"{key}{extension}"
+        if path.exists():
+            data = path.read_bytes()
+            try:
+                with Image.open(io.BytesIO(data)) as image:
+                    width, height = image.size
+            except (UnidentifiedImageError, OSError):
+                width = height = None
+            return PreparedImage(data, mime_type, width, height, original_size)
+    return None
+
+
+def _store_cached(cache_dir: Path, key: str, image: PreparedImage) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(image.data)
+        os.replace(tmp_path, cache_dir / f"{key}{EXTENSIONS.get(image.mime_type, '.jpg')}")
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+
+def prepare_image(image_path: str) -> PreparedImage:
+    """
+    Prepare an uploaded image file, reusing the stored copy from an earlier run
+    """
+    data = Path(image_path).read_bytes()
+    cache_dir = Path(settings.IMAGE_CACHE_DIR) if settings.IMAGE_CACHE_DIR else None
+    key = _cache_key(data)
+
+    if cache_dir:
+        cached = _load_cached(cache_dir, key, len(data))
+        if cached is not None:
+            return cached
+
+    prepared = prepare_image_bytes(data, image_path)
+    logger.info(
+        f"Prepared image {os.path.basename(image_path)}: {prepared.original_size} -> {prepared.size} bytes, "
+        f"{prepared.mime_type} {prepared.width}x{prepared.height}"
+    )
+    if cache_dir and prepared.width:
+        try:
+            _store_cached(cache_dir, key, prepared)
+        except OSError as e:
+            logger.error(f"Error storing prepared image {key[:12]}: {str(e)}")
+    return prepared
+
+
+def as_prepared(image: Union[PreparedImage, bytes, None]) -> Optional[PreparedImage]:
+    """
+    Accept raw bytes from callers that have not prepared their image
+    """
+    if not image:
+        return None
+    if isinstance(image, PreparedImage):
+        return image
+    return prepare_image_bytes(image)
@@ -0,0 +1,209 @@
+"""
+Content-addressed cache for web search LLM responses
+
+Entries are keyed on everything that determines the model's answer (model, tools
+config, normalized prompt and image hash), so a repeated claim can skip the
+network entirely. Entries expire after LLM_CACHE_TTL seconds to keep news
+reasonably fresh, and the least recently used entries are evicted once the
+cache holds more than LLM_CACHE_MAX_ENTRIES.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Collapse whitespace so indentation changes in prompt templates don't miss the cache
+    """
+    return _WHITESPACE_RE.sub(' ', prompt or '').strip()
+
+
+def hash_image(image_data: Optional[bytes]) -> Optional[str]:
+    """
+    Get a stable content hash for an uploaded image
+    """
+    if not image_data:
+        return None
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def build_cache_key(model: str, tools: List[Dict[str, Any]], prompt: str, image_data: Optional[bytes] = None, text_format: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build the content address for a web search request
+    """
+    material = json.dumps({
+        'model': model,
+        'tools': tools,
+        'prompt': normalize_prompt(prompt),
+        'image': hash_image(image_data),
+        'text': text_format,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class RedisCacheBackend:
+    """Shared cache across workers; a sorted set of access times drives LRU eviction"""
+
+    def __init__(self, url: str, ttl: int, max_entries: int, prefix: str = 'llm_cache'):
+        import redis.asyncio as aioredis
+
+        self.redis = aioredis.Redis.from_url(url)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.lru_key = f"{prefix}:lru"
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.redis.get(self._key(key))
+        if value is None:
+            await self.redis.zrem(self.lru_key, key)
+            return None
+        await self.redis.zadd(self.lru_key, {key: time.time()})
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(self._key(key), value, ex=self.ttl)
+            pipe.zadd(self.lru_key, {key: time.time()})
+            pipe.zcard(self.lru_key)
+            results = await pipe.execute()
+
+        overflow = results[-1] - self.max_entries
+        if overflow > 0:
+            evicted = await self.redis.zpopmin(self.lru_key, overflow)
+            if evicted:
+                await self.redis.delete(*[self._key(k.decode() if isinstance(k, bytes) else k) for k, _ in evicted])
+
+
+class DiskCacheBackend:
+    """Per-host cache of one file per entry; file mtime records the last access"""
+
+    def __init__(self, directory: str, ttl: int, max_entries: int):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _get_sync(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            stored_at, value = path.read_bytes().split(b'\n', 1)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # Expiry counts from the write time stored in the entry; mtime tracks last access
+        if time.time() - float(stored_at) > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+
+        os.utime(path)
+        return value
+
+    def _set_sync(self, key: str, value: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(f"{time.time()}\n".encode('utf-8') + value)
+        os.replace(tmp_path, path)
+        self._evict_sync()
+
+    def _evict_sync(self) -> None:
+        entries = list(self.directory.glob('*.json'))
+        overflow = len(entries) - self.max_entries
+        if overflow <= 0:
+            return
+
+        def last_access(p: Path) -> float:
+            try:
+                return p.stat().st_mtime
+            except FileNotFoundError:
+                return 0.0
+
+        for path in sorted(entries, key=last_access)[:overflow]:
+            path.unlink(missing_ok=True)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        await asyncio.to_thread(self._set_sync, key, value)
+
+
+class LLMResponseCache:
+    """Facade over the configured backend; backend errors degrade to cache misses"""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            value = await self.backend.get(key)
+            return json.loads(value) if value else None
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {str(e)}")
+            return None
+
+    async def set(self, key: str, payload: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self.backend.set(key, json.dumps(payload).encode('utf-8'))
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {str(e)}")
+
+
+# Like the OpenAI client, async Redis connections are bound to one event loop
+_caches: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LLMResponseCache]" = weakref.WeakKeyDictionary()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """
+    Get the LLM response cache configured by LLM_CACHE_BACKEND for the running loop
+    """
+    loop = asyncio.get_running_loop()
+    cache = _caches.get(loop)
+    if cache is None:
+        backend_name = getattr(settings, 'LLM_CACHE_BACKEND', 'none')
+        ttl = getattr(settings, 'LLM_CACHE_TTL', 6 * 60 * 60)
+        max_entries = getattr(settings, 'LLM_CACHE_MAX_ENTRIES', 10000)
+
+        backend = None
+        if backend_name == 'redis':
+            backend = RedisCacheBackend(settings.LLM_CACHE_REDIS_URL, ttl, max_entries)
+        elif backend_name == 'disk':
+            backend = DiskCacheBackend(settings.LLM_CACHE_DIR, ttl, max_entries)
+        elif backend_name != 'none':
+            logger.warning(f"Unknown LLM_CACHE_BACKEND '{backend_name}', caching disabled")
+
+        cache = LLMResponseCache(backend)
+        _caches[loop] = cache
+    return cache
+
+
+def empty_cache_stats() -> Dict[str, int]:
+    return {'hits': 0, 'misses': 0, 'bytes_saved': 0}
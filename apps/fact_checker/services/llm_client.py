@@ -0,0 +1,210 @@
+"""
+Shared asynchronous LLM client used by all ChatGPT services
+
+Calls go to the providers in llm_providers: LLM_PROVIDER first, then each of
+LLM_FAILOVER_PROVIDERS in order. A provider is failed over when its call
+still fails after resilience.call_with_resilience has retried it and tried the
+fallback model, or when its circuit is open. Requests the API rejected as bad
+are never sent to the next provider. call_stats["provider"] names the provider
+that answered.
+"""
+import logging
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from openai import AsyncOpenAI
+from django.conf import settings
+
+from apps.fact_checker.services import llm_usage
+from apps.fact_checker.services.llm_providers import LLMProvider, OpenAIProvider, close_providers, get_provider, get_providers
+from apps.fact_checker.services.resilience import CircuitOpenError, ResponseFailedError, call_with_resilience, is_retryable
+from apps.fact_checker.services.rate_limiter import PRIORITY_NORMAL, estimate_request_tokens, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+def get_async_client() -> AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client of the "openai" provider for the running event loop
+
+    For OpenAI-only endpoints such as the Batch API; model calls go through the providers.
+    """
+    provider = get_provider('openai')
+    if not isinstance(provider, OpenAIProvider):
+        raise ValueError("LLM provider 'openai' must use the openai backend")
+    return provider.client()
+
+
+def warm_up() -> None:
+    """
+    Open the clients of the configured providers on the running event loop
+    """
+    for provider in get_providers():
+        if isinstance(provider, OpenAIProvider):
+            provider.client()
+
+
+async def _with_failover(
+    send: Callable[[LLMProvider, Dict[str, Any]], Awaitable[Any]],
+    request: Dict[str, Any],
+    call_stats: Optional[Dict[str, Any]] = None,
+    hedge: bool = True,
+    can_retry: Callable[[], bool] = lambda: True,
+) -> Any:
+    """
+    Run send(provider, request) with resilience on each provider in turn until one answers
+    """
+    providers = get_providers()
+    last_error = None
+    for index, provider in enumerate(providers):
+        if index:
+            logger.warning(f"Failing over from LLM provider {providers[index - 1].name} to {provider.name} after {type(last_error).__name__}: {str(last_error)}")
+        provider_request = {**request, 'model': provider.map_model(request['model'])}
+        try:
+            response = await call_with_resilience(
+                partial(send, provider), provider_request, call_stats, hedge, can_retry,
+                # The primary keeps plain per-model circuits; others get their own
+                scope=provider.name if index else '',
+            )
+        except Exception as e:
+            degraded = is_retryable(e) or isinstance(e, CircuitOpenError)
+            if index == len(providers) - 1 or not degraded or not can_retry():
+                raise
+            last_error = e
+            continue
+
+        if call_stats is not None:
+            call_stats['provider'] = provider.name
+            call_stats['metered'] = provider.metered
+        return response
+    raise last_error
+
+
+async def _reserve(provider: LLMProvider, request: Dict[str, Any], priority: int, call_stats: Optional[Dict[str, Any]]) -> int:
+    """
+    Queue for the shared rate limit and record the wait in call_stats
+    """
+    limiter = get_rate_limiter() if provider.metered else None
+    estimated_tokens = estimate_request_tokens(request) if limiter else 0
+    waited_ms = await limiter.acquire(request['model'], estimated_tokens, priority) if limiter else 0
+    if call_stats is not None:
+        call_stats['queue_wait_ms'] = call_stats.get('queue_wait_ms', 0) + waited_ms
+    return estimated_tokens
+
+
+async def _settle(provider: LLMProvider, request: Dict[str, Any], estimated_tokens: int, response: Any) -> None:
+    limiter = get_rate_limiter() if provider.metered else None
+    if limiter and response is not None:
+        usage = llm_usage.extract_usage(response)
+        await limiter.settle(request['model'], estimated_tokens, usage['input_tokens'] + usage['output_tokens'])
+
+
+async def create_response(priority: int = PRIORITY_NORMAL, call_stats: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+    """
+    Call the Responses API without blocking the event loop
+
+    Every attempt first waits its turn under the shared OpenAI rate limit; lower
+    priority numbers go first and the time spent queued is added to call_stats.
+    Transient failures are retried, slow calls hedged and unhealthy models
+    swapped for their fallback (see resilience.call_with_resilience), and a
+    degraded provider is failed over.
+    """
+    async def send(provider: LLMProvider, request: Dict[str, Any]) -> Any:
+        estimated_tokens = await _reserve(provider, request, priority, call_stats)
+        response = await provider.create_response(request)
+        await _settle(provider, request, estimated_tokens, response)
+        return response
+
+    return await _with_failover(send, kwargs, call_stats)
+
+
+async def stream_response(on_delta: Callable[[str], Awaitable[None]], priority: int = PRIORITY_NORMAL, call_stats: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+    """
+    Stream a Responses API call, passing each output text delta to on_delta
+
+    Returns the final Response object, the same shape create_response returns;
+    a response that ends with response.failed raises ResponseFailedError, which
+    is retried and failed over like a transient API error when its code is.
+    Streams are never hedged, and are only retried until the first delta has
+    been passed on, so listeners never see text twice.
+    """
+    emitted = False
+
+    async def send(provider: LLMProvider, request: Dict[str, Any]) -> Any:
+        nonlocal emitted
+        estimated_tokens = await _reserve(provider, request, priority, call_stats)
+        stream = await provider.stream_response(request)
+        final_response = None
+        async for event in stream:
+            if event.type == 'response.output_text.delta':
+                emitted = True
+                await on_delta(event.delta)
+            elif event.type in ('response.completed', 'response.incomplete', 'response.failed'):
+                final_response = event.response
+
+        if final_response is None:
+            raise RuntimeError("Response stream ended without a final response")
+        await _settle(provider, request, estimated_tokens, final_response)
+        if final_response.status == 'failed':
+            error = final_response.error
+            raise ResponseFailedError(
+                f"Response failed: {error.message if error else 'no error details'}",
+                error.code if error else None
+            )
+        return final_response
+
+    return await _with_failover(send, kwargs, call_stats, hedge=False, can_retry=lambda: not emitted)
+
+
+async def submit_background_response(priority: int = PRIORITY_NORMAL, call_stats: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+    """
+    Start a Responses API call in background mode and return without waiting for it
+
+    The returned Response is usually still queued; fetch it later with
+    retrieve_response. Submissions are never hedged, since every duplicate
+    would be a billed run of its own. call_stats["provider"] names the provider
+    to retrieve it from.
+    """
+    async def send(provider: LLMProvider, request: Dict[str, Any]) -> Any:
+        await _reserve(provider, request, priority, call_stats)
+        return await provider.submit_background_response(request)
+
+    return await _with_failover(send, kwargs, call_stats, hedge=False)
+
+
+def _stored_provider(provider: Optional[str]) -> LLMProvider:
+    return get_provider(provider or getattr(settings, 'LLM_PROVIDER', 'openai'))
+
+
+async def retrieve_response(response_id: str, provider: Optional[str] = None) -> Any:
+    """
+    Get the current state of a stored (e.g. background) response from the provider that holds it
+    """
+    return await _stored_provider(provider).retrieve_response(response_id)
+
+
+async def cancel_response(response_id: str, provider: Optional[str] = None) -> Any:
+    """
+    Cancel a background response that is still queued or running
+    """
+    return await _stored_provider(provider).cancel_response(response_id)
+
+
+async def create_chat_completion(priority: int = PRIORITY_NORMAL, call_stats: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+    """
+    Call the Chat Completions API without blocking the event loop
+    """
+    async def send(provider: LLMProvider, request: Dict[str, Any]) -> Any:
+        estimated_tokens = await _reserve(provider, request, priority, call_stats)
+        response = await provider.create_chat_completion(request)
+        await _settle(provider, request, estimated_tokens, response)
+        return response
+
+    return await _with_failover(send, kwargs, call_stats)
+
+
+async def close_async_client() -> None:
+    """
+    Close the provider clients bound to the running event loop and release their connections
+    """
+    await close_providers()
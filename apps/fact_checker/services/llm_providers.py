@@ -0,0 +1,375 @@
+"""
+LLM providers behind llm_client
+
+A provider sends Responses API calls (plain, streamed or in background mode)
+and Chat Completions calls, and returns objects in the OpenAI response shapes.
+The services, llm_usage and the rate limiter read those shapes, so they work
+unchanged with any provider. LLM_PROVIDERS configures the named providers:
+
+- "openai" backends talk to the OpenAI API, or to any endpoint serving the same
+  API (set base_url, and models to rename models for it);
+- the "local" backend is a deterministic stand-in that answers offline. It
+  fills structured outputs from their JSON schema and prices every call at 0,
+  so whole analyses can run in tests and benchmarks without network access.
+  Set latency to simulate model response times.
+
+LLM_PROVIDER picks the primary provider and LLM_FAILOVER_PROVIDERS the ones
+llm_client fails over to, in order, when it is degraded (see llm_client).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+import weakref
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+from django.conf import settings
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from openai.types.chat import ChatCompletion
+from openai.types.responses import Response
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProvider(ABC):
+    """
+    Interface of an LLM provider
+
+    Backends implement every call below, so an incomplete one fails when it
+    is constructed rather than in the middle of an analysis.
+
+    Args:
+        name: The provider's key in LLM_PROVIDERS
+        models: Model names to send instead of the requested ones
+    """
+
+    # Whether calls are billed and count against the shared rate limit
+    metered = True
+
+    def __init__(self, name: str, models: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.models = models or {}
+
+    def map_model(self, model: str) -> str:
+        return self.models.get(model, model)
+
+    @abstractmethod
+    async def create_response(self, request: Dict[str, Any]) -> Any:
+        """
+        Create a response and wait for it
+        """
+
+    @abstractmethod
+    async def stream_response(self, request: Dict[str, Any]) -> AsyncIterator[Any]:
+        """
+        Stream a response as Responses API events (output text deltas, then the final response)
+        """
+
+    @abstractmethod
+    async def submit_background_response(self, request: Dict[str, Any]) -> Any:
+        """
+        Start a stored response in background mode without waiting for it
+        """
+
+    @abstractmethod
+    async def retrieve_response(self, response_id: str) -> Any:
+        """
+        Get the current state of a stored response
+        """
+
+    @abstractmethod
+    async def cancel_response(self, response_id: str) -> Any:
+        """
+        Cancel a stored response that is still running
+        """
+
+    @abstractmethod
+    async def create_chat_completion(self, request: Dict[str, Any]) -> Any:
+        """
+        Create a chat completion
+        """
+
+    async def close(self) -> None:
+        """
+        Release the resources bound to the running event loop
+        """
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    The OpenAI API, or an endpoint compatible with it
+
+    Args:
+        name: The provider's key in LLM_PROVIDERS
+        api_key: API key; OPENAI_API_KEY by default
+        base_url: Endpoint of a compatible API; the OpenAI API by default
+        models: Model names to send instead of the requested ones
+    """
+
+    def __init__(self, name: str, api_key: Optional[str] = None, base_url: Optional[str] = None, models: Optional[Dict[str, str]] = None):
+        super().__init__(name, models)
+        self.api_key = api_key or settings.OPENAI_API_KEY
+        self.base_url = base_url or None
+        # httpx connection pools are bound to the event loop that opened them, so we keep
+        # exactly one client per loop and let it be garbage collected with the loop.
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+    def _build_client(self) -> AsyncOpenAI:
+        """
+        Build an AsyncOpenAI client backed by a pooled keep-alive HTTP connection
+        """
+        limits = httpx.Limits(
+            max_connections=getattr(settings, 'OPENAI_MAX_CONNECTIONS', 100),
+            max_keepalive_connections=getattr(settings, 'OPENAI_MAX_KEEPALIVE_CONNECTIONS', 20),
+            keepalive_expiry=getattr(settings, 'OPENAI_KEEPALIVE_EXPIRY', 30.0),
+        )
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=getattr(settings, 'OPENAI_TIMEOUT', 600.0),
+            # Retries are handled by resilience.call_with_resilience, which can also hedge and fall back
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(limits=limits),
+        )
+
+    def client(self) -> AsyncOpenAI:
+        """
+        Get this provider's AsyncOpenAI client for the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._build_client()
+            self._clients[loop] = client
+            logger.debug(f"Created AsyncOpenAI client for provider {self.name} on event loop {id(loop)}")
+        return client
+
+    async def create_response(self, request: Dict[str, Any]) -> Any:
+        return await self.client().responses.create(**request)
+
+    async def stream_response(self, request: Dict[str, Any]) -> AsyncIterator[Any]:
+        return await self.client().responses.create(stream=True, **request)
+
+    async def submit_background_response(self, request: Dict[str, Any]) -> Any:
+        return await self.client().responses.create(background=True, store=True, **request)
+
+    async def retrieve_response(self, response_id: str) -> Any:
+        return await self.client().responses.retrieve(response_id)
+
+    async def cancel_response(self, response_id: str) -> Any:
+        return await self.client().responses.cancel(response_id)
+
+    async def create_chat_completion(self, request: Dict[str, Any]) -> Any:
+        return await self.client().chat.completions.create(**request)
+
+    async def close(self) -> None:
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is None:
+            return
+        try:
+            await client.close()
+        except Exception as e:
+            logger.error(f"Error closing AsyncOpenAI client of provider {self.name}: {str(e)}")
+
+
+def _request_text(value: Any) -> str:
+    # The prompt text of a request's input or messages
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return "\n".join(_request_text(item) for item in value)
+    if isinstance(value, dict):
+        return _request_text(value.get('content') or value.get('text') or '')
+    return ''
+
+
+class LocalProvider(LLMProvider):
+    """
+    Deterministic offline stand-in for the OpenAI API
+
+    The same request always gets the same answer: structured outputs are
+    filled from their JSON schema with values derived from a hash of the
+    request, other calls get a short markdown text. Web search calls cite
+    example.org. Usage is estimated at 4 characters per token.
+
+    Args:
+        name: The provider's key in LLM_PROVIDERS
+        latency: Seconds every call takes
+    """
+
+    metered = False
+
+    def __init__(self, name: str, latency: float = 0.0, models: Optional[Dict[str, str]] = None):
+        super().__init__(name, models)
+        self.latency = latency
+        self._stored: Dict[str, Any] = {}
+
+    @staticmethod
+    def _digest(*parts: Any) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _sample(self, schema: Dict[str, Any], defs: Dict[str, Any], seed: str, path: str = '') -> Any:
+        # A value matching a strict JSON schema, chosen deterministically from the seed
+        if '$ref' in schema:
+            return self._sample(defs[schema['$ref'].split('/')[-1]], defs, seed, path)
+        if 'anyOf' in schema:
+            options = schema['anyOf']
+            # Optional fields stay empty, so the stand-in never reports e.g. an existing fact-check
+            if any(option.get('type') == 'null' for option in options):
+                return None
+            return self._sample(options[0], defs, seed, path)
+
+        pick = int(self._digest(seed, path), 16)
+        if 'enum' in schema:
+            return schema['enum'][pick % len(schema['enum'])]
+        schema_type = schema.get('type')
+        if schema_type == 'object':
+            return {
+                key: self._sample(value, defs, seed, f"{path}.{key}")
+                for key, value in schema.get('properties', {}).items()
+            }
+        if schema_type == 'array':
+            return [self._sample(schema.get('items', {}), defs, seed, f"{path}[{index}]") for index in range(2)]
+        if schema_type == 'number':
+            return round(0.5 + (pick % 45) / 100, 2)
+        if schema_type == 'integer':
+            return 1 + pick % 10
+        if schema_type == 'boolean':
+            return bool(pick % 2)
+        return f"Local {path.rsplit('.', 1)[-1].strip('[]0123456789') or 'answer'} {seed[:8]}"
+
+    def _answer(self, request: Dict[str, Any], schema_format: Optional[Dict[str, Any]]) -> str:
+        seed = self._digest(request.get('model'), request.get('input') or request.get('messages'))
+        if schema_format and schema_format.get('schema'):
+            schema = schema_format['schema']
+            return json.dumps(self._sample(schema, schema.get('$defs', {}), seed))
+        prompt = _request_text(request.get('input') or request.get('messages')).strip()
+        first_line = prompt.splitlines()[0][:120] if prompt else ''
+        return f"# Local Response\n\nDeterministic answer {seed[:8]} to: {first_line}"
+
+    async def _wait(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _response(self, request: Dict[str, Any], status: str = 'completed') -> Any:
+        text_format = (request.get('text') or {}).get('format') or {}
+        answer = self._answer(request, text_format if text_format.get('type') == 'json_schema' else None)
+        searched = any(str(tool.get('type', '')).startswith('web_search') for tool in request.get('tools') or [])
+        response_id = f"resp_local_{uuid.uuid4().hex[:12]}"
+
+        output = []
+        annotations = []
+        if searched:
+            output.append({'id': f"ws_{response_id}", 'type': 'web_search_call', 'status': 'completed'})
+            annotations.append({
+                'type': 'url_citation', 'url': f"https://example.org/local/{self._digest(answer)[:12]}",
+                'title': 'Local stand-in source', 'start_index': 0, 'end_index': min(len(answer), 20),
+            })
+        output.append({
+            'id': f"msg_{response_id}", 'type': 'message', 'role': 'assistant', 'status': 'completed',
+            'content': [{'type': 'output_text', 'text': answer, 'annotations': annotations}],
+        })
+
+        input_tokens = max(len(_request_text(request.get('input'))) // 4, 1)
+        output_tokens = max(len(answer) // 4, 1)
+        now = time.time()
+        return Response.construct(
+            id=response_id, object='response', created_at=now - self.latency, completed_at=now,
+            model=request.get('model'), status=status, output=output, error=None,
+            usage={
+                'input_tokens': input_tokens, 'input_tokens_details': {'cached_tokens': 0},
+                'output_tokens': output_tokens, 'output_tokens_details': {'reasoning_tokens': 0},
+                'total_tokens': input_tokens + output_tokens,
+            },
+        )
+
+    async def create_response(self, request: Dict[str, Any]) -> Any:
+        await self._wait()
+        return self._response(request)
+
+    async def stream_response(self, request: Dict[str, Any]) -> AsyncIterator[Any]:
+        await self._wait()
+        response = self._response(request)
+        text = response.output[-1].content[0].text
+
+        async def events():
+            for start in range(0, len(text), 40):
+                yield SimpleNamespace(type='response.output_text.delta', delta=text[start:start + 40])
+            yield SimpleNamespace(type='response.completed', response=response)
+        return events()
+
+    async def submit_background_response(self, request: Dict[str, Any]) -> Any:
+        # Answered at once; the first retrieve finds it completed
+        await self._wait()
+        response = self._response(request)
+        self._stored[response.id] = response
+        return Response.construct(id=response.id, object='response', status='queued', model=request.get('model'))
+
+    async def retrieve_response(self, response_id: str) -> Any:
+        return self._stored[response_id]
+
+    async def cancel_response(self, response_id: str) -> Any:
+        return self._stored.pop(response_id, None)
+
+    async def create_chat_completion(self, request: Dict[str, Any]) -> Any:
+        await self._wait()
+        response_format = request.get('response_format') or {}
+        answer = self._answer(request, response_format.get('json_schema') if response_format.get('type') == 'json_schema' else None)
+        prompt_tokens = max(len(_request_text(request.get('messages'))) // 4, 1)
+        completion_tokens = max(len(answer) // 4, 1)
+        return ChatCompletion.construct(
+            id=f"chatcmpl_local_{uuid.uuid4().hex[:12]}", object='chat.completion', created=int(time.time()),
+            model=request.get('model'),
+            choices=[{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': answer}}],
+            usage={'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens, 'total_tokens': prompt_tokens + completion_tokens},
+        )
+
+
+BACKENDS = {
+    'openai': OpenAIProvider,
+    'local': LocalProvider,
+}
+
+# Per worker process, like the resilience state; clients inside are per event loop.
+# Keyed by name and configuration, so a changed configuration gets a new provider.
+_providers: Dict[tuple, LLMProvider] = {}
+
+
+def get_provider(name: str) -> LLMProvider:
+    """
+    Get the provider configured under a name in LLM_PROVIDERS
+    """
+    options = dict(getattr(settings, 'LLM_PROVIDERS', {}).get(name) or {})
+    key = (name, json.dumps(options, sort_keys=True))
+    provider = _providers.get(key)
+    if provider is None:
+        backend = options.pop('backend', name)
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r} for LLM provider {name!r}")
+        provider = BACKENDS[backend](name, **options)
+        _providers[key] = provider
+    return provider
+
+
+def get_providers() -> List[LLMProvider]:
+    """
+    The primary provider followed by the providers to fail over to
+    """
+    names = [getattr(settings, 'LLM_PROVIDER', 'openai')]
+    for name in getattr(settings, 'LLM_FAILOVER_PROVIDERS', []):
+        if name not in names:
+            names.append(name)
+    return [get_provider(name) for name in names]
+
+
+async def close_providers() -> None:
+    """
+    Close the clients every provider holds on the running event loop
+    """
+    for provider in list(_providers.values()):
+        await provider.close()
@@ -0,0 +1,209 @@
+"""
+Token, latency and cost accounting for LLM calls
+
+Usage is read from Responses API and Chat Completions responses, priced with
+MODEL_PRICES and stored on ChatGPTInteraction, so spend and latency can be
+rolled up per session and per step.
+"""
+import logging
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens (input, cached input, output) and per web search tool call.
+# Keep in sync with https://openai.com/api/pricing; reasoning tokens bill as output.
+MODEL_PRICES = {
+    'gpt-4.1': {'input': '2.00', 'cached_input': '0.50', 'output': '8.00', 'web_search_call': '0.035'},
+    'gpt-4.1-mini': {'input': '0.40', 'cached_input': '0.10', 'output': '1.60', 'web_search_call': '0.0275'},
+    'gpt-4.1-nano': {'input': '0.10', 'cached_input': '0.025', 'output': '0.40', 'web_search_call': '0.0275'},
+    'gpt-4o': {'input': '2.50', 'cached_input': '1.25', 'output': '10.00', 'web_search_call': '0.035'},
+    'gpt-4o-mini': {'input': '0.15', 'cached_input': '0.075', 'output': '0.60', 'web_search_call': '0.0275'},
+    'o3': {'input': '2.00', 'cached_input': '0.50', 'output': '8.00', 'web_search_call': '0.01'},
+    'o4-mini': {'input': '1.10', 'cached_input': '0.275', 'output': '4.40', 'web_search_call': '0.01'},
+}
+
+USAGE_FIELDS = ['input_tokens', 'cached_input_tokens', 'output_tokens', 'reasoning_tokens', 'web_search_calls']
+
+_PER_MILLION = Decimal(1000000)
+
+# Batch API requests are billed at half the interactive price
+BATCH_PRICE_FACTOR = Decimal('0.5')
+
+
+def empty_usage() -> Dict[str, int]:
+    """
+    Usage for a call that never reached the API, e.g. an LLM cache hit
+    """
+    return {field: 0 for field in USAGE_FIELDS}
+
+
+def _field(obj: Any, name: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def extract_usage(response: Any) -> Dict[str, int]:
+    """
+    Read token usage and web search calls from a Responses API or Chat Completions response
+    """
+    usage = empty_usage()
+    raw = _field(response, 'usage')
+    if raw is not None:
+        if _field(raw, 'input_tokens') is not None:
+            # Responses API
+            usage['input_tokens'] = _field(raw, 'input_tokens') or 0
+            usage['output_tokens'] = _field(raw, 'output_tokens') or 0
+            usage['cached_input_tokens'] = _field(_field(raw, 'input_tokens_details'), 'cached_tokens') or 0
+            usage['reasoning_tokens'] = _field(_field(raw, 'output_tokens_details'), 'reasoning_tokens') or 0
+        else:
+            # Chat Completions API
+            usage['input_tokens'] = _field(raw, 'prompt_tokens') or 0
+            usage['output_tokens'] = _field(raw, 'completion_tokens') or 0
+            usage['cached_input_tokens'] = _field(_field(raw, 'prompt_tokens_details'), 'cached_tokens') or 0
+            usage['reasoning_tokens'] = _field(_field(raw, 'completion_tokens_details'), 'reasoning_tokens') or 0
+
+    usage['web_search_calls'] = sum(
+        1 for item in (_field(response, 'output') or []) if _field(item, 'type') == 'web_search_call'
+    )
+    return usage
+
+
+def get_model_prices(model: str) -> Optional[Dict[str, str]]:
+    """
+    Look up prices for a model, matching dated snapshots like o4-mini-2025-04-16
+    """
+    if model in MODEL_PRICES:
+        return MODEL_PRICES[model]
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model.startswith(f"{name}-"):
+            return MODEL_PRICES[name]
+    return None
+
+
+def compute_cost(model: str, usage: Dict[str, int]) -> Optional[Decimal]:
+    """
+    Compute the USD cost of a call, or None for models missing from the price table
+    """
+    prices = get_model_prices(model)
+    if prices is None:
+        logger.warning(f"No price configured for model {model}; cost not recorded")
+        return None
+
+    cached = usage.get('cached_input_tokens', 0)
+    uncached = max(usage.get('input_tokens', 0) - cached, 0)
+    cost = (
+        uncached * Decimal(prices['input'])
+        + cached * Decimal(prices['cached_input'])
+        + usage.get('output_tokens', 0) * Decimal(prices['output'])
+    ) / _PER_MILLION
+    cost += usage.get('web_search_calls', 0) * Decimal(prices['web_search_call'])
+    return cost.quantize(Decimal('0.000001'))
+
+
+def build_call_usage(model: str, response: Any, latency_ms: int, call_stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Summarize one API call: model, token usage, latency and cost
+
+    Args:
+        model: Model requested; replaced by call_stats["model"] if a fallback answered
+        response: API response, or None when nothing was sent (e.g. a cache hit)
+        latency_ms: Wall-clock time of the call, including rate limit queueing and retries
+        call_stats: Filled in by llm_client (queue_wait_ms, retries, hedged, model,
+            and the provider, whose calls cost nothing unless metered), by the
+            batch collector (batch) or by background responses (latency_ms from
+            submission to completion, which replaces the measured latency)
+    """
+    call_stats = call_stats or {}
+    model = call_stats.get('model', model)
+    usage = extract_usage(response) if response is not None else empty_usage()
+    billed = response is not None and call_stats.get('metered', True)
+    cost = compute_cost(model, usage) if billed else Decimal('0')
+    if cost and call_stats.get('batch'):
+        cost = (cost * BATCH_PRICE_FACTOR).quantize(Decimal('0.000001'))
+    return {
+        'model': model,
+        'provider': call_stats.get('provider'),
+        **usage,
+        'latency_ms': call_stats.get('latency_ms', latency_ms),
+        'queue_wait_ms': call_stats.get('queue_wait_ms', 0),
+        'retries': call_stats.get('retries', 0),
+        'hedged': call_stats.get('hedged', False),
+        'cost': cost,
+    }
+
+
+def interaction_fields(call_usage: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map a call's usage onto ChatGPTInteraction fields
+    """
+    return {
+        'model_used': call_usage['model'],
+        'provider': call_usage.get('provider'),
+        'tokens_used': call_usage['input_tokens'] + call_usage['output_tokens'],
+        'cost': call_usage['cost'],
+        'latency_ms': call_usage['latency_ms'],
+        'queue_wait_ms': call_usage.get('queue_wait_ms', 0),
+        'retries': call_usage.get('retries', 0),
+        'hedged': call_usage.get('hedged', False),
+        **{field: call_usage[field] for field in USAGE_FIELDS},
+    }
+
+
+def _empty_rollup() -> Dict[str, Any]:
+    return {
+        'calls': 0, **empty_usage(), 'tokens_used': 0, 'latency_ms': 0, 'max_latency_ms': 0,
+        'queue_wait_ms': 0, 'retries': 0, 'hedged_calls': 0, 'cost': Decimal('0'),
+    }
+
+
+def prompt_cache_hit_rate(cached_input_tokens: int, input_tokens: int) -> Optional[float]:
+    """
+    Share of input tokens billed at the cached rate, or None before any input
+    """
+    if not input_tokens:
+        return None
+    return round(cached_input_tokens / input_tokens, 3)
+
+
+def rollup_usage(interactions: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Total usage, latency, retries and cost for a session and for each of its steps
+
+    Args:
+        interactions: ChatGPTInteraction rows as dicts, e.g. from .values()
+
+    Returns:
+        Dict with "total", "steps" (one entry per step_number, None for calls
+        outside a step) and "prompt_templates" (cached-token hit rate per
+        prompt template, for rows that include prompt_template)
+    """
+    total = _empty_rollup()
+    steps = {}
+    templates = {}
+    for row in interactions:
+        if row.get('prompt_template'):
+            template = templates.setdefault(row['prompt_template'], {
+                'prompt_template': row['prompt_template'], 'calls': 0, 'input_tokens': 0, 'cached_input_tokens': 0,
+            })
+            template['calls'] += 1
+            template['input_tokens'] += row.get('input_tokens') or 0
+            template['cached_input_tokens'] += row.get('cached_input_tokens') or 0
+
+        step_number = row.get('step_number')
+        step = steps.setdefault(step_number, {'step_number': step_number, **_empty_rollup()})
+        for bucket in (total, step):
+            bucket['calls'] += 1
+            for field in USAGE_FIELDS + ['tokens_used', 'latency_ms', 'queue_wait_ms', 'retries']:
+                bucket[field] += row.get(field) or 0
+            bucket['max_latency_ms'] = max(bucket['max_latency_ms'], row.get('latency_ms') or 0)
+            bucket['hedged_calls'] += 1 if row.get('hedged') else 0
+            bucket['cost'] += row.get('cost') or Decimal('0')
+
+    ordered = sorted(steps.values(), key=lambda s: (s['step_number'] is None, s['step_number'] or 0))
+    for template in templates.values():
+        template['cache_hit_rate'] = prompt_cache_hit_rate(template['cached_input_tokens'], template['input_tokens'])
+    return {'total': total, 'steps': ordered, 'prompt_templates': sorted(templates.values(), key=lambda t: t['prompt_template'])}
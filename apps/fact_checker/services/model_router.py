@@ -0,0 +1,231 @@
+"""
+Per-step choice of model and web search context size
+
+Every web search step used to go to o4-mini with a medium search context, so
+"water is wet" cost as much time as a multi-part statistical claim. The router
+scores each session from cheap local features (claim length, named entities,
+numbers, clauses, an attached image) plus the claim_type or research_scope that
+step 1 reports, and maps the score to one of the MODEL_ROUTES tiers:
+
+- fast: a small model searching one level shallower, for simple claims;
+- standard: the previous default;
+- thorough: searching one level deeper, for complex claims.
+
+The search context size itself comes from the step's search profile (see
+search_profiles), moved by the tier's search_depth.
+
+Each session also gets a latency budget. Before every step the remaining
+budget is split over the steps still to run on the critical path; a tier whose
+typical latency does not fit is stepped down. A session budget (see
+session_budget) that is running low drops the step to its lowest tier and a
+shallower search, and its deadline becomes the call's timeout. Every decision
+is logged. With routing disabled the service's default model is used, but
+search profiles, the session's search options and its budget still apply.
+"""
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from apps.fact_checker.services.resilience import recent_latency
+from apps.fact_checker.services.search_profiles import resolve_search
+from apps.fact_checker.services.session_budget import SessionBudget
+
+logger = logging.getLogger(__name__)
+
+TIERS: List[str] = ['fast', 'standard', 'thorough']
+
+# Added to the complexity score once step 1 has classified the request
+CLAIM_TYPE_WEIGHTS = {
+    'statistical_claim': 2,
+    'scientific_claim': 2,
+    'political_statement': 1,
+}
+RESEARCH_SCOPE_WEIGHTS = {
+    'broad': 1,
+    'comprehensive': 2,
+}
+
+# Lowest tier a step may use regardless of complexity or deadline
+STEP_FLOORS = {
+    'research_report': 'standard',
+}
+
+ENTITY_PATTERN = re.compile(r"\b[A-Z][\w'-]+(?:\s+[A-Z][\w'-]+)*")
+NUMBER_PATTERN = re.compile(r"\d[\d,.]*%?")
+CLAUSE_PATTERN = re.compile(r"\b(?:and|but|while|whereas|because|although|which)\b|[;,，；、]", re.IGNORECASE)
+CJK_PATTERN = re.compile(r"[一-鿿]")
+
+
+def claim_features(user_input: str, has_image: bool = False) -> Dict[str, Any]:
+    """
+    Cheap local features of a claim, computed without any model call
+    """
+    text = user_input or ''
+    # Chinese has no spaces between words; count roughly two characters per word
+    words = max(len(text.split()), len(CJK_PATTERN.findall(text)) // 2)
+    # Capitalized phrases, except the one that merely opens the text
+    entities = ENTITY_PATTERN.findall(text)
+    if entities and text.lstrip().startswith(entities[0]):
+        entities = entities[1:]
+    return {
+        'words': words,
+        'entities': len(entities),
+        'numbers': len(NUMBER_PATTERN.findall(text)),
+        'clauses': len(CLAUSE_PATTERN.findall(text)),
+        'has_image': has_image,
+    }
+
+
+def complexity_score(features: Dict[str, Any]) -> int:
+    """
+    Score a claim's features; 0-1 is simple, 2-3 moderate, 4 and up complex
+    """
+    score = 0
+    score += (features['words'] > 25) + (features['words'] > 60)
+    score += features['entities'] >= 3
+    score += (features['numbers'] >= 1) + (features['numbers'] >= 3)
+    score += features['clauses'] >= 2
+    score += features['has_image']
+    return int(score)
+
+
+def tier_for_score(score: int) -> str:
+    if score <= 1:
+        return 'fast'
+    if score <= 3:
+        return 'standard'
+    return 'thorough'
+
+
+def get_routes() -> Dict[str, Dict[str, Any]]:
+    return getattr(settings, 'MODEL_ROUTES', {})
+
+
+class ModelRouter:
+    """
+    Routes the steps of one session
+
+    Args:
+        session_id: For logging
+        user_input: The claim or research request
+        has_image: Whether an image was attached
+        budget: Latency budget for the whole session in seconds
+        mode: The session's mode, selecting the search profile
+        search_options: The session's per-request search overrides
+        session_budget: The session's deadline and token and web search limits
+    """
+
+    def __init__(self, session_id: str, user_input: str, has_image: bool = False, budget: Optional[float] = None, mode: str = 'fact_check', search_options: Optional[Dict[str, Any]] = None, session_budget: Optional[SessionBudget] = None):
+        self.session_id = session_id
+        self.mode = mode
+        self.search_options = search_options or {}
+        self.features = claim_features(user_input, has_image)
+        self.type_weight = 0
+        self.budget = budget
+        self.session_budget = session_budget
+        self.started = time.monotonic()
+
+    @property
+    def score(self) -> int:
+        return complexity_score(self.features) + self.type_weight
+
+    def observe(self, step1_result: Dict[str, Any]) -> None:
+        """
+        Refine the score with step 1's classification of the request
+        """
+        if step1_result.get('error'):
+            return
+        self.type_weight = (
+            CLAIM_TYPE_WEIGHTS.get(step1_result.get('claim_type'), 0)
+            + RESEARCH_SCOPE_WEIGHTS.get(step1_result.get('research_scope'), 0)
+        )
+
+    def _typical_seconds(self, tier: str) -> float:
+        route = get_routes()[tier]
+        measured = recent_latency(route['model'])
+        return measured if measured is not None else route.get('typical_seconds', 30)
+
+    def _remaining_seconds(self) -> Optional[float]:
+        # The tighter of the latency budget and the session deadline
+        remaining = [
+            left for left in (
+                self.budget - (time.monotonic() - self.started) if self.budget else None,
+                self.session_budget.remaining_seconds() if self.session_budget else None,
+            ) if left is not None
+        ]
+        return min(remaining) if remaining else None
+
+    def _call_timeout(self, steps_left: int) -> Optional[float]:
+        # Time the step's call may take: the later steps keep time for the fastest tier,
+        # but every step gets at least an even share of what is left
+        remaining = self.session_budget.remaining_seconds() if self.session_budget else None
+        if remaining is None:
+            return None
+        steps_left = max(steps_left, 1)
+        reserve = self._typical_seconds(TIERS[0]) if TIERS[0] in get_routes() else 30
+        return max(remaining - reserve * (steps_left - 1), remaining / steps_left)
+
+    def route(self, step_name: str, steps_left: int = 1, step1_result: Optional[Dict[str, Any]] = None, ceiling: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Pick the model and web search settings for a step
+
+        Args:
+            step_name: The step's step_type, used in logs and for STEP_FLOORS
+            steps_left: Steps still to run on the critical path, this one included
+            step1_result: Step 1's result, for the steps after it (see observe)
+            ceiling: Highest tier allowed, e.g. 'fast' for a lightweight step
+
+        Returns:
+            Dict with model, search_context_size, user_location, tier and reason,
+            plus the session budget and the call's timeout in seconds (None
+            without a deadline); model and tier are None when routing is
+            disabled and the service default model applies
+        """
+        if step1_result:
+            self.observe(step1_result)
+
+        budget_low = self.session_budget.low() if self.session_budget else None
+        limits = {'budget': self.session_budget, 'timeout': self._call_timeout(steps_left)}
+
+        routes = get_routes()
+        if not getattr(settings, 'MODEL_ROUTING_ENABLED', True) or not routes:
+            search = resolve_search(self.mode, step_name, -1 if budget_low else 0, self.search_options)
+            reason = f"routing disabled, budget low ({budget_low})" if budget_low else 'routing disabled'
+            logger.info(f"Searching for {step_name} of session {self.session_id} with {search['search_context_size']} search context ({reason})")
+            return {'model': None, **search, 'tier': None, 'reason': reason, **limits}
+
+        floor = TIERS.index(STEP_FLOORS.get(step_name, 'fast'))
+        tier = max(TIERS.index(tier_for_score(self.score)), floor)
+        reason = f"complexity {self.score}"
+        if ceiling and tier > TIERS.index(ceiling):
+            tier = max(TIERS.index(ceiling), floor)
+            reason += f", capped at {ceiling}"
+
+        remaining = self._remaining_seconds()
+        if remaining is not None:
+            allowance = remaining / max(steps_left, 1)
+            while tier > floor and self._typical_seconds(TIERS[tier]) > allowance:
+                tier -= 1
+            reason += f", {max(allowance, 0):.0f}s per remaining step"
+
+        if budget_low:
+            tier = floor
+            reason += f", budget low ({budget_low})"
+
+        route = routes[TIERS[tier]]
+        depth = route.get('search_depth', 0) - (1 if budget_low else 0)
+        decision = {
+            'model': route['model'],
+            **resolve_search(self.mode, step_name, depth, self.search_options),
+            'tier': TIERS[tier],
+            'reason': reason,
+            **limits,
+        }
+        logger.info(
+            f"Routing {step_name} for session {self.session_id} to {decision['model']} "
+            f"with {decision['search_context_size']} search context ({decision['tier']}: {reason})"
+        )
+        return decision
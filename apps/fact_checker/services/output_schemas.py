@@ -0,0 +1,352 @@
+"""
+Output contracts for every structured LLM call
+
+Each step declares its result once, as a pydantic model. The model's JSON schema
+is sent with the request as a strict structured-output format, so the API only
+returns documents that match it, and the reply is validated straight back into
+the model; no text scanning or fallback result is needed. Field descriptions
+are part of the schema the model sees, so prompts do not repeat the structure.
+"""
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Literal, Optional, Type
+
+from openai.lib._pydantic import to_strict_json_schema
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+logger = logging.getLogger(__name__)
+
+Level = Literal['high', 'medium', 'low']
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a response is empty, refused or does not match its schema"""
+
+
+class StepOutput(BaseModel):
+    """Base for output contracts; strict mode requires every field and no extras"""
+
+    model_config = ConfigDict(extra='forbid')
+
+
+# Fact check, step 1: initial search
+
+class InitialSource(StepOutput):
+    source_name: str = Field(description="Name of the source")
+    source_type: Literal['news', 'academic', 'government', 'expert', 'other']
+    credibility_level: Level
+    key_information: str = Field(description="Main information from this source")
+
+
+class ExistingFactCheck(StepOutput):
+    publisher: str = Field(description="Fact-checking organization, e.g. Snopes, Reuters Fact Check, PolitiFact")
+    url: str = Field(description="URL of the published fact-check")
+    rating: Literal['true', 'likely_true', 'mixed', 'unproven', 'likely_false', 'false']
+    confidence: float = Field(description="Confidence from 0.0 to 1.0 that this fact-check addresses this exact claim and settles it")
+
+
+class InitialSearch(StepOutput):
+    main_topic: str = Field(description="The primary topic or subject matter")
+    claim_type: Literal['news_event', 'historical_fact', 'scientific_claim', 'statistical_claim', 'political_statement', 'other']
+    initial_credible_sources: List[InitialSource]
+    general_summary: str = Field(description="Brief general summary of what current credible sources say about this topic")
+    search_strategy: str = Field(description="What search approach was most effective for finding information")
+    preliminary_assessment: str = Field(description="Initial assessment based on credible sources found")
+    areas_needing_deeper_research: List[str] = Field(description="Specific aspects that need more detailed investigation")
+    existing_fact_check: Optional[ExistingFactCheck] = Field(description="A published fact-check of this same claim by a dedicated fact-checking organization, or null if none was found")
+
+
+# Fact check, step 2: deeper exploration
+
+class Evidence(StepOutput):
+    evidence_type: Literal['statistical', 'testimonial', 'documentary', 'expert_opinion', 'other']
+    evidence_description: str = Field(description="Description of the evidence found")
+    source_quality: Level
+    supports_claim: Literal['strongly_supports', 'somewhat_supports', 'neutral', 'somewhat_contradicts', 'strongly_contradicts']
+
+
+class CounterArgument(StepOutput):
+    argument: str = Field(description="Description of counter-argument or alternative perspective")
+    source: str = Field(description="Source of this counter-argument")
+    credibility: Level
+
+
+class ExpertPerspective(StepOutput):
+    expert_name: str = Field(description="Name or description of expert")
+    expertise_area: str = Field(description="Their area of expertise")
+    opinion_summary: str = Field(description="Summary of their perspective")
+    stance: Literal['supports', 'opposes', 'neutral', 'nuanced']
+
+
+class DeeperExploration(StepOutput):
+    specific_evidence: List[Evidence]
+    counter_arguments: List[CounterArgument]
+    expert_perspectives: List[ExpertPerspective]
+    recent_developments: List[str] = Field(description="Any recent news, updates, or developments related to this claim")
+    contextual_factors: List[str] = Field(description="Important contextual information that affects interpretation")
+    contradictory_information: List[str] = Field(description="Information that contradicts the original claim")
+    areas_of_uncertainty: List[str] = Field(description="Aspects where evidence is unclear or conflicting")
+
+
+# Fact check, step 3: source evaluation
+
+class BiasAssessment(StepOutput):
+    political_lean: Literal['left', 'center', 'right', 'unknown']
+    bias_level: Literal['minimal', 'low', 'moderate', 'high']
+    factual_reporting: Literal['very_high', 'high', 'mostly_factual', 'mixed', 'low']
+
+
+class SourceCredibility(StepOutput):
+    url: str = Field(description="Source URL")
+    publisher: str = Field(description="Publisher name")
+    credibility_score: float = Field(description="Credibility from 0.0 to 1.0")
+    credibility_factors: List[str] = Field(description="Factors affecting credibility (e.g., editorial standards, fact-checking history, transparency)")
+    bias_assessment: BiasAssessment
+    publisher_reputation: Literal['excellent', 'good', 'fair', 'poor', 'unknown']
+    fact_check_history: str = Field(description="Description of publisher's fact-checking track record")
+    funding_transparency: Literal['transparent', 'somewhat_transparent', 'opaque', 'unknown']
+
+
+class SourceQuality(StepOutput):
+    primary_sources_count: int
+    secondary_sources_count: int
+    high_credibility_sources: int
+    questionable_sources: int
+    source_diversity: str = Field(description="Assessment of source diversity and independence")
+
+
+class CrossReference(StepOutput):
+    consistent_information: List[str] = Field(description="Information that is consistently reported across sources")
+    conflicting_information: List[str] = Field(description="Information that conflicts between sources")
+    unique_claims: List[str] = Field(description="Claims found in only one or few sources")
+    verification_status: Literal['well_verified', 'partially_verified', 'poorly_verified', 'conflicting']
+
+
+class SourceEvaluation(StepOutput):
+    source_credibility_analysis: List[SourceCredibility]
+    overall_source_quality: SourceQuality
+    cross_reference_analysis: CrossReference
+    red_flags: List[str] = Field(description="Any credibility red flags or concerns identified")
+    source_recommendations: str = Field(description="Recommendations about which sources are most trustworthy")
+
+
+# Fact check, step 4: final conclusion
+
+class Verdict(StepOutput):
+    classification: Literal['true', 'likely_true', 'uncertain', 'likely_false', 'false']
+    confidence_score: float = Field(description="Confidence from 0.0 to 1.0")
+    summary: str = Field(description="Brief summary suitable for display to users")
+
+
+class DetailedAnalysis(StepOutput):
+    reasoning: str = Field(description="Detailed explanation of the verdict based on all research findings")
+    key_evidence: List[str] = Field(description="Most important evidence points supporting the verdict")
+    supporting_evidence: List[str] = Field(description="Evidence that supports the claim")
+    contradictory_evidence: List[str] = Field(description="Evidence that contradicts the claim")
+    source_quality_assessment: str = Field(description="Overall assessment of source quality and reliability")
+    limitations: List[str] = Field(description="Limitations of this fact-check analysis")
+    areas_of_uncertainty: List[str] = Field(description="Aspects where definitive conclusions cannot be made")
+
+
+class MethodologySummary(StepOutput):
+    search_approach: str = Field(description="Summary of search methodology used")
+    sources_consulted: str = Field(description="Types and quality of sources consulted")
+    verification_methods: str = Field(description="Methods used to verify information")
+    analysis_date: str = Field(description="When this analysis was conducted")
+
+
+class FinalConclusion(StepOutput):
+    verdict: Verdict
+    detailed_analysis: DetailedAnalysis
+    methodology_summary: MethodologySummary
+    recommendations: List[str] = Field(description="Recommendations for readers about interpreting this information")
+    follow_up_suggestions: List[str] = Field(description="Suggestions for further research or monitoring of developments")
+
+
+# Research, step 1: understanding the request
+
+class ResearchArea(StepOutput):
+    area: str = Field(description="Specific research area or subtopic")
+    importance: Level
+    description: str = Field(description="Why this area is important for the research")
+
+
+class ResearchUnderstanding(StepOutput):
+    research_question: str = Field(description="Clear, focused research question derived from the user's request")
+    question_type: Literal['academic', 'business', 'technical', 'general', 'exploratory', 'comparative', 'analytical']
+    research_scope: Literal['narrow', 'focused', 'broad', 'comprehensive']
+    key_concepts: List[str] = Field(description="Key concepts, terms, or topics central to this research")
+    search_strategy: str = Field(description="Recommended approach for conducting this research")
+    initial_understanding: str = Field(description="Your understanding of what the user is looking for")
+    research_areas: List[ResearchArea]
+    methodology_suggestions: List[str] = Field(description="Suggested research methods or approaches")
+    expected_outcomes: List[str] = Field(description="What types of insights or information this research should provide")
+
+
+# Research, step 2: general research
+
+class GeneralFinding(StepOutput):
+    topic: str = Field(description="Specific aspect or subtopic")
+    key_information: str = Field(description="Important information found about this topic")
+    source_type: Literal['academic', 'news', 'government', 'industry', 'expert', 'other']
+    reliability: Level
+
+
+class GeneralResearch(StepOutput):
+    general_findings: List[GeneralFinding]
+    key_information: List[str] = Field(description="Most important facts or pieces of information discovered")
+    topic_overview: str = Field(description="Comprehensive overview of the topic based on research findings")
+    related_topics: List[str] = Field(description="Related topics or areas that emerged during research")
+    preliminary_insights: List[str] = Field(description="Initial insights or patterns observed")
+    areas_for_deeper_research: List[str] = Field(description="Specific areas that warrant more detailed investigation")
+    information_gaps: List[str] = Field(description="Areas where information is lacking or unclear")
+    research_quality_assessment: str = Field(description="Assessment of the quality and availability of information on this topic")
+
+
+# Research, step 3: specific exploration
+
+class DetailedFinding(StepOutput):
+    area: str = Field(description="Specific research area explored")
+    key_insights: str = Field(description="Detailed insights discovered")
+    evidence_type: Literal['statistical', 'qualitative', 'expert_opinion', 'case_study', 'other']
+    confidence_level: Level
+    implications: str = Field(description="What this finding means for the research question")
+
+
+class ExpertOpinion(StepOutput):
+    expert: str = Field(description="Expert name or description")
+    expertise: str = Field(description="Area of expertise")
+    opinion: str = Field(description="Summary of their perspective")
+    context: str = Field(description="Context or basis for their opinion")
+
+
+class DataPoint(StepOutput):
+    metric: str = Field(description="Specific data point or statistic")
+    value: str = Field(description="The actual value or finding")
+    source: str = Field(description="Source of the data")
+    context: str = Field(description="What this data means")
+
+
+class SpecificResearch(StepOutput):
+    detailed_findings: List[DetailedFinding]
+    specific_insights: List[str] = Field(description="Specific, detailed insights that directly address the research question")
+    expert_opinions: List[ExpertOpinion]
+    case_studies: List[str] = Field(description="Relevant case studies or examples found")
+    data_points: List[DataPoint]
+    conflicting_viewpoints: List[str] = Field(description="Different perspectives or contradictory information found")
+    research_gaps: List[str] = Field(description="Areas where more research is needed")
+    practical_applications: List[str] = Field(description="How this research can be applied or used")
+
+
+# Single-call analysis (ChatGPTService and the *_with_search methods)
+
+class ClaimAnalysis(StepOutput):
+    main_topic: str = Field(description="The primary topic or subject matter")
+    factual_claims: List[str] = Field(description="Specific factual claims that can be verified")
+    potential_publishers: List[str] = Field(description="Credible news sources likely to have covered this topic")
+    search_keywords: List[str] = Field(description="Effective search terms for finding relevant information")
+    claim_type: Literal['news_event', 'historical_fact', 'scientific_claim', 'statistical_claim', 'other']
+    urgency_level: Level
+    complexity_score: int = Field(description="Complexity from 1 to 10")
+    initial_assessment: str = Field(description="Brief initial assessment of the claim's plausibility")
+
+
+class WebSearchInsights(StepOutput):
+    recent_coverage: List[str] = Field(description="Recent news coverage found")
+    authoritative_sources: List[str] = Field(description="Authoritative sources that have addressed this topic")
+    initial_credibility: str = Field(description="Assessment based on immediate web search results")
+
+
+class WebClaimAnalysis(ClaimAnalysis):
+    web_search_insights: WebSearchInsights
+
+
+class SourceAssessment(StepOutput):
+    url: str
+    credibility_score: float = Field(description="Credibility from 0.0 to 1.0")
+    relevance_score: float = Field(description="Relevance from 0.0 to 1.0")
+    supports_claim: Optional[bool] = Field(description="Whether the source supports the claim, or null if it does not say")
+    key_points: List[str] = Field(description="Important points from this source")
+    publisher_reliability: Literal['high', 'medium', 'low', 'unknown']
+    bias_assessment: Literal['left', 'center', 'right', 'unknown']
+    fact_check_notes: str = Field(description="Notes about this source's reliability")
+
+
+class SourceAssessments(StepOutput):
+    source_evaluations: List[SourceAssessment]
+    overall_assessment: str = Field(description="Summary of source quality and consensus")
+
+
+class WebSourceAssessment(SourceAssessment):
+    cross_references: List[str] = Field(description="Additional sources found that corroborate or contradict")
+
+
+class WebSourceAssessments(StepOutput):
+    source_evaluations: List[WebSourceAssessment]
+    overall_assessment: str = Field(description="Summary of source quality and consensus")
+    additional_findings: str = Field(description="What web search revealed about this topic")
+    consensus_level: str = Field(description="How much agreement exists among reliable sources")
+
+
+class ClaimVerdict(StepOutput):
+    verdict: Literal['true', 'likely', 'uncertain', 'suspicious', 'false']
+    confidence_score: float = Field(description="Confidence from 0.0 to 1.0")
+    reasoning: str = Field(description="Detailed explanation of the verdict")
+    key_evidence: List[str] = Field(description="Most important evidence points")
+    contradictory_evidence: List[str] = Field(description="Evidence that contradicts the claim")
+    supporting_evidence: List[str] = Field(description="Evidence that supports the claim")
+    source_quality_summary: str = Field(description="Assessment of overall source quality")
+    limitations: List[str] = Field(description="Limitations of this fact-check")
+    recommendations: List[str] = Field(description="Recommendations for further verification if needed")
+    summary: str = Field(description="Brief summary suitable for display to users")
+
+
+class WebClaimVerdict(ClaimVerdict):
+    verdict: Literal['true', 'likely_true', 'uncertain', 'likely_false', 'false']
+    recent_developments: List[str] = Field(description="Any recent developments found through web search")
+    expert_consensus: str = Field(description="What expert sources and authoritative publications say")
+    last_updated: str = Field(description="When this assessment was made and what current sources say")
+
+
+@lru_cache(maxsize=None)
+def json_schema(output_type: Type[StepOutput]) -> Dict[str, Any]:
+    """
+    Strict-mode JSON schema for an output contract, built once per contract
+    """
+    return {
+        "name": output_type.__name__,
+        "schema": to_strict_json_schema(output_type),
+        "strict": True,
+    }
+
+
+def text_format(output_type: Type[StepOutput]) -> Dict[str, Any]:
+    """
+    Responses API "text" parameter requesting output that matches the contract
+    """
+    return {"format": {"type": "json_schema", **json_schema(output_type)}}
+
+
+def response_format(output_type: Type[StepOutput]) -> Dict[str, Any]:
+    """
+    Chat Completions "response_format" parameter requesting output that matches the contract
+    """
+    return {"type": "json_schema", "json_schema": json_schema(output_type)}
+
+
+def parse_output(output_type: Type[StepOutput], response_text: str) -> Dict[str, Any]:
+    """
+    Validate a structured-output reply against its contract
+
+    Returns:
+        The validated result as a plain dict, ready to extend and store
+    Raises:
+        StructuredOutputError: If the reply is empty or does not match the schema
+    """
+    if not response_text:
+        raise StructuredOutputError(f"Empty {output_type.__name__} response")
+    try:
+        return output_type.model_validate_json(response_text).model_dump(mode='json')
+    except ValidationError as e:
+        logger.warning(f"{output_type.__name__} response failed validation: {str(e)}")
+        raise StructuredOutputError(f"Invalid {output_type.__name__} response: {e.error_count()} validation error(s)") from e
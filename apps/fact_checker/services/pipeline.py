@@ -0,0 +1,330 @@
+"""
+Dependency-driven execution of analysis steps
+
+A workflow is a list of Nodes, each naming the results it needs from other
+nodes. The Pipeline starts every node as soon as its inputs are ready, so
+independent nodes run concurrently, and keeps each node's AnalysisStep row in
+step with its status:
+
+- rows for all nodes are created as 'pending' when the run starts;
+- a node's row is 'in_progress' while it runs, then 'completed' or 'failed';
+- when a required node fails the run stops: running nodes are cancelled and
+  their rows, like those of nodes that never started, are marked failed;
+- a node whose skip hook gives a reason once its inputs are ready is not run;
+  its row is marked 'skipped' and dependents receive {"skipped": True, "reason": ...}.
+
+Completed rows are checkpoints. When a session is run again after its worker
+died, nodes whose row completed (and whose inputs were restored too) take their
+result from the row's result_data instead of running again, so only the
+missing steps are paid for. Every finished step also touches the session's
+updated_at, which is how stale analyses are told apart from slow ones.
+
+A node fails when it raises or returns nothing or a dict with an "error" key,
+the way the step methods already report errors. A node that raises
+StepDeferred is waiting on work that continues outside this run (a background
+response): its row stays 'in_progress', nodes depending on it are not started,
+and the run returns with run.deferred naming it. Running the session again
+later picks up from the checkpoints.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from apps.fact_checker.models import AnalysisStep, FactCheckSession
+
+logger = logging.getLogger(__name__)
+
+
+class StepDeferred(Exception):
+    """Raised by a node whose result is not ready yet; the run stops at it and is resumed later"""
+
+
+class Node:
+    """
+    One step of a pipeline
+
+    Args:
+        name: Unique name other nodes use to refer to this node's result
+        run: Called with its inputs as keyword arguments, plus step=<AnalysisStep>
+            when the node has a step row; returns an awaitable of the result
+        inputs: Keyword argument name -> name of the node whose result it receives
+        step_number, step_type, description: The node's AnalysisStep row, if it has one
+        required: Whether the run stops when this node fails; a failed optional
+            node's error result is still passed on to its dependents
+        restore: Rebuilds the node's result from its completed row's result_data
+            when resuming; defaults to the stored result_data itself
+        skip: Called with the node's inputs when they are ready; returning a
+            reason skips the node (an early exit), returning None runs it
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[..., Awaitable[Any]],
+        inputs: Optional[Dict[str, str]] = None,
+        step_number: Optional[int] = None,
+        step_type: str = '',
+        description: str = '',
+        required: bool = True,
+        restore: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        skip: Optional[Callable[..., Optional[str]]] = None,
+    ):
+        self.name = name
+        self.run = run
+        self.inputs = inputs or {}
+        self.step_number = step_number
+        self.step_type = step_type
+        self.description = description
+        self.required = required
+        self.restore = restore
+        self.skip = skip
+
+
+class PipelineRun:
+    """
+    Results and statuses of one pipeline run
+    """
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.status: Dict[str, str] = {}
+        # Name of the required node whose failure stopped the run
+        self.failed: Optional[str] = None
+        # Nodes restored from checkpoints instead of being run
+        self.resumed: List[str] = []
+        # Nodes waiting on work outside this run; the session is run again once it is done
+        self.deferred: List[str] = []
+
+    @property
+    def error_result(self) -> Dict[str, Any]:
+        result = self.results.get(self.failed)
+        return result if isinstance(result, dict) else {}
+
+
+def is_failure(result: Any) -> bool:
+    return not result or (isinstance(result, dict) and bool(result.get('error')))
+
+
+class Pipeline:
+    """
+    A DAG of Nodes, validated on construction
+    """
+
+    def __init__(self, nodes: List[Node]):
+        self.nodes: Dict[str, Node] = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Duplicate pipeline node {node.name}")
+            self.nodes[node.name] = node
+
+        for node in nodes:
+            unknown = set(node.inputs.values()) - set(self.nodes)
+            if unknown:
+                raise ValueError(f"Pipeline node {node.name} depends on unknown node(s) {sorted(unknown)}")
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order = []
+        visiting = set()
+
+        def visit(name: str) -> None:
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a cycle through {name}")
+            visiting.add(name)
+            for source in self.nodes[name].inputs.values():
+                visit(source)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name)
+        return order
+
+    async def run(self, session: FactCheckSession) -> PipelineRun:
+        """
+        Run every node once its inputs are ready
+
+        Returns:
+            PipelineRun with each node's result; run.failed names the required
+            node that stopped the run, or is None if the run finished
+        """
+        run = PipelineRun()
+        steps, checkpoints = await sync_to_async(self._prepare_steps)(session)
+        for name in self.order:
+            if name in checkpoints:
+                run.results[name] = checkpoints[name]
+                run.status[name] = 'completed'
+                run.resumed.append(name)
+        if run.resumed:
+            logger.info(f"Resuming session {session.session_id} from completed steps {run.resumed}")
+        waiting = [name for name in self.order if name not in run.results]
+        running: Dict[asyncio.Future, str] = {}
+
+        try:
+            while waiting or running:
+                # Skipped nodes resolve at once and can make their dependents ready
+                ready = [name for name in waiting if self._ready(name, run)]
+                while ready:
+                    for name in ready:
+                        waiting.remove(name)
+                        reason = self._skip_reason(self.nodes[name], run)
+                        if reason:
+                            logger.info(f"Skipping step {name} for session {session.session_id}: {reason}")
+                            run.results[name] = {"skipped": True, "reason": reason}
+                            run.status[name] = 'skipped'
+                            if name in steps:
+                                await sync_to_async(self._mark_skipped)(steps[name], reason)
+                        else:
+                            run.status[name] = 'in_progress'
+                            running[asyncio.ensure_future(self._run_node(self.nodes[name], steps.get(name), run))] = name
+                    ready = [name for name in waiting if self._ready(name, run)]
+                if not running:
+                    # Everything left waits on a deferred node
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    try:
+                        result, failed = task.result()
+                    except StepDeferred as e:
+                        logger.info(f"Step {name} of session {session.session_id} deferred: {str(e)}")
+                        run.status[name] = 'deferred'
+                        run.deferred.append(name)
+                        continue
+                    run.results[name] = result
+                    run.status[name] = 'failed' if failed else 'completed'
+                    if name in steps:
+                        await sync_to_async(self._touch_session)(session)
+                    if failed and self.nodes[name].required and run.failed is None:
+                        logger.error(f"Required step {name} failed for session {session.session_id}, stopping the pipeline")
+                        run.failed = name
+
+                if run.failed:
+                    break
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        if run.failed:
+            not_run = waiting + list(running.values())
+            for name in not_run:
+                run.status[name] = 'failed'
+            not_run_steps = [steps[name].pk for name in not_run if name in steps]
+            if not_run_steps:
+                await sync_to_async(self._mark_not_run)(not_run_steps, run.failed)
+        return run
+
+    def _ready(self, name: str, run: PipelineRun) -> bool:
+        return all(source in run.results for source in self.nodes[name].inputs.values())
+
+    def _inputs(self, node: Node, run: PipelineRun) -> Dict[str, Any]:
+        return {param: run.results[source] for param, source in node.inputs.items()}
+
+    def _skip_reason(self, node: Node, run: PipelineRun) -> Optional[str]:
+        if node.skip is None:
+            return None
+        try:
+            return node.skip(**self._inputs(node, run))
+        except Exception as e:
+            logger.error(f"Error in skip policy of step {node.name}, running it: {str(e)}")
+            return None
+
+    def _prepare_steps(self, session: FactCheckSession) -> Tuple[Dict[str, AnalysisStep], Dict[str, Any]]:
+        """
+        Create each node's row, or reuse the row left by an interrupted run
+
+        Returns:
+            The rows by node name, and the restored results of completed rows
+        """
+        steps = {}
+        checkpoints = {}
+        if all(node.step_number is None for node in self.nodes.values()):
+            return steps, checkpoints
+
+        existing = {step.step_number: step for step in AnalysisStep.objects.filter(session=session)}
+        for name in self.order:
+            node = self.nodes[name]
+            if node.step_number is None:
+                continue
+            step = existing.get(node.step_number)
+            if step is None:
+                step = AnalysisStep.objects.create(
+                    session=session,
+                    step_number=node.step_number,
+                    step_type=node.step_type,
+                    description=node.description,
+                    status='pending'
+                )
+            elif (
+                step.status == 'completed'
+                and step.step_type == node.step_type
+                # A step is only as current as the results it was computed from
+                and all(source in checkpoints for source in node.inputs.values())
+            ):
+                try:
+                    checkpoints[node.name] = node.restore(step.result_data) if node.restore else step.result_data
+                except Exception as e:
+                    logger.warning(f"Could not restore step {node.name} of session {session.session_id}: {str(e)}")
+            if node.name not in checkpoints and step.status != 'pending':
+                step.step_type = node.step_type
+                step.description = node.description
+                step.status = 'pending'
+                step.result_data = {}
+                step.error_message = None
+                step.completed_at = None
+                step.summary = None
+                step.save()
+            steps[node.name] = step
+        return steps, checkpoints
+
+    def _mark_skipped(self, step: AnalysisStep, reason: str) -> None:
+        step.status = 'skipped'
+        step.summary = f"Skipped: {reason}"
+        step.result_data = {"skipped": True, "reason": reason}
+        step.completed_at = timezone.now()
+        step.save()
+
+    def _touch_session(self, session: FactCheckSession) -> None:
+        FactCheckSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+
+    def _mark_not_run(self, step_pks: List[int], failed: str) -> None:
+        AnalysisStep.objects.filter(pk__in=step_pks, status__in=['pending', 'in_progress']).update(
+            status='failed',
+            error_message=f"Not run because step {failed} failed",
+            completed_at=timezone.now()
+        )
+
+    async def _run_node(self, node: Node, step: Optional[AnalysisStep], run: PipelineRun) -> Tuple[Any, bool]:
+        kwargs = self._inputs(node, run)
+        if step is not None:
+            step.status = 'in_progress'
+            await sync_to_async(step.save)(update_fields=['status'])
+            kwargs['step'] = step
+
+        try:
+            result = await node.run(**kwargs)
+        except StepDeferred:
+            raise
+        except Exception as e:
+            logger.error(f"Error in pipeline step {node.name}: {str(e)}")
+            result = {"error": str(e)}
+
+        failed = is_failure(result)
+        # Step methods usually finish their own row; close it if they did not
+        if step is not None and step.status == 'in_progress':
+            step.status = 'failed' if failed else 'completed'
+            step.completed_at = timezone.now()
+            if failed:
+                step.error_message = result.get('error') if isinstance(result, dict) else "Step returned no result"
+            elif isinstance(result, dict):
+                step.result_data = result
+            await sync_to_async(step.save)()
+        return result, failed
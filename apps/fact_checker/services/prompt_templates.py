@@ -0,0 +1,196 @@
+"""
+Versioned prompt templates for the web search and research steps
+
+OpenAI caches the longest previously seen prefix of a request's input, so the
+input tokens of a prompt are only billed at the cached rate up to the first
+character that differs. The step prompts used to open with the user's claim,
+which made every prompt unique from its first line. Templates put their static
+instructions first and append the variable data (claim, earlier findings) as
+labelled sections at the end, so every call of a template shares its prefix.
+
+Templates are compiled once at import. Each has a key of the form
+"name.vN", sent as the request's prompt_cache_key to keep calls of a template
+on the same cache, and stored on ChatGPTInteraction.prompt_template so the
+cached-token hit rate can be compared per template and version. Bump the
+version whenever the instructions change.
+"""
+import textwrap
+from typing import Dict, List, Tuple
+
+
+class PromptTemplate:
+    """
+    A prompt with a static prefix and variable sections
+
+    Args:
+        name: Registry name, e.g. "fact_check.initial_search"
+        version: Bumped whenever the instructions change
+        instructions: Static text, identical for every call
+        sections: (label, variable) pairs rendered in order after the instructions
+    """
+
+    def __init__(self, name: str, version: int, instructions: str, sections: List[Tuple[str, str]]):
+        self.name = name
+        self.version = version
+        self.key = f"{name}.v{version}"
+        self.prefix = textwrap.dedent(instructions).strip()
+        self.sections = sections
+
+    def render(self, **values: str) -> str:
+        """
+        Fill in the variable sections; a missing variable raises KeyError
+        """
+        missing = [variable for _, variable in self.sections if variable not in values]
+        if missing:
+            raise KeyError(f"Prompt template {self.key} is missing {', '.join(missing)}")
+        parts = [self.prefix]
+        parts.extend(f"{label}:\n{str(values[variable]).strip()}" for label, variable in self.sections)
+        return "\n\n".join(parts)
+
+
+TEMPLATES: Dict[str, PromptTemplate] = {}
+
+
+def register(template: PromptTemplate) -> PromptTemplate:
+    if template.name in TEMPLATES:
+        raise ValueError(f"Prompt template {template.name} is already registered")
+    TEMPLATES[template.name] = template
+    return template
+
+
+def get_template(name: str) -> PromptTemplate:
+    return TEMPLATES[name]
+
+
+# Multi-step fact-check (ChatGPTWebSearchService)
+
+FACT_CHECK_INITIAL_SEARCH = register(PromptTemplate('fact_check.initial_search', 1, """
+    You are an expert fact-checker performing an initial search for credible sources. Analyze the claim given at the end and search for the most authoritative and credible sources available. Use the user's input language (English or Chinese) for your response.
+
+    Focus on finding:
+    1. Primary sources (official statements, press releases, government documents)
+    2. Credible news organizations with strong fact-checking reputations
+    3. Academic or scientific sources if relevant
+    4. Expert commentary from recognized authorities
+
+    Always use web search to find the most credible and authoritative sources available, DO NOT overly rely on your internal knowledge.
+""", [('Claim', 'user_input')]))
+
+FACT_CHECK_DEEPER_EXPLORATION = register(PromptTemplate('fact_check.deeper_exploration', 1, """
+    You are an expert fact-checker conducting deeper research. Based on the initial findings given at the end, conduct more specific and targeted searches to gather detailed information.
+
+    Conduct deeper, more specific searches focusing on:
+    1. Detailed evidence for specific claims
+    2. Counter-arguments or alternative perspectives
+    3. Expert analysis and commentary
+    4. Recent updates or developments
+    5. Contextual information that affects the claim's validity
+
+    Use targeted web searches to gather comprehensive evidence from multiple perspectives.
+""", [('Original Claim', 'user_input'), ('Initial Research Findings', 'context')]))
+
+FACT_CHECK_SOURCE_EVALUATION = register(PromptTemplate('fact_check.source_evaluation', 1, """
+    You are an expert fact-checker evaluating source credibility and reliability. Analyze all the sources found in the initial research step, listed at the end, and provide a comprehensive credibility assessment.
+
+    Conduct additional web searches to verify publisher credibility, check for bias, and cross-reference information.
+
+    Use web search to verify publisher reputations and credibility ratings from media bias and fact-checking organizations.
+""", [('Sources to evaluate from initial research', 'sources'), ('Initial research findings', 'context')]))
+
+FACT_CHECK_FINAL_CONCLUSION = register(PromptTemplate('fact_check.final_conclusion', 1, """
+    You are an expert fact-checker providing a final conclusion. Synthesize all previous research, given at the end, to provide a comprehensive final verdict.
+
+    Provide a balanced, evidence-based conclusion that acknowledges uncertainties while being as definitive as the evidence allows. Follow the research note at the end on how far to search.
+""", [('Original Claim', 'user_input'), ('Research Summary', 'context'), ('Research note', 'research_note')]))
+
+FACT_CHECK_STEP_SUMMARY = register(PromptTemplate('fact_check.step_summary', 1, """
+    You will be given the JSON data from one step of a fact-checking process. Provide a concise, one-sentence summary of it for a non-technical user. Reply with the summary only.
+
+    Example Summaries:
+    - Step 1: "Identified the main topic and found initial credible sources to investigate the claim."
+    - Step 2: "Gathered specific evidence and noted some conflicting reports that require further analysis."
+    - Step 3: "Evaluated the reliability of the sources, finding most to be credible but with some potential for bias."
+    - Step 4: "Finalized the analysis, reaching a verdict with a moderate level of confidence."
+""", [('Step', 'step_number'), ('Data', 'data')]))
+
+
+# Research mode (ChatGPTResearchService)
+
+RESEARCH_UNDERSTANDING = register(PromptTemplate('research.understanding', 1, """
+    You are an expert researcher analyzing a research request. Your goal is to understand what the user wants to learn and clarify the research question to guide comprehensive investigation.
+
+    Analyze the request given at the end and identify:
+    1. The core research question or topic
+    2. Key concepts and areas to explore
+    3. The scope and approach needed
+    4. What the user is ultimately trying to understand
+
+    Focus on understanding the research intent to enable comprehensive investigation.
+""", [('User Request', 'user_input')]))
+
+RESEARCH_GENERAL_SEARCH = register(PromptTemplate('research.general_search', 1, """
+    You are an expert researcher conducting comprehensive background research. Based on the research understanding given at the end, gather broad information to build a foundation of knowledge about the topic.
+
+    Conduct thorough web searches to gather:
+    1. Foundational information and background context
+    2. Current state of knowledge and recent developments
+    3. Key facts, data, and statistics
+    4. Major perspectives and different viewpoints
+    5. Important trends and patterns
+    6. Authoritative sources and expert insights
+
+    Focus on building comprehensive understanding through diverse, reliable sources.
+""", [('Original User Request', 'user_input'), ('Research Understanding from Step 1', 'context')]))
+
+RESEARCH_SPECIFIC_EXPLORATION = register(PromptTemplate('research.specific_exploration', 1, """
+    You are an expert researcher conducting targeted investigation. Based on the foundational research given at the end, now explore specific aspects in greater depth to provide comprehensive understanding.
+
+    Conduct focused searches to explore:
+    1. Detailed analysis of the most important areas identified
+    2. Expert perspectives and authoritative opinions
+    3. Specific evidence, case studies, and real-world examples
+    4. Current debates, challenges, and emerging issues
+    5. Practical implications and applications
+    6. Recent developments and future outlook
+
+    Focus on depth and specificity to provide comprehensive answers.
+""", [('Previous research findings', 'context')]))
+
+RESEARCH_FINAL_REPORT = register(PromptTemplate('research.final_report', 1, """
+    You are an expert researcher writing a comprehensive research report. Your goal is to help the audience fully understand the answer to their research question through clear, engaging writing. The research request and a summary of the research process are given at the end.
+
+    Write a comprehensive research report in markdown format that addresses the user's question. Focus on helping the audience understand the topic thoroughly rather than providing recommendations or action items.
+
+    Your report should:
+    - Start with a clear, engaging introduction that frames the research question and provides a short and concise overview of the conclusions drawn
+    - Present findings in a logical, easy-to-follow structure
+    - Include key insights, data, and expert perspectives discovered
+    - Explain complex concepts in accessible language
+    - Highlight different viewpoints when they exist
+    - Discuss current trends and recent developments
+    - Address any limitations or gaps in the available information
+    - Conclude with a synthesis that answers the original question
+
+    Write in a style similar to a high-quality research article or investigative report. Use markdown formatting including:
+    - Headers (## and ###) to organize sections
+    - **Bold text** for emphasis on key points
+    - *Italics* for important terms or concepts
+    - Bullet points or numbered lists where appropriate
+    - > Blockquotes for significant expert opinions or key insights
+
+    Do NOT include:
+    - Specific action recommendations
+    - Detailed methodology sections
+    - Formal citations (but you can reference "recent studies" or "experts indicate")
+
+    Focus on being informative, engaging, and helping the reader gain deep understanding of the topic. Reply with the complete research report in markdown format only.
+""", [('Original Research Request', 'user_input'), ('Research Process Summary', 'context')]))
+
+RESEARCH_STEP_SUMMARY = register(PromptTemplate('research.step_summary', 1, """
+    You will be given the JSON data from one step of a research process. Provide a concise, one-sentence summary of it for a non-technical user. Reply with the summary only.
+
+    Example Summaries:
+    - Step 1: "Analyzed and clarified the research question, identifying key areas to investigate."
+    - Step 2: "Conducted comprehensive background research and gathered general information about the topic."
+    - Step 3: "Performed detailed investigation into specific aspects and gathered expert insights."
+""", [('Step', 'step_number'), ('Data', 'data')]))
@@ -0,0 +1,236 @@
+"""
+Redis-backed token bucket shared by every worker that calls OpenAI
+
+Each model has two buckets, one for requests and one for tokens, refilled
+continuously at OPENAI_RATE_LIMITS per minute. Callers reserve one request plus
+their estimated tokens before calling the API and queue until the buckets
+allow it, instead of failing with 429s. Waiting callers register in a shared
+priority queue so that more urgent work (lower priority number) goes first on
+every node. Once the response arrives, the estimate is settled against the
+real usage.
+"""
+import asyncio
+import logging
+import random
+import time
+import uuid
+import weakref
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+from apps.fact_checker.services.context_projection import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Lower numbers are served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+# Rough input size of one image at default detail
+IMAGE_TOKEN_ESTIMATE = 1100
+
+# Returns 0 once a request is reserved, otherwise how many ms to wait before retrying
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rpm, tpm, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local ticket, priority = ARGV[4], tonumber(ARGV[5])
+local waiter_ttl, yield_ms = tonumber(ARGV[6]), tonumber(ARGV[7])
+
+redis.call('ZADD', KEYS[2], priority, ticket)
+redis.call('HSET', KEYS[3], ticket, now + waiter_ttl)
+redis.call('PEXPIRE', KEYS[2], waiter_ttl * 2)
+redis.call('PEXPIRE', KEYS[3], waiter_ttl * 2)
+
+-- Let live waiters with a more urgent priority go first; forget ones that stopped polling
+local ahead = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', '(' .. priority)
+for _, other in ipairs(ahead) do
+    local deadline = tonumber(redis.call('HGET', KEYS[3], other) or '0')
+    if deadline < now then
+        redis.call('ZREM', KEYS[2], other)
+        redis.call('HDEL', KEYS[3], other)
+    else
+        return yield_ms
+    end
+end
+
+local bucket = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'ts')
+local requests = tonumber(bucket[1]) or rpm
+local tokens = tonumber(bucket[2]) or tpm
+local elapsed = math.max(now - (tonumber(bucket[3]) or now), 0)
+requests = math.min(rpm, requests + elapsed * rpm / 60000)
+tokens = math.min(tpm, tokens + elapsed * tpm / 60000)
+cost = math.min(cost, tpm)
+
+local wait = 0
+if requests < 1 then
+    wait = math.max(wait, (1 - requests) * 60000 / rpm)
+end
+if tokens < cost then
+    wait = math.max(wait, (cost - tokens) * 60000 / tpm)
+end
+if wait == 0 then
+    requests = requests - 1
+    tokens = tokens - cost
+    redis.call('ZREM', KEYS[2], ticket)
+    redis.call('HDEL', KEYS[3], ticket)
+end
+
+redis.call('HSET', KEYS[1], 'requests', requests, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 120000)
+return math.ceil(wait)
+"""
+
+
+def estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """
+    Estimate the tokens a Responses or Chat Completions request will consume
+
+    Counts the text in input/messages, a fixed amount per image, and the output
+    cap (or RATE_LIMIT_DEFAULT_OUTPUT_TOKENS when the request sets none).
+    """
+    texts = []
+    images = 0
+
+    def collect(value: Any) -> None:
+        nonlocal images
+        if isinstance(value, str):
+            texts.append(value)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+        elif isinstance(value, dict):
+            if value.get('type') in ['input_image', 'image_url']:
+                images += 1
+                return
+            for key in ['content', 'text']:
+                if key in value:
+                    collect(value[key])
+
+    collect(request.get('input'))
+    collect(request.get('messages'))
+    collect(request.get('instructions'))
+
+    output_tokens = (
+        request.get('max_output_tokens')
+        or request.get('max_completion_tokens')
+        or request.get('max_tokens')
+        or getattr(settings, 'RATE_LIMIT_DEFAULT_OUTPUT_TOKENS', 4000)
+    )
+    return count_tokens('\n'.join(texts)) + images * IMAGE_TOKEN_ESTIMATE + output_tokens
+
+
+class RateLimiter:
+    """
+    Distributed request and token buckets for OpenAI models
+    """
+
+    # Waiters that stop polling for this long drop out of the priority queue
+    WAITER_TTL_MS = 10000
+    # How long to back off when a more urgent caller is queued
+    YIELD_MS = 100
+    # Re-check at least this often so waiters stay registered
+    MAX_SLEEP = 2.0
+    # Skip limiting for this long after Redis errors instead of failing calls
+    ERROR_BACKOFF = 30.0
+
+    def __init__(self, url: str):
+        import redis.asyncio as aioredis
+
+        self.redis = aioredis.Redis.from_url(url, decode_responses=True)
+        self.acquire_script = self.redis.register_script(_ACQUIRE_SCRIPT)
+        self.limits = getattr(settings, 'OPENAI_RATE_LIMITS', {})
+        self.max_wait = getattr(settings, 'RATE_LIMIT_MAX_WAIT', 300.0)
+        self._disabled_until = 0.0
+
+    def get_limits(self, model: str) -> Optional[Dict[str, int]]:
+        """
+        Look up RPM/TPM limits for a model, matching dated snapshots like o4-mini-2025-04-16
+        """
+        if model in self.limits:
+            return self.limits[model]
+        for name in sorted(self.limits, key=len, reverse=True):
+            if model.startswith(f"{name}-"):
+                return self.limits[name]
+        return None
+
+    def _keys(self, model: str) -> list:
+        return [f"rate_limit:{model}:bucket", f"rate_limit:{model}:waiters", f"rate_limit:{model}:deadlines"]
+
+    async def acquire(self, model: str, estimated_tokens: int, priority: int = PRIORITY_NORMAL) -> int:
+        """
+        Wait until the model's buckets allow this request, then reserve it
+
+        Returns:
+            int: Time spent queued, in milliseconds
+        """
+        limits = self.get_limits(model)
+        if limits is None or time.monotonic() < self._disabled_until:
+            return 0
+
+        keys = self._keys(model)
+        ticket = uuid.uuid4().hex
+        started = time.monotonic()
+        try:
+            while True:
+                wait_ms = await self.acquire_script(keys=keys, args=[
+                    limits['rpm'], limits['tpm'], estimated_tokens, ticket, priority,
+                    self.WAITER_TTL_MS, self.YIELD_MS
+                ])
+                if not wait_ms:
+                    break
+
+                if time.monotonic() - started + wait_ms / 1000 > self.max_wait:
+                    # Queue, don't fail: past the cap, let the API's own retries handle it
+                    logger.warning(f"Rate limit wait for {model} exceeded {self.max_wait}s; sending request anyway")
+                    await self._leave_queue(keys, ticket)
+                    break
+
+                # A little jitter keeps waiters on different nodes from polling in lockstep
+                await asyncio.sleep(min(wait_ms / 1000, self.MAX_SLEEP) * (1 + random.random() * 0.1))
+        except Exception as e:
+            logger.warning(f"Rate limiter unavailable, skipping limits for {self.ERROR_BACKOFF}s: {str(e)}")
+            self._disabled_until = time.monotonic() + self.ERROR_BACKOFF
+
+        waited_ms = int((time.monotonic() - started) * 1000)
+        if waited_ms >= 1000:
+            logger.info(f"Queued {waited_ms}ms for {model} rate limit (priority {priority})")
+        return waited_ms
+
+    async def settle(self, model: str, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        Correct the token bucket once the real usage of a request is known
+        """
+        if self.get_limits(model) is None or time.monotonic() < self._disabled_until:
+            return
+        try:
+            # May go negative, which delays the next callers until the overrun is refilled
+            await self.redis.hincrbyfloat(self._keys(model)[0], 'tokens', estimated_tokens - actual_tokens)
+        except Exception as e:
+            logger.warning(f"Error settling rate limit tokens for {model}: {str(e)}")
+
+    async def _leave_queue(self, keys: list, ticket: str) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrem(keys[1], ticket)
+            pipe.hdel(keys[2], ticket)
+            await pipe.execute()
+
+
+# redis.asyncio connections are bound to the loop that opened them
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, RateLimiter]" = weakref.WeakKeyDictionary()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Get the rate limiter for the running loop, or None when RATE_LIMIT_ENABLED is off
+    """
+    if not getattr(settings, 'RATE_LIMIT_ENABLED', False):
+        return None
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = RateLimiter(settings.RATE_LIMIT_REDIS_URL)
+        _limiters[loop] = limiter
+    return limiter
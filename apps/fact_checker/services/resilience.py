@@ -0,0 +1,294 @@
+"""
+Retries, hedging and circuit breaking for LLM calls
+
+call_with_resilience wraps a single API call:
+- transient errors (timeouts, connection errors, 429, 5xx) are retried a
+  bounded number of times with full-jitter exponential backoff;
+- a call still running past the model's recent p95 latency gets one hedged
+  duplicate, and whichever finishes first wins;
+- a per-model circuit breaker opens after repeated failures, so calls fail fast
+  and go to the model's fallback in LLM_FALLBACK_MODELS until it recovers.
+
+Retry counts, hedging and the model that answered are written to call_stats so
+they end up on the call's ChatGPTInteraction.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import openai
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Error codes of a failed response that are transient; the rest (e.g. invalid_image) are bad requests
+RETRYABLE_FAILURE_CODES = {'server_error', 'rate_limit_exceeded', 'vector_store_timeout'}
+
+
+class CircuitOpenError(Exception):
+    """Raised when every candidate model's circuit is open"""
+
+
+class ResponseFailedError(Exception):
+    """Raised when a streamed response ends with response.failed"""
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one model
+
+    Closed: calls pass. After failure_threshold consecutive transient failures
+    it opens and rejects calls for reset_timeout seconds, then lets a single
+    trial call through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, model: str, failure_threshold: int, reset_timeout: float):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half_open' and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info(f"Circuit for {self.model} closed")
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_cancelled(self) -> None:
+        # An abandoned call says nothing about the model; let the next call be the trial
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial_in_flight or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self.trial_in_flight:
+                logger.warning(f"Circuit for {self.model} opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+
+class LatencyTracker:
+    """
+    Recent successful call latencies per model, for the hedging threshold
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = {}
+
+    def record(self, model: str, seconds: float) -> None:
+        self.samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model: str, percentile: float, min_samples: int) -> Optional[float]:
+        samples = self.samples.get(model)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(len(ordered) * percentile / 100), len(ordered) - 1)]
+
+
+# Per worker process; all analyses in a process share one event loop
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies = LatencyTracker()
+
+
+def recent_latency(model: str, percentile: float = 50, min_samples: int = 5) -> Optional[float]:
+    """
+    Latency percentile in seconds of this process's recent successful calls to a model
+    """
+    return _latencies.percentile(model, percentile, min_samples)
+
+
+def get_circuit_breaker(model: str, scope: str = '') -> CircuitBreaker:
+    key = f"{scope}/{model}" if scope else model
+    breaker = _breakers.get(key)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            key,
+            getattr(settings, 'LLM_CIRCUIT_FAILURE_THRESHOLD', 5),
+            getattr(settings, 'LLM_CIRCUIT_RESET_TIMEOUT', 30.0),
+        )
+        _breakers[key] = breaker
+    return breaker
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Check whether an error is transient and worth retrying
+    """
+    if isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, ResponseFailedError):
+        return error.code in RETRYABLE_FAILURE_CODES
+    return False
+
+
+def backoff_delay(attempt: int, error: Optional[Exception] = None) -> float:
+    """
+    Full-jitter exponential backoff, honouring Retry-After on rate limit errors
+    """
+    max_delay = getattr(settings, 'LLM_RETRY_MAX_DELAY', 8.0)
+    delay = random.uniform(0, min(max_delay, getattr(settings, 'LLM_RETRY_BASE_DELAY', 0.5) * 2 ** attempt))
+
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    try:
+        delay = max(delay, min(float(retry_after), max_delay)) if retry_after else delay
+    except ValueError:
+        pass
+    return delay
+
+
+def candidate_models(model: str) -> List[str]:
+    fallback = getattr(settings, 'LLM_FALLBACK_MODELS', {}).get(model)
+    return [model, fallback] if fallback and fallback != model else [model]
+
+
+async def _timed(send: Callable[[Dict[str, Any]], Awaitable[Any]], request: Dict[str, Any]) -> Any:
+    started = time.monotonic()
+    response = await send(request)
+    _latencies.record(request['model'], time.monotonic() - started)
+    return response
+
+
+async def _hedged(send: Callable[[Dict[str, Any]], Awaitable[Any]], request: Dict[str, Any], stats: Dict[str, Any]) -> Any:
+    """
+    Send the request, and once more if the first is slower than the model's recent p95
+    """
+    hedge_after = None
+    if getattr(settings, 'LLM_HEDGING_ENABLED', False):
+        hedge_after = _latencies.percentile(
+            request['model'],
+            getattr(settings, 'LLM_HEDGE_PERCENTILE', 95),
+            getattr(settings, 'LLM_HEDGE_MIN_SAMPLES', 20),
+        )
+
+    tasks = [asyncio.ensure_future(_timed(send, request))]
+    try:
+        if hedge_after is None:
+            return await tasks[0]
+
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            logger.info(f"Hedging {request['model']} call still running after {hedge_after:.1f}s")
+            stats['hedged'] = True
+            tasks.append(asyncio.ensure_future(_timed(send, request)))
+
+        pending = set(tasks)
+        first_error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                first_error = first_error or task.exception()
+        raise first_error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def call_with_resilience(
+    send: Callable[[Dict[str, Any]], Awaitable[Any]],
+    request: Dict[str, Any],
+    call_stats: Optional[Dict[str, Any]] = None,
+    hedge: bool = True,
+    can_retry: Callable[[], bool] = lambda: True,
+    scope: str = '',
+) -> Any:
+    """
+    Run send(request) with retries, optional hedging and per-model circuit breaking
+
+    Args:
+        send: Performs one API call for the given request kwargs
+        request: Request kwargs; "model" is swapped for the fallback if its circuit is open
+        call_stats: Receives "retries", "hedged" and the "model" that answered
+        hedge: Whether a slow call may be duplicated (off for streams)
+        can_retry: Checked before retrying, e.g. to stop once a stream has sent text
+        scope: Keeps separate circuits for the same models, e.g. per LLM provider
+
+    Returns:
+        The API response from the first successful attempt
+    """
+    stats = call_stats if call_stats is not None else {}
+    stats.setdefault('retries', 0)
+    stats.setdefault('hedged', False)
+    max_retries = getattr(settings, 'OPENAI_MAX_RETRIES', 3)
+    last_error = None
+
+    for model in candidate_models(request['model']):
+        breaker = get_circuit_breaker(model, scope)
+        attempt_request = request if model == request['model'] else {**request, 'model': model}
+
+        for attempt in range(max_retries + 1):
+            if not breaker.allow():
+                logger.warning(f"Circuit for {model} is open, failing fast")
+                last_error = last_error or CircuitOpenError(f"Circuit for {model} is open")
+                break
+
+            try:
+                if hedge:
+                    response = await _hedged(send, attempt_request, stats)
+                else:
+                    response = await _timed(send, attempt_request)
+            except asyncio.CancelledError:
+                # Deadlines, task timeouts and hedging cancel calls; a cancelled trial must not hold the circuit open
+                breaker.record_cancelled()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # The API answered, so the model is healthy; the request itself is bad
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                last_error = e
+                if attempt == max_retries or not can_retry():
+                    break
+                delay = backoff_delay(attempt, e)
+                logger.warning(f"Retrying {model} call in {delay:.1f}s after {type(e).__name__}: {str(e)}")
+                stats['retries'] += 1
+                await asyncio.sleep(delay)
+                continue
+
+            breaker.record_success()
+            stats['model'] = model
+            if model != request['model']:
+                logger.warning(f"Answered by fallback model {model} instead of {request['model']}")
+            return response
+
+        if not can_retry():
+            break
+
+    raise last_error
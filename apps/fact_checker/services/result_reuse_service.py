@@ -0,0 +1,125 @@
+import logging
+from datetime import timedelta
+from typing import Optional
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apps.fact_checker.models import FactCheckSession, AnalysisStep, Source
+
+logger = logging.getLogger(__name__)
+
+
+class ResultReuseService:
+    """Service for answering repeated claims from a recent completed session"""
+
+    def __init__(self, window_seconds: Optional[int] = None):
+        if window_seconds is None:
+            window_seconds = getattr(settings, 'CLAIM_REUSE_WINDOW', 0)
+        self.window_seconds = window_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    def find_reusable_session(self, claim_fingerprint: str) -> Optional[FactCheckSession]:
+        """
+        Find the most recent completed original session for a fingerprint inside the freshness window
+        """
+        if not self.enabled or not claim_fingerprint:
+            return None
+
+        cutoff = timezone.now() - timedelta(seconds=self.window_seconds)
+
+        # Only original runs count, so cloning a clone never extends a result's freshness
+        return FactCheckSession.objects.filter(
+            claim_fingerprint=claim_fingerprint,
+            status='completed',
+            reused_from__isnull=True,
+            completed_at__gte=cutoff
+        ).order_by('-completed_at').first()
+
+    def sync_rows(self, source_session: FactCheckSession, target_session: FactCheckSession) -> bool:
+        """
+        Bring the target's steps and sources up to date with the source session
+
+        Returns:
+            bool: True if any row was created or changed
+        """
+        changed = False
+        target_steps = {step.step_number: step for step in target_session.analysis_steps.all()}
+
+        for step in source_session.analysis_steps.all():
+            fields = {
+                'step_type': step.step_type,
+                'description': step.description,
+                'status': step.status,
+                'result_data': step.result_data,
+                'error_message': step.error_message,
+                'completed_at': step.completed_at,
+                'summary': step.summary,
+            }
+            existing = target_steps.get(step.step_number)
+            if existing is None:
+                AnalysisStep.objects.create(session=target_session, step_number=step.step_number, **fields)
+                changed = True
+            elif any(getattr(existing, name) != value for name, value in fields.items()):
+                for name, value in fields.items():
+                    setattr(existing, name, value)
+                existing.save()
+                changed = True
+
+        known_urls = set(target_session.sources.values_list('url', flat=True))
+        new_sources = [
+            Source(
+                session=target_session,
+                url=source.url,
+                title=source.title,
+                publisher=source.publisher,
+                author=source.author,
+                credibility_score=source.credibility_score,
+                content_summary=source.content_summary,
+                extracted_claims=source.extracted_claims,
+                publish_date=source.publish_date,
+                is_primary_source=source.is_primary_source,
+                supports_claim=source.supports_claim,
+                relevance_score=source.relevance_score
+            )
+            for source in source_session.sources.all()
+            if source.url not in known_urls
+        ]
+        if new_sources:
+            Source.objects.bulk_create(new_sources)
+            changed = True
+
+        return changed
+
+    def copy_outcome(self, source_session: FactCheckSession, target_session: FactCheckSession) -> FactCheckSession:
+        """
+        Copy the final status and verdict of a finished session
+        """
+        target_session.final_verdict = source_session.final_verdict
+        target_session.confidence_score = source_session.confidence_score
+        target_session.analysis_summary = source_session.analysis_summary
+        target_session.reused_from = source_session
+        target_session.status = source_session.status
+        target_session.completed_at = timezone.now()
+        target_session.save()
+        return target_session
+
+    def clear_rows(self, target_session: FactCheckSession) -> None:
+        """
+        Remove mirrored steps and sources before a session runs its own analysis
+        """
+        target_session.analysis_steps.all().delete()
+        target_session.sources.all().delete()
+
+    def clone_result(self, source_session: FactCheckSession, target_session: FactCheckSession) -> FactCheckSession:
+        """
+        Copy the steps, sources and verdict of a completed session into a new session
+        """
+        with transaction.atomic():
+            self.sync_rows(source_session, target_session)
+            self.copy_outcome(source_session, target_session)
+
+        logger.info(f"Session {target_session.session_id} reused result of session {source_session.session_id}")
+        return target_session
@@ -0,0 +1,88 @@
+"""
+Per-step web search depth and location
+
+WEB_SEARCH_PROFILES sets the search context size of every step, per mode: the
+credibility check of step 3 only needs to look sources up, while step 2's
+evidence gathering benefits from reading more of each page. A profile gives
+the size at the standard routing tier; the fast tier searches one level
+shallower and the thorough tier one level deeper (see MODEL_ROUTES'
+search_depth), so a simple claim or a tight latency budget also keeps searches
+short. Steps without a profile entry use WEB_SEARCH_CONTEXT_SIZE.
+
+A request can override both: search_options on the session may carry a
+search_context_size for every step and a user_location that replaces
+WEB_SEARCH_USER_LOCATION (a partial location is not mixed with the configured
+city or timezone of another country). The location is sent as the web search tool's
+approximate user location, so local news and regional sources rank first.
+"""
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+CONTEXT_SIZES = ['low', 'medium', 'high']
+LOCATION_FIELDS = ['country', 'region', 'city', 'timezone']
+
+
+def profile_context_size(mode: str, step_name: Optional[str]) -> str:
+    """
+    The configured search context size of a step at the standard tier
+    """
+    profile = getattr(settings, 'WEB_SEARCH_PROFILES', {}).get(mode, {})
+    default = getattr(settings, 'WEB_SEARCH_CONTEXT_SIZE', 'medium')
+    size = profile.get(step_name, default)
+    return size if size in CONTEXT_SIZES else 'medium'
+
+
+def shift_context_size(size: str, depth: int) -> str:
+    """
+    Move a context size up or down, staying within low..high
+    """
+    index = CONTEXT_SIZES.index(size) + depth
+    return CONTEXT_SIZES[min(max(index, 0), len(CONTEXT_SIZES) - 1)]
+
+
+def search_user_location(search_options: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, str]]:
+    """
+    The approximate user location for the web search tool, or None when unset
+    """
+    location = (search_options or {}).get('user_location') or getattr(settings, 'WEB_SEARCH_USER_LOCATION', {})
+    location = {field: location[field] for field in LOCATION_FIELDS if location.get(field)}
+    if not location:
+        return None
+    return {'type': 'approximate', **location}
+
+
+def resolve_search(mode: str, step_name: Optional[str], depth: int = 0, search_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Search settings for one step
+
+    Args:
+        mode: The session's mode, selecting the profile
+        step_name: The step's step_type
+        depth: Levels to move the profile's size, from the routing tier
+        search_options: The session's per-request overrides
+
+    Returns:
+        Dict with search_context_size and user_location
+    """
+    search_options = search_options or {}
+    size = search_options.get('search_context_size')
+    if size not in CONTEXT_SIZES:
+        size = shift_context_size(profile_context_size(mode, step_name), depth)
+    return {
+        'search_context_size': size,
+        'user_location': search_user_location(search_options),
+    }
+
+
+def web_search_tool(route: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    The web_search_preview tool definition for a routed step
+
+    Without a route (legacy single-request analyses) the global defaults apply
+    """
+    search = route if route and route.get('search_context_size') else resolve_search('fact_check', None)
+    tool = {"type": "web_search_preview", "search_context_size": search['search_context_size']}
+    if search.get('user_location'):
+        tool["user_location"] = search['user_location']
+    return tool
@@ -0,0 +1,161 @@
+"""
+Per-session time, token and web search budgets
+
+SESSION_BUDGETS gives every mode a wall-clock deadline, a token limit (input
+plus output) and a limit on web search tool calls; 0 leaves a limit off.
+EnhancedAnalysisService builds a SessionBudget when an analysis starts and
+hands it to the model router, so it reaches every step:
+
+- the router puts the budget and the time left for the call on each step's
+  route; _make_web_search_request refuses to start a call once the budget is
+  exceeded, cancels a call still running at the deadline and records each
+  call's usage. Non-final steps leave time for the final step;
+- once less than SESSION_BUDGET_LOW_FRACTION of any limit remains, the
+  router drops to the step's lowest tier with a shallower search, and optional
+  steps are skipped;
+- a final step (the fact-check conclusion or the research report) reached
+  with the budget exceeded, or cut off by the deadline, does not fail the
+  session: it writes a partial result from the steps that did finish.
+
+Tokens and searches are counted over the whole session, including earlier
+runs of a resumed session. The deadline covers the current run. Bulk
+analyses have none, since they wait on the Batch API's completion window.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+from django.conf import settings
+from django.db.models import Sum
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExceeded(Exception):
+    """The session ran out of time, tokens or web search calls"""
+
+
+class SessionBudget:
+    """
+    The limits of one analysis run and what it has used so far
+
+    Args:
+        deadline: Seconds from now until the run must end, or None
+        max_tokens: Input plus output tokens for the session, or None
+        max_web_search_calls: Web search tool calls for the session, or None
+        tokens_used: Tokens already used by earlier runs
+        web_search_calls: Web search calls already made by earlier runs
+    """
+
+    def __init__(self, deadline: Optional[float] = None, max_tokens: Optional[int] = None, max_web_search_calls: Optional[int] = None, tokens_used: int = 0, web_search_calls: int = 0):
+        self.deadline = deadline or None
+        self.max_tokens = max_tokens or None
+        self.max_web_search_calls = max_web_search_calls or None
+        self.tokens_used = tokens_used
+        self.web_search_calls = web_search_calls
+        self.started = time.monotonic()
+
+    @classmethod
+    def for_session(cls, session, batch: bool = False) -> 'SessionBudget':
+        """
+        The configured budget for a session's mode, less what the session already used
+        """
+        limits = getattr(settings, 'SESSION_BUDGETS', {}).get(session.mode, {})
+        spent = session.gpt_interactions.aggregate(
+            input_tokens=Sum('input_tokens'), output_tokens=Sum('output_tokens'), web_search_calls=Sum('web_search_calls')
+        )
+        return cls(
+            deadline=None if batch else limits.get('deadline'),
+            max_tokens=limits.get('max_tokens'),
+            max_web_search_calls=limits.get('max_web_search_calls'),
+            tokens_used=(spent['input_tokens'] or 0) + (spent['output_tokens'] or 0),
+            web_search_calls=spent['web_search_calls'] or 0,
+        )
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - self.elapsed()
+
+    def record(self, call_usage: Dict[str, Any]) -> None:
+        """
+        Count a call's usage (see llm_usage.build_call_usage)
+        """
+        self.tokens_used += call_usage.get('input_tokens', 0) + call_usage.get('output_tokens', 0)
+        self.web_search_calls += call_usage.get('web_search_calls', 0)
+
+    def _left(self) -> Dict[str, tuple]:
+        # (remaining, limit) of every limit that is set
+        left = {}
+        if self.deadline is not None:
+            left['time'] = (self.remaining_seconds(), self.deadline)
+        if self.max_tokens is not None:
+            left['tokens'] = (self.max_tokens - self.tokens_used, self.max_tokens)
+        if self.max_web_search_calls is not None:
+            left['web searches'] = (self.max_web_search_calls - self.web_search_calls, self.max_web_search_calls)
+        return left
+
+    def exceeded(self) -> Optional[str]:
+        """
+        Why the budget is used up, or None while it is not
+        """
+        if self.deadline is not None and self.remaining_seconds() <= 0:
+            return f"the {self.deadline:.0f}s session deadline passed"
+        if self.max_tokens is not None and self.tokens_used >= self.max_tokens:
+            return f"{self.tokens_used} of {self.max_tokens} session tokens were used"
+        if self.max_web_search_calls is not None and self.web_search_calls >= self.max_web_search_calls:
+            return f"{self.web_search_calls} of {self.max_web_search_calls} session web searches were made"
+        return None
+
+    def low(self) -> Optional[str]:
+        """
+        Which limit is nearly used up, or None while every limit has room
+        """
+        fraction = getattr(settings, 'SESSION_BUDGET_LOW_FRACTION', 0.25)
+        for name, (remaining, limit) in self._left().items():
+            if remaining < limit * fraction:
+                return f"{max(remaining, 0):.0f} of {limit:.0f} {name} left"
+        return None
+
+    def skip_reason(self, **inputs) -> Optional[str]:
+        """
+        Skip policy for optional steps (see pipeline.Node): a reason once the budget is low
+        """
+        reason = self.exceeded() or self.low()
+        return f"the session budget is running out ({reason})" if reason else None
+
+    def check(self) -> None:
+        reason = self.exceeded()
+        if reason:
+            raise BudgetExceeded(f"Session budget exceeded: {reason}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'elapsed_seconds': round(self.elapsed(), 1),
+            'deadline': self.deadline,
+            'tokens_used': self.tokens_used,
+            'max_tokens': self.max_tokens,
+            'web_search_calls': self.web_search_calls,
+            'max_web_search_calls': self.max_web_search_calls,
+            'exceeded': self.exceeded(),
+        }
+
+
+async def within_deadline(awaitable: Awaitable[Any], timeout: Optional[float]) -> Any:
+    """
+    Await a call, cancelling it with BudgetExceeded once the step's time is up
+    """
+    if timeout is None:
+        return await awaitable
+    if timeout <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise BudgetExceeded("Session budget exceeded: no time left for this step")
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise BudgetExceeded(f"Session budget exceeded: the call was cut off after {timeout:.0f}s at the session deadline")
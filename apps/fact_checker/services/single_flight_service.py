@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+from typing import Any, Coroutine, Dict, Optional
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Only touch the lock if this session still holds it
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_REFRESH_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_redis_client = None
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        import redis
+
+        # The sync client is thread-safe and shared by all Celery threads in the process
+        _redis_client = redis.Redis.from_url(settings.SINGLE_FLIGHT_REDIS_URL, decode_responses=True)
+    return _redis_client
+
+
+class SingleFlightService:
+    """
+    Redis-backed single-flight for identical claims across Celery nodes
+
+    The first session for a claim fingerprint becomes the leader and runs the
+    pipeline while holding a short-lived lock that it keeps refreshing. Later
+    sessions with the same fingerprint follow the leader and mirror its rows
+    instead of running their own analysis. If the leader dies, its lock expires
+    and a follower takes over.
+    """
+
+    def __init__(self):
+        self.enabled = getattr(settings, 'SINGLE_FLIGHT_ENABLED', False)
+        self.lock_ttl = getattr(settings, 'SINGLE_FLIGHT_LOCK_TTL', 60)
+        self.result_ttl = getattr(settings, 'SINGLE_FLIGHT_RESULT_TTL', 600)
+
+    def _lock_key(self, claim_fingerprint: str) -> str:
+        return f"single_flight:lock:{claim_fingerprint}"
+
+    def _result_key(self, session_id: str) -> str:
+        return f"single_flight:result:{session_id}"
+
+    def acquire(self, claim_fingerprint: Optional[str], session_id: str) -> str:
+        """
+        Try to lead the analysis for a fingerprint
+
+        Returns:
+            str: The leader's session id; equal to session_id when this session leads
+        """
+        if not self.enabled or not claim_fingerprint:
+            return session_id
+
+        try:
+            client = _get_redis()
+            key = self._lock_key(claim_fingerprint)
+            if client.set(key, session_id, nx=True, ex=self.lock_ttl):
+                return session_id
+
+            leader_id = client.get(key)
+            # The lock may have been released between SET and GET; the next run will retry
+            return leader_id or session_id
+        except Exception as e:
+            # Without Redis every session runs its own analysis, as before
+            logger.warning(f"Single-flight lock unavailable, running session {session_id} alone: {str(e)}")
+            return session_id
+
+    def get_leader(self, claim_fingerprint: str) -> Optional[str]:
+        """
+        Get the session currently holding the lock for a fingerprint
+        """
+        try:
+            return _get_redis().get(self._lock_key(claim_fingerprint))
+        except Exception as e:
+            logger.warning(f"Error reading single-flight lock: {str(e)}")
+            return None
+
+    def refresh(self, claim_fingerprint: str, session_id: str) -> bool:
+        """
+        Extend the lock while the leader is still working
+        """
+        try:
+            client = _get_redis()
+            return bool(client.eval(_REFRESH_SCRIPT, 1, self._lock_key(claim_fingerprint), session_id, self.lock_ttl))
+        except Exception as e:
+            logger.warning(f"Error refreshing single-flight lock: {str(e)}")
+            return False
+
+    def release(self, claim_fingerprint: Optional[str], session_id: str) -> None:
+        """
+        Release the lock if this session still holds it
+        """
+        if not self.enabled or not claim_fingerprint:
+            return
+        try:
+            _get_redis().eval(_RELEASE_SCRIPT, 1, self._lock_key(claim_fingerprint), session_id)
+        except Exception as e:
+            logger.warning(f"Error releasing single-flight lock: {str(e)}")
+
+    async def hold(self, claim_fingerprint: Optional[str], session_id: str, coro: Coroutine) -> Any:
+        """
+        Run the leader's analysis while keeping its lock alive
+        """
+        if not self.enabled or not claim_fingerprint:
+            return await coro
+
+        async def heartbeat():
+            while True:
+                await asyncio.sleep(self.lock_ttl / 3)
+                await asyncio.to_thread(self.refresh, claim_fingerprint, session_id)
+
+        heartbeat_task = asyncio.create_task(heartbeat())
+        try:
+            return await coro
+        finally:
+            heartbeat_task.cancel()
+
+    def publish_result(self, session_id: str, result: Dict[str, Any]) -> None:
+        """
+        Store the leader's task result so followers can send the same completion event
+        """
+        if not self.enabled:
+            return
+        try:
+            _get_redis().set(self._result_key(session_id), json.dumps(result, default=str), ex=self.result_ttl)
+        except Exception as e:
+            logger.warning(f"Error publishing single-flight result: {str(e)}")
+
+    def get_result(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the result published by a leader session
+        """
+        try:
+            value = _get_redis().get(self._result_key(session_id))
+            return json.loads(value) if value else None
+        except Exception as e:
+            logger.warning(f"Error reading single-flight result: {str(e)}")
+            return None
@@ -0,0 +1,299 @@
+"""
+User-facing one-sentence summaries for analysis steps
+
+By default (STEP_SUMMARY_MODE=template) summaries are built from the structured
+fields each step already returns, in the language of the user's input, without
+any LLM call. With STEP_SUMMARY_MODE=llm they are written by gpt-4.1-mini
+instead. LLM summaries are cosmetic, so they never hold up the pipeline: the
+step is saved as completed right away and its summary is generated in a
+background task, patched into AnalysisStep.summary when ready and announced
+with a step_summary event.
+"""
+import asyncio
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, Set
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from apps.fact_checker.models import AnalysisStep
+
+logger = logging.getLogger(__name__)
+
+_CJK_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+
+VERDICT_LABELS = {
+    'true': {'en': 'true', 'zh': '属实'},
+    'likely_true': {'en': 'likely true', 'zh': '可能属实'},
+    'likely': {'en': 'likely true', 'zh': '可能属实'},
+    'uncertain': {'en': 'uncertain', 'zh': '无法确定'},
+    'suspicious': {'en': 'suspicious', 'zh': '存疑'},
+    'likely_false': {'en': 'likely false', 'zh': '可能不实'},
+    'false': {'en': 'false', 'zh': '不实'},
+}
+
+VERIFICATION_LABELS = {
+    'well_verified': {'en': 'well verified', 'zh': '已充分核实'},
+    'partially_verified': {'en': 'partially verified', 'zh': '部分核实'},
+    'poorly_verified': {'en': 'poorly verified', 'zh': '核实不足'},
+    'conflicting': {'en': 'conflicting', 'zh': '说法相互矛盾'},
+    'unknown': {'en': 'not yet verified', 'zh': '尚未核实'},
+}
+
+SUPPORTING_STANCES = ['strongly_supports', 'somewhat_supports']
+CONTRADICTING_STANCES = ['strongly_contradicts', 'somewhat_contradicts']
+
+# One template per step type and language; placeholders are filled by _summary_fields
+TEMPLATES = {
+    'topic_analysis': {
+        'en': 'Identified the topic "{topic}" and {claims} verifiable claims to check.',
+        'zh': '已确定主题“{topic}”，并找出 {claims} 条可核实的说法。',
+    },
+    'source_search': {
+        'en': 'Found {results} candidate sources to review.',
+        'zh': '找到 {results} 个待审阅的候选来源。',
+    },
+    'content_extraction': {
+        'en': 'Extracted content from {crawled} sources.',
+        'zh': '已从 {crawled} 个来源提取内容。',
+    },
+    'source_evaluation': {
+        'en': 'Evaluated {evaluated} sources: {supporting} support the claim and {contradicting} contradict it.',
+        'zh': '已评估 {evaluated} 个来源：{supporting} 个支持该说法，{contradicting} 个与之相反。',
+    },
+    'final_verdict': {
+        'en': 'Reached a verdict of "{verdict}" with {confidence}% confidence.',
+        'zh': '得出结论“{verdict}”，置信度 {confidence}%。',
+    },
+    'initial_web_search': {
+        'en': 'Identified the topic "{topic}" and found {sources} initial credible sources, {high} of them highly credible.',
+        'zh': '已确定主题“{topic}”，找到 {sources} 个初步可信来源，其中 {high} 个可信度高。',
+    },
+    'deeper_exploration': {
+        'en': 'Gathered {evidence} pieces of specific evidence ({supporting} supporting, {contradicting} contradicting) and {counter} counter-arguments.',
+        'zh': '收集到 {evidence} 条具体证据（{supporting} 条支持，{contradicting} 条反驳）以及 {counter} 个反方观点。',
+    },
+    'source_credibility_evaluation': {
+        'en': 'Evaluated {evaluated} sources: {high} highly credible and {questionable} questionable; the claim is {verification}.',
+        'zh': '已评估 {evaluated} 个来源：{high} 个可信度高，{questionable} 个存疑；该说法{verification}。',
+    },
+    'final_conclusion': {
+        'en': 'Reached a verdict of "{verdict}" with {confidence}% confidence.',
+        'zh': '得出结论“{verdict}”，置信度 {confidence}%。',
+    },
+    'research_understanding': {
+        'en': 'Framed the research question "{question}" and identified {areas} areas to explore.',
+        'zh': '已明确研究问题“{question}”，并确定 {areas} 个研究方向。',
+    },
+    'general_research': {
+        'en': 'Collected {findings} general findings and {facts} key facts about the topic.',
+        'zh': '收集到 {findings} 项总体发现和 {facts} 条关键信息。',
+    },
+    'specific_research': {
+        'en': 'Explored {findings} areas in depth, with {experts} expert opinions and {data} data points.',
+        'zh': '深入研究了 {findings} 个方向，获得 {experts} 条专家观点和 {data} 个数据点。',
+    },
+    'research_report': {
+        'en': 'Compiled the final research report.',
+        'zh': '已完成最终研究报告。',
+    },
+    'search': {
+        'en': 'Completed the search for relevant sources.',
+        'zh': '已完成相关来源的搜索。',
+    },
+}
+
+FALLBACK_TEMPLATE = {
+    'en': 'This step has been completed.',
+    'zh': '此步骤已完成。',
+}
+
+# Keep references so pending summary tasks aren't garbage collected mid-flight
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def uses_llm_summaries() -> bool:
+    """
+    Check whether step summaries should be written by the LLM instead of templates
+    """
+    return getattr(settings, 'STEP_SUMMARY_MODE', 'template') == 'llm'
+
+
+def detect_language(text: str) -> str:
+    """
+    Detect whether the user wrote in Chinese or English
+    """
+    return 'zh' if _CJK_RE.search(text or '') else 'en'
+
+
+def _count(value: Any) -> int:
+    return len(value) if isinstance(value, list) else 0
+
+
+def _text(value: Any, default: str, limit: int = 80) -> str:
+    text = value.strip() if isinstance(value, str) else ''
+    if not text:
+        return default
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+
+def _label(labels: Dict[str, Dict[str, str]], value: Any, language: str, default: str) -> str:
+    key = value if isinstance(value, str) and value in labels else default
+    return labels[key][language]
+
+
+def _percent(value: Any) -> int:
+    try:
+        return round(float(value) * 100)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _summary_fields(step_type: str, data: Dict[str, Any], language: str) -> Dict[str, Any]:
+    unknown_topic = '该说法' if language == 'zh' else 'the claim'
+
+    if step_type == 'topic_analysis':
+        return {
+            'topic': _text(data.get('main_topic'), unknown_topic),
+            'claims': _count(data.get('factual_claims')),
+        }
+    if step_type == 'source_search':
+        return {'results': _count(data.get('search_results'))}
+    if step_type == 'content_extraction':
+        return {'crawled': data.get('crawled_count') or 0}
+    if step_type == 'source_evaluation':
+        evaluations = data.get('source_evaluations') or []
+        return {
+            'evaluated': _count(evaluations),
+            'supporting': sum(1 for e in evaluations if isinstance(e, dict) and e.get('supports_claim') is True),
+            'contradicting': sum(1 for e in evaluations if isinstance(e, dict) and e.get('supports_claim') is False),
+        }
+    if step_type in ['final_verdict', 'final_conclusion']:
+        verdict = data.get('verdict')
+        if isinstance(verdict, dict):
+            classification, confidence = verdict.get('classification'), verdict.get('confidence_score')
+        else:
+            classification, confidence = verdict, data.get('confidence_score')
+        return {
+            'verdict': _label(VERDICT_LABELS, classification, language, 'uncertain'),
+            'confidence': _percent(confidence),
+        }
+    if step_type == 'initial_web_search':
+        sources = data.get('initial_credible_sources') or []
+        return {
+            'topic': _text(data.get('main_topic'), unknown_topic),
+            'sources': _count(sources),
+            'high': sum(1 for s in sources if isinstance(s, dict) and s.get('credibility_level') == 'high'),
+        }
+    if step_type == 'deeper_exploration':
+        evidence = data.get('specific_evidence') or []
+        stances = [e.get('supports_claim') for e in evidence if isinstance(e, dict)]
+        return {
+            'evidence': _count(evidence),
+            'supporting': sum(1 for stance in stances if stance in SUPPORTING_STANCES),
+            'contradicting': sum(1 for stance in stances if stance in CONTRADICTING_STANCES),
+            'counter': _count(data.get('counter_arguments')),
+        }
+    if step_type == 'source_credibility_evaluation':
+        quality = data.get('overall_source_quality') or {}
+        cross_reference = data.get('cross_reference_analysis') or {}
+        return {
+            'evaluated': _count(data.get('source_credibility_analysis')),
+            'high': quality.get('high_credibility_sources') or 0,
+            'questionable': quality.get('questionable_sources') or 0,
+            'verification': _label(VERIFICATION_LABELS, cross_reference.get('verification_status'), language, 'unknown'),
+        }
+    if step_type == 'research_understanding':
+        return {
+            'question': _text(data.get('research_question'), unknown_topic),
+            'areas': _count(data.get('research_areas')),
+        }
+    if step_type == 'general_research':
+        return {
+            'findings': _count(data.get('general_findings')),
+            'facts': _count(data.get('key_information')),
+        }
+    if step_type == 'specific_research':
+        return {
+            'findings': _count(data.get('detailed_findings')),
+            'experts': _count(data.get('expert_opinions')),
+            'data': _count(data.get('data_points')),
+        }
+    return {}
+
+
+def build_step_summary(step_type: str, result_data: Dict[str, Any], user_input: str = '') -> str:
+    """
+    Build a one-sentence summary of a step from its parsed result, without an LLM call
+
+    Args:
+        step_type: One of AnalysisStep.STEP_TYPES
+        result_data: The step's parsed result
+        user_input: The user's claim or question, used to pick English or Chinese
+
+    Returns:
+        str: Summary suitable for display to users
+    """
+    language = detect_language(user_input)
+    templates = TEMPLATES.get(step_type, FALLBACK_TEMPLATE)
+    try:
+        return templates[language].format(**_summary_fields(step_type, result_data or {}, language))
+    except Exception as e:
+        logger.warning(f"Error building summary for step type {step_type}: {str(e)}")
+        return FALLBACK_TEMPLATE[language]
+
+
+def schedule_step_summary(step: AnalysisStep, summarize: Callable[[], Awaitable[str]]) -> asyncio.Task:
+    """
+    Generate a step's summary in the background and patch it in when ready
+    """
+    task = asyncio.create_task(_complete_step_summary(step, summarize))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def wait_for_pending_summaries(timeout: float = 30.0) -> None:
+    """
+    Wait for in-flight summaries, e.g. before a short-lived event loop closes
+    """
+    pending = [task for task in _background_tasks if task.get_loop() is asyncio.get_running_loop()]
+    if pending:
+        await asyncio.wait(pending, timeout=timeout)
+
+
+async def _complete_step_summary(step: AnalysisStep, summarize: Callable[[], Awaitable[str]]) -> None:
+    try:
+        summary = await summarize()
+        await sync_to_async(_save_step_summary)(step.pk, summary)
+        await _send_step_summary_event(step, summary)
+    except Exception as e:
+        logger.error(f"Error completing summary for step {step.step_number} of session {step.session_id}: {str(e)}")
+
+
+def _save_step_summary(step_pk: int, summary: str) -> None:
+    step = AnalysisStep.objects.get(pk=step_pk)
+    step.summary = summary
+    if isinstance(step.result_data, dict):
+        step.result_data['summary'] = summary
+    step.save(update_fields=['summary', 'result_data'])
+
+
+async def _send_step_summary_event(step: AnalysisStep, summary: str) -> None:
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        await channel_layer.group_send(f"fact_check_{step.session_id}", {
+            'type': 'fact_check_update',
+            'data': {
+                'type': 'step_summary',
+                'step_number': step.step_number,
+                'step_type': step.step_type,
+                'summary': summary
+            }
+        })
+    except Exception as e:
+        logger.warning(f"Error sending step summary event: {str(e)}")
@@ -0,0 +1,72 @@
+"""
+Relay streamed response text to a session's WebSocket group
+"""
+import logging
+import time
+from typing import Union
+
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+
+class TokenStreamer:
+    """
+    Send partial response text to FactCheckConsumer as token_delta events
+
+    Deltas from the Responses API are a few characters each; they are buffered and
+    flushed every FLUSH_CHARS characters or FLUSH_INTERVAL seconds so the channel
+    layer sees a handful of messages per second instead of one per token.
+    """
+
+    FLUSH_CHARS = 200
+    FLUSH_INTERVAL = 0.25
+
+    def __init__(self, session_id: str, step: Union[int, str]):
+        self.group_name = f"fact_check_{session_id}"
+        self.step = step
+        self.channel_layer = get_channel_layer()
+        self._buffer = []
+        self._buffered_chars = 0
+        self._sequence = 0
+        self._last_flush = time.monotonic()
+
+    async def push(self, delta: str) -> None:
+        if not delta:
+            return
+        self._buffer.append(delta)
+        self._buffered_chars += len(delta)
+        if self._buffered_chars >= self.FLUSH_CHARS or time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL:
+            await self.flush()
+
+    async def flush(self, done: bool = False) -> None:
+        if not self._buffer and not done:
+            return
+
+        delta = ''.join(self._buffer)
+        self._buffer = []
+        self._buffered_chars = 0
+        self._last_flush = time.monotonic()
+
+        await self._send({
+            'step': self.step,
+            'sequence': self._sequence,
+            'delta': delta,
+            'done': done
+        })
+        self._sequence += 1
+
+    async def close(self) -> None:
+        await self.flush(done=True)
+
+    async def _send(self, data: dict) -> None:
+        if self.channel_layer is None:
+            return
+        try:
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'token_delta',
+                'data': data
+            })
+        except Exception as e:
+            # Streaming is best-effort; the full result is still persisted at the end
+            logger.warning(f"Error sending token delta to {self.group_name}: {str(e)}")
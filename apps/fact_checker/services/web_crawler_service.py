@@ -131,6 +131,13 @@ class WebCrawlerService:
             "relevance_score": source.relevance_score,
         }
 
+    async def start(self):
+        """Launch the crawler browser ahead of the first crawl."""
+        try:
+            await self.crawler.start()
+        except Exception as exc:
+            logger.error("Error during crawler startup: %s", exc)
+
     async def cleanup(self):
         """Gracefully close the AsyncWebCrawler session."""
         try:
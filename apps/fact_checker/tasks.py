@@ -1,9 +1,15 @@
 import logging
-import asyncio
+from datetime import timedelta
 from celery import shared_task
+from django.conf import settings
+from django.db.models import F
 from django.utils import timezone
 from apps.fact_checker.models import FactCheckSession
-from apps.fact_checker.services.enhanced_analysis_service import EnhancedAnalysisService
+from apps.fact_checker.services.result_reuse_service import ResultReuseService
+from apps.fact_checker.services.single_flight_service import SingleFlightService
+from apps.fact_checker.worker_runtime import (
+    get_analysis_service, run_analysis_in_worker_loop, run_in_worker_loop
+)
 
 logger = logging.getLogger(__name__)
 
@@ -26,32 +32,57 @@ def perform_fact_check_task(self, session_id: str):
         # Check if this is a research session
         use_research = session.mode == 'research'
         
-        analysis_service = EnhancedAnalysisService(
+        # Identical claims already being analyzed on any node are followed, not re-run
+        single_flight = SingleFlightService()
+        leader_id = single_flight.acquire(session.claim_fingerprint, session_id)
+        if leader_id != session_id:
+            logger.info(f"Session {session_id} is following in-flight session {leader_id}")
+            session.status = 'analyzing'
+            session.save()
+            mirror_leader_session_task.delay(session_id, leader_id)
+            return {'session_id': session_id, 'following': leader_id}
+        
+        # Reuse this worker's warm service and long-lived event loop; concurrent
+        # tasks from the threads pool share the loop up to ANALYSIS_MAX_CONCURRENCY
+        analysis_service = get_analysis_service(
             use_web_search=use_web_search,
             use_research=use_research
         )
         
-        # Run async analysis in event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
+        deferred = False
         try:
-            result = loop.run_until_complete(
-                analysis_service.perform_complete_analysis(session)
+            result = run_analysis_in_worker_loop(
+                single_flight.hold(
+                    session.claim_fingerprint,
+                    session_id,
+                    analysis_service.perform_complete_analysis(session)
+                )
             )
-            
-            logger.info(f"Fact-check task completed for session {session_id}")
-            
-            # Send WebSocket update with final result
-            send_websocket_update.delay(session_id, {
-                'type': 'analysis_complete',
-                'result': result
-            })
-            
-            return result
-            
+            # A session waiting on background responses keeps leading its claim
+            deferred = bool(result.get('deferred'))
+            if not deferred:
+                single_flight.publish_result(session_id, result)
         finally:
-            loop.close()
+            if not deferred:
+                single_flight.release(session.claim_fingerprint, session_id)
+        
+        if deferred:
+            logger.info(f"Session {session_id} is waiting on background responses for {result['deferred']}")
+            poll_background_responses_task.apply_async(
+                args=[session_id],
+                countdown=getattr(settings, 'BACKGROUND_POLL_INTERVAL', 10.0)
+            )
+            return result
+        
+        logger.info(f"Fact-check task completed for session {session_id}")
+        
+        # Send WebSocket update with final result
+        send_websocket_update.delay(session_id, {
+            'type': 'analysis_complete',
+            'result': result
+        })
+        
+        return result
             
     except FactCheckSession.DoesNotExist:
         error_msg = f"Session {session_id} not found"
@@ -80,6 +111,247 @@ def perform_fact_check_task(self, session_id: str):
         return {'error': error_msg}
 
 
+@shared_task
+def resume_fact_check_task(session_id: str):
+    """
+    Resume an interrupted analysis from its last completed step
+
+    Completed AnalysisStep rows are checkpoints: the analysis pipeline restores
+    their results instead of running those steps again, so only the steps the
+    lost worker never finished are paid for.
+    """
+    try:
+        session = FactCheckSession.objects.get(session_id=session_id)
+        if session.status != 'analyzing':
+            logger.info(f"Session {session_id} is {session.status}, nothing to resume")
+            return {'session_id': session_id, 'status': session.status}
+        
+        completed_steps = list(
+            session.analysis_steps.filter(status='completed').values_list('step_number', flat=True)
+        )
+        logger.info(f"Resuming session {session_id} (attempt {session.resume_count}) with completed steps {completed_steps}")
+        
+        return perform_fact_check_task(session_id)
+        
+    except FactCheckSession.DoesNotExist:
+        error_msg = f"Session {session_id} not found"
+        logger.error(error_msg)
+        return {'error': error_msg}
+
+
+@shared_task
+def poll_background_responses_task(session_id: str):
+    """
+    Run a research session again once its background responses have finished
+
+    Runs one check and reschedules itself while the model is still working, so
+    waiting sessions don't hold a worker thread. Each check keeps the session
+    fresh for the stale-session sweeper and its single-flight lock alive.
+    """
+    from apps.fact_checker.services.background_responses import responses_ready
+    
+    try:
+        session = FactCheckSession.objects.get(session_id=session_id)
+        if session.status != 'analyzing':
+            return
+        
+        if session.background_responses and not run_in_worker_loop(responses_ready(session.background_responses)):
+            FactCheckSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+            single_flight = SingleFlightService()
+            if single_flight.enabled and session.claim_fingerprint:
+                single_flight.refresh(session.claim_fingerprint, session_id)
+            poll_background_responses_task.apply_async(
+                args=[session_id],
+                countdown=getattr(settings, 'BACKGROUND_POLL_INTERVAL', 10.0)
+            )
+            return
+        
+        logger.info(f"Background responses of session {session_id} finished, resuming the analysis")
+        perform_fact_check_task.delay(session_id)
+        
+    except FactCheckSession.DoesNotExist:
+        logger.error(f"Session {session_id} not found")
+        
+    except Exception as e:
+        logger.error(f"Error polling background responses of session {session_id}: {str(e)}")
+
+
+@shared_task
+def requeue_stale_sessions():
+    """
+    Periodic task to resume analyses whose worker died
+
+    A running analysis touches its session after every step, so a session that
+    has been 'analyzing' for ANALYSIS_STALE_AFTER seconds without progress has
+    no worker left. It is requeued to resume from its completed steps, up to
+    ANALYSIS_MAX_RESUMES times, after which it is marked failed.
+    """
+    try:
+        cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'ANALYSIS_STALE_AFTER', 1200))
+        max_resumes = getattr(settings, 'ANALYSIS_MAX_RESUMES', 2)
+        
+        # Bulk sessions wait hours on their batches; perform_bulk_fact_check_task resumes them
+        stale_sessions = FactCheckSession.objects.filter(
+            status='analyzing', updated_at__lt=cutoff, bulk_job__isnull=True
+        )
+        
+        requeued = 0
+        for session in stale_sessions:
+            session_id = str(session.session_id)
+            
+            if session.resume_count >= max_resumes:
+                logger.error(f"Session {session_id} was interrupted {session.resume_count + 1} times, marking it failed")
+                session.status = 'failed'
+                session.completed_at = timezone.now()
+                session.save()
+                send_websocket_update.delay(session_id, {
+                    'type': 'analysis_error',
+                    'error': "Analysis was interrupted and could not be resumed"
+                })
+                continue
+            
+            # Claim the session first so an overlapping sweep cannot requeue it twice
+            claimed = FactCheckSession.objects.filter(
+                pk=session.pk, status='analyzing', updated_at=session.updated_at
+            ).update(resume_count=F('resume_count') + 1, updated_at=timezone.now())
+            
+            if claimed:
+                resume_fact_check_task.delay(session_id)
+                requeued += 1
+        
+        if requeued:
+            logger.info(f"Requeued {requeued} stale sessions")
+        
+    except Exception as e:
+        logger.error(f"Error in stale session sweep: {str(e)}")
+
+
+@shared_task
+def perform_bulk_fact_check_task(bulk_job: str):
+    """
+    Run every unfinished session of a bulk job through the Batch API
+
+    All sessions are analyzed concurrently on the worker loop, so each wave of
+    step calls (every session's step 1, then steps 2 and 3, ...) is packed into
+    shared batch jobs. Steps are persisted as their batches complete; running
+    the task again for the same job resumes the unfinished sessions from their
+    completed steps.
+    """
+    import asyncio
+    from apps.fact_checker.services.enhanced_analysis_service import EnhancedAnalysisService
+    
+    try:
+        sessions = list(FactCheckSession.objects.filter(bulk_job=bulk_job, status__in=['pending', 'analyzing']))
+        if not sessions:
+            logger.info(f"Bulk job {bulk_job} has no unfinished sessions")
+            return {'bulk_job': bulk_job, 'sessions': 0}
+        
+        logger.info(f"Starting bulk job {bulk_job} with {len(sessions)} sessions")
+        services = {
+            mode: EnhancedAnalysisService(
+                use_web_search=mode == 'fact_check', use_research=mode == 'research', batch=True
+            )
+            for mode in {session.mode for session in sessions}
+        }
+        
+        async def run_all():
+            return await asyncio.gather(
+                *(services[session.mode].perform_complete_analysis(session) for session in sessions),
+                return_exceptions=True
+            )
+        
+        # Batches can take up to their 24 hour completion window, so no analysis timeout applies
+        results = run_in_worker_loop(run_all())
+        
+        failed = sum(1 for result in results if isinstance(result, Exception) or result.get('error'))
+        logger.info(f"Bulk job {bulk_job} finished: {len(sessions) - failed} completed, {failed} failed")
+        return {'bulk_job': bulk_job, 'sessions': len(sessions), 'failed': failed}
+        
+    except Exception as e:
+        error_msg = f"Error in bulk job {bulk_job}: {str(e)}"
+        logger.error(error_msg)
+        return {'error': error_msg}
+
+
+@shared_task
+def mirror_leader_session_task(session_id: str, leader_session_id: str):
+    """
+    Mirror an in-flight leader session into a follower session
+
+    Runs one pass and reschedules itself until the leader finishes, so waiting
+    followers don't hold a worker thread. Each pass touches the follower, so a
+    leader that runs past ANALYSIS_STALE_AFTER doesn't get it requeued.
+    """
+    try:
+        session = FactCheckSession.objects.get(session_id=session_id)
+        single_flight = SingleFlightService()
+        reuse_service = ResultReuseService()
+        
+        leader = FactCheckSession.objects.filter(session_id=leader_session_id).first()
+        if leader is None:
+            logger.warning(f"Leader session {leader_session_id} was deleted, session {session_id} taking over")
+            reuse_service.clear_rows(session)
+            perform_fact_check_task.delay(session_id)
+            return
+        
+        # Read the lock before the rows: the leader stores everything before releasing it
+        lock_holder = single_flight.get_leader(session.claim_fingerprint)
+        
+        if reuse_service.sync_rows(leader, session):
+            send_progress_update.delay(session_id)
+        
+        leader_finished = leader.status in ['completed', 'failed']
+        
+        if leader_finished and lock_holder != leader_session_id:
+            session = reuse_service.copy_outcome(leader, session)
+            logger.info(f"Session {session_id} finished by mirroring session {leader_session_id}")
+            
+            if session.status == 'completed':
+                result = single_flight.get_result(leader_session_id) or {
+                    'success': True,
+                    'status': 'completed',
+                    'verdict': session.final_verdict,
+                    'confidence_score': session.confidence_score,
+                    'summary': session.analysis_summary
+                }
+                result['session_id'] = session_id
+                send_websocket_update.delay(session_id, {
+                    'type': 'analysis_complete',
+                    'result': result
+                })
+            else:
+                send_websocket_update.delay(session_id, {
+                    'type': 'analysis_error',
+                    'error': f"Analysis of the same claim in session {leader_session_id} failed"
+                })
+            return
+        
+        if lock_holder != leader_session_id:
+            # The leader died without finishing; start over and contend for the lock again
+            logger.warning(f"Leader session {leader_session_id} lost its lock, session {session_id} taking over")
+            reuse_service.clear_rows(session)
+            perform_fact_check_task.delay(session_id)
+            return
+        
+        # Followers only write step rows; keep the session fresh for the stale-session sweeper
+        FactCheckSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+        mirror_leader_session_task.apply_async(
+            args=[session_id, leader_session_id],
+            countdown=getattr(settings, 'SINGLE_FLIGHT_POLL_INTERVAL', 2.0)
+        )
+        
+    except FactCheckSession.DoesNotExist:
+        logger.error(f"Session {session_id} not found")
+        
+    except Exception as e:
+        # Redis or the database may be briefly unavailable; keep the chain going
+        logger.error(f"Error mirroring leader session {leader_session_id} into {session_id}, retrying: {str(e)}")
+        mirror_leader_session_task.apply_async(
+            args=[session_id, leader_session_id],
+            countdown=getattr(settings, 'SINGLE_FLIGHT_POLL_INTERVAL', 2.0)
+        )
+
+
 @shared_task
 def send_websocket_update(session_id: str, data: dict):
     """
@@ -116,8 +388,8 @@ def send_progress_update(session_id: str):
         session = FactCheckSession.objects.get(session_id=session_id)
         from django.conf import settings
         use_web_search = getattr(settings, 'USE_WEB_SEARCH', False)
-        analysis_service = EnhancedAnalysisService(use_web_search=use_web_search)
-        progress_data = analysis_service.get_analysis_progress(session)
+        analysis_service = get_analysis_service(use_web_search=use_web_search)
+        progress_data = run_in_worker_loop(analysis_service.get_analysis_progress(session))
         
         # Send via WebSocket
         send_websocket_update.delay(session_id, {
@@ -1,8 +1,12 @@
 """
 Utility functions for the fact-checking system
 """
+import hashlib
+import json
 import logging
-from typing import List, Dict, Any
+import re
+import unicodedata
+from typing import List, Dict, Any, Optional
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -196,6 +200,50 @@ def sanitize_user_input(text: str) -> str:
     return text
 
 
+def normalize_claim_text(text: str) -> str:
+    """
+    Normalize a claim so trivially different spellings of it compare equal
+    """
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    # Trailing punctuation ("Is X true?" vs "Is X true") doesn't change the claim
+    return text.rstrip(' .!?。！？')
+
+
+def compute_claim_fingerprint(text: str, mode: str = 'fact_check', image_file=None, search_options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Fingerprint a request by mode, normalized text, uploaded image content and search options
+
+    Args:
+        text: The user's claim or research question
+        mode: Analysis mode; fact-checks and research reports are never interchangeable
+        image_file: Optional uploaded image file, read in chunks and rewound
+        search_options: Optional web search overrides; a different location or depth can change the result
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    digest = hashlib.sha256()
+    digest.update(mode.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(normalize_claim_text(text).encode('utf-8'))
+
+    if image_file:
+        image_digest = hashlib.sha256()
+        for chunk in image_file.chunks():
+            image_digest.update(chunk)
+        image_file.seek(0)
+        digest.update(b'\0')
+        digest.update(image_digest.hexdigest().encode('utf-8'))
+
+    if search_options:
+        digest.update(b'\0')
+        digest.update(json.dumps(search_options, sort_keys=True).encode('utf-8'))
+
+    return digest.hexdigest()
+
+
 def calculate_confidence_score(analysis_data: Dict[str, Any]) -> float:
     """
     Calculate overall confidence score based on analysis data
@@ -259,6 +307,7 @@ def get_web_search_config() -> dict:
         'enabled': getattr(settings, 'USE_WEB_SEARCH', False),
         'context_size': getattr(settings, 'WEB_SEARCH_CONTEXT_SIZE', 'medium'),
         'user_location': getattr(settings, 'WEB_SEARCH_USER_LOCATION', {}),
+        'profiles': getattr(settings, 'WEB_SEARCH_PROFILES', {}),
     }
 
 
@@ -0,0 +1,237 @@
+"""
+Per-worker-process runtime for Celery tasks
+
+Each worker process owns one long-lived asyncio event loop running in a
+background thread, plus warm analysis services (pooled OpenAI clients and, for
+the traditional workflow, a started crawler browser). Tasks submit their
+coroutines to that loop instead of creating a fresh loop and fresh services
+every time.
+
+With the threads pool (``--pool=threads --concurrency=N``) every Celery thread
+submits its analysis to the same loop, so one process drives up to
+ANALYSIS_MAX_CONCURRENCY analyses at once while they wait on OpenAI. Each
+analysis runs as its own asyncio task with its own timeout, so a slow or failing
+session cannot affect the others.
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, Coroutine, Dict, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from celery import signals
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerRuntime:
+    """Owns the worker's event loop thread and its warm service singletons"""
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._services: Dict[Tuple[bool, bool], Any] = {}
+        self._analysis_slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.RLock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Start the event loop thread and warm up clients and services
+        """
+        with self._lock:
+            if self.is_running:
+                return
+
+            self.loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run_loop,
+                args=(ready,),
+                name='factcheck-worker-loop',
+                daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+            logger.info("Worker event loop started")
+
+        try:
+            self.run(self._warm_up())
+        except Exception as e:
+            # A failed warm-up must not take the worker down; services are built lazily
+            logger.error(f"Error warming up worker services: {str(e)}")
+
+    def _run_loop(self, ready: threading.Event) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(ready.set)
+        self.loop.run_forever()
+
+    async def _warm_up(self) -> None:
+        from apps.fact_checker.services import llm_client
+
+        llm_client.warm_up()
+
+        use_web_search = getattr(settings, 'USE_WEB_SEARCH', False)
+        self.get_analysis_service(use_web_search=False, use_research=True)
+        service = self.get_analysis_service(use_web_search=use_web_search, use_research=False)
+        await service.start()
+
+        logger.info("Worker services warmed up")
+
+    def get_analysis_service(self, use_web_search: bool = False, use_research: bool = False):
+        """
+        Get the shared EnhancedAnalysisService for the given workflow
+        """
+        from apps.fact_checker.services.enhanced_analysis_service import EnhancedAnalysisService
+
+        key = (bool(use_web_search), bool(use_research))
+        with self._lock:
+            service = self._services.get(key)
+            if service is None:
+                service = EnhancedAnalysisService(
+                    use_web_search=use_web_search,
+                    use_research=use_research,
+                    persistent=True
+                )
+                self._services[key] = service
+            return service
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the worker loop and block until it finishes
+        """
+        if not self.is_running:
+            self.start()
+
+        future = asyncio.run_coroutine_threadsafe(self._run_task(coro), self.loop)
+        return future.result(timeout)
+
+    def run_analysis(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        Run one analysis on the worker loop under the per-process concurrency cap
+        """
+        if not self.is_running:
+            self.start()
+
+        if timeout is None:
+            timeout = getattr(settings, 'ANALYSIS_TASK_TIMEOUT', None)
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._run_task(self._run_limited(coro, timeout)), self.loop
+        )
+        return future.result()
+
+    async def _run_limited(self, coro: Coroutine, timeout: Optional[float]) -> Any:
+        if self._analysis_slots is None:
+            self._analysis_slots = asyncio.Semaphore(
+                getattr(settings, 'ANALYSIS_MAX_CONCURRENCY', 16)
+            )
+
+        async with self._analysis_slots:
+            # wait_for runs the analysis in its own task and cancels only that task on timeout
+            return await asyncio.wait_for(coro, timeout)
+
+    async def _run_task(self, coro: Coroutine) -> Any:
+        try:
+            return await coro
+        finally:
+            # ORM calls run on asgiref's long-lived executor thread, which Celery's
+            # per-task connection cleanup never sees
+            await sync_to_async(close_old_connections)()
+
+    def stop(self) -> None:
+        """
+        Release warm services, close pooled clients and stop the loop
+        """
+        with self._lock:
+            if not self.is_running:
+                return
+
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(30)
+            except Exception as e:
+                logger.error(f"Error shutting down worker services: {str(e)}")
+
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=10)
+            self.loop.close()
+
+            self.loop = None
+            self._thread = None
+            self._analysis_slots = None
+            logger.info("Worker event loop stopped")
+
+    async def _shutdown(self) -> None:
+        from apps.fact_checker.services import llm_client
+        from apps.fact_checker.services.step_summaries import wait_for_pending_summaries
+
+        # Let background step summaries land before their client goes away
+        await wait_for_pending_summaries(timeout=10)
+
+        for service in self._services.values():
+            await service.shutdown()
+        self._services.clear()
+
+        await llm_client.close_async_client()
+
+
+_runtime = WorkerRuntime()
+
+
+def start_worker_runtime() -> None:
+    _runtime.start()
+
+
+def stop_worker_runtime() -> None:
+    _runtime.stop()
+
+
+def run_in_worker_loop(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine on this process's long-lived event loop
+    """
+    return _runtime.run(coro, timeout)
+
+
+def run_analysis_in_worker_loop(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """
+    Run an analysis coroutine on the shared loop, respecting ANALYSIS_MAX_CONCURRENCY
+    """
+    return _runtime.run_analysis(coro, timeout)
+
+
+def get_analysis_service(use_web_search: bool = False, use_research: bool = False):
+    """
+    Get the warm EnhancedAnalysisService for this worker process
+    """
+    return _runtime.get_analysis_service(use_web_search=use_web_search, use_research=use_research)
+
+
+@signals.worker_init.connect
+def _on_worker_init(sender=None, **kwargs):
+    # The threads pool never sends worker_process_init. worker_init runs before a
+    # prefork pool forks, so only start here when no fork will follow.
+    pool_cls = getattr(sender, 'pool_cls', None)
+    if getattr(pool_cls, '__module__', '') == 'celery.concurrency.thread':
+        start_worker_runtime()
+
+
+@signals.worker_process_init.connect
+def _on_worker_process_init(**kwargs):
+    # Sent in every prefork child and once by the solo pool
+    start_worker_runtime()
+
+
+@signals.worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs):
+    stop_worker_runtime()
+
+
+@signals.worker_shutdown.connect
+def _on_worker_shutdown(**kwargs):
+    stop_worker_runtime()
@@ -3,8 +3,8 @@
 # Start Redis
 redis-server --daemonize yes
 
-# Start Celery worker
-celery -A factcheck_backend worker --loglevel=info --pool=solo &
+# Start Celery worker (threads share one asyncio loop, so one process runs many analyses)
+celery -A factcheck_backend worker --loglevel=info --pool=threads --concurrency=${CELERY_CONCURRENCY:-16} &
 
 # Start Daphne ASGI server
 daphne -b 0.0.0.0 -p 8000 factcheck_backend.asgi:application
@@ -20,6 +20,10 @@ app.conf.beat_schedule = {
         'task': 'apps.fact_checker.tasks.cleanup_old_sessions',
         'schedule': 86400.0,  # Run daily (86400 seconds)
     },
+    'requeue-stale-sessions': {
+        'task': 'apps.fact_checker.tasks.requeue_stale_sessions',
+        'schedule': 300.0,  # Run every 5 minutes
+    },
 }
 
 app.conf.timezone = 'UTC'
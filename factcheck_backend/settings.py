@@ -13,7 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 import sys
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -188,9 +188,52 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Analyses take minutes each; don't let one thread reserve tasks another could run
+CELERY_WORKER_PREFETCH_MULTIPLIER = config("CELERY_WORKER_PREFETCH_MULTIPLIER", default=1, cast=int)
+
+# Asyncio execution mode: analyses from all worker threads share one event loop per process
+ANALYSIS_MAX_CONCURRENCY = config("ANALYSIS_MAX_CONCURRENCY", default=16, cast=int)
+ANALYSIS_TASK_TIMEOUT = config("ANALYSIS_TASK_TIMEOUT", default=900.0, cast=float)  # seconds per analysis
+# Sessions left 'analyzing' this long without finishing a step lost their worker and are resumed
+ANALYSIS_STALE_AFTER = config("ANALYSIS_STALE_AFTER", default=1200, cast=int)  # seconds; keep above ANALYSIS_TASK_TIMEOUT
+ANALYSIS_MAX_RESUMES = config("ANALYSIS_MAX_RESUMES", default=2, cast=int)  # then the session is marked failed
 
 # API Keys Configuration
 OPENAI_API_KEY = config("OPENAI_API_KEY", default="")
+# Shared AsyncOpenAI client (connection pool per worker event loop)
+OPENAI_TIMEOUT = config("OPENAI_TIMEOUT", default=600.0, cast=float)
+OPENAI_MAX_RETRIES = config("OPENAI_MAX_RETRIES", default=3, cast=int)  # transient errors, with jittered backoff
+LLM_RETRY_BASE_DELAY = config("LLM_RETRY_BASE_DELAY", default=0.5, cast=float)
+LLM_RETRY_MAX_DELAY = config("LLM_RETRY_MAX_DELAY", default=8.0, cast=float)
+# Send one duplicate of a call that is slower than this percentile of recent calls to the same model
+LLM_HEDGING_ENABLED = config("LLM_HEDGING_ENABLED", default=True, cast=bool)
+LLM_HEDGE_PERCENTILE = config("LLM_HEDGE_PERCENTILE", default=95, cast=int)
+LLM_HEDGE_MIN_SAMPLES = config("LLM_HEDGE_MIN_SAMPLES", default=20, cast=int)
+# Per-model circuit breaker: after this many consecutive failures, use the fallback model for a while
+LLM_CIRCUIT_FAILURE_THRESHOLD = config("LLM_CIRCUIT_FAILURE_THRESHOLD", default=5, cast=int)
+LLM_CIRCUIT_RESET_TIMEOUT = config("LLM_CIRCUIT_RESET_TIMEOUT", default=30.0, cast=float)
+LLM_FALLBACK_MODELS = {
+    "o4-mini": config("O4_MINI_FALLBACK_MODEL", default="gpt-4.1"),
+    "gpt-4.1-mini": config("GPT_41_MINI_FALLBACK_MODEL", default="gpt-4.1-nano"),
+}
+OPENAI_MAX_CONNECTIONS = config("OPENAI_MAX_CONNECTIONS", default=100, cast=int)
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = config("OPENAI_MAX_KEEPALIVE_CONNECTIONS", default=20, cast=int)
+OPENAI_KEEPALIVE_EXPIRY = config("OPENAI_KEEPALIVE_EXPIRY", default=30.0, cast=float)
+
+# LLM providers: "openai" backends call the OpenAI API or a compatible endpoint (base_url),
+# "local" is a deterministic offline stand-in for tests and benchmarks
+LLM_PROVIDERS = {
+    "openai": {"backend": "openai"},
+    "secondary": {
+        "backend": "openai",
+        "api_key": config("SECONDARY_LLM_API_KEY", default=""),
+        "base_url": config("SECONDARY_LLM_BASE_URL", default=""),
+    },
+    "local": {"backend": "local", "latency": config("LOCAL_LLM_LATENCY", default=0.0, cast=float)},  # seconds per call
+}
+LLM_PROVIDER = config("LLM_PROVIDER", default="openai")
+# Providers to fail over to, in order, when the primary keeps failing or its circuit is open
+LLM_FAILOVER_PROVIDERS = config("LLM_FAILOVER_PROVIDERS", default="", cast=Csv())
 GOOGLE_SEARCH_API_KEY = config("GOOGLE_SEARCH_API_KEY", default="")
 # Web Search Configuration
 USE_WEB_SEARCH = config("USE_WEB_SEARCH", default=False, cast=bool)
@@ -201,6 +244,117 @@ WEB_SEARCH_USER_LOCATION = {
     "region": config("WEB_SEARCH_REGION", default=""),
     "timezone": config("WEB_SEARCH_TIMEZONE", default="America/New_York")
 }
+# Search context size per mode and step at the standard routing tier; unlisted steps use WEB_SEARCH_CONTEXT_SIZE
+WEB_SEARCH_PROFILES = {
+    "fact_check": {
+        "initial_web_search": WEB_SEARCH_CONTEXT_SIZE,
+        "deeper_exploration": config("DEEPER_EXPLORATION_SEARCH_CONTEXT", default="high"),
+        "source_credibility_evaluation": config("SOURCE_EVALUATION_SEARCH_CONTEXT", default="low"),
+        "final_conclusion": config("FINAL_CONCLUSION_SEARCH_CONTEXT", default="low"),
+    },
+    "research": {
+        "research_understanding": config("RESEARCH_UNDERSTANDING_SEARCH_CONTEXT", default="low"),
+        "general_research": config("GENERAL_RESEARCH_SEARCH_CONTEXT", default="high"),
+        "specific_research": config("SPECIFIC_RESEARCH_SEARCH_CONTEXT", default="high"),
+        "research_report": WEB_SEARCH_CONTEXT_SIZE,
+    },
+}
+
+# Model per step, chosen from claim complexity and the session's latency budget;
+# search_depth moves the step's profile context size for the tier
+MODEL_ROUTING_ENABLED = config("MODEL_ROUTING_ENABLED", default=True, cast=bool)
+MODEL_ROUTES = {
+    "fast": {"model": config("FAST_ROUTE_MODEL", default="gpt-4.1-mini"), "search_depth": -1, "typical_seconds": 10},
+    "standard": {"model": config("STANDARD_ROUTE_MODEL", default="o4-mini"), "search_depth": 0, "typical_seconds": 35},
+    "thorough": {"model": config("THOROUGH_ROUTE_MODEL", default="o4-mini"), "search_depth": 1, "typical_seconds": 60},
+}
+ANALYSIS_LATENCY_BUDGET = config("ANALYSIS_LATENCY_BUDGET", default=180.0, cast=float)  # seconds per fact check
+RESEARCH_LATENCY_BUDGET = config("RESEARCH_LATENCY_BUDGET", default=480.0, cast=float)  # seconds per research session
+
+# Hard per-session limits; a session that runs low skips optional steps and ends with a partial result (0 = no limit)
+SESSION_BUDGETS = {
+    "fact_check": {
+        "deadline": config("FACT_CHECK_DEADLINE", default=300.0, cast=float),  # seconds per run
+        "max_tokens": config("FACT_CHECK_MAX_TOKENS", default=150000, cast=int),
+        "max_web_search_calls": config("FACT_CHECK_MAX_WEB_SEARCHES", default=30, cast=int),
+    },
+    "research": {
+        "deadline": config("RESEARCH_DEADLINE", default=600.0, cast=float),
+        "max_tokens": config("RESEARCH_MAX_TOKENS", default=400000, cast=int),
+        "max_web_search_calls": config("RESEARCH_MAX_WEB_SEARCHES", default=60, cast=int),
+    },
+}
+SESSION_BUDGET_LOW_FRACTION = config("SESSION_BUDGET_LOW_FRACTION", default=0.25, cast=float)
+
+# Uploaded images are downscaled to what the vision model uses and recompressed once per session
+IMAGE_MAX_DIMENSION = config("IMAGE_MAX_DIMENSION", default=2048, cast=int)  # pixels, long side
+IMAGE_MAX_SHORT_SIDE = config("IMAGE_MAX_SHORT_SIDE", default=768, cast=int)  # pixels
+IMAGE_JPEG_QUALITY = config("IMAGE_JPEG_QUALITY", default=85, cast=int)
+IMAGE_CACHE_DIR = config("IMAGE_CACHE_DIR", default=str(MEDIA_ROOT / "fact_check_images" / "prepared"))  # empty to disable
+
+# Skip deeper research when step 1 finds a trusted published fact-check of the same claim
+EARLY_EXIT_ENABLED = config("EARLY_EXIT_ENABLED", default=True, cast=bool)
+EARLY_EXIT_MIN_CONFIDENCE = config("EARLY_EXIT_MIN_CONFIDENCE", default=0.85, cast=float)
+EARLY_EXIT_FACT_CHECKERS = config(
+    "EARLY_EXIT_FACT_CHECKERS",
+    default="snopes.com,politifact.com,factcheck.org,reuters.com,apnews.com,afp.com,fullfact.org",
+    cast=Csv()
+)
+
+# LLM response cache for web search requests (redis, disk or none)
+LLM_CACHE_BACKEND = config("LLM_CACHE_BACKEND", default="redis")
+LLM_CACHE_TTL = config("LLM_CACHE_TTL", default=6 * 60 * 60, cast=int)  # seconds; keeps news reasonably fresh
+LLM_CACHE_MAX_ENTRIES = config("LLM_CACHE_MAX_ENTRIES", default=10000, cast=int)
+LLM_CACHE_REDIS_URL = config("LLM_CACHE_REDIS_URL", default=config("REDIS_URL", default="redis://localhost:6379/0"))
+LLM_CACHE_DIR = config("LLM_CACHE_DIR", default=str(BASE_DIR / 'cache' / 'llm'))
+
+# Reuse a completed session for an identical claim within this many seconds (0 disables reuse)
+CLAIM_REUSE_WINDOW = config("CLAIM_REUSE_WINDOW", default=60 * 60, cast=int)
+
+# Single-flight: concurrent sessions for the same claim follow one leader analysis across nodes
+SINGLE_FLIGHT_ENABLED = config("SINGLE_FLIGHT_ENABLED", default=True, cast=bool)
+SINGLE_FLIGHT_REDIS_URL = config("SINGLE_FLIGHT_REDIS_URL", default=config("REDIS_URL", default="redis://localhost:6379/0"))
+SINGLE_FLIGHT_LOCK_TTL = config("SINGLE_FLIGHT_LOCK_TTL", default=60, cast=int)  # seconds; refreshed by the leader
+SINGLE_FLIGHT_RESULT_TTL = config("SINGLE_FLIGHT_RESULT_TTL", default=600, cast=int)
+SINGLE_FLIGHT_POLL_INTERVAL = config("SINGLE_FLIGHT_POLL_INTERVAL", default=2.0, cast=float)
+
+# Stream step 4 and the research report to WebSocket clients as token_delta events
+STREAM_LLM_OUTPUT = config("STREAM_LLM_OUTPUT", default=True, cast=bool)
+
+# Research calls as background responses: no worker waits on the model, but the report is not streamed
+RESEARCH_BACKGROUND_RESPONSES = config("RESEARCH_BACKGROUND_RESPONSES", default=False, cast=bool)
+BACKGROUND_POLL_INTERVAL = config("BACKGROUND_POLL_INTERVAL", default=10.0, cast=float)  # seconds; keep below SINGLE_FLIGHT_LOCK_TTL
+BACKGROUND_RESPONSE_MAX_WAIT = config("BACKGROUND_RESPONSE_MAX_WAIT", default=3600, cast=int)  # seconds before a response is cancelled
+
+# Step summaries: "template" builds them from parsed step fields, "llm" asks gpt-4.1-mini in the background
+STEP_SUMMARY_MODE = config("STEP_SUMMARY_MODE", default="template")
+
+# Token budgets for the digest of earlier step results embedded in later prompts
+CONTEXT_TOKEN_BUDGET = config("CONTEXT_TOKEN_BUDGET", default=3000, cast=int)
+CITATION_TOKEN_BUDGET = config("CITATION_TOKEN_BUDGET", default=1500, cast=int)
+RESEARCH_REPORT_CONTEXT_TOKEN_BUDGET = config("RESEARCH_REPORT_CONTEXT_TOKEN_BUDGET", default=8000, cast=int)
+
+# Shared OpenAI rate limit across all workers (Redis token buckets per model)
+RATE_LIMIT_ENABLED = config("RATE_LIMIT_ENABLED", default=True, cast=bool)
+RATE_LIMIT_REDIS_URL = config("RATE_LIMIT_REDIS_URL", default=config("REDIS_URL", default="redis://localhost:6379/0"))
+RATE_LIMIT_MAX_WAIT = config("RATE_LIMIT_MAX_WAIT", default=300.0, cast=float)  # seconds queued before sending anyway
+RATE_LIMIT_DEFAULT_OUTPUT_TOKENS = config("RATE_LIMIT_DEFAULT_OUTPUT_TOKENS", default=4000, cast=int)
+OPENAI_RATE_LIMITS = {
+    "o4-mini": {
+        "rpm": config("O4_MINI_RPM", default=1000, cast=int),
+        "tpm": config("O4_MINI_TPM", default=100000, cast=int),
+    },
+    "gpt-4.1-mini": {
+        "rpm": config("GPT_41_MINI_RPM", default=500, cast=int),
+        "tpm": config("GPT_41_MINI_TPM", default=200000, cast=int),
+    },
+}
+
+# Bulk mode (manage.py bulk_fact_check): step calls go through the Batch API ("openai") or the in-process stand-in ("local")
+BATCH_BACKEND = config("BATCH_BACKEND", default="openai")
+BATCH_MAX_REQUESTS = config("BATCH_MAX_REQUESTS", default=1000, cast=int)  # submit a batch once this many calls wait
+BATCH_FLUSH_INTERVAL = config("BATCH_FLUSH_INTERVAL", default=30.0, cast=float)  # seconds before a partial batch is submitted
+BATCH_POLL_INTERVAL = config("BATCH_POLL_INTERVAL", default=60.0, cast=float)  # seconds between batch status checks
 
 # Logging Configuration
 LOGGING = {
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""
+Test script for the Batch API transport of bulk analyses
+"""
+
+import os
+import sys
+import asyncio
+from decimal import Decimal
+from types import SimpleNamespace
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from django.test import override_settings
+
+from apps.fact_checker.services import batch_client, llm_usage
+from apps.fact_checker.services.batch_client import BatchCollector, BatchRequestError, LocalBatchClient
+from apps.fact_checker.services.chatgpt_shallow_analysis_service import ChatGPTResearchService
+from apps.fact_checker.services.chatgpt_web_search_service import ChatGPTWebSearchService
+from apps.fact_checker.services.session_budget import SessionBudget
+
+ROUTES = {
+    'fast': {'model': 'gpt-4.1-mini', 'search_depth': -1, 'typical_seconds': 10},
+    'standard': {'model': 'o4-mini', 'search_depth': 0, 'typical_seconds': 35},
+    'thorough': {'model': 'o4-large', 'search_depth': 1, 'typical_seconds': 60},
+}
+
+
+def response_body(text, url='https://www.reuters.com/article'):
+    return {
+        'id': 'resp_local',
+        'object': 'response',
+        'model': 'o4-mini',
+        'status': 'completed',
+        'output': [
+            {'id': 'ws_1', 'type': 'web_search_call', 'status': 'completed'},
+            {
+                'id': 'msg_1', 'type': 'message', 'role': 'assistant', 'status': 'completed',
+                'content': [{
+                    'type': 'output_text',
+                    'text': text,
+                    'annotations': [{'type': 'url_citation', 'url': url, 'title': 'Reuters', 'start_index': 0, 'end_index': 4}],
+                }],
+            },
+        ],
+        'usage': {
+            'input_tokens': 1000000,
+            'input_tokens_details': {'cached_tokens': 0},
+            'output_tokens': 0,
+            'output_tokens_details': {'reasoning_tokens': 0},
+            'total_tokens': 1000000,
+        },
+    }
+
+
+def test_batch_client():
+    """Test packing calls into batches and mapping results back"""
+    print("Testing Batch API transport...")
+
+    async def run():
+        submitted = []
+
+        async def handler(body):
+            if 'fail' in body['input']:
+                raise ValueError('model refused')
+            return response_body(f"answer to {body['input']}")
+
+        local = LocalBatchClient(handler)
+        create_batch = local.batches.create
+
+        async def counting_create(**kwargs):
+            submitted.append(kwargs['input_file_id'])
+            return await create_batch(**kwargs)
+        local.batches.create = counting_create
+
+        # Test concurrent calls are packed into one batch and answered in order
+        collector = BatchCollector(local, max_requests=100, flush_interval=0.05, poll_interval=0.01)
+        stats = [{} for _ in range(3)]
+        responses = await asyncio.gather(*(
+            collector.create_response(call_stats=stats[i], model='o4-mini', input=f"claim {i}")
+            for i in range(3)
+        ))
+        assert len(submitted) == 1
+        assert [response.output[1].content[0].text for response in responses] == ['answer to claim 0', 'answer to claim 1', 'answer to claim 2']
+        assert responses[0].output[1].content[0].annotations[0].url == 'https://www.reuters.com/article'
+        assert all(call_stats['batch'] for call_stats in stats)
+        print("✓ Concurrent calls packed into one batch and mapped back by custom_id")
+
+        # Test a full batch is submitted without waiting for the flush interval
+        collector = BatchCollector(local, max_requests=2, flush_interval=60, poll_interval=0.01)
+        await asyncio.wait_for(asyncio.gather(
+            collector.create_response(model='o4-mini', input='a'),
+            collector.create_response(model='o4-mini', input='b'),
+        ), timeout=5)
+        assert len(submitted) == 2
+        print("✓ Full batch submitted immediately")
+
+        # Test a failed line raises for its caller only
+        collector = BatchCollector(local, max_requests=100, flush_interval=0.01, poll_interval=0.01)
+        results = await asyncio.gather(
+            collector.create_response(model='o4-mini', input='ok'),
+            collector.create_response(model='o4-mini', input='fail'),
+            return_exceptions=True
+        )
+        assert results[0].output[1].content[0].text == 'answer to ok'
+        assert isinstance(results[1], BatchRequestError) and 'model refused' in str(results[1])
+        print("✓ Failed batch lines raise BatchRequestError")
+
+        # Test web search steps in batch mode go through the collector
+        batch_client._collectors[asyncio.get_running_loop()] = BatchCollector(local, flush_interval=0.01, poll_interval=0.01)
+        service = ChatGPTWebSearchService(batch=True)
+        assert not service.stream_output
+        call_stats = {}
+        response = await service._create_web_search_response(
+            tools=[], input_data='step 1', stream_to='ignored', call_stats=call_stats, prompt_cache_key='fact_check.initial_search.v1'
+        )
+        assert response.output[1].content[0].text == 'answer to step 1'
+        assert call_stats['batch']
+        print("✓ Batch-mode service calls go through the Batch API")
+
+        return call_stats, response
+
+    call_stats, response = asyncio.run(run())
+
+    # Test batch calls are priced at half the interactive rate
+    interactive = llm_usage.build_call_usage('o4-mini', response, 100)
+    batched = llm_usage.build_call_usage('o4-mini', response, 100, call_stats)
+    assert interactive['cost'] == Decimal('1.110000')
+    assert batched['cost'] == Decimal('0.555000')
+    print(f"✓ Batch cost halved: ${interactive['cost']} -> ${batched['cost']}")
+
+    # Test batch runs are routed without the interactive latency budget
+    claim = (
+        "The Federal Reserve raised rates 11 times between 2022 and 2023, while the "
+        "European Central Bank and the Bank of England raised theirs by 4.5%, according to Reuters"
+    )
+    with override_settings(MODEL_ROUTING_ENABLED=True, MODEL_ROUTES=ROUTES, ANALYSIS_LATENCY_BUDGET=180.0, RESEARCH_LATENCY_BUDGET=480.0):
+        for service_class, mode in ((ChatGPTWebSearchService, 'fact_check'), (ChatGPTResearchService, 'research')):
+            session = SimpleNamespace(session_id=f'batch-{mode}', mode=mode, search_options={})
+            interactive = service_class()._build_router(session, claim, None, SessionBudget())
+            batched = service_class(batch=True)._build_router(session, claim, None, SessionBudget())
+            assert interactive.budget and batched.budget is None
+            # An hour waiting on batches leaves the interactive router on the fast tier
+            interactive.started -= 3600
+            batched.started -= 3600
+            step = 'final_conclusion' if mode == 'fact_check' else 'specific_research'
+            assert interactive.route(step, steps_left=1)['tier'] == 'fast'
+            assert batched.route(step, steps_left=1)['tier'] == 'thorough'
+    print("✓ Batch runs keep their tier without a latency budget")
+
+    print("\nAll tests passed! The Batch API transport is ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_batch_client()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""
+Test script for claim normalization and fingerprinting
+"""
+
+import os
+import sys
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from apps.fact_checker.utils import normalize_claim_text, compute_claim_fingerprint
+
+
+def test_claim_fingerprint():
+    """Test that equivalent claims share a fingerprint and different requests don't"""
+    print("Testing claim fingerprints...")
+
+    # Test normalization
+    assert normalize_claim_text("  The Moon\tis made of CHEESE?! ") == "the moon is made of cheese"
+    assert normalize_claim_text("Ｔｈｅ moon") == "the moon"
+    print("✓ Case, whitespace, width and trailing punctuation are normalized")
+
+    # Test fingerprints
+    fingerprint = compute_claim_fingerprint("The moon is made of cheese", "fact_check")
+    assert fingerprint == compute_claim_fingerprint("the moon  is made of cheese.", "fact_check")
+    assert fingerprint != compute_claim_fingerprint("The moon is made of cheese", "research")
+    assert fingerprint != compute_claim_fingerprint("The moon is made of rock", "fact_check")
+    print("✓ Fingerprint depends on normalized text and mode")
+
+    # Test image content
+    image = SimpleUploadedFile("a.jpg", b"image-bytes", content_type="image/jpeg")
+    with_image = compute_claim_fingerprint("The moon is made of cheese", "fact_check", image)
+    assert with_image != fingerprint
+    assert image.read() == b"image-bytes"
+    renamed = SimpleUploadedFile("b.jpg", b"image-bytes", content_type="image/jpeg")
+    assert with_image == compute_claim_fingerprint("The moon is made of cheese", "fact_check", renamed)
+    print("✓ Image content (not file name) is part of the fingerprint and the file is rewound")
+
+    print("\nAll tests passed! Claim fingerprinting is ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_claim_fingerprint()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Test script for the token-budgeted context projection
+"""
+
+import json
+import os
+import sys
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from apps.fact_checker.services.context_projection import count_tokens, project_citations, project_context
+
+
+def test_context_projection():
+    """Test that step digests are compact, deduplicated and within budget"""
+    print("Testing context projection...")
+
+    step1 = {
+        "main_topic": "Moon composition",
+        "initial_findings": "Lunar samples returned by Apollo missions show the moon is made of rock.",
+        "search_strategy": "Search NASA and peer-reviewed geology sources",
+        "citations": [{"url": "https://nasa.gov/a", "title": "A"}],
+        "llm_cache": {"hits": 1, "misses": 0, "bytes_saved": 100},
+        "summary": "Identified the topic",
+        "step": 1,
+    }
+    step2 = {
+        "specific_evidence": [
+            {"evidence": "Lunar samples returned by Apollo missions show the moon is made of rock.", "supports_claim": "strongly_contradicts"},
+            {"evidence": "Seismometers left on the surface measured a rocky crust.", "supports_claim": "strongly_contradicts"},
+        ],
+        "citations": [{"url": "https://nasa.gov/a", "title": "A"}, {"url": "https://usgs.gov/b", "title": "B"}],
+    }
+
+    # Test bookkeeping removal and deduplication
+    digest = project_context([("Step 1 - Initial Search", step1), ("Step 2 - Deeper Exploration", step2)], budget=3000)
+    lines = digest.split('\n')
+    assert len(lines) == 2
+    assert lines[0].startswith("Step 1 - Initial Search: {")
+    first = json.loads(lines[0].split(': ', 1)[1])
+    second = json.loads(lines[1].split(': ', 1)[1])
+    assert set(first) == {"main_topic", "initial_findings", "search_strategy"}
+    assert len(second["specific_evidence"]) == 2
+    assert "evidence" not in second["specific_evidence"][0]
+    assert second["specific_evidence"][0]["supports_claim"] == "strongly_contradicts"
+    assert second["specific_evidence"][1]["supports_claim"] == "strongly_contradicts"
+    assert len(digest) < len(json.dumps(step1, indent=2)) + len(json.dumps(step2, indent=2))
+    print("✓ Bookkeeping keys and repeated strings removed")
+
+    # Test budget enforcement on a large result
+    big = {
+        "main_topic": "Moon composition",
+        "search_strategy": "x " * 2000,
+        "initial_credible_sources": [
+            {"source_name": f"Source {i}", "key_information": f"Finding number {i}: " + "detail " * 200}
+            for i in range(30)
+        ],
+    }
+    for budget in [1500, 300, 50]:
+        digest = project_context([("Step 1 - Initial Search", big)], budget=budget)
+        assert count_tokens(digest) <= budget + 1, (budget, count_tokens(digest))
+    digest = project_context([("Step 1 - Initial Search", big)], budget=1500)
+    assert "search_strategy" not in digest
+    assert "Moon composition" in digest
+    print("✓ Digest pruned to fit token budget")
+
+    # Test inputs that are empty or not dictionaries
+    assert project_context([("Step 1", {})], budget=100) == "Step 1: {}"
+    assert project_context([("Step 1", None)], budget=100) == "Step 1: {}"
+    print("✓ Empty results handled")
+
+    # Test citation projection
+    citations = json.loads(project_citations(step1["citations"] + step2["citations"] + [{"title": "no url"}], budget=1500))
+    assert citations == [{"url": "https://nasa.gov/a", "title": "A"}, {"url": "https://usgs.gov/b", "title": "B"}]
+    many = [{"url": f"https://example.com/{i}", "title": "t" * 50, "snippet": "s" * 500} for i in range(100)]
+    assert count_tokens(project_citations(many, budget=400)) <= 400
+    print("✓ Citations deduplicated and trimmed")
+
+    print("\nAll tests passed! Context projection is ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_context_projection()
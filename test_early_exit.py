@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Test script for the fact-check early-exit policy
+"""
+
+import os
+import sys
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from django.test import override_settings
+
+from apps.fact_checker.services.early_exit import fact_check_exit_reason
+
+
+def step1_result(**fact_check):
+    existing = {
+        'publisher': 'Snopes',
+        'url': 'https://www.snopes.com/fact-check/water-wet/',
+        'rating': 'false',
+        'confidence': 0.95,
+        **fact_check,
+    }
+    return {
+        'main_topic': 'Water',
+        'existing_fact_check': existing,
+        'citations': [{'url': 'https://www.snopes.com/fact-check/water-wet/?utm_source=openai', 'title': 'Snopes'}],
+    }
+
+
+@override_settings(
+    EARLY_EXIT_ENABLED=True,
+    EARLY_EXIT_MIN_CONFIDENCE=0.85,
+    EARLY_EXIT_FACT_CHECKERS=['snopes.com', 'reuters.com'],
+)
+def test_early_exit():
+    """Test when the initial search ends the analysis early"""
+    print("Testing early-exit policy...")
+
+    # Test a trusted, cited, confident fact-check exits early
+    reason = fact_check_exit_reason(step1_result())
+    assert reason and 'Snopes' in reason and 'false' in reason
+    print(f"✓ Early exit taken: {reason}")
+
+    # Test each guard keeps the full analysis
+    cases = {
+        "no fact-check": {**step1_result(), 'existing_fact_check': None},
+        "unclear rating": step1_result(rating='mixed'),
+        "low confidence": step1_result(confidence=0.6),
+        "untrusted publisher": step1_result(url='https://factcheck.example.com/water'),
+        "lookalike domain": step1_result(url='https://notsnopes.com/water'),
+        "not among citations": {**step1_result(), 'citations': [{'url': 'https://en.wikipedia.org/wiki/Water'}]},
+        "other page on the same domain": {**step1_result(), 'citations': [{'url': 'https://www.snopes.com/news/water-week/'}]},
+        "failed step": {'error': 'timed out', 'step': 1},
+    }
+    for name, result in cases.items():
+        assert fact_check_exit_reason(result) is None, name
+    print(f"✓ Full analysis kept ({', '.join(cases)})")
+
+    # Test subdomains of trusted fact-checkers count
+    result = step1_result(publisher='Reuters', url='https://fact.reuters.com/check/1')
+    result['citations'] = [{'url': 'https://fact.reuters.com/check/1'}]
+    assert fact_check_exit_reason(result)
+    print("✓ Subdomains of trusted fact-checkers accepted")
+
+    # Test the policy can be switched off
+    with override_settings(EARLY_EXIT_ENABLED=False):
+        assert fact_check_exit_reason(step1_result()) is None
+    print("✓ Early exit disabled")
+
+    print("\nAll tests passed! The early-exit policy is ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_early_exit()
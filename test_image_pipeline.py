@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Test script for upload image preprocessing
+"""
+
+import asyncio
+import io
+import os
+import shutil
+import sys
+import tempfile
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from django.test import override_settings
+from PIL import Image
+
+from apps.fact_checker.services import image_pipeline
+from apps.fact_checker.services.chatgpt_web_search_service import ChatGPTWebSearchService
+from apps.fact_checker.services.image_pipeline import PreparedImage, prepare_image, prepare_image_bytes, target_size
+
+CACHE_DIR = tempfile.mkdtemp()
+
+
+def encode(image: Image.Image, image_format: str, **params) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **params)
+    return buffer.getvalue()
+
+
+def noisy(size, mode='RGB') -> Image.Image:
+    """An image that compresses poorly, like a photo"""
+    return Image.frombytes(mode, size, os.urandom(size[0] * size[1] * len(mode)))
+
+
+@override_settings(IMAGE_MAX_DIMENSION=2048, IMAGE_MAX_SHORT_SIDE=768, IMAGE_JPEG_QUALITY=85, IMAGE_CACHE_DIR=CACHE_DIR)
+def test_image_pipeline():
+    """Test format detection, downscaling, recompression and payload reuse"""
+    print("Testing image pipeline...")
+
+    # Test the size follows the vision model's high-detail limits
+    assert target_size(4032, 3024) == (1024, 768)
+    assert target_size(1170, 2532) == (768, 1662)
+    assert target_size(4000, 500) == (2048, 256)
+    assert target_size(640, 480) == (640, 480)
+    print("✓ Target size capped at what the model uses")
+
+    # Test a large PNG photo is downscaled and recompressed to JPEG
+    original = encode(noisy((3000, 2000)), 'PNG')
+    image = prepare_image_bytes(original)
+    assert image.mime_type == 'image/jpeg' and (image.width, image.height) == (1152, 768)
+    assert Image.open(io.BytesIO(image.data)).format == 'JPEG'
+    assert image.size < image.original_size / 5
+    print(f"✓ Large upload downscaled ({image.original_size} -> {image.size} bytes)")
+
+    # Test a small image keeps its real format when re-encoding would not help
+    flat = encode(Image.new('RGB', (64, 48), (20, 120, 200)), 'PNG')
+    image = prepare_image_bytes(flat)
+    assert image.mime_type == 'image/png' and image.data == flat
+    assert image.data_url.startswith('data:image/png;base64,')
+    webp = encode(noisy((300, 200)), 'WEBP', quality=40)
+    assert prepare_image_bytes(webp).mime_type == 'image/webp'
+    print("✓ Real format detected and small images left alone")
+
+    # Test transparency is flattened and EXIF orientation applied
+    image = prepare_image_bytes(encode(noisy((1600, 1600), 'RGBA'), 'PNG'))
+    assert image.mime_type == 'image/jpeg' and (image.width, image.height) == (768, 768)
+    exif = Image.Exif()
+    exif[image_pipeline.ORIENTATION_TAG] = 6
+    image = prepare_image_bytes(encode(noisy((400, 300)), 'JPEG', exif=exif))
+    assert (image.width, image.height) == (300, 400)
+    print("✓ Transparency flattened and rotation applied")
+
+    # Test unreadable data is sent unchanged
+    image = prepare_image_bytes(b'not an image', 'upload.heic')
+    assert image.data == b'not an image' and image.width is None
+    print("✓ Unreadable images passed through")
+
+    # Test a file is prepared once and the stored copy reused
+    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as upload:
+        upload.write(original)
+    first = prepare_image(upload.name)
+    assert len(os.listdir(CACHE_DIR)) == 1
+    second = prepare_image(upload.name)
+    assert second.data == first.data and (second.width, second.height) == (first.width, first.height)
+    with override_settings(IMAGE_JPEG_QUALITY=60):
+        assert prepare_image(upload.name).size < first.size and len(os.listdir(CACHE_DIR)) == 2
+    os.unlink(upload.name)
+    print("✓ Prepared copy stored and reused")
+
+    # Test the data URL is encoded once and sent by the web search request
+    assert first.data_url is first.data_url
+    service = ChatGPTWebSearchService()
+    sent = []
+
+    async def create_response(tools, input_data, *args, **kwargs):
+        sent.append(input_data)
+        raise RuntimeError("stop after building the request")
+
+    service._create_web_search_response = create_response
+
+    async def run():
+        with override_settings(LLM_CACHE_BACKEND='none'):
+            for _ in range(2):
+                try:
+                    await service._make_web_search_request("Is this photo real?", first)
+                except RuntimeError:
+                    pass
+
+    asyncio.run(run())
+    urls = [request[0]['content'][1]['image_url'] for request in sent]
+    assert len(urls) == 2 and urls[0] is urls[1] is first.data_url
+    assert urls[0].startswith('data:image/jpeg;base64,')
+    assert image_pipeline.as_prepared(first) is first and isinstance(image_pipeline.as_prepared(flat), PreparedImage)
+    print("✓ Requests reuse the prepared payload")
+
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    print("\nAll tests passed! Image pipeline is ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_image_pipeline()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Test script for the content-addressed LLM response cache
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from apps.fact_checker.services.llm_cache import DiskCacheBackend, LLMResponseCache, build_cache_key
+
+TOOLS = [{"type": "web_search_preview", "search_context_size": "medium"}]
+
+
+def test_llm_cache():
+    """Test cache keys, disk storage, TTL expiry and LRU eviction"""
+    print("Testing LLM response cache...")
+
+    # Test cache keys
+    key = build_cache_key("o4-mini", TOOLS, "Is the  moon\n made of cheese?")
+    assert key == build_cache_key("o4-mini", TOOLS, "Is the moon made of cheese?")
+    assert key != build_cache_key("gpt-4.1-mini", TOOLS, "Is the moon made of cheese?")
+    assert key != build_cache_key("o4-mini", TOOLS, "Is the moon made of cheese?", b"image")
+    print("✓ Cache keys ignore whitespace and cover model and image")
+
+    async def run():
+        directory = tempfile.mkdtemp()
+
+        # Test round trip
+        cache = LLMResponseCache(DiskCacheBackend(directory, ttl=60, max_entries=2))
+        payload = {"response_text": "{}", "citations": [{"url": "https://example.com"}]}
+        await cache.set(key, payload)
+        assert await cache.get(key) == payload
+        print("✓ Disk cache stores and returns responses")
+
+        # Test LRU eviction
+        await cache.set("b", {"response_text": "b"})
+        await asyncio.sleep(0.01)
+        await cache.get(key)
+        await cache.set("c", {"response_text": "c"})
+        assert await cache.get("b") is None
+        assert await cache.get(key) == payload
+        print("✓ Least recently used entry evicted")
+
+        # Test TTL expiry
+        expired = LLMResponseCache(DiskCacheBackend(directory, ttl=-1, max_entries=2))
+        assert await expired.get(key) is None
+        print("✓ Expired entries are treated as misses")
+
+        # Test disabled cache
+        assert await LLMResponseCache().get(key) is None
+        print("✓ Disabled cache always misses")
+
+    asyncio.run(run())
+
+    print("\nAll tests passed! The LLM response cache is ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_llm_cache()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Test script for per-step model routing
+"""
+
+import os
+import sys
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from django.test import override_settings
+
+from apps.fact_checker.services import resilience
+from apps.fact_checker.services.model_router import ModelRouter, claim_features, complexity_score
+from apps.fact_checker.services.session_budget import SessionBudget
+
+ROUTES = {
+    'fast': {'model': 'gpt-4.1-mini', 'search_depth': -1, 'typical_seconds': 10},
+    'standard': {'model': 'o4-mini', 'search_depth': 0, 'typical_seconds': 35},
+    'thorough': {'model': 'o4-large', 'search_depth': 1, 'typical_seconds': 60},
+}
+
+
+@override_settings(MODEL_ROUTING_ENABLED=True, MODEL_ROUTES=ROUTES, WEB_SEARCH_PROFILES={}, WEB_SEARCH_CONTEXT_SIZE='medium')
+def test_model_router():
+    """Test claim features, tier selection and the latency budget"""
+    print("Testing model routing...")
+    resilience._latencies.samples.clear()
+
+    # Test features of a simple and a complex claim
+    simple = "Water is wet"
+    complex_claim = (
+        "The Federal Reserve raised rates 11 times between 2022 and 2023, while the "
+        "European Central Bank and the Bank of England raised theirs by 4.5%, according to Reuters"
+    )
+    assert complexity_score(claim_features(simple)) == 0
+    features = claim_features(complex_claim)
+    assert features['entities'] >= 3 and features['numbers'] >= 3 and features['clauses'] >= 2
+    assert complexity_score(features) >= 4
+    assert claim_features("中国的人口在2023年首次下降")['numbers'] == 1
+    print(f"✓ Claim features scored (complex claim: {complexity_score(features)})")
+
+    # Test simple claims go to the fast tier, complex ones to the thorough tier
+    route = ModelRouter('s1', simple).route('initial_web_search', steps_left=3)
+    assert route['model'] == 'gpt-4.1-mini' and route['search_context_size'] == 'low'
+    route = ModelRouter('s2', complex_claim).route('initial_web_search', steps_left=3)
+    assert route['tier'] == 'thorough'
+    print("✓ Tier follows claim complexity")
+
+    # Test step 1's classification raises the tier of later steps
+    router = ModelRouter('s3', simple)
+    assert router.route('initial_web_search', steps_left=3)['tier'] == 'fast'
+    route = router.route('deeper_exploration', steps_left=2, step1_result={'claim_type': 'statistical_claim'})
+    assert route['tier'] == 'standard'
+    print("✓ Step 1 claim_type refines the route")
+
+    # Test step floors hold regardless of complexity
+    assert ModelRouter('s4', simple).route('research_report')['tier'] == 'standard'
+    print("✓ Step floors respected")
+
+    # Test a tight budget steps the tier down
+    router = ModelRouter('s5', complex_claim, budget=100)
+    assert router.route('initial_web_search', steps_left=3)['tier'] == 'fast'
+    router = ModelRouter('s6', complex_claim, budget=150)
+    assert router.route('initial_web_search', steps_left=3)['tier'] == 'standard'
+    assert router.route('final_conclusion', steps_left=1)['tier'] == 'thorough'
+    # Measured latencies replace the configured typical ones
+    for _ in range(5):
+        resilience._latencies.record('o4-large', 200)
+    assert router.route('final_conclusion', steps_left=1)['tier'] == 'standard'
+    resilience._latencies.samples.clear()
+    print("✓ Latency budget respected")
+
+    # Test a session budget running low drops to the step floor and a shallower search
+    budget = SessionBudget(deadline=300, max_tokens=1000, tokens_used=900)
+    route = ModelRouter('s8', complex_claim, session_budget=budget).route('final_conclusion', steps_left=1)
+    assert route['tier'] == 'fast' and route['search_context_size'] == 'low'
+    assert 'budget low' in route['reason'] and route['budget'] is budget
+    route = ModelRouter('s9', simple, session_budget=budget).route('research_report', steps_left=1)
+    assert route['tier'] == 'standard' and route['search_context_size'] == 'low'
+    # The deadline becomes the call's timeout, less time for the steps after it
+    route = ModelRouter('s10', simple, session_budget=SessionBudget(deadline=300)).route('initial_web_search', steps_left=3)
+    assert 270 < route['timeout'] <= 280
+    assert ModelRouter('s11', simple).route('initial_web_search', steps_left=3)['timeout'] is None
+    print("✓ Session budget downgrades the route and bounds the call")
+
+    # Test routing can be switched off
+    with override_settings(MODEL_ROUTING_ENABLED=False):
+        route = ModelRouter('s7', simple).route('initial_web_search')
+        assert route['model'] is None and route['search_context_size'] == 'medium'
+        route = ModelRouter('s12', simple, session_budget=budget).route('initial_web_search')
+        assert route['search_context_size'] == 'low' and route['budget'] is budget
+    print("✓ Routing disabled falls back to service defaults")
+
+    print("\nAll tests passed! Model routing is ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_model_router()
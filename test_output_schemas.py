@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Test script for structured-output contracts
+"""
+
+import json
+import os
+import sys
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from apps.fact_checker.services import llm_cache, output_schemas
+from apps.fact_checker.services.output_schemas import (
+    FinalConclusion, StructuredOutputError, WebClaimVerdict, parse_output, response_format, text_format,
+)
+
+
+def walk_objects(schema):
+    if isinstance(schema, dict):
+        if schema.get('type') == 'object':
+            yield schema
+        for value in schema.values():
+            yield from walk_objects(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            yield from walk_objects(value)
+
+
+def final_conclusion(**verdict):
+    return {
+        "verdict": {"classification": "likely_false", "confidence_score": 0.8, "summary": "Mostly false", **verdict},
+        "detailed_analysis": {
+            "reasoning": "r", "key_evidence": [], "supporting_evidence": [], "contradictory_evidence": ["e"],
+            "source_quality_assessment": "good", "limitations": [], "areas_of_uncertainty": [],
+        },
+        "methodology_summary": {
+            "search_approach": "a", "sources_consulted": "s", "verification_methods": "v", "analysis_date": "2025-01-01",
+        },
+        "recommendations": [],
+        "follow_up_suggestions": [],
+    }
+
+
+def test_output_schemas():
+    """Test schema strictness, request formats and validation"""
+    print("Testing output schemas...")
+
+    # Test every contract is valid for strict mode: closed objects, all fields required
+    contracts = [
+        value for value in vars(output_schemas).values()
+        if isinstance(value, type) and issubclass(value, output_schemas.StepOutput) and value is not output_schemas.StepOutput
+    ]
+    for contract in contracts:
+        schema = output_schemas.json_schema(contract)["schema"]
+        for obj in walk_objects(schema):
+            assert obj["additionalProperties"] is False, contract.__name__
+            assert set(obj["required"]) == set(obj["properties"]), contract.__name__
+    print(f"✓ {len(contracts)} contracts are strict-mode schemas")
+
+    # Test request parameters for both APIs
+    text = text_format(FinalConclusion)
+    assert text["format"]["type"] == "json_schema" and text["format"]["name"] == "FinalConclusion"
+    assert text["format"]["strict"] is True
+    chat = response_format(WebClaimVerdict)
+    assert chat["type"] == "json_schema" and chat["json_schema"]["name"] == "WebClaimVerdict"
+    print("✓ Responses and Chat Completions formats built")
+
+    # Test a conforming reply validates into a plain dict
+    result = parse_output(FinalConclusion, json.dumps(final_conclusion()))
+    assert result["verdict"]["classification"] == "likely_false"
+    assert isinstance(result["detailed_analysis"]["contradictory_evidence"], list)
+    print("✓ Conforming reply validated")
+
+    # Test non-conforming and empty replies fail instead of producing a fallback
+    for bad in [json.dumps(final_conclusion(classification="mostly_true")), '{"verdict":', ""]:
+        try:
+            parse_output(FinalConclusion, bad)
+            assert False, f"Expected {bad[:20]!r} to fail validation"
+        except StructuredOutputError:
+            pass
+    print("✓ Non-conforming replies rejected")
+
+    # Test the requested contract is part of the LLM cache key
+    tools = [{"type": "web_search_preview"}]
+    plain = llm_cache.build_cache_key("o4-mini", tools, "prompt")
+    structured = llm_cache.build_cache_key("o4-mini", tools, "prompt", None, text)
+    assert plain != structured
+    assert structured == llm_cache.build_cache_key("o4-mini", tools, "prompt", None, text_format(FinalConclusion))
+    print("✓ Cache key includes the output contract")
+
+    print("\nAll tests passed! Output schemas are ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_output_schemas()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+Test script for the analysis step pipeline
+"""
+
+import asyncio
+import os
+import sys
+import django
+import pytest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from django.test.runner import DiscoverRunner
+
+from apps.fact_checker.models import AnalysisStep, FactCheckSession
+from apps.fact_checker.services.pipeline import Node, Pipeline, StepDeferred
+
+
+def test_pipeline():
+    """Test dependency ordering, concurrency and failure handling"""
+    print("Testing analysis step pipeline...")
+
+    # Nodes without step numbers have no AnalysisStep rows, so nothing touches the database
+    session = FactCheckSession(user_input="Test claim")
+
+    async def run():
+        # Test independent nodes run concurrently and results flow to dependents
+        events = []
+
+        def step(name, delay=0.1, result=None):
+            async def run_step(**inputs):
+                events.append(('start', name))
+                await asyncio.sleep(delay)
+                events.append(('end', name))
+                return result if result is not None else {'name': name, 'inputs': sorted(inputs)}
+            return run_step
+
+        pipeline = Pipeline([
+            Node('conclusion', step('conclusion'), inputs={'a': 'explore', 'b': 'evaluate'}),
+            Node('explore', step('explore'), inputs={'initial': 'search'}, required=False),
+            Node('evaluate', step('evaluate'), inputs={'initial': 'search'}, required=False),
+            Node('search', step('search')),
+        ])
+        assert pipeline.order.index('search') < pipeline.order.index('explore') < pipeline.order.index('conclusion')
+
+        loop = asyncio.get_running_loop()
+        began = loop.time()
+        result = await pipeline.run(session)
+        elapsed = loop.time() - began
+        assert result.failed is None
+        assert result.results['conclusion'] == {'name': 'conclusion', 'inputs': ['a', 'b']}
+        assert set(result.status.values()) == {'completed'}
+        # explore and evaluate overlap, so three rounds rather than four
+        assert events.index(('start', 'evaluate')) < events.index(('end', 'explore'))
+        assert elapsed < 0.38, elapsed
+        print(f"✓ Independent nodes ran concurrently ({elapsed:.2f}s)")
+
+        # Test a failed optional node passes its error on
+        pipeline = Pipeline([
+            Node('search', step('search')),
+            Node('explore', step('explore', result={'error': 'timed out'}), inputs={'initial': 'search'}, required=False),
+            Node('conclusion', lambda explore: asyncio.sleep(0, result={'explore': explore}), inputs={'explore': 'explore'}),
+        ])
+        result = await pipeline.run(session)
+        assert result.failed is None and result.status['explore'] == 'failed'
+        assert result.results['conclusion'] == {'explore': {'error': 'timed out'}}
+        print("✓ Optional node failure passed on to dependents")
+
+        # Test a skip policy resolves nodes without running them
+        events.clear()
+        pipeline = Pipeline([
+            Node('search', step('search', result={'settled': True})),
+            Node('explore', step('explore'), inputs={'initial': 'search'}, skip=lambda initial: "already settled" if initial['settled'] else None),
+            Node('conclusion', lambda explore: asyncio.sleep(0, result={'explore': explore}), inputs={'explore': 'explore'}),
+        ])
+        result = await pipeline.run(session)
+        assert result.failed is None and result.status['explore'] == 'skipped'
+        assert ('start', 'explore') not in events
+        assert result.results['conclusion'] == {'explore': {'skipped': True, 'reason': 'already settled'}}
+        print("✓ Skipped node passed its reason on to dependents")
+
+        # Test a failed required node stops the run and cancels running nodes
+        events.clear()
+
+        async def broken(**inputs):
+            raise RuntimeError("model unavailable")
+
+        pipeline = Pipeline([
+            Node('search', broken),
+            Node('slow', step('slow', delay=5)),
+            Node('conclusion', step('conclusion'), inputs={'initial': 'search'}),
+        ])
+        began = loop.time()
+        result = await pipeline.run(session)
+        assert result.failed == 'search' and result.error_result == {'error': 'model unavailable'}
+        assert result.status == {'search': 'failed', 'slow': 'failed', 'conclusion': 'failed'}
+        assert ('start', 'conclusion') not in events and ('end', 'slow') not in events
+        assert loop.time() - began < 1
+        print("✓ Required node failure stopped the run")
+
+        # Test a deferred node stops its branch without failing the run
+        events.clear()
+
+        async def waiting(**inputs):
+            raise StepDeferred("background response queued")
+
+        pipeline = Pipeline([
+            Node('search', step('search')),
+            Node('report', waiting, inputs={'initial': 'search'}),
+            Node('publish', step('publish'), inputs={'report': 'report'}),
+        ])
+        result = await pipeline.run(session)
+        assert result.failed is None and result.deferred == ['report']
+        assert result.status == {'search': 'completed', 'report': 'deferred'}
+        assert ('start', 'publish') not in events
+        print("✓ Deferred node left its dependents for a later run")
+
+    asyncio.run(run())
+
+    # Test invalid graphs are rejected
+    async def noop():
+        return {}
+
+    for nodes, message in [
+        ([Node('a', noop), Node('a', noop)], "Duplicate"),
+        ([Node('a', noop, inputs={'x': 'missing'})], "unknown"),
+        ([Node('a', noop, inputs={'x': 'b'}), Node('b', noop, inputs={'x': 'a'})], "cycle"),
+    ]:
+        try:
+            Pipeline(nodes)
+            assert False, f"Expected a {message} error"
+        except ValueError as e:
+            assert message in str(e)
+    print("✓ Invalid graphs rejected")
+
+    print("\nAll tests passed! The analysis step pipeline is ready to use.")
+    return True
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pipeline_checkpoints():
+    """Test resuming a run from the completed rows of an interrupted one"""
+    print("Testing pipeline checkpoints...")
+    events = []
+
+    def step(name, result=None):
+        async def run_step(step, **inputs):
+            events.append(name)
+            return result or {'name': name}
+        return run_step
+
+    def build(restore=None):
+        return Pipeline([
+            Node('search', step('search'), step_number=1, step_type='initial_web_search', restore=restore),
+            Node('explore', step('explore'), inputs={'initial': 'search'}, step_number=2, step_type='deeper_exploration'),
+            Node('conclusion', step('conclusion'), inputs={'explore': 'explore'}, step_number=3, step_type='final_conclusion'),
+        ])
+
+    def interrupted_session(rows):
+        session = FactCheckSession.objects.create(user_input="Test claim", status='analyzing')
+        for step_number, (step_type, status, result_data) in rows.items():
+            AnalysisStep.objects.create(
+                session=session, step_number=step_number, step_type=step_type,
+                description=step_type, status=status, result_data=result_data
+            )
+        return session
+
+    # Test completed rows are restored instead of run again
+    session = interrupted_session({
+        1: ('initial_web_search', 'completed', {'name': 'search', 'stored': True}),
+        2: ('deeper_exploration', 'in_progress', {}),
+    })
+    run = asyncio.run(build().run(session))
+    assert run.failed is None and run.resumed == ['search'] and events == ['explore', 'conclusion']
+    assert run.results['search'] == {'name': 'search', 'stored': True}
+    assert set(session.analysis_steps.values_list('status', flat=True)) == {'completed'}
+    print("✓ Completed rows restored, not re-run")
+
+    # Test a completed row whose input runs again is reset and recomputed
+    events.clear()
+    session = interrupted_session({
+        1: ('initial_web_search', 'failed', {}),
+        2: ('deeper_exploration', 'completed', {'name': 'explore', 'stale': True}),
+    })
+    steps, checkpoints = build()._prepare_steps(session)
+    assert not checkpoints and steps['explore'].status == 'pending' and steps['explore'].result_data == {}
+    run = asyncio.run(build().run(session))
+    assert not run.resumed and events == ['search', 'explore', 'conclusion']
+    assert session.analysis_steps.get(step_number=2).result_data == {'name': 'explore'}
+    print("✓ Row computed from a re-run input reset to pending")
+
+    # Test a restore hook that raises makes the step run again
+    events.clear()
+    session = interrupted_session({1: ('initial_web_search', 'completed', {'unexpected': 'shape'})})
+
+    def broken_restore(result_data):
+        raise KeyError('name')
+
+    run = asyncio.run(build(restore=broken_restore).run(session))
+    assert not run.resumed and events == ['search', 'explore', 'conclusion']
+    assert session.analysis_steps.get(step_number=1).result_data == {'name': 'search'}
+    print("✓ Unrestorable checkpoint run again")
+
+    print("\nAll tests passed! Pipeline checkpoints are ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_pipeline()
+    # pytest-django provides the test database under pytest
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        test_pipeline_checkpoints()
+    finally:
+        runner.teardown_databases(old_config)
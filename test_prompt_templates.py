@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Test script for the prompt template registry
+"""
+
+import os
+import sys
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from apps.fact_checker.services.prompt_templates import (
+    FACT_CHECK_FINAL_CONCLUSION, FACT_CHECK_INITIAL_SEARCH, TEMPLATES, PromptTemplate, get_template, register,
+)
+
+
+def test_prompt_templates():
+    """Test rendering, prefix stability and the registry"""
+    print("Testing prompt templates...")
+
+    # Test static instructions come first and variable data last
+    first = FACT_CHECK_INITIAL_SEARCH.render(user_input="Water is wet")
+    second = FACT_CHECK_INITIAL_SEARCH.render(user_input="水是湿的")
+    assert first.startswith(FACT_CHECK_INITIAL_SEARCH.prefix) and second.startswith(FACT_CHECK_INITIAL_SEARCH.prefix)
+    assert first.endswith("Claim:\nWater is wet")
+    assert not FACT_CHECK_INITIAL_SEARCH.prefix.startswith(" ")
+    print("✓ Calls of a template share their static prefix")
+
+    # Test every template keeps variables out of its instructions
+    for template in TEMPLATES.values():
+        assert "{" not in template.prefix, template.key
+        values = {variable: f"<{variable}>" for _, variable in template.sections}
+        rendered = template.render(**values)
+        assert rendered.index(template.prefix) == 0
+        assert all(rendered.index(value) > len(template.prefix) for value in values.values())
+    print(f"✓ {len(TEMPLATES)} templates render with variables last")
+
+    # Test a missing variable is an error, not a silently empty section
+    try:
+        FACT_CHECK_FINAL_CONCLUSION.render(user_input="x", context="y")
+        assert False, "missing variable accepted"
+    except KeyError as e:
+        assert "research_note" in str(e)
+    print("✓ Missing variables rejected")
+
+    # Test versioned keys and the registry
+    assert FACT_CHECK_INITIAL_SEARCH.key == "fact_check.initial_search.v1"
+    assert get_template("research.final_report").key == "research.final_report.v1"
+    try:
+        register(PromptTemplate("fact_check.initial_search", 2, "New instructions", []))
+        assert False, "duplicate template registered"
+    except ValueError:
+        pass
+    print("✓ Registry keys templates by name and version")
+
+    print("\nAll tests passed! Prompt templates are ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_prompt_templates()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Test script for the shared OpenAI rate limiter
+"""
+
+import asyncio
+import os
+import sys
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from apps.fact_checker.services.context_projection import count_tokens
+from apps.fact_checker.services.rate_limiter import IMAGE_TOKEN_ESTIMATE, RateLimiter, estimate_request_tokens
+
+
+def test_rate_limiter():
+    """Test token estimates, limit lookup and degraded operation"""
+    print("Testing rate limiter...")
+
+    # Test Responses API estimate: prompt text, image and default output allowance
+    prompt = "Is the moon made of cheese? " * 20
+    request = {
+        "model": "o4-mini",
+        "input": [{
+            "role": "user",
+            "content": [
+                {"type": "input_text", "text": prompt},
+                {"type": "input_image", "image_url": "data:image/jpeg;base64,AAAA"},
+            ],
+        }],
+    }
+    assert estimate_request_tokens(request) == count_tokens(prompt) + IMAGE_TOKEN_ESTIMATE + 4000
+    print("✓ Responses API request estimated")
+
+    # Test Chat Completions estimate uses max_tokens
+    request = {"model": "gpt-4.1-mini", "messages": [{"role": "user", "content": prompt}], "max_tokens": 100}
+    assert estimate_request_tokens(request) == count_tokens(prompt) + 100
+    print("✓ Chat Completions request estimated")
+
+    # Test limit lookup, including dated snapshots and unknown models
+    limiter = RateLimiter("redis://127.0.0.1:1/0")
+    limiter.limits = {"o4-mini": {"rpm": 10, "tpm": 1000}}
+    assert limiter.get_limits("o4-mini") == {"rpm": 10, "tpm": 1000}
+    assert limiter.get_limits("o4-mini-2025-04-16") == {"rpm": 10, "tpm": 1000}
+    assert limiter.get_limits("gpt-4.1-mini") is None
+    print("✓ Limits looked up per model")
+
+    # Test that an unreachable Redis never blocks or fails the call
+    async def acquire_without_redis():
+        waited = await limiter.acquire("o4-mini", 500)
+        assert waited < 5000
+        # Backed off: later calls skip Redis entirely
+        assert await limiter.acquire("o4-mini", 500) == 0
+        await limiter.settle("o4-mini", 500, 700)
+
+    asyncio.run(acquire_without_redis())
+    print("✓ Calls proceed when Redis is unavailable")
+
+    print("\nAll tests passed! Rate limiter is ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_rate_limiter()
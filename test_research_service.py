@@ -16,6 +16,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
 django.setup()
 
 from apps.fact_checker.services.chatgpt_shallow_analysis_service import ChatGPTResearchService
+from apps.fact_checker.services.output_schemas import ResearchUnderstanding, parse_output
 
 def test_research_service():
     """Test the ChatGPTResearchService"""
@@ -29,16 +30,10 @@ def test_research_service():
     # Test utility methods
     print("\nTesting utility methods...")
     
-    # Test JSON cleaning
-    test_json = '''```json
-    {"test": "value"}
-    ```'''
-    cleaned = service._clean_json_response(test_json)
-    print(f"✓ JSON cleaning works: {cleaned}")
-    
-    # Test fallback response
-    fallback = service._create_research_fallback_response(1, "Test response", [])
-    print(f"✓ Fallback response created for step 1: {fallback.get('research_question', 'Not found')}")
+    # Test research step output validation
+    response = '{"research_question": "q", "question_type": "general", "research_scope": "focused", "key_concepts": [], "search_strategy": "s", "initial_understanding": "u", "research_areas": [], "methodology_suggestions": [], "expected_outcomes": []}'
+    result = parse_output(ResearchUnderstanding, response)
+    print(f"✓ Step 1 output validated: {result.get('research_question', 'Not found')}")
     
     print("\nAll tests passed! The research service is ready to use.")
     return True
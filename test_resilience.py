@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+Test script for retries, hedging and circuit breaking of LLM calls
+"""
+
+import asyncio
+import os
+import sys
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+import httpx
+import openai
+from django.test import override_settings
+
+from apps.fact_checker.services import resilience
+from apps.fact_checker.services.resilience import CircuitBreaker, call_with_resilience
+
+
+def server_error(status_code: int = 503) -> openai.APIStatusError:
+    request = httpx.Request('POST', 'https://api.openai.com/v1/responses')
+    return openai.APIStatusError("error", response=httpx.Response(status_code, request=request), body=None)
+
+
+def reset_state():
+    resilience._breakers.clear()
+    resilience._latencies.samples.clear()
+
+
+@override_settings(
+    OPENAI_MAX_RETRIES=2,
+    LLM_RETRY_BASE_DELAY=0.001,
+    LLM_RETRY_MAX_DELAY=0.01,
+    LLM_HEDGING_ENABLED=True,
+    LLM_HEDGE_PERCENTILE=95,
+    LLM_HEDGE_MIN_SAMPLES=5,
+    LLM_CIRCUIT_FAILURE_THRESHOLD=3,
+    LLM_CIRCUIT_RESET_TIMEOUT=60,
+    LLM_FALLBACK_MODELS={'o4-mini': 'gpt-4.1'},
+)
+def test_resilience():
+    """Test retry, hedging and circuit breaker behavior"""
+    print("Testing LLM call resilience...")
+
+    async def run():
+        # Test transient errors are retried
+        reset_state()
+        calls = []
+
+        async def flaky(request):
+            calls.append(request['model'])
+            if len(calls) < 3:
+                raise server_error(503)
+            return 'ok'
+
+        stats = {}
+        assert await call_with_resilience(flaky, {'model': 'o4-mini'}, stats) == 'ok'
+        assert calls == ['o4-mini'] * 3 and stats['retries'] == 2 and stats['model'] == 'o4-mini'
+        print("✓ Transient errors retried")
+
+        # Test client errors are not retried
+        reset_state()
+        calls.clear()
+
+        async def bad_request(request):
+            calls.append(request['model'])
+            raise server_error(400)
+
+        try:
+            await call_with_resilience(bad_request, {'model': 'o4-mini'})
+            assert False, "Expected the 400 to be raised"
+        except openai.APIStatusError as e:
+            assert e.status_code == 400
+        assert len(calls) == 1
+        print("✓ Client errors raised without retrying")
+
+        # Test the circuit opens and calls go to the fallback model
+        reset_state()
+        calls.clear()
+
+        async def primary_down(request):
+            calls.append(request['model'])
+            if request['model'] == 'o4-mini':
+                raise server_error(500)
+            return f"answer from {request['model']}"
+
+        stats = {}
+        assert await call_with_resilience(primary_down, {'model': 'o4-mini'}, stats) == 'answer from gpt-4.1'
+        assert calls == ['o4-mini'] * 3 + ['gpt-4.1'] and stats['model'] == 'gpt-4.1'
+        assert resilience.get_circuit_breaker('o4-mini').state == 'open'
+
+        # While open, the primary is skipped entirely
+        calls.clear()
+        assert await call_with_resilience(primary_down, {'model': 'o4-mini'}) == 'answer from gpt-4.1'
+        assert calls == ['gpt-4.1']
+        print("✓ Circuit opened and fallback model used")
+
+        # Test a slow call is hedged and the faster duplicate wins
+        reset_state()
+        for _ in range(5):
+            resilience._latencies.record('o4-mini', 0.02)
+        started = []
+
+        async def slow_first(request):
+            started.append(True)
+            await asyncio.sleep(5 if len(started) == 1 else 0.01)
+            return f"attempt {len(started)}"
+
+        stats = {}
+        loop = asyncio.get_running_loop()
+        began = loop.time()
+        assert await call_with_resilience(slow_first, {'model': 'o4-mini'}, stats) == 'attempt 2'
+        assert stats['hedged'] is True and loop.time() - began < 1
+        print("✓ Slow call hedged")
+
+        # Test streams stop retrying once text was sent
+        reset_state()
+        calls.clear()
+
+        async def broken_stream(request):
+            calls.append(request['model'])
+            raise server_error(502)
+
+        try:
+            await call_with_resilience(broken_stream, {'model': 'o4-mini'}, hedge=False, can_retry=lambda: False)
+            assert False, "Expected the 502 to be raised"
+        except openai.APIStatusError:
+            pass
+        assert calls == ['o4-mini']
+        print("✓ Streams not retried after emitting text")
+
+    asyncio.run(run())
+
+    # Test half-open trial closes the circuit again
+    breaker = CircuitBreaker('o4-mini', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow()
+    print("✓ Circuit recovers after a successful trial")
+
+    # Test a cancelled half-open trial neither counts as a failure nor blocks the next trial
+    async def cancel_trial():
+        reset_state()
+        breaker = resilience.get_circuit_breaker('o4-mini')
+        breaker.reset_timeout = 0
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        failures = breaker.failures
+
+        async def slow(request):
+            await asyncio.sleep(5)
+            return 'late'
+
+        task = asyncio.create_task(call_with_resilience(slow, {'model': 'o4-mini'}, hedge=False))
+        await asyncio.sleep(0.01)
+        assert breaker.trial_in_flight
+        task.cancel()
+        try:
+            await task
+            assert False, "Expected the cancellation to propagate"
+        except asyncio.CancelledError:
+            pass
+        assert not breaker.trial_in_flight and breaker.failures == failures
+
+        async def answer(request):
+            return 'ok'
+        assert await call_with_resilience(answer, {'model': 'o4-mini'}, hedge=False) == 'ok'
+        assert breaker.state == 'closed'
+
+    asyncio.run(cancel_trial())
+    print("✓ Cancelled trial releases the half-open circuit")
+
+    print("\nAll tests passed! LLM call resilience is ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_resilience()
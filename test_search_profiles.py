@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Test script for per-step web search profiles
+"""
+
+import os
+import sys
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from django.test import override_settings
+
+from apps.fact_checker.services.model_router import ModelRouter
+from apps.fact_checker.services.search_profiles import resolve_search, web_search_tool
+
+ROUTES = {
+    'fast': {'model': 'gpt-4.1-mini', 'search_depth': -1, 'typical_seconds': 10},
+    'standard': {'model': 'o4-mini', 'search_depth': 0, 'typical_seconds': 35},
+    'thorough': {'model': 'o4-mini', 'search_depth': 1, 'typical_seconds': 60},
+}
+PROFILES = {
+    'fact_check': {
+        'deeper_exploration': 'high',
+        'source_credibility_evaluation': 'low',
+    },
+    'research': {
+        'general_research': 'high',
+    },
+}
+LOCATION = {'country': 'US', 'city': '', 'region': '', 'timezone': 'America/New_York'}
+
+
+@override_settings(
+    MODEL_ROUTING_ENABLED=True, MODEL_ROUTES=ROUTES, WEB_SEARCH_PROFILES=PROFILES,
+    WEB_SEARCH_CONTEXT_SIZE='medium', WEB_SEARCH_USER_LOCATION=LOCATION,
+)
+def test_search_profiles():
+    """Test profile sizes, tier depth, request overrides and the search tool"""
+    print("Testing web search profiles...")
+
+    # Test steps use their mode's profile, falling back to WEB_SEARCH_CONTEXT_SIZE
+    assert resolve_search('fact_check', 'deeper_exploration')['search_context_size'] == 'high'
+    assert resolve_search('fact_check', 'source_credibility_evaluation')['search_context_size'] == 'low'
+    assert resolve_search('fact_check', 'initial_web_search')['search_context_size'] == 'medium'
+    assert resolve_search('research', 'general_research')['search_context_size'] == 'high'
+    assert resolve_search('research', 'deeper_exploration')['search_context_size'] == 'medium'
+    print("✓ Per-mode step profiles applied")
+
+    # Test the routing tier moves the profile's size within low..high
+    assert resolve_search('fact_check', 'deeper_exploration', -1)['search_context_size'] == 'medium'
+    assert resolve_search('fact_check', 'deeper_exploration', 1)['search_context_size'] == 'high'
+    assert resolve_search('fact_check', 'source_credibility_evaluation', -1)['search_context_size'] == 'low'
+    router = ModelRouter('s1', "Water is wet")
+    assert router.route('deeper_exploration', steps_left=2)['search_context_size'] == 'medium'
+    assert router.route('source_credibility_evaluation', steps_left=2)['search_context_size'] == 'low'
+    print("✓ Routing tier adjusts search depth")
+
+    # Test per-request overrides replace the profile and merge the location
+    options = {'search_context_size': 'high', 'user_location': {'country': 'GB', 'city': 'London', 'timezone': 'Europe/London'}}
+    router = ModelRouter('s2', "Water is wet", search_options=options)
+    route = router.route('source_credibility_evaluation', steps_left=2)
+    assert route['search_context_size'] == 'high'
+    assert route['user_location'] == {'type': 'approximate', 'country': 'GB', 'city': 'London', 'timezone': 'Europe/London'}
+    # A partial location replaces the configured one rather than mixing with it
+    located = ModelRouter('s3', "Water is wet", search_options={'user_location': {'country': 'FR'}}).route('initial_web_search')
+    assert located['user_location'] == {'type': 'approximate', 'country': 'FR'}
+    print("✓ Request overrides applied")
+
+    # Test the tool definition carries the context size and location
+    tool = web_search_tool(route)
+    assert tool == {'type': 'web_search_preview', 'search_context_size': 'high', 'user_location': route['user_location']}
+    tool = web_search_tool()
+    assert tool['search_context_size'] == 'medium' and tool['user_location']['country'] == 'US'
+    with override_settings(WEB_SEARCH_USER_LOCATION={'country': ''}):
+        assert 'user_location' not in web_search_tool()
+    print("✓ Web search tool built")
+
+    # Test profiles still apply when model routing is off
+    with override_settings(MODEL_ROUTING_ENABLED=False):
+        route = ModelRouter('s4', "Water is wet").route('deeper_exploration')
+        assert route['model'] is None and route['search_context_size'] == 'high'
+    print("✓ Profiles apply without model routing")
+
+    print("\nAll tests passed! Web search profiles are ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_search_profiles()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Test script for per-session deadlines and budgets
+"""
+
+import os
+import sys
+import asyncio
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from django.test import override_settings
+
+from apps.fact_checker.services.chatgpt_shallow_analysis_service import ChatGPTResearchService
+from apps.fact_checker.services.chatgpt_web_search_service import ChatGPTWebSearchService
+from apps.fact_checker.services.session_budget import BudgetExceeded, SessionBudget, within_deadline
+
+
+@override_settings(SESSION_BUDGET_LOW_FRACTION=0.25)
+def test_session_budget():
+    """Test budget limits, the skip policy, deadlines and partial results"""
+    print("Testing session budgets...")
+
+    # Test 0 leaves a limit off
+    budget = SessionBudget(deadline=0, max_tokens=0, max_web_search_calls=0, tokens_used=10 ** 9)
+    assert budget.exceeded() is None and budget.low() is None and budget.remaining_seconds() is None
+    budget.check()
+    print("✓ Unset limits never run out")
+
+    # Test usage is recorded and limits trip in turn
+    budget = SessionBudget(max_tokens=1000, max_web_search_calls=4)
+    budget.record({'input_tokens': 500, 'output_tokens': 100, 'web_search_calls': 1})
+    assert budget.low() is None and budget.skip_reason(step1_result={}) is None
+    budget.record({'input_tokens': 200, 'output_tokens': 0, 'web_search_calls': 1})
+    assert '200 of 1000 tokens left' in budget.low()
+    assert budget.skip_reason(step1_result={}).startswith('the session budget is running out')
+    budget.record({'input_tokens': 200, 'output_tokens': 0, 'web_search_calls': 0})
+    assert '1000 of 1000 session tokens' in budget.exceeded()
+    assert 'web searches' in SessionBudget(max_web_search_calls=4, web_search_calls=4).exceeded()
+    try:
+        budget.check()
+        assert False, "check() should raise once the budget is exceeded"
+    except BudgetExceeded:
+        pass
+    print("✓ Token and web search limits go low, then exceeded")
+
+    # Test the deadline
+    budget = SessionBudget(deadline=10)
+    budget.started -= 8
+    assert 'time left' in budget.low() and budget.exceeded() is None
+    budget.started -= 3
+    assert 'deadline passed' in budget.exceeded()
+    assert budget.snapshot()['exceeded']
+    print("✓ Deadline tracked")
+
+    # Test a call is cut off at the step's timeout, and not started without time left
+    async def slow_call():
+        await asyncio.sleep(5)
+        return 'late'
+
+    async def run():
+        assert await within_deadline(asyncio.sleep(0, result='ok'), None) == 'ok'
+        assert await within_deadline(asyncio.sleep(0, result='ok'), 1) == 'ok'
+        for timeout in (0.05, 0):
+            try:
+                await within_deadline(slow_call(), timeout)
+                assert False, "the call should be cut off"
+            except BudgetExceeded:
+                pass
+
+    asyncio.run(run())
+    print("✓ Calls bounded by the deadline")
+
+    # Test the final steps fall back to partial results
+    step1 = {'preliminary_assessment': 'Reports broadly support the claim.', 'areas_needing_deeper_research': ['dates'], 'search_strategy': 'news'}
+    skipped = {'skipped': True, 'reason': 'the session budget is running out'}
+    conclusion = ChatGPTWebSearchService()._partial_conclusion('Session budget exceeded: the 300s session deadline passed', step1, skipped, skipped)
+    assert conclusion['partial'] and conclusion['verdict']['classification'] == 'uncertain'
+    assert 'stopped early because the 300s session deadline passed' in conclusion['verdict']['summary']
+    assert 'initial search' in conclusion['methodology_summary']['sources_consulted']
+    report = ChatGPTResearchService()._partial_report(
+        'Session budget exceeded: no time left for this step',
+        {'research_question': 'Why?'}, {'topic_overview': 'An overview.', 'key_information': ['fact']}, skipped
+    )
+    markdown = report['research_report']['markdown_content']
+    assert report['partial'] and '## Research Question' in markdown and '- fact' in markdown
+    print("✓ Partial conclusion and report built from finished steps")
+
+    print("\nAll tests passed! Session budgets are ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_session_budget()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+"""
+Test script for single-flight analysis of identical claims and the stale-session sweeper
+"""
+
+import os
+import sys
+from datetime import timedelta
+from unittest import mock
+import django
+import pytest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.utils import timezone
+
+from apps.fact_checker import tasks
+from apps.fact_checker.models import AnalysisStep, FactCheckSession
+from apps.fact_checker.services import single_flight_service
+from apps.fact_checker.services.single_flight_service import SingleFlightService
+
+
+class FakeRedis:
+    """In-memory stand-in for the commands the single-flight service uses"""
+
+    def __init__(self):
+        self.values = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def eval(self, script, numkeys, key, session_id, *args):
+        if self.values.get(key) != session_id:
+            return 0
+        if script == single_flight_service._RELEASE_SCRIPT:
+            del self.values[key]
+        return 1
+
+
+class CeleryCalls:
+    """Records the tasks queued by the task under test instead of sending them"""
+
+    def __init__(self):
+        self.calls = []
+        self.patches = [
+            mock.patch.object(tasks.perform_fact_check_task, 'delay', self.recorder('perform')),
+            mock.patch.object(tasks.resume_fact_check_task, 'delay', self.recorder('resume')),
+            mock.patch.object(tasks.mirror_leader_session_task, 'delay', self.recorder('mirror')),
+            mock.patch.object(tasks.mirror_leader_session_task, 'apply_async', self.recorder('mirror_later')),
+            mock.patch.object(tasks.send_progress_update, 'delay', self.recorder('progress')),
+            mock.patch.object(tasks.send_websocket_update, 'delay', self.recorder('websocket')),
+        ]
+
+    def recorder(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, kwargs.get('args', args)))
+        return record
+
+    def named(self, name):
+        return [args for call, args in self.calls if call == name]
+
+    def __enter__(self):
+        for patch in self.patches:
+            patch.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        for patch in self.patches:
+            patch.stop()
+
+
+def create_session(fingerprint, status='analyzing'):
+    return FactCheckSession.objects.create(
+        user_input="The Eiffel Tower was completed in 1889", mode='fact_check',
+        claim_fingerprint=fingerprint, status=status
+    )
+
+
+@pytest.mark.django_db
+@override_settings(SINGLE_FLIGHT_ENABLED=True, SINGLE_FLIGHT_LOCK_TTL=60, SINGLE_FLIGHT_RESULT_TTL=600)
+def test_single_flight():
+    """Test leader election, mirroring and takeover by followers"""
+    print("Testing single-flight...")
+    redis = FakeRedis()
+    single_flight_service._redis_client = redis
+
+    try:
+        single_flight = SingleFlightService()
+
+        # Test a second session for the same claim follows the first
+        leader = create_session('claim-a')
+        follower = create_session('claim-a', status='pending')
+        assert single_flight.acquire('claim-a', str(leader.session_id)) == str(leader.session_id)
+        assert single_flight.acquire('claim-a', str(follower.session_id)) == str(leader.session_id)
+        assert single_flight.acquire('claim-b', str(follower.session_id)) == str(follower.session_id)
+        single_flight.release('claim-a', str(follower.session_id))
+        assert single_flight.get_leader('claim-a') == str(leader.session_id)
+        with CeleryCalls() as celery, override_settings(USE_WEB_SEARCH=True):
+            result = tasks.perform_fact_check_task(str(follower.session_id))
+        assert result['following'] == str(leader.session_id)
+        assert celery.named('mirror') == [(str(follower.session_id), str(leader.session_id))]
+        follower.refresh_from_db()
+        assert follower.status == 'analyzing'
+        print("✓ Second session for a claim becomes a follower")
+
+        # Test a running leader's steps are mirrored and the follower keeps waiting
+        AnalysisStep.objects.create(
+            session=leader, step_number=1, step_type='initial_web_search',
+            description='Initial search', status='completed', result_data={'claim_type': 'historical_fact'}
+        )
+        with CeleryCalls() as celery:
+            tasks.mirror_leader_session_task(str(follower.session_id), str(leader.session_id))
+        assert follower.analysis_steps.get(step_number=1).result_data == {'claim_type': 'historical_fact'}
+        assert celery.named('progress') and celery.named('mirror_later') == [[str(follower.session_id), str(leader.session_id)]]
+        print("✓ Running leader mirrored step by step")
+
+        # Test a follower of a long-running leader is not swept up as stale
+        stale = timezone.now() - timedelta(hours=2)
+        FactCheckSession.objects.filter(pk__in=[leader.pk, follower.pk]).update(updated_at=stale)
+        with CeleryCalls() as celery, override_settings(ANALYSIS_STALE_AFTER=1200):
+            tasks.mirror_leader_session_task(str(follower.session_id), str(leader.session_id))
+            FactCheckSession.objects.filter(pk=leader.pk).update(updated_at=timezone.now())
+            tasks.requeue_stale_sessions()
+        follower.refresh_from_db()
+        assert not celery.named('resume') and follower.status == 'analyzing' and follower.resume_count == 0
+        print("✓ Mirroring keeps the follower fresh for the stale-session sweeper")
+
+        # Test a transient error reschedules the mirror pass instead of ending the chain
+        with CeleryCalls() as celery, mock.patch.object(SingleFlightService, 'get_leader', side_effect=ConnectionError("Redis went away")):
+            tasks.mirror_leader_session_task(str(follower.session_id), str(leader.session_id))
+        assert celery.named('mirror_later') == [[str(follower.session_id), str(leader.session_id)]]
+        print("✓ Mirroring retried after a transient error")
+
+        # Test a finished leader's outcome and published result reach the follower
+        leader.status, leader.final_verdict, leader.confidence_score = 'completed', 'true', 0.95
+        leader.save()
+        single_flight.publish_result(str(leader.session_id), {'success': True, 'status': 'completed', 'verdict': 'true'})
+        single_flight.release('claim-a', str(leader.session_id))
+        with CeleryCalls() as celery:
+            tasks.mirror_leader_session_task(str(follower.session_id), str(leader.session_id))
+        follower.refresh_from_db()
+        assert follower.status == 'completed' and follower.final_verdict == 'true' and follower.reused_from_id == leader.pk
+        [(session_id, event)] = celery.named('websocket')
+        assert session_id == str(follower.session_id) and event['type'] == 'analysis_complete'
+        assert event['result']['verdict'] == 'true' and event['result']['session_id'] == str(follower.session_id)
+        assert not celery.named('mirror_later')
+        print("✓ Finished leader's outcome and result copied to the follower")
+
+        # Test a leader that lost its lock without finishing is taken over
+        leader = create_session('claim-c')
+        follower = create_session('claim-c')
+        AnalysisStep.objects.create(session=follower, step_number=1, step_type='initial_web_search', description='Initial search', status='completed')
+        with CeleryCalls() as celery:
+            tasks.mirror_leader_session_task(str(follower.session_id), str(leader.session_id))
+        assert celery.named('perform') == [(str(follower.session_id),)]
+        assert not follower.analysis_steps.exists() and not celery.named('mirror_later')
+        print("✓ Follower takes over from a leader that lost its lock")
+
+        # Test a deleted leader is taken over
+        redis.set(single_flight._lock_key('claim-c'), str(leader.session_id))
+        AnalysisStep.objects.create(session=follower, step_number=1, step_type='initial_web_search', description='Initial search', status='completed')
+        leader_id = str(leader.session_id)
+        leader.delete()
+        with CeleryCalls() as celery:
+            tasks.mirror_leader_session_task(str(follower.session_id), leader_id)
+        assert celery.named('perform') == [(str(follower.session_id),)]
+        assert not follower.analysis_steps.exists()
+        print("✓ Follower takes over from a deleted leader")
+
+    finally:
+        single_flight_service._redis_client = None
+
+    print("\nAll tests passed! Single-flight is ready to use.")
+    return True
+
+
+@pytest.mark.django_db
+@override_settings(ANALYSIS_STALE_AFTER=1200, ANALYSIS_MAX_RESUMES=2)
+def test_stale_session_sweeper():
+    """Test interrupted sessions are requeued once per sweep and given up on after too many"""
+    print("Testing stale-session sweeper...")
+    stale = timezone.now() - timedelta(hours=1)
+
+    # Test a stale session is requeued once, even when two sweeps overlap
+    session = create_session(None)
+    fresh = create_session(None)
+    FactCheckSession.objects.filter(pk=session.pk).update(updated_at=stale)
+    real_filter = FactCheckSession.objects.filter
+    # The overlapping sweep read the session before the first one claimed it
+    snapshot = list(real_filter(pk=session.pk))
+
+    def overlapping_sweep(*args, **kwargs):
+        return snapshot if 'updated_at__lt' in kwargs else real_filter(*args, **kwargs)
+
+    with CeleryCalls() as celery:
+        tasks.requeue_stale_sessions()
+        with mock.patch.object(FactCheckSession.objects, 'filter', side_effect=overlapping_sweep):
+            tasks.requeue_stale_sessions()
+        tasks.requeue_stale_sessions()
+    assert celery.named('resume') == [(str(session.session_id),)]
+    session.refresh_from_db()
+    assert session.resume_count == 1 and session.status == 'analyzing' and session.updated_at > stale
+    fresh.refresh_from_db()
+    assert fresh.resume_count == 0
+    print("✓ Stale session requeued once across overlapping sweeps")
+
+    # Test a session interrupted ANALYSIS_MAX_RESUMES times is marked failed
+    FactCheckSession.objects.filter(pk=session.pk).update(updated_at=stale, resume_count=2)
+    with CeleryCalls() as celery:
+        tasks.requeue_stale_sessions()
+    session.refresh_from_db()
+    assert session.status == 'failed' and session.completed_at and not celery.named('resume')
+    [(session_id, event)] = celery.named('websocket')
+    assert session_id == str(session.session_id) and event['type'] == 'analysis_error'
+    print("✓ Session past ANALYSIS_MAX_RESUMES marked failed")
+
+    print("\nAll tests passed! The stale-session sweeper is ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    # pytest-django provides the test database under pytest
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        test_single_flight()
+        test_stale_session_sweeper()
+    finally:
+        runner.teardown_databases(old_config)
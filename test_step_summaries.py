@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Test script for the template step summarizer
+"""
+
+import os
+import sys
+import django
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'factcheck_backend.settings')
+django.setup()
+
+from apps.fact_checker.models import AnalysisStep
+from apps.fact_checker.services.step_summaries import build_step_summary, detect_language
+
+
+def test_step_summaries():
+    """Test template summaries for each step type in both languages"""
+    print("Testing template step summaries...")
+
+    # Test language detection
+    assert detect_language("The moon is made of cheese") == 'en'
+    assert detect_language("月亮是奶酪做的") == 'zh'
+    print("✓ Language detected from user input")
+
+    # Test web search steps
+    step1 = {
+        "main_topic": "Moon composition",
+        "initial_credible_sources": [
+            {"source_name": "NASA", "credibility_level": "high"},
+            {"source_name": "Blog", "credibility_level": "low"},
+        ],
+    }
+    summary = build_step_summary('initial_web_search', step1, "The moon is made of cheese")
+    assert summary == 'Identified the topic "Moon composition" and found 2 initial credible sources, 1 of them highly credible.'
+    print(f"✓ Step 1: {summary}")
+
+    step2 = {
+        "specific_evidence": [
+            {"supports_claim": "strongly_contradicts"},
+            {"supports_claim": "somewhat_supports"},
+            {"supports_claim": "neutral"},
+        ],
+        "counter_arguments": [{"argument": "x"}],
+    }
+    summary = build_step_summary('deeper_exploration', step2, "The moon is made of cheese")
+    assert "3 pieces of specific evidence (1 supporting, 1 contradicting)" in summary
+    print(f"✓ Step 2: {summary}")
+
+    step3 = {
+        "source_credibility_analysis": [{}, {}, {}],
+        "overall_source_quality": {"high_credibility_sources": 2, "questionable_sources": 1},
+        "cross_reference_analysis": {"verification_status": "well_verified"},
+    }
+    summary = build_step_summary('source_credibility_evaluation', step3, "月亮是奶酪做的")
+    assert summary == '已评估 3 个来源：2 个可信度高，1 个存疑；该说法已充分核实。'
+    print(f"✓ Step 3 (zh): {summary}")
+
+    step4 = {"verdict": {"classification": "false", "confidence_score": 0.92}}
+    summary = build_step_summary('final_conclusion', step4, "The moon is made of cheese")
+    assert summary == 'Reached a verdict of "false" with 92% confidence.'
+    print(f"✓ Step 4: {summary}")
+
+    # Test traditional verdict shape
+    summary = build_step_summary('final_verdict', {"verdict": "likely", "confidence_score": 0.7}, "x")
+    assert summary == 'Reached a verdict of "likely true" with 70% confidence.'
+    print(f"✓ Traditional verdict: {summary}")
+
+    # Every step type produces a summary, even from empty or malformed data
+    for step_type, _ in AnalysisStep.STEP_TYPES:
+        for user_input in ["claim", "说法"]:
+            assert build_step_summary(step_type, {}, user_input)
+            assert build_step_summary(step_type, {"verdict": [], "main_topic": 5}, user_input)
+    assert build_step_summary('unknown_type', {}, "claim") == 'This step has been completed.'
+    print("✓ All step types summarized in both languages")
+
+    print("\nAll tests passed! Template step summaries are ready to use.")
+    return True
+
+
+if __name__ == "__main__":
+    test_step_summaries()